@@ -33,6 +33,7 @@ separate instance of logging.Logger.
 
 import os
 import sys
+import atexit
 import logging
 import importlib
 from enum import Enum
@@ -62,6 +63,10 @@ PREFIX = "bcfplugin_"
 
 LOGFILE = "{}log.txt".format(PREFIX)
 
+CLI_ENVIRONMENT = "BCFPLUGIN_CLI"
+""" Environment variable set while the command line interface runs (see
+`__main__.py`). Worker processes started by it inherit the variable. """
+
 
 def printErr(msg):
 
@@ -136,6 +141,27 @@ def getFileHandler(fpath):
     return handler
 
 
+def isCommandLineRun():
+
+    """ Returns whether the plugin is imported by its command line interface,
+    `python -m bcfplugin`, or by one of the worker processes of it.
+
+    While `python -m` imports the package `sys.argv[0]` is "-m". Worker
+    processes are recognized by `CLI_ENVIRONMENT`.
+    """
+
+    return sys.argv[:1] == ["-m"] or os.environ.get(CLI_ENVIRONMENT) == "1"
+
+
+def deleteSessionTmp():
+
+    """ Delete the temporary directory of this process, together with the log
+    file in it """
+
+    logging.shutdown()
+    util.session.deleteTmp()
+
+
 def createLogger(name):
 
     """ Creates a new logger instance with module name = `name`.
@@ -205,9 +231,18 @@ frontend = None
 if not check_dependencies():
     raise ImportError
 
-# delete temporary artifacts
 import util
-util.deleteTmp()
+if isCommandLineRun():
+    # the plugin may be running in FreeCAD at the same time, therefore only
+    # a temporary directory of this process is used and deleted on exit
+    os.environ[CLI_ENVIRONMENT] = "1"
+    # `util` and `bcfplugin.util` are loaded as separate modules
+    util.session.persistent = False
+    sys.modules["bcfplugin.util"].session.persistent = False
+    atexit.register(deleteSessionTmp)
+else:
+    # delete temporary artifacts
+    util.deleteTmp()
 
 # create working directory
 path = util.getSystemTmp()
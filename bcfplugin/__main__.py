@@ -0,0 +1,134 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+"""
+Author: Patrick Podest
+Date: 2019-08-16
+Github: @podestplatz
+
+**** Description ****
+Command line interface of the plugin, run as `python -m bcfplugin`. It does
+not require FreeCAD. Unlike the plugin in FreeCAD it only deletes its own
+temporary directory, since another instance may be running at the same time
+(see `bcfplugin.isCommandLineRun()`).
+
+    validate [-j JOBS] PATH...
+        Validates the BCF archives PATH, and all archives found in the
+        directories PATH, against the schemas of the standard. For every
+        archive one line of JSON is printed, as soon as it was validated (see
+        `rdwr.validator`). The exit status is 1 if any archive is invalid.
+
+    export [-f jsonl|csv] [-r TYPES] [-c COLUMNS] [-o OUTPUT] FILE
+        Writes one record per topic, comment and viewpoint reference of the
+        BCF archive FILE to OUTPUT, by default to stdout (see
+        `rdwr.exporter`). TYPES and COLUMNS are comma separated lists, which
+        restrict the exported records and their columns.
+"""
+
+import sys
+import json
+import logging
+import argparse
+
+import bcfplugin.rdwr.exporter as exporter
+import bcfplugin.rdwr.validator as validator
+
+
+def validate(args):
+
+    """ Run the validate command, returns the exit status """
+
+    allValid = True
+    for result in validator.validateArchives(args.paths, args.jobs):
+        print(json.dumps(result), flush=True)
+        allValid = allValid and result["valid"]
+
+    return 0 if allValid else 1
+
+
+def export(args):
+
+    """ Run the export command, returns the exit status """
+
+    recordTypes = tuple(exporter.RECORD_COLUMNS)
+    if args.records is not None:
+        recordTypes = tuple(args.records.split(","))
+    columns = None
+    if args.columns is not None:
+        columns = args.columns.split(",")
+
+    out = sys.stdout
+    if args.output is not None:
+        out = open(args.output, "w", newline="" if args.format == "csv"
+                else None, encoding="utf-8")
+    try:
+        exporter.export(args.file, out, args.format, columns, recordTypes)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    return 0
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog="python -m bcfplugin")
+    commands = parser.add_subparsers(dest="command")
+    validateParser = commands.add_parser("validate",
+            help="validate BCF archives against the schemas")
+    validateParser.add_argument("paths", nargs="+", metavar="PATH",
+            help="BCF archive or directory containing BCF archives")
+    validateParser.add_argument("-j", "--jobs", type=int, default=None,
+            help="number of worker processes, by default one per CPU")
+    exportParser = commands.add_parser("export",
+            help="export topics, comments and viewpoints as flat records")
+    exportParser.add_argument("file", metavar="FILE", help="BCF archive")
+    exportParser.add_argument("-f", "--format", choices=exporter.FORMATS,
+            default="jsonl", help="output format, by default jsonl")
+    exportParser.add_argument("-r", "--records", metavar="TYPES",
+            help="comma separated types of records to export, out of {}".format(
+                ",".join(exporter.RECORD_COLUMNS)))
+    exportParser.add_argument("-c", "--columns",
+            help="comma separated columns to export, in this order")
+    exportParser.add_argument("-o", "--output",
+            help="file to write to, by default stdout")
+    args = parser.parse_args(argv)
+
+    # stdout is reserved for the results, the log file holds all messages
+    for handler in logging.getLogger().handlers:
+        if (isinstance(handler, logging.StreamHandler) and
+                handler.stream is sys.stdout):
+            handler.setStream(sys.stderr)
+            handler.setLevel(logging.WARNING)
+
+    if args.command == "validate":
+        if args.jobs is not None and args.jobs < 1:
+            parser.error("--jobs has to be at least 1")
+        return validate(args)
+    elif args.command == "export":
+        try:
+            return export(args)
+        except (OSError, ValueError) as exc:
+            parser.exit(1, "{}\n".format(exc))
+
+    parser.print_help()
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,570 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+"""
+Author: Patrick Podest
+Date: 2019-08-16
+Github: @podestplatz
+
+**** Description ****
+aio provides the programmaticInterface to asyncio applications. Every function
+of the programmaticInterface that works on the data model is available as
+coroutine here, operating on `defaultSession`. Further files can be opened in
+own `AsyncSession`s.
+
+Reading, writing and packing files would block the event loop, thus every
+operation that modifies the project runs on `executor`, a thread pool of
+`MAX_WORKERS` threads. At most `MAX_PENDING_WRITES` modifications of one
+session are handed to the pool at the same time, further ones wait in the
+event loop. Retrievals run directly in the event loop, as long as no
+modification holds the lock of the session; otherwise they run on the pool too.
+
+Activating viewpoints and adding the current one require FreeCAD and have to be
+called on its GUI thread, thus they are not available here.
+"""
+
+import asyncio
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from uuid import UUID
+
+import bcfplugin
+import bcfplugin.programmaticInterface as pI
+from bcfplugin.programmaticInterface import OperationResults
+from bcfplugin.rdwr.viewpoint import Viewpoint
+from bcfplugin.rdwr.topic import Topic, BimSnippet
+from bcfplugin.rdwr.markup import Comment, ViewpointReference
+
+__all__ = [ "AsyncSession", "OperationResults", "openProject", "closeProject",
+        "saveProject", "addProject", "addTopic", "addComment", "addFile",
+        "addDocumentReference", "addLabel", "addViewpointToComment",
+        "copyFileToProject", "deleteObject", "modifyComment", "modifyElement",
+        "isProjectOpen", "isProjectDirty", "getProjectName", "getTopics",
+        "getComments", "getViewpoints", "getSnapshots", "getRelevantIfcFiles",
+        "getAdditionalDocumentReferences", "getTopic", "getTopicFromUUID",
+        "hasChangedSinceOpening", "getLockMetrics"
+        ]
+
+MAX_WORKERS = 4
+""" Number of threads of `executor` """
+
+MAX_PENDING_WRITES = 8
+""" Number of modifications of one session that may be handed to `executor`
+at the same time """
+
+executor = None
+""" ThreadPoolExecutor running the blocking work, created on first use """
+
+logger = bcfplugin.createLogger(__name__)
+
+
+class _SaveCancelled(Exception):
+
+    """ Raised from the progress callback to abort a save """
+
+
+def _getExecutor():
+
+    global executor
+
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=MAX_WORKERS,
+                thread_name_prefix="bcfplugin-aio")
+    return executor
+
+
+async def _runInExecutor(function, *args):
+
+    """ Run `function(*args)` on `executor` and return its result.
+
+    If the awaiting task is cancelled before `function` started, it is not run
+    at all. Otherwise it cannot be interrupted, the cancellation takes effect
+    after `function` returned.
+    """
+
+    future = _getExecutor().submit(function, *args)
+    wrapped = asyncio.wrap_future(future)
+    try:
+        return await asyncio.shield(wrapped)
+    except asyncio.CancelledError:
+        if not future.cancel():
+            await asyncio.wait([ wrapped ])
+        raise
+
+
+class AsyncSession(object):
+
+    """ Coroutines operating on the ProjectSession `session`.
+
+    Modifications are run on `executor`, of which at most `MAX_PENDING_WRITES`
+    at the same time. Retrievals are run in the event loop if they do not
+    have to wait for the lock of `session`.
+    """
+
+    def __init__(self, session: pI.ProjectSession = None):
+
+        self.session = session if session is not None else pI.ProjectSession()
+        self.writeSlots = None
+        """ Semaphore limiting the modifications handed to `executor`. Created
+        on first use, inside the event loop. """
+
+
+    async def _write(self, function, *args):
+
+        """ Run the modification `function(*args)` on `executor` """
+
+        if self.writeSlots is None:
+            self.writeSlots = asyncio.Semaphore(MAX_PENDING_WRITES)
+
+        async with self.writeSlots:
+            return await _runInExecutor(function, *args)
+
+
+    async def _read(self, function, *args):
+
+        """ Run the retrieval `function(*args)` without leaving the event loop
+        if the data model is not locked by a modification. """
+
+        lock = self.session.lock
+        if lock.acquireRead(False):
+            try:
+                return function(*args)
+            finally:
+                lock.releaseRead()
+
+        return await _runInExecutor(function, *args)
+
+
+    async def openProject(self, bcfFile):
+
+        """ Asynchronous version of `ProjectSession.openProject()`.
+
+        If the open is cancelled while the file is read, the file is closed
+        again as soon as it was read completely. The project that was open
+        before is not restored in that case.
+        """
+
+        results = list()
+
+        def openProject():
+            results.append(self.session.openProject(bcfFile))
+            return results[0]
+
+        try:
+            return await self._write(openProject)
+        except asyncio.CancelledError:
+            if len(results) > 0 and results[0] == OperationResults.SUCCESS:
+                logger.info("Opening {} was cancelled".format(bcfFile))
+                await self._write(self.session.discardProject)
+            raise
+
+
+    async def closeProject(self):
+
+        """ Asynchronous version of `ProjectSession.discardProject()`.
+
+        Unlike `ProjectSession.closeProject()` the user is not asked whether
+        to save the changes, call `saveProject()` beforehand instead.
+        """
+
+        return await self._write(self.session.discardProject)
+
+
+    async def saveProject(self, dstFile, serialize=False):
+
+        """ Asynchronous version of `ProjectSession.saveProject()`.
+
+        The archive is written by `ProjectSession.saveProjectInBackground()`.
+        If the save is cancelled, writing is aborted at the next member and
+        `dstFile` is left untouched.
+        """
+
+        cancelled = threading.Event()
+
+        def onProgress(bytesWritten, membersWritten):
+            if cancelled.is_set():
+                raise _SaveCancelled()
+
+        future = await self._write(self.session.saveProjectInBackground,
+                dstFile, serialize, onProgress)
+        wrapped = asyncio.wrap_future(future)
+        try:
+            return await asyncio.shield(wrapped)
+        except asyncio.CancelledError:
+            logger.info("Saving to {} was cancelled".format(dstFile))
+            cancelled.set()
+            await asyncio.wait([ wrapped ])
+            raise
+
+
+    async def addProject(self, name: str, extensionSchemaUri: ""):
+
+        return await self._write(self.session.addProject, name,
+                extensionSchemaUri)
+
+
+    async def addTopic(self, title: str, author: str, type: str = "",
+            description = "", status: str = "", priority: str = "",
+            index: int = -1, labels: List[str] = list(),
+            dueDate: datetime = None, assignee: str = "", stage: str = "",
+            relatedTopics: List[UUID] = list(),
+            referenceLinks: List[str] = list(),
+            bimSnippet: BimSnippet = None):
+
+        return await self._write(self.session.addTopic, title, author, type,
+                description, status, priority, index, labels, dueDate,
+                assignee, stage, relatedTopics, referenceLinks, bimSnippet)
+
+
+    async def addComment(self, topic: Topic, text: str, author: str,
+            viewpoint: Viewpoint = None):
+
+        return await self._write(self.session.addComment, topic, text,
+                author, viewpoint)
+
+
+    async def addFile(self, topic: Topic, ifcProject: str = "",
+            ifcSpatialStructureElement: str = "", isExternal: bool = False,
+            filename: str = "", reference: str = ""):
+
+        return await self._write(self.session.addFile, topic, ifcProject,
+                ifcSpatialStructureElement, isExternal, filename, reference)
+
+
+    async def addDocumentReference(self, topic: Topic, guid: str = "",
+            isExternal: bool = False, path: str = "", description: str = ""):
+
+        return await self._write(self.session.addDocumentReference, topic,
+                guid, isExternal, path, description)
+
+
+    async def addLabel(self, topic: Topic, label: str):
+
+        return await self._write(self.session.addLabel, topic, label)
+
+
+    async def addViewpointToComment(self, comment: Comment,
+            viewpoint: ViewpointReference, author: str):
+
+        return await self._write(self.session.addViewpointToComment, comment,
+                viewpoint, author)
+
+
+    async def copyFileToProject(self, path: str, destName: str = "",
+            topic: Topic = None):
+
+        return await self._write(self.session.copyFileToProject, path,
+                destName, topic)
+
+
+    async def deleteObject(self, object):
+
+        return await self._write(self.session.deleteObject, object)
+
+
+    async def modifyComment(self, comment: Comment, newText: str, author: str):
+
+        return await self._write(self.session.modifyComment, comment, newText,
+                author)
+
+
+    async def modifyElement(self, element, author=""):
+
+        return await self._write(self.session.modifyElement, element, author)
+
+
+    async def isProjectOpen(self):
+
+        return await self._read(self.session.isProjectOpen)
+
+
+    async def isProjectDirty(self):
+
+        return await self._read(self.session.isProjectDirty)
+
+
+    async def getProjectName(self):
+
+        return await self._read(self.session.getProjectName)
+
+
+    async def getTopics(self):
+
+        return await self._read(self.session.getTopics)
+
+
+    async def getComments(self, topic: Topic, viewpoint: Viewpoint = None):
+
+        return await self._read(self.session.getComments, topic, viewpoint)
+
+
+    async def getViewpoints(self, topic: Topic, realViewpoint = True):
+
+        return await self._read(self.session.getViewpoints, topic,
+                realViewpoint)
+
+
+    async def getSnapshots(self, topic: Topic):
+
+        return await self._read(self.session.getSnapshots, topic)
+
+
+    async def getRelevantIfcFiles(self, topic: Topic):
+
+        return await self._read(self.session.getRelevantIfcFiles, topic)
+
+
+    async def getAdditionalDocumentReferences(self, topic: Topic):
+
+        return await self._read(self.session.getAdditionalDocumentReferences,
+                topic)
+
+
+    async def getTopic(self, element):
+
+        return await self._read(self.session.getTopic, element)
+
+
+    async def getTopicFromUUID(self, uid: UUID):
+
+        return await self._read(self.session.getTopicFromUUID, uid)
+
+
+    async def hasChangedSinceOpening(self, element):
+
+        return await self._read(self.session.hasChangedSinceOpening, element)
+
+
+    def getLockMetrics(self):
+
+        """ Returns how long the lock of `session` was held """
+
+        return self.session.getLockMetrics()
+
+
+defaultSession = AsyncSession(pI.defaultSession)
+""" Operates on the session of the module level functions of the
+programmaticInterface """
+
+
+async def openProject(bcfFile):
+
+    """ Wrapper for `defaultSession.openProject()` """
+
+    return await defaultSession.openProject(bcfFile)
+
+
+async def closeProject():
+
+    """ Wrapper for `defaultSession.closeProject()` """
+
+    return await defaultSession.closeProject()
+
+
+async def saveProject(dstFile, serialize=False):
+
+    """ Wrapper for `defaultSession.saveProject()` """
+
+    return await defaultSession.saveProject(dstFile, serialize)
+
+
+async def addProject(name: str, extensionSchemaUri: ""):
+
+    """ Wrapper for `defaultSession.addProject()` """
+
+    return await defaultSession.addProject(name, extensionSchemaUri)
+
+
+async def addTopic(title: str, author: str, type: str = "",
+        description = "", status: str = "", priority: str = "",
+        index: int = -1, labels: List[str] = list(),
+        dueDate: datetime = None, assignee: str = "", stage: str = "",
+        relatedTopics: List[UUID] = list(),
+        referenceLinks: List[str] = list(),
+        bimSnippet: BimSnippet = None):
+
+    """ Wrapper for `defaultSession.addTopic()` """
+
+    return await defaultSession.addTopic(title, author, type, description,
+            status, priority, index, labels, dueDate, assignee, stage,
+            relatedTopics, referenceLinks, bimSnippet)
+
+
+async def addComment(topic: Topic, text: str, author: str,
+        viewpoint: Viewpoint = None):
+
+    """ Wrapper for `defaultSession.addComment()` """
+
+    return await defaultSession.addComment(topic, text, author, viewpoint)
+
+
+async def addFile(topic: Topic, ifcProject: str = "",
+        ifcSpatialStructureElement: str = "", isExternal: bool = False,
+        filename: str = "", reference: str = ""):
+
+    """ Wrapper for `defaultSession.addFile()` """
+
+    return await defaultSession.addFile(topic, ifcProject,
+            ifcSpatialStructureElement, isExternal, filename, reference)
+
+
+async def addDocumentReference(topic: Topic, guid: str = "",
+        isExternal: bool = False, path: str = "", description: str = ""):
+
+    """ Wrapper for `defaultSession.addDocumentReference()` """
+
+    return await defaultSession.addDocumentReference(topic, guid, isExternal,
+            path, description)
+
+
+async def addLabel(topic: Topic, label: str):
+
+    """ Wrapper for `defaultSession.addLabel()` """
+
+    return await defaultSession.addLabel(topic, label)
+
+
+async def addViewpointToComment(comment: Comment,
+        viewpoint: ViewpointReference, author: str):
+
+    """ Wrapper for `defaultSession.addViewpointToComment()` """
+
+    return await defaultSession.addViewpointToComment(comment, viewpoint,
+            author)
+
+
+async def copyFileToProject(path: str, destName: str = "",
+        topic: Topic = None):
+
+    """ Wrapper for `defaultSession.copyFileToProject()` """
+
+    return await defaultSession.copyFileToProject(path, destName, topic)
+
+
+async def deleteObject(object):
+
+    """ Wrapper for `defaultSession.deleteObject()` """
+
+    return await defaultSession.deleteObject(object)
+
+
+async def modifyComment(comment: Comment, newText: str, author: str):
+
+    """ Wrapper for `defaultSession.modifyComment()` """
+
+    return await defaultSession.modifyComment(comment, newText, author)
+
+
+async def modifyElement(element, author=""):
+
+    """ Wrapper for `defaultSession.modifyElement()` """
+
+    return await defaultSession.modifyElement(element, author)
+
+
+async def isProjectOpen():
+
+    """ Wrapper for `defaultSession.isProjectOpen()` """
+
+    return await defaultSession.isProjectOpen()
+
+
+async def isProjectDirty():
+
+    """ Wrapper for `defaultSession.isProjectDirty()` """
+
+    return await defaultSession.isProjectDirty()
+
+
+async def getProjectName():
+
+    """ Wrapper for `defaultSession.getProjectName()` """
+
+    return await defaultSession.getProjectName()
+
+
+async def getTopics():
+
+    """ Wrapper for `defaultSession.getTopics()` """
+
+    return await defaultSession.getTopics()
+
+
+async def getComments(topic: Topic, viewpoint: Viewpoint = None):
+
+    """ Wrapper for `defaultSession.getComments()` """
+
+    return await defaultSession.getComments(topic, viewpoint)
+
+
+async def getViewpoints(topic: Topic, realViewpoint = True):
+
+    """ Wrapper for `defaultSession.getViewpoints()` """
+
+    return await defaultSession.getViewpoints(topic, realViewpoint)
+
+
+async def getSnapshots(topic: Topic):
+
+    """ Wrapper for `defaultSession.getSnapshots()` """
+
+    return await defaultSession.getSnapshots(topic)
+
+
+async def getRelevantIfcFiles(topic: Topic):
+
+    """ Wrapper for `defaultSession.getRelevantIfcFiles()` """
+
+    return await defaultSession.getRelevantIfcFiles(topic)
+
+
+async def getAdditionalDocumentReferences(topic: Topic):
+
+    """ Wrapper for `defaultSession.getAdditionalDocumentReferences()` """
+
+    return await defaultSession.getAdditionalDocumentReferences(topic)
+
+
+async def getTopic(element):
+
+    """ Wrapper for `defaultSession.getTopic()` """
+
+    return await defaultSession.getTopic(element)
+
+
+async def getTopicFromUUID(uid: UUID):
+
+    """ Wrapper for `defaultSession.getTopicFromUUID()` """
+
+    return await defaultSession.getTopicFromUUID(uid)
+
+
+async def hasChangedSinceOpening(element):
+
+    """ Wrapper for `defaultSession.hasChangedSinceOpening()` """
+
+    return await defaultSession.hasChangedSinceOpening(element)
+
+
+def getLockMetrics():
+
+    """ Wrapper for `defaultSession.getLockMetrics()` """
+
+    return defaultSession.getLockMetrics()
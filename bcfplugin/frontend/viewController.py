@@ -45,7 +45,7 @@ import util
 
 from rdwr.threedvector import (Point, Direction)
 from rdwr.viewpoint import (OrthogonalCamera, PerspectiveCamera, Component,
-        ComponentColour, Line, ClippingPlane)
+        ComponentColour, ComponentList, ColourGroups, Line, ClippingPlane)
 
 # it is assumed that this file is only imported iff the plugin is running inside
 # FreeCAD in Gui mode.
@@ -493,7 +493,7 @@ def colourToTuple(colour: str):
     return (rgbVal[0]/maxColVal, rgbVal[1]/maxColVal, rgbVal[2]/maxColVal)
 
 
-def colourComponents(colourings: List[ComponentColour], ifcObjects = None):
+def colourComponents(colourings: ColourGroups, ifcObjects = None):
 
     """ Set the colour of every object with a matching IfcUID.
 
@@ -517,15 +517,12 @@ def colourComponents(colourings: List[ComponentColour], ifcObjects = None):
         ifcObjects = getIfcObjects()
 
     colouringCnt = 0
-    for colouring in colourings:
-        colour = colouring.colour
+    for (colour, ifcIds) in colourings.iterGroups():
         colTuple = colourToTuple(colour)
 
-        util.printInfo("Got colour {} for components {}".format(colTuple,
-            colouring.components))
-        for component in colouring.components:
-            cIfcId = component.ifcId
-
+        util.printInfo("Got colour {} for {} components".format(colTuple,
+            len(ifcIds)))
+        for cIfcId in ifcIds:
             # colour object if it has an ifcId <=> obj \in ifcObjects
             if cIfcId in ifcObjects:
                 obj = ifcObjects[cIfcId]
@@ -540,7 +537,7 @@ def colourComponents(colourings: List[ComponentColour], ifcObjects = None):
 
 
 def applyVisibilitySettings(defaultVisibility: bool,
-        exceptions: List[Component], ifcObjects = None):
+        exceptions: ComponentList, ifcObjects = None):
 
     """ Set every object's visibility to `defaultVisibility` except for
     `exceptions`.
@@ -561,9 +558,7 @@ def applyVisibilitySettings(defaultVisibility: bool,
 
     # set visibility of exceptions, if they are found by their ifcId, to the
     # complement of `defaultVisibility`
-    for exception in exceptions:
-        excId = exception.ifcId
-
+    for excId in exceptions.ifcIds:
         if excId in ifcObjects:
             ifcObjects[excId].ViewObject.Visibility = not defaultVisibility
 
@@ -586,7 +581,7 @@ def backupSelection():
         selectionBackup = FreeCADGui.Selection.getCompleteSelection()
 
 
-def selectComponents(components: List[Component], ifcObjects = None):
+def selectComponents(components: ComponentList, ifcObjects = None):
 
     """ Selects every object that the same IfcUID as a component in `components`
 
@@ -598,15 +593,12 @@ def selectComponents(components: List[Component], ifcObjects = None):
     if ifcObjects is None:
         ifcObjects = getIfcObjects()
 
-    util.printInfo("Walking through components {} to select".format(components))
+    util.printInfo("Walking through {} components to select".format(
+        len(components)))
     selectionCnt = 0
     backupSelection()
     FreeCADGui.Selection.clearSelection()
-    for component in components:
-        ifcUID = component.ifcId
-
-        util.printInfo("Checking {} if it is in ifcObjects {}".format(ifcUID,
-            ifcObjects))
+    for ifcUID in components.ifcIds:
         if ifcUID in ifcObjects:
             FreeCADGui.Selection.addSelection(ifcObjects[ifcUID])
             selectionCnt += 1
@@ -19,7 +19,10 @@ Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 __all__ = ["openProjectBtnHandler", "getProjectName", "saveProject",
         "addTopic", "createProject", "RelatedTopicsModel", "TopicListModel",
         "SnapshotModel", "CommentModel", "ViewpointsListModel",
-        "TopicMetricsModel", "AdditionalDocumentsModel"]
+        "TopicMetricsModel", "AdditionalDocumentsModel",
+        "startBackgroundWriting", "stopBackgroundWriting"]
+
+from PySide2.QtCore import QObject, Signal, Slot
 
 from bcfplugin.gui.models.relatedtopicsmodel import RelatedTopicsModel
 from bcfplugin.gui.models.topiclistmodel import TopicListModel
@@ -32,6 +35,56 @@ from bcfplugin.gui.models.additionaldocumentsmodel import AdditionalDocumentsMod
 from bcfplugin import programmaticInterface as pI
 
 
+class UpdateDispatcher(QObject):
+
+    """ Runs the callbacks of the background writer on the GUI thread.
+
+    `dispatch` can be called from any thread, the signal `called` is then
+    delivered by the event loop of the thread the dispatcher lives in.
+    """
+
+    called = Signal(object, object)
+
+    def __init__(self):
+
+        QObject.__init__(self)
+        self.called.connect(self.call)
+
+
+    @Slot(object, object)
+    def call(self, function, args):
+
+        function(*args)
+
+
+    def dispatch(self, function, *args):
+
+        self.called.emit(function, args)
+
+
+dispatcher = None
+""" UpdateDispatcher used by the background writer """
+
+
+def startBackgroundWriting():
+
+    """ Let programmaticInterface write updates on a background thread. """
+
+    global dispatcher
+
+    dispatcher = UpdateDispatcher()
+    pI.startUpdateWorker(dispatcher.dispatch)
+
+
+def stopBackgroundWriting():
+
+    """ Finish running saves, write all pending updates and stop the
+    background thread. """
+
+    pI.waitForSaves()
+    pI.stopUpdateWorker()
+
+
 def openProjectBtnHandler(file):
 
     """ Handler of the "Open" button for a project """
@@ -46,11 +99,31 @@ def getProjectName():
     return pI.getProjectName()
 
 
-def saveProject(dstFile):
+def isProjectDirty():
+
+    """ Wrapper for programmaticInterface.isProjectDirty() """
+
+    return pI.isProjectDirty()
+
+
+def saveProject(dstFile, onProgress=None, onDone=None):
+
+    """ Wrapper for programmaticInterface.saveProjectInBackground()
+
+    `onProgress(bytesWritten, membersWritten)` and `onDone(success)` are
+    called on the GUI thread. `success` is `True` if the project was saved.
+    """
+
+    dispatch = pI.updateworker.directDispatch
+    if dispatcher is not None:
+        dispatch = dispatcher.dispatch
 
-    """ Wrapper for programmaticInterface.saveProject() """
+    def done(result):
+        if onDone is not None:
+            onDone(result == pI.OperationResults.SUCCESS)
 
-    pI.saveProject(dstFile)
+    pI.saveProjectInBackground(dstFile, onProgress=onProgress, onDone=done,
+            dispatch=dispatch)
 
 
 def addTopic(newTopic: dict):
@@ -41,7 +41,7 @@ import bcfplugin.programmaticInterface as pI
 import bcfplugin.util as util
 from bcfplugin.rdwr.topic import Topic
 from bcfplugin.rdwr.markup import Comment
-from bcfplugin.frontend.viewController import CamType
+from bcfplugin.rdwr.viewpoint import CamType
 
 logger = bcfplugin.createLogger(__name__)
 
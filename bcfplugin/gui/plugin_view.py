@@ -103,6 +103,9 @@ class MyMainWindow(QWidget):
 
         self.setObjectName(OBJECTNAME)
 
+        # write changes to file without blocking the GUI
+        model.startBackgroundWriting()
+
         self.mainLayout = QVBoxLayout()
         self.mainLayout.setObjectName("mainLayout")
         self.setWindowTitle("BCF-Plugin")
@@ -473,7 +476,28 @@ class MyMainWindow(QWidget):
         filename = QFileDialog.getSaveFileName(self, self.tr("Save BCF File"),
                 dflPath,  self.tr("BCF Files (*.bcf *.bcfzip)"))
         if filename[0] != "":
-            model.saveProject(filename[0])
+            model.saveProject(filename[0], self.showSaveProgress,
+                    self.saveDoneHandler)
+
+
+    def showSaveProgress(self, bytesWritten, membersWritten):
+
+        """ Shows the progress of a running save in the notification label """
+
+        self.notificationLabel.setText(self.tr("Saving... {} files, {} KiB"
+            " written").format(membersWritten, bytesWritten // 1024))
+        self.notificationLabel.show()
+
+
+    def saveDoneHandler(self, success):
+
+        """ Handler invoked after a save, started by `saveProjectHandler`,
+        ended. """
+
+        if not success:
+            showNotification(self, self.tr("The project could not be saved."))
+        else:
+            showNotification(self, self.tr("Project saved."))
 
 
     @Slot()
@@ -510,9 +534,10 @@ class MyMainWindow(QWidget):
         asked whether to save the project or not.
         """
 
-        if util.getDirtyBit():
+        if model.isProjectDirty():
             self.showExitSaveDialog()
 
+        model.stopBackgroundWriting()
         util.deleteTmp()
 
 
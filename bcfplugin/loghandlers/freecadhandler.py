@@ -39,8 +39,6 @@ Following the mapping is depicted:
 import logging
 from logging import Handler
 
-import FreeCAD as App
-
 
 class FreeCADHandler(Handler):
 
@@ -50,6 +48,9 @@ class FreeCADHandler(Handler):
 
     def emit(self, record):
 
+        # imported here, the plugin can be loaded without FreeCAD otherwise
+        import FreeCAD as App
+
         console = App.Console
         msg = self.format(record) + "\n"
         level = record.levelno
@@ -30,35 +30,48 @@ It fulfills two purposes:
     - providing a library for the GUI part of the plugin, to access the data
       model.
 
-Every function in here operates on `curProject`, which is the active instance
-of the data model. No object of the data model is passes to the frontend,
-rather for every retrieve operation a deepcopy of the result is created. This
-ensures that the programmaticInterface remains in full control of the data
-model at every point in time.
+Every open BCF file is represented by a `ProjectSession`, which holds the
+active instance of the data model, its working directory and its pending
+updates. Several sessions can be open at the same time. The functions in here
+operate on `defaultSession`. No object of the data model is passes to the
+frontend, rather for every retrieve operation a deepcopy of the result is
+created. This ensures that the programmaticInterface remains in full control of
+the data model at every point in time.
 """
 
+import gc
 import os
 import re
 import sys
 import copy
+import weakref
+import functools
 import pytz
 import shutil
-import inspect
 import logging
+import threading
 import datetime
 from enum import Enum
+from collections import deque
+from concurrent import futures
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import List, Tuple
 from uuid import uuid4, UUID
 
 import bcfplugin
 import bcfplugin.util as util
+import bcfplugin.rwlock as rwlock
 import bcfplugin.rdwr.reader as reader
 import bcfplugin.rdwr.writer as writer
+import bcfplugin.rdwr.journal as journal
+import bcfplugin.rdwr.updateworker as updateworker
+from bcfplugin.rdwr.undolog import UndoLog
 import bcfplugin.rdwr.project as p
 import bcfplugin.rdwr.markup as m
 from bcfplugin.rdwr.modification import (ModificationDate, ModificationAuthor,
         ModificationType)
-from bcfplugin.rdwr.viewpoint import Viewpoint, OrthogonalCamera, PerspectiveCamera
+from bcfplugin.rdwr.viewpoint import (Viewpoint, OrthogonalCamera,
+        PerspectiveCamera, CamType)
 from bcfplugin.rdwr.topic import Topic, DocumentReference, BimSnippet
 from bcfplugin.rdwr.markup import Comment, Header, HeaderFile, ViewpointReference, Markup
 from bcfplugin.rdwr.uri import Uri
@@ -66,30 +79,60 @@ from bcfplugin.rdwr.interfaces.identifiable import Identifiable
 from bcfplugin.rdwr.interfaces.hierarchy import Hierarchy
 from bcfplugin.rdwr.interfaces.state import State
 from bcfplugin.rdwr.interfaces.xmlname import XMLName
-from bcfplugin.frontend.viewController import CamType
 from bcfplugin import FREECAD, GUI
 
 __all__ = [ "CamType", "OperationResults", "deleteObject", "openProject", "closeProject",
+        "discardProject",
+        "ProjectSession", "startUpdateWorker", "stopUpdateWorker",
+        "getLockMetrics",
         "getTopics", "getComments", "getViewpoints", "openIfcFile",
         "getRelevantIfcFiles", "getAdditionalDocumentReferences",
         "activateViewpoint", "addCurrentViewpoint",
         "addComment", "addFile", "addLabel", "addDocumentReference", "addTopic",
         "copyFileToProject", "modifyComment", "modifyElement", "saveProject",
-        "getTopicFromUUID"
+        "saveProjectInBackground", "waitForSaves", "getTopicFromUUID",
+        "hasChangedSinceOpening", "isProjectDirty"
         ]
 
 utc = pytz.UTC
 """ For localized times """
 
-curProject = None
-""" This variable holds the reference to the currently active data model. """
-
 App = None
 """ Alias for the FreeCAD module """
 
 Gui = None
 """ Alias for the FreeCADGui module """
 
+saveExecutor = None
+""" Single thread running the saves started by `saveProjectInBackground()` of
+all sessions, one after the other. Created by the first such save. """
+
+stringPool = p.StringPool()
+""" String pool shared by the projects of all sessions, see
+`project.StringPool`. Emptied as soon as no session holds a project anymore.
+"""
+
+sessions = weakref.WeakSet()
+""" All sessions that were created and are still referenced """
+
+freezeModel = True
+""" If set, the data model read by `openProject()` is moved to the permanent
+generation of the garbage collector. """
+
+frozenModels = 0
+""" Number of sessions whose data model is accounted as frozen, see
+`_freezeModel()` """
+
+freezeLock = threading.Lock()
+""" Guards `frozenModels` """
+
+DEFAULT_SESSION_MEMBERS = { "curProject": "project",
+        "updateWorker": "updateWorker", "pendingBatches": "pendingBatches",
+        "openedFingerprints": "openedFingerprints",
+        "modelFrozen": "modelFrozen" }
+""" Maps the former module level names of the state of the open project to the
+members of `defaultSession` they are resolved to (see `__getattr__()`) """
+
 logger = bcfplugin.createLogger(__name__)
 
 if GUI:
@@ -110,161 +153,52 @@ class OperationResults(Enum):
     FAILURE = 2
 
 
-def _handleProjectUpdate(errMsg, backup):
-
-    """ Request for all updates to be written, and handle the results.
-
-    If the update went through successful then the backup is deleted. Otherwise
-    the current state is rolled back.
-    """
-
-    global curProject
-
-    errorenousUpdate = writer.processProjectUpdates()
-    if errorenousUpdate is not None:
-        logger.error(errMsg)
-        logger.info("Project state is reset to before the update.")
-        oldProject = curProject
-        curProject = backup
-        del oldProject
-        return OperationResults.FAILURE
-
-    del backup
-    return OperationResults.SUCCESS
-
-
-def _getCallerFileName():
+def _freezeModel():
 
-    """ Return the file name of the second to last function on the stack.
+    """ Move the data model, that was just read, out of reach of the cycle
+    collector. Returns whether the model is accounted as frozen, in which case
+    `_unfreezeModel()` has to be called once the model is dropped.
 
-    This function assumes that it is called from another function inside this
-    module.
-    For every method a new stack frame is pushed onto the stack, thus the
-    previous stack frame (gotten via `inspect.stack()[1]`) will be of the
-    function inside this module. `_getCallerFileName` now returns the file name
-    of the function that called the former.
+    Every element of the data model references its parent through
+    `containingObject`, so the model consists of reference cycles only. With a
+    large project open each full collection would traverse all of them again,
+    without ever finding garbage. Frozen objects are ignored by the collector
+    until `_unfreezeModel()` is called.
 
-    For example:
-        a() -> b() -> _getCallerFileName()
-        Returns module(a).__file__
+    `gc.freeze()` affects the whole process, so the freezes of all sessions are
+    counted. Only the first one collects and freezes, the models of sessions
+    opened while another one is frozen stay with the collector. Thereby not
+    every open runs a full collection.
     """
 
-    frame = inspect.stack()[2]
-    module = inspect.getmodule(frame[0])
-
-    return module.__file__
-
-
-def isProjectOpen():
-
-    """ Check whether a project is currently open and display an error message
-
-    Returns true if a project is currently open. False otherwise.
-    """
+    global frozenModels
 
-    if curProject is None:
+    if not freezeModel or not hasattr(gc, "freeze"):
         return False
-    return True
-
-
-def saveProject(dstFile):
-
-    """ Save the current state of the working directory to `dstfile` """
-
-    logger.info("Saving the project to {}".format(dstFile))
-    bcfRootPath = util.getBcfDir()
-    writer.zipToBcfFile(bcfRootPath, dstFile)
 
+    with freezeLock:
+        frozenModels += 1
+        if frozenModels == 1:
+            # garbage of the reader shall not be kept alive by freezing it too
+            gc.collect()
+            gc.freeze()
+            logger.debug("Froze {} object(s)".format(gc.get_freeze_count()))
 
-def openProject(bcfFile):
-
-    """ Reads in the given bcfFile and makes it available to the plugin.
-
-    bcfFile is read using reader.readBcfFile(), if it returned `None` it is
-    assumed that the file is invalid and the user is notified.
-    """
-
-    global curProject
-
-    logger.info("Opening {}".format(bcfFile))
-    if not os.path.exists(bcfFile):
-        logger.error("File {} does not exist. Please choose a valid"\
-            " file!".format(bcfFile))
-        return OperationResults.FAILURE
-
-    project = reader.readBcfFile(bcfFile)
-    if project is None:
-        logger.error("{} could not be read.".format(bcfFile))
-        return OperationResults.FAILURE
-
-    curProject = project
-    return OperationResults.SUCCESS
-
-
-def closeProject():
-
-    """ Encompasses an interactive CLI close project prompt.
-
-    First the user is given the choice to save the dirty state or discard it.
-    If he/she wants to save the state the path to the file (the state shall be
-    stored to) is requested. With this path the `saveProject` is then called.
-    After a successful operation, the data model is deleted.
-    """
-
-    global curProject
-
-    logger.info("Closing project...")
-    if util.getDirtyBit():
-
-        answer = "x"
-        while answer not in "ny " and answer != "":
-            answer = input("Do you want to save your changes before exiting?"\
-                    "([y]|n)")
-
-        if answer == "y" or answer == " " or answer == "":
-            currentDir = os.path.dirname(os.path.abspath(__file__))
-            print("Current directory: {}".format(currentDir))
-            file = input("File to save to: ")
-            if os.path.isabs(file):
-                saveProject(file)
-            else:
-                saveProject(os.path.join(currentDir, file))
-
-    del curProject
-    util.deleteTmp()
-
-
-def _searchRealTopic(topic: Topic):
-
-    """ Searches `curProject` for `topic` and returns the result
-
-    If not found then an error message is printed in addition
-    """
-
-    global curProject
-
-    logger.debug("Retrieving original copy of topic: {}".format(topic.title))
-    realTopic = curProject.searchObject(topic)
-    if realTopic is None:
-        logger.error("Topic {} could not be found in the open project."\
-                "Cannot retrieve any comments for it then".format(topic))
-    return realTopic
-
+    return True
 
-def _filterCommentsForViewpoint(comments: List[Tuple[str, m.Comment]], viewpoint: Viewpoint):
 
-    """ Filter comments referencing viewpoint """
+def _unfreezeModel():
 
-    if viewpoint is None:
-        return comments
+    """ Release one freeze of `_freezeModel()`. As soon as no session holds a
+    frozen model anymore, the frozen objects are handed back to the
+    collector, so the replaced models can be collected. """
 
-    realVp = curProject.searchObject(viewpoint)
-    realVpRef = realVp.containingObject
+    global frozenModels
 
-    f = lambda cm:\
-        cm if (cm[1].viewpoint and cm[1].viewpoint.id == realVpRef.id) else None
-    filtered = list(filter(f, comments))
-    return filtered
+    with freezeLock:
+        frozenModels -= 1
+        if frozenModels == 0:
+            gc.unfreeze()
 
 
 def openIfcFile(path: str):
@@ -380,920 +314,1993 @@ def _isIfcGuid(guid: str):
     return True
 
 
-def copyFileToProject(path: str, destName: str = "", topic: Topic = None):
+def _isLeafElement(element):
 
-    """ Copy the file behind `path` into the working directory.
+    """ Check whether `element` holds just a single value.
 
-    If `topic` is not None and references an existing topic in the project then
-    the file behind path is copied into the topic directory. Otherwise it is
-    copied into the root directory of the project.
-    If `destName` is given the resulting filename will be the value of
-    `destName`. Otherwise the original filename is used.
-    Before everything takes place, a backup of the current project is made. If
-    an error occurs, the current project will be rolled back to the backup.
+    Leaf elements are instances of SimpleElement and Attribute. Those are the
+    only two types the writer can modify in place.
     """
 
-    global curProject
+    return (issubclass(type(element), p.SimpleElement) or
+            issubclass(type(element), p.Attribute))
 
-    logger.info("Copying file {} into the project".format(path))
-    if not os.path.exists(path):
-        logger.error("File `{}` does not exist. Nothing is beeing copied.")
-        return OperationResults.FAILURE
 
-    if not isProjectOpen():
-        return OperationResults.FAILURE
+def _collectChangedMembers(realElement, element):
 
-    srcFileName = os.path.basename(path)
-    dstFileName = srcFileName if destName == "" else destName
-    destPath = util.getBcfDir()
-    if topic is not None:
-        realTopic = _searchRealTopic(topic)
-        if realTopic is None:
+    """ Compare `element` against its counterpart `realElement` in curProject.
+
+    Returns a list of tuples, one tuple for every leaf element
+    (SimpleElement/Attribute) whose value differs between both objects. The
+    first element of a tuple is the leaf element of `realElement`, the second
+    one is the new value taken from `element`.
+    If the two objects differ in their structure (e.g. a label was added, or a
+    complex member was replaced) `None` is returned, since such a change cannot
+    be expressed as modification of single values.
+    """
+
+    if _isLeafElement(realElement):
+        if realElement.value != element.value:
+            return [ (realElement, element.value) ]
+        return []
+
+    # the fingerprint of `realElement` is mostly cached already
+    if realElement.fingerprint == element.fingerprint:
+        return []
+
+    changes = list()
+    for (name, realValue) in realElement.getMembers().items():
+        if name in realElement.fingerprintIgnored:
+            continue
+
+        value = getattr(element, name, None)
+        if _isLeafElement(realValue):
+            if not _isLeafElement(value):
+                return None
+            if realValue.value != value.value:
+                changes.append((realValue, value.value))
+
+        elif issubclass(type(realValue), list):
+            if (not issubclass(type(value), list) or
+                    len(realValue) != len(value)):
+                return None
+
+            for (realItem, item) in zip(realValue, value):
+                if not issubclass(type(realItem), Identifiable):
+                    if realItem != item:
+                        return None
+                    continue
+                if not issubclass(type(item), Identifiable):
+                    return None
+
+                itemChanges = _collectChangedMembers(realItem, item)
+                if itemChanges is None:
+                    return None
+                changes += itemChanges
+
+        elif issubclass(type(realValue), Identifiable):
+            if not issubclass(type(value), Identifiable):
+                return None
+            # members that are only referenced (e.g. the viewpoint of a
+            # comment) must not be changed through the referencing object
+            if realValue.containingObject is not realElement:
+                if realValue.id != value.id:
+                    return None
+                continue
+
+            memberChanges = _collectChangedMembers(realValue, value)
+            if memberChanges is None:
+                return None
+            changes += memberChanges
+
+        elif realValue != value:
+            return None
+
+    return changes
+
+
+def _writingWhenIdle(method):
+
+    """ Decorator running `method` under the write lock of `self.lock`, once
+    the UpdateWorker processed every submitted batch and no background save is
+    running anymore.
+
+    The waiting is done before the lock is taken, since the UpdateWorker
+    reports every batch under the write lock. If meanwhile another thread
+    submitted a batch or started a save, the lock is given up and waited for
+    that one too. A thread already holding the write lock cannot wait, it
+    runs `method` right away.
+    """
+
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        if self.lock.isWriting():
+            return method(self, *args, **kwargs)
+
+        while True:
+            self._waitUntilIdle()
+            with self.lock.write():
+                if self._isIdle():
+                    return method(self, *args, **kwargs)
+
+    return locked
+
+
+class ProjectSession(object):
+
+    """ One open BCF file.
+
+    Every session has its own data model (`project`), working directory
+    (`context`), queue of updates (`updates`) and fingerprints recorded on
+    opening. Thereby several BCF files can be open at the same time. The
+    compiled schemas (see `reader.loadSchema()`) and the string pool
+    `stringPool` are shared by all sessions. The module level functions of the
+    programmaticInterface operate on `defaultSession`.
+
+    A session can be used from several threads. Retrieving data holds the read
+    lock of `lock`, thus runs concurrently with other retrievals. Every
+    modification holds the write lock until its updates are handed over,
+    thereby no retrieval ever sees a half modified project. Operations that
+    need the UpdateWorker and the background saves to be done wait for them
+    before taking the lock, see `_writingWhenIdle()`.
+    """
+
+    def __init__(self, context: util.SessionContext = None,
+            updates: writer.UpdateQueue = None):
+
+        self.context = context if context is not None else util.SessionContext()
+        """ Session context holding the working directory of `project` and the
+        archive it was extracted from """
+        self.updates = (updates if updates is not None else
+                writer.UpdateQueue(self.context))
+        """ Updates of `project` not yet written to the working directory """
+        self.stringPool = stringPool
+        """ String pool of the projects read by this session """
+        self.project = None
+        """ This variable holds the reference to the active data model. """
+        self.updateWorker = None
+        """ UpdateWorker writing the updates to file in the background. Only
+        set between `startUpdateWorker()` and `stopUpdateWorker()` """
+        self.pendingBatches = deque()
+        """ Batches submitted to `updateWorker` that were not yet processed.
+        Every element is a dictionary holding the error message, the UndoLog
+        and the number of journal records of one batch. """
+        self.lastSave = None
+        """ Future of the last save started by `saveProjectInBackground()` """
+        self.openedFingerprints = dict()
+        """ Maps the id of every markup, topic, comment and viewpoint reference
+        of the open project to its fingerprint at the time the project was
+        opened. See `hasChangedSinceOpening()`. """
+        self.lock = rwlock.RWLock()
+        """ Guards `project` and the pending updates, see
+        `getLockMetrics()` """
+        self.modelFrozen = False
+        """ Whether `project` is accounted in the freeze of the data models,
+        see `_freezeModel()` """
+        sessions.add(self)
+
+
+    def _isIdle(self):
+
+        """ Returns whether `updateWorker` processed all submitted batches and
+        no save started by `saveProjectInBackground()` is running """
+
+        if self.lastSave is not None and not self.lastSave.done():
+            return False
+        worker = self.updateWorker
+        return worker is None or worker.isIdle()
+
+
+    def _waitUntilIdle(self):
+
+        """ Block until `_isIdle()` holds. Must not be called while holding
+        `lock`, the UpdateWorker needs it to report its batches. """
+
+        self.waitForSaves()
+        worker = self.updateWorker
+        if worker is not None:
+            worker.flush()
+
+
+    def getLockMetrics(self):
+
+        """ Returns how long `lock` was held, see `rwlock.RWLock.getMetrics()`
+        """
+
+        return self.lock.getMetrics()
+
+
+    def _handleProjectUpdate(self, errMsg, undo, deferred=True):
+
+        """ Request for all updates to be written, and handle the results.
+
+        If `writer.deferUpdates` is set and `deferred` is not cleared, the updates
+        are only recorded in the journal and written to file on the next flush.
+        Updates that are not deferred are written right away, the caller has to
+        make sure the UpdateWorker is idle (see `_writingWhenIdle()`).
+        If the update did not go through, the modifications recorded in the
+        UndoLog `undo` are reverted. `undo` is `None` if the update did not
+        modify the open project.
+        """
+
+        if deferred and writer.deferUpdates:
+            if not self.updates.journal():
+                logger.error(errMsg)
+                logger.info("Project state is reset to before the update.")
+                if undo is not None:
+                    undo.undo()
+                return OperationResults.FAILURE
+
+        if deferred and self.updateWorker is not None:
+            updates = self.updates.take()
+            journaled = writer.deferUpdates and self.context.getSourceArchive() is not None
+            batch = { "errMsg": errMsg, "undo": undo,
+                    "records": len(updates) if journaled else 0 }
+            self.pendingBatches.append(batch)
+            self.updateWorker.submit(updates, batch)
+            return OperationResults.SUCCESS
+
+        if deferred and writer.deferUpdates:
+            return OperationResults.SUCCESS
+
+        errorenousUpdate = self.updates.process()
+        if errorenousUpdate is not None:
+            logger.error(errMsg)
+            logger.info("Project state is reset to before the update.")
+            if undo is not None:
+                undo.undo()
             return OperationResults.FAILURE
 
-        destPath = os.path.join(destPath, str(realTopic.xmlId))
-    destPath = os.path.join(destPath, dstFileName)
+        return OperationResults.SUCCESS
 
-    i = 1
-    while os.path.exists(destPath):
-        if i == 1:
-            logger.info("{} already exists.".format(destPath))
 
-        dir, file = os.path.split(destPath)
-        splitFN = dstFileName.split(".")
-        splitFN[0] += "({})".format(i)
-        file = ".".join(splitFN)
-        destPath = os.path.join(dir, file)
-        i += 1
+    def _indexOfBatch(self, batch):
 
-    if i != 1:
-        logger.info("Changed filename to {}.".format(destPath))
+        """ Returns the index of `batch` in `pendingBatches` or -1.
 
-    shutil.copyfile(path, destPath)
+        Batches are compared by identity, comparing them by value would compare
+        their UndoLogs.
+        """
 
+        for (index, pending) in enumerate(self.pendingBatches):
+            if pending is batch:
+                return index
+        return -1
 
-def setModDateAuthor(element, author="", addUpdate=True):
 
-    """ Update the modAuthor and modDate members of element """
+    @rwlock.writing
+    def _onBatchWritten(self, batch):
 
-    logger.debug("Updating ModifiedDate and ModifiedAuthor in"\
-            " {}".format(element))
-    # timestamp used as modification datetime
-    modDate = utc.localize(datetime.datetime.now())
+        """ Called by `updateWorker` after `batch` was written successfully """
 
-    oldDate = element.modDate
-    element.modDate = modDate
+        index = self._indexOfBatch(batch)
+        if index != -1:
+            del self.pendingBatches[index]
 
-    # set the modAuthor if `author` is set
-    if author != "" and author is not None:
-        oldAuthor = element.modAuthor
-        element.modAuthor = author
-    # if author is left empty, the previous modification author will be
-    # overwritten
-    elif author == "" or author is None:
-        # print info if the author is not set
-        logger.info("Author is not set.")
-        element.modAuthor = element._modAuthor.defaultValue
-
-    # add the author/date modification as update to the writers module
-    if addUpdate:
-        element._modDate.state = State.States.MODIFIED
-        writer.addProjectUpdate(curProject, element._modDate, oldDate)
 
-        if author != "" and author is not None:
-            element._modAuthor.state = State.States.MODIFIED
-            writer.addProjectUpdate(curProject, element._modAuthor, oldDate)
+    @rwlock.writing
+    def _onBatchFailed(self, batch, dropped):
 
+        """ Called by `updateWorker` if `batch` could not be written.
 
-def getProjectName():
+        The project is rolled back to the state before `batch`. Thereby also all
+        batches submitted after `batch` are undone, these are dropped by the
+        worker. Their records are revoked from the journal.
+        """
 
-    """ Return the name of the open project """
+        index = self._indexOfBatch(batch)
+        if dropped or index == -1:
+            # already undone by the rollback of a previous batch
+            return
 
-    return curProject.name
+        logger.error(batch["errMsg"])
+        logger.info("Project state is reset to before the update.")
+        undoneBatches = list(self.pendingBatches)[index:]
+        for i in range(len(undoneBatches)):
+            self.pendingBatches.pop()
 
+        records = sum([ undone["records"] for undone in undoneBatches ])
+        with journal.lock:
+            archive = self.context.getSourceArchive()
+            if records > 0 and archive is not None:
+                journal.appendRollback(archive, records)
 
-def getTopics():
+        # the latest modifications are reverted first
+        for undone in reversed(undoneBatches):
+            if undone["undo"] is not None:
+                undone["undo"].undo()
+        self.updateWorker.reset()
 
-    """ Retrieves ordered list of topics from the currently open project.
 
-    A list is constructed that holds tuples, in which the first element contains
-    the name of the topic and the second element is a copy of the topic object
-    itself.
-    The list is sorted based on the index a topic is assigned to. Topics without
-    an index are shown as last elements.
-    """
+    @rwlock.writing
+    def startUpdateWorker(self, dispatch=updateworker.directDispatch):
 
-    logger.debug("Retrieving list of topics in the project")
-    if not isProjectOpen():
-        return OperationResults.FAILURE
+        """ Write updates to file on a background thread from now on.
 
-    topics = list()
-    for markup in curProject.topicList:
-        topic = copy.deepcopy(markup.topic)
-        topics.append((topic.title, topic))
+        Operations return as soon as their updates are handed over to the worker.
+        If an update fails, the project is rolled back as usual, but only once the
+        failure is reported. This is done by calling the failure handler through
+        `dispatch`, which can be used to run it on the thread operating the
+        programmaticInterface.
+        """
 
-    # move all topics without an index to the end of the list
-    topics = sorted(topics, key=lambda topic: topic[1].index)
-    for i in range(0, len(topics)):
-        topic = topics[i][1]
+        if self.updateWorker is not None:
+            return
 
-        if topic.index != topic._index.defaultValue:
-            # first element with a valid index. No invalid indices will follow
-            break
+        logger.debug("Starting background writing of updates")
+        self.updateWorker = updateworker.UpdateWorker(self._onBatchWritten,
+                self._onBatchFailed, dispatch, self.updates)
 
-        if topic.index == topic._index.defaultValue:
-            topics.append(topics[i])
-            del topics[i]
 
-    return topics
+    @_writingWhenIdle
+    def stopUpdateWorker(self):
 
+        """ Write all pending updates and stop the background writing """
 
-def getComments(topic: Topic, viewpoint: Viewpoint = None):
+        if self.updateWorker is None:
+            return
 
-    """ Collect an ordered list of comments inside of topic.
+        logger.debug("Stopping background writing of updates")
+        self.updateWorker.stop()
+        self.updateWorker = None
 
-    The list of comments is sorted by the date they were created in ascending
-    order => oldest entries will be first in the list.
-    Every list element item will be a tuple where the first element is the
-    comments string representation and the second is the comment object itself.
 
-    If this cannot be done OperationsResult.FAILURE is returned instead.
+    def _flushProjectUpdates(self):
 
-    If viewpoint is set then the list of comments is filtered for ones
-    referencing viewpoint.
-    """
+        """ Write all deferred updates to the files of the working directory.
 
-    global curProject
+        `updateWorker` has to be idle already, see `_writingWhenIdle()`.
+        Returns OperationResults.FAILURE if at least one update could not be
+        written.
+        """
 
-    logger.debug("Retrieving comments to topic {}".format(topic.title))
-    if not isProjectOpen():
-        return OperationResults.FAILURE
+        if self.updateWorker is not None:
+            if not self.updateWorker.flush():
+                logger.error("Updates could not be written to the working"\
+                        " directory.")
+                return OperationResults.FAILURE
 
-    realTopic = _searchRealTopic(topic)
-    if realTopic is None:
-        return OperationResults.FAILURE
+        failedUpdates = self.updates.flush()
+        if len(failedUpdates) > 0:
+            logger.error("{} update(s) could not be written to the working"\
+                    " directory.".format(len(failedUpdates)))
+            return OperationResults.FAILURE
 
-    markup = realTopic.containingObject
-    comments = [ (str(comment), copy.deepcopy(comment)) for comment in markup.comments ]
+        return OperationResults.SUCCESS
 
-    comments = sorted(comments, key=lambda cm: cm[1].date)
-    comments = _filterCommentsForViewpoint(comments, viewpoint)
-    return comments
 
+    @rwlock.reading
+    def isProjectOpen(self):
 
-def getViewpoints(topic: Topic, realViewpoint = True):
+        """ Check whether a project is currently open and display an error message
 
-    """ Collect a list of viewpoints associated with the given topic.
+        Returns true if a project is currently open. False otherwise.
+        """
 
-    The list is constructed of tuples. Each tuple element contains the name of
-    the viewpoint file and a reference to the read-in viewpoint.
-    If the list cannot be constructed, because for example no project is
-    currently open, OperationResults.FAILURE is returned.
-    If `realViewpoint` == True then the second element of every tuple is the
-    viewpoint object itself referenced by the viewpoint reference. Otherwise it
-    is the viewpoint reference.
-    """
+        if self.project is None:
+            return False
+        return True
 
-    global curProject
 
-    logger.debug("Retrieving viewpoints to topic {}".format(topic.title))
-    if not isProjectOpen():
-        return OperationResults.FAILURE
+    @rwlock.reading
+    def isProjectDirty(self):
 
-    # given topic is a copy of the topic contained in curProject
-    realTopic = _searchRealTopic(topic)
-    if realTopic is None:
-        return OperationResults.FAILURE
+        """ Returns whether the open project holds modifications that were not
+        saved yet. """
 
-    markup = realTopic.containingObject
-    viewpoints = []
-    if realViewpoint:
-        viewpoints = [ (str(vpRef.file), copy.deepcopy(vpRef.viewpoint))
-                for vpRef in markup.viewpoints ]
-    else:
-        viewpoints = [ (str(vpRef.file), copy.deepcopy(vpRef))
-                for vpRef in markup.viewpoints ]
+        if self.project is None:
+            return False
+        return self.project.getDirtyBit()
 
 
-    return viewpoints
+    def _takeSaveSnapshot(self, serialize, isolate):
 
+        """ Capture the state of the project a save is based on.
 
-def getSnapshots(topic: Topic):
+        All deferred updates are written to the working directory beforehand. If
+        `isolate` is set, the working directory is snapshotted by
+        `writer.snapshotWorkingDir()` and, if `serialize` is set, the data model is
+        copied. Thereby the project can be modified while the save is running.
+        Returns a dictionary describing the state, or `None` if the state could not
+        be captured.
+        """
 
-    """ Returns a list of files representing the snapshots contained in `topic`.
+        # files of the working directory are packed, so they have to be up to date
+        if self._flushProjectUpdates() != OperationResults.SUCCESS:
+            return None
+        if serialize and not self.isProjectOpen():
+            return None
 
-    No deep copy has to made here, since the list returnde by
-    `markup.getSnapshotFileList()` is already a list of strings with no tie to
-    the data model.
-    Every entry of the list returned by `markup.getSnapshotFileList()` is
-    assumed to be just the filename of the snapshot file. Thus the string is
-    joined with the path to the working directory.
-    """
+        save = dict()
+        save["bcfRootPath"] = self.context.getBcfDir()
+        save["srcArchive"] = self.context.getSourceArchive()
+        save["fileStats"] = (self.context.readFileStats() if save["srcArchive"] is not
+                None else {})
+        save["updateCount"] = self.updates.count
+        save["journalOffset"] = (journal.getOffset(save["srcArchive"]) if
+                save["srcArchive"] is not None else 0)
+        save["snapshotDir"] = None
+        save["project"] = self.project
+        # `project` may become a copy, the dirty bit is the one of the original
+        save["openProject"] = self.project
+        if isolate:
+            save["snapshotDir"] = writer.snapshotWorkingDir(save["bcfRootPath"],
+                    self.context)
+            save["bcfRootPath"] = save["snapshotDir"]
+            if serialize:
+                save["project"] = copy.deepcopy(self.project)
 
-    logger.debug("Retrieving snapshots for topic {}".format(topic.title))
-    if not isProjectOpen():
-        return OperationResults.FAILURE
+        return save
 
-    realTopic = _searchRealTopic(topic)
-    if realTopic is None:
-        return OperationResults.FAILURE
 
-    markup = realTopic.containingObject
-    snapshots = markup.getSnapshotFileList()
+    def _writeSave(self, save, dstFile, serialize, progress=None):
 
-    topicDir = os.path.join(util.getBcfDir(), str(realTopic.xmlId))
-    return [ os.path.join(topicDir, snapshot) for snapshot in snapshots ]
+        """ Write the state `save`, captured by `_takeSaveSnapshot()`, to
+        `dstFile`.
 
+        Afterwards the journal is updated to only contain the updates that were
+        made after the state was captured. This is safe to be called on a
+        background thread.
+        """
 
-def getRelevantIfcFiles(topic: Topic):
+        srcArchive = save["srcArchive"]
+        dstFile = os.path.abspath(dstFile)
+        try:
+            if serialize:
+                writer.serializeToBcfFile(save["project"], dstFile, srcArchive,
+                        save["bcfRootPath"], progress=progress, session=self.context)
+            else:
+                writer.packBcfFile(save["bcfRootPath"], dstFile, srcArchive,
+                        save["fileStats"], progress=progress)
+                fileStats = util.getFileStats(save["bcfRootPath"])
+
+            with journal.lock:
+                if not serialize:
+                    # the working directory now corresponds to `dstFile`
+                    self.context.setSourceArchive(dstFile)
+                    self.context.storeFileStats(fileStats)
+
+                # the journal only records changes not contained in the source
+                # archive
+                if srcArchive is not None and (not serialize or
+                        dstFile == srcArchive):
+                    journal.rebase(srcArchive, save["journalOffset"], dstFile)
+                else:
+                    journal.discard(dstFile)
+
+                save["openProject"].setDirty(self.updates.count !=
+                        save["updateCount"])
+
+        finally:
+            if save["snapshotDir"] is not None:
+                shutil.rmtree(save["snapshotDir"], ignore_errors=True)
+
+
+    @_writingWhenIdle
+    def saveProject(self, dstFile, serialize=False):
+
+        """ Save the current state of the working directory to `dstfile`
+
+        If `serialize` is set, the XML files are not taken from the working
+        directory but generated from the data model instead. Only snapshots,
+        documents and similar files are taken from the working directory and the
+        file the project was opened from.
+        """
+
+        logger.info("Saving the project to {}".format(dstFile))
+        save = self._takeSaveSnapshot(serialize, False)
+        if save is None:
+            return OperationResults.FAILURE
 
-    """ Return a list of Ifc files relevant to this topic.
+        self._writeSave(save, dstFile, serialize)
+        return OperationResults.SUCCESS
 
-    This list is basically markup.Header.files. files is further filtered for
-    ones that at least have the attribute IfcProjectId and a path associated.
-    If the list cannot be constructed, because for example no project is
-    currently open, OperationResults.FAILURE is returned.
-    """
 
-    global curProject
+    @_writingWhenIdle
+    def saveProjectInBackground(self, dstFile, serialize=False, onProgress=None,
+            onDone=None, dispatch=updateworker.directDispatch):
 
-    logger.debug("Retrieving list of relevant IFC files for topic"\
-            " {}".format(topic.title))
-    if not isProjectOpen():
-        return OperationResults.FAILURE
+        """ Save the current state of the project to `dstFile` on a background
+        thread.
 
-    realTopic = _searchRealTopic(topic)
-    if realTopic is None:
-        return OperationResults.FAILURE
+        In contrast to `saveProject()` only a snapshot of the working directory is
+        taken before this function returns. The archive is written from the
+        snapshot afterwards, while the project can be modified further. The saved
+        file therefore contains exactly the state at the time of the call.
+        `dstFile` is replaced only after it was written completely.
 
-    markup = realTopic.containingObject
-    if markup.header is None:
-        return []
+        While the archive is written, `onProgress(bytesWritten, membersWritten)`
+        is called after every member. After the save ended `onDone(result)` is
+        called with the OperationResults of the save. Both are called through
+        `dispatch`.
+        Returns a Future resolving to the OperationResults of the save.
+        """
 
-    files = copy.deepcopy(markup.header.files)
+        global saveExecutor
 
-    hasIfcProjectId = lambda file: file.ifcProjectId != file._ifcProjectId.defaultValue
-    hasReference = lambda file: file.reference != file._reference.defaultValue
-    files = filter(lambda f: hasIfcProjectId(f) and hasReference(f), files)
+        logger.info("Saving the project to {} in the background".format(dstFile))
+        save = self._takeSaveSnapshot(serialize, True)
+        if save is None:
+            if onDone is not None:
+                dispatch(onDone, OperationResults.FAILURE)
+            failed = Future()
+            failed.set_result(OperationResults.FAILURE)
+            return failed
 
-    logger.info("If you want to open one of the files in FreeCAD run:\n"\
-            "\t plugin.openIfcProject(file)")
+        progress = None
+        if onProgress is not None:
+            progress = writer.WriteProgress(lambda bytesWritten, membersWritten:
+                    dispatch(onProgress, bytesWritten, membersWritten))
 
-    return list(files)
+        def run():
+            result = OperationResults.SUCCESS
+            try:
+                self._writeSave(save, dstFile, serialize, progress)
+            except Exception as exc:
+                logger.error("Project could not be saved to {}: {}".format(
+                    dstFile, exc))
+                result = OperationResults.FAILURE
 
+            if onDone is not None:
+                dispatch(onDone, result)
+            return result
 
-def getAdditionalDocumentReferences(topic: Topic):
+        if saveExecutor is None:
+            saveExecutor = ThreadPoolExecutor(max_workers=1,
+                    thread_name_prefix="bcfplugin-save")
+        self.lastSave = saveExecutor.submit(run)
+        return self.lastSave
 
-    """ Returns a list of all document references of a topic """
 
-    global curProject
+    def waitForSaves(self):
 
-    logger.debug("Retrieving list of document references to topic"\
-            " {}".format(topic.title))
-    if not isProjectOpen():
-        return OperationResults.FAILURE
+        """ Block until every save started by `saveProjectInBackground()` ended """
 
-    realTopic = _searchRealTopic(topic)
-    if realTopic is None:
-        return OperationResults.FAILURE
+        lastSave = self.lastSave
+        if lastSave is not None:
+            # saves are run one after the other, so this one ended last
+            futures.wait([ lastSave ])
 
-    docRefs = [ (ref.description, copy.deepcopy(ref))
-                for ref in realTopic.docRefs ]
-    return docRefs
 
+    def _releaseFreeze(self):
 
-def getTopic(element):
+        """ Release the freeze of `project`, if it was accounted in one """
 
-    """ Returns the topic to which `element` is associated.
+        if self.modelFrozen:
+            self.modelFrozen = False
+            _unfreezeModel()
 
-    If `element` could not be found inside the current project `None` is
-    returned. If `element` could not be associated to any existing topic `None`
-    is returned. In the case that this function is called from outside this
-    module (`programmaticInterface.py`), a deep copy of the found topic is
-    returned.
-    """
 
-    logger.debug("Retrieving topic associated to {}".format(element))
-    realElement = curProject.searchObject(element)
-    if realElement is None:
-        logger.erroror("Element {} could not be found in the current project.")
-        return None
-
-    elemHierarchy = realElement.getHierarchyList()
-
-    topic = None
-    for elem in elemHierarchy:
-        if isinstance(elem, Markup):
-            topic = elem.topic
-            break
-        elif isinstance(elem, Topic):
-            topic = elem
-            break
-        else:
-            continue
+    def _recordFingerprints(self, project):
 
-    if _getCallerFileName() == __file__:
-        return topic
-    elif topic is not None:
-        topicCpy = copy.deepcopy(topic)
-        return topicCpy
-    else:
-        return None
+        """ Fill `openedFingerprints` with the elements of `project`.
 
+        Thereby the fingerprints of all elements get calculated and cached. """
 
-def getTopicFromUUID(uid: UUID):
+        self.openedFingerprints = dict()
+        for markup in project.topicList:
+            elements = [ markup, markup.topic ] + markup.comments + markup.viewpoints
+            for element in elements:
+                if element is not None:
+                    self.openedFingerprints[element.id] = element.fingerprint
 
-    """ Search the data model for a topic where `topic.xmlId == uid` holds. """
 
-    global curProject
+    @rwlock.reading
+    def hasChangedSinceOpening(self, element):
 
-    logger.debug("Searching data model for topic with UUID {}".format(uid))
-    if not isProjectOpen():
-        logger.error("The project is not open. Open a project before"\
-                " trying to retrieve a topic by UUID.")
-        return OperationResults.FAILURE
+        """ Returns whether `element`, a markup, topic, comment or viewpoint
+        reference, differs from its state at the time the project was opened.
 
-    if not isinstance(uid, UUID):
-        logger.error("uid is not of type UUID. Can only get topic by UUID.")
-        return OperationResults.FAILURE
+        Elements that were added afterwards are always reported as changed. For
+        elements of the data model itself the check is a comparison of two cached
+        fingerprints. Copies, as returned by `getTopics()` and the like, have to
+        calculate their fingerprint first.
+        """
 
-    match = None
-    topics = [ item.topic for item in curProject.topicList ]
-    for topic in topics:
-        if topic.xmlId == uid:
-            match = copy.deepcopy(topic)
-            break
+        openedFingerprint = self.openedFingerprints.get(element.id)
+        if openedFingerprint is None:
+            return True
 
-    if match is None:
-        logger.error("Could not find a topic to that uid: {}".format(str(uid)))
-        return OperationResults.FAILURE
+        return element.fingerprint != openedFingerprint
 
-    return match
 
+    @_writingWhenIdle
+    def openProject(self, bcfFile):
 
-def addProject(name: str, extensionSchemaUri: ""):
+        """ Reads in the given bcfFile and makes it available to the plugin.
 
-    """ Adds a new project to the current working directory.
+        bcfFile is read using reader.readBcfFile(), if it returned `None` it is
+        assumed that the file is invalid and the user is notified.
+        """
 
-    This means essentially creating a new folder named `name` and placing one
-    new file in it, namely `project.bcfp`."""
+        logger.info("Opening {}".format(bcfFile))
+        if not os.path.exists(bcfFile):
+            logger.error("File {} does not exist. Please choose a valid"\
+                " file!".format(bcfFile))
+            return OperationResults.FAILURE
 
-    global curProject
+        # deferred updates belong to the working directory of the open project
+        if self.isProjectOpen():
+            self._flushProjectUpdates()
+        self._releaseFreeze()
+
+        # replay changes that were not saved before the last session ended
+        prepareDir = None
+        journaledUpdates = journal.readUpdates(bcfFile)
+        if len(journaledUpdates) > 0:
+            logger.info("Restoring {} unsaved change(s) of {}".format(
+                len(journaledUpdates), bcfFile))
+
+            def prepareDir(bcfExtractedPath):
+                self.context.setBcfDir(bcfExtractedPath)
+                self.updates.replay(journaledUpdates)
+
+        project = reader.readBcfFile(bcfFile, prepareDir,
+                self.context, self.stringPool)
+        if project is None:
+            logger.error("{} could not be read.".format(bcfFile))
+            return OperationResults.FAILURE
 
-    logger.info("Adding new project with name {}".format(name))
-    newProject = p.Project(uuid4(), name, extensionSchemaUri)
-    newProject.state = State.States.ADDED
+        self.project = project
+        self._recordFingerprints(project)
+        self.modelFrozen = _freezeModel()
+        if len(journaledUpdates) > 0:
+            project.setDirty(True)
+        return OperationResults.SUCCESS
 
-    writer.addProjectUpdate(newProject, newProject, None)
-    result = _handleProjectUpdate("Project could not be created", None)
-    if result == OperationResults.SUCCESS:
-        curProject = copy.deepcopy(newProject)
 
-    return result
+    def closeProject(self):
 
+        """ Encompasses an interactive CLI close project prompt.
 
-def addViewpointToComment(comment: Comment, viewpoint: ViewpointReference, author: str):
+        First the user is given the choice to save the dirty state or discard it.
+        If he/she wants to save the state the path to the file (the state shall be
+        stored to) is requested. With this path the `saveProject` is then called.
+        After a successful operation, the data model is deleted. The lock is
+        only taken by the save and discard themselves, not while the user is
+        asked.
+        """
 
-    """ Add a reference to `viewpoint` inside `comment`.
+        logger.info("Closing project...")
+        if self.isProjectDirty():
 
-    If `comment` already referenced a viewpoint then it is updated. If no
-    viewpoint was refrerenced before then a new xml node is created. In both
-    cases `ModifiedAuthor` (`modAuthor`) and `ModifiedDate` (`modDate`) are
-    updated/set.
-    Before everything takes place, a backup of the current project is made. If
-    an error occurs, the current project will be rolled back to the backup.
-    """
+            answer = "x"
+            while answer not in "ny " and answer != "":
+                answer = input("Do you want to save your changes before exiting?"\
+                        "([y]|n)")
 
-    global curProject
-    projectBackup = copy.deepcopy(curProject)
-    logger.info("Adding new viewpoint reference to comment {}".format(comment))
+            if answer == "y" or answer == " " or answer == "":
+                currentDir = os.path.dirname(os.path.abspath(__file__))
+                print("Current directory: {}".format(currentDir))
+                file = input("File to save to: ")
+                if os.path.isabs(file):
+                    self.saveProject(file)
+                else:
+                    self.saveProject(os.path.join(currentDir, file))
 
-    if author == "":
-        logger.info("`author` is empty. Cannot update without an author.")
-        return OperationResults.FAILURE
+        self.discardProject()
 
-    if not isProjectOpen():
-        return OperationResults.FAILURE
 
-    realComment = curProject.searchObject(comment)
-    realViewpoint = curProject.searchObject(viewpoint)
-    if realComment == None:
-        logger.error("No matching comment was found in the current project.")
-        return OperationResults.FAILURE
+    @_writingWhenIdle
+    def discardProject(self):
 
-    if realViewpoint == None:
-        logger.error("No matching viewpoint was found in the current project.")
-        return OperationResults.FAILURE
+        """ Close the project without asking whether to save its changes.
 
-    modDate = utc.localize(datetime.datetime.now())
+        Updates the UpdateWorker is still writing are waited for, deferred
+        updates are dropped. The journal of the source archive is discarded as
+        well, otherwise the dropped changes would be restored on the next
+        opening. Afterwards the working directory is deleted.
+        """
 
-    realComment.state = State.States.DELETED
-    writer.addProjectUpdate(curProject, realComment, None)
+        archive = self.context.getSourceArchive()
+        if archive is not None:
+            journal.discard(archive)
 
-    realComment.viewpoint = viewpoint
-    realComment.state = State.States.ADDED
-    writer.addProjectUpdate(curProject, realComment, None)
+        self.pendingBatches.clear()
+        self.updates.clear()
+        self.project = None
+        self.openedFingerprints.clear()
+        self._releaseFreeze()
+        self.context.deleteTmp()
 
-    oldDate = realComment.modDate
-    realComment.modDate = modDate
-    realComment._modDate.state = State.States.MODIFIED
-    writer.addProjectUpdate(curProject, realComment._modDate, oldDate)
+        if all([ session.project is None for session in sessions ]):
+            stringPool.clear()
 
-    oldAuthor = realComment.modAuthor
-    realComment.modAuthor = author
-    realComment._modAuthor.state = State.States.MODIFIED
-    writer.addProjectUpdate(curProject, realComment._modAuthor, oldAuthor)
 
-    return _handleProjectUpdate("Could not assign viewpoint.", projectBackup)
+    def _searchRealTopic(self, topic: Topic):
 
+        """ Searches `project` for `topic` and returns the result
 
-def addCurrentViewpoint(topic: Topic):
+        If not found then an error message is printed in addition
+        """
 
-    """ Reads the current view settings and adds them as viewpoint to `topic`
+        logger.debug("Retrieving original copy of topic: {}".format(topic.title))
+        realTopic = self.project.searchObject(topic)
+        if realTopic is None:
+            logger.error("Topic {} could not be found in the open project."\
+                    "Cannot retrieve any comments for it then".format(topic))
+        return realTopic
 
-    The view settings include:
-        - selection state of each ifc object
-        - color of each ifc object
-        - camera position and orientation
-    """
 
-    global curProject
-    projectBackup = copy.deepcopy(curProject)
-    logger.info("Adding current view settings as viewpoint to topic"\
-            " {}".format(topic.title))
+    def _filterCommentsForViewpoint(self, comments: List[Tuple[str, m.Comment]], viewpoint: Viewpoint):
 
-    if not (GUI and FREECAD):
-        logger.error("Application is running either not inside FreeCAD or without"\
-                " GUI. Thus cannot set camera position")
-        return OperationResults.FAILURE
+        """ Filter comments referencing viewpoint """
 
-    doNotAdd = False
-    if not isProjectOpen():
-        logger.info("Project is not open. Viewpoint cannot be added to any"\
-                " topic")
-        doNotAdd = True
+        if viewpoint is None:
+            return comments
 
-    realTopic = _searchRealTopic(topic)
-    if realTopic is None:
-        logger.info("Viewpoint will not be added.")
-        doNotAdd = True
+        realVp = self.project.searchObject(viewpoint)
+        realVpRef = realVp.containingObject
 
-    camSettings = None
-    try:
-        camSettings = vCtrl.readCamera()
-    except AttributeError as err:
-        logger.error("Camera settings could not be read. Make sure the 3D"\
-                " view is active.")
-        logger.error(str(err))
-        return OperationResults.FAILURE
-    else:
-        if camSettings is None:
+        f = lambda cm:\
+            cm if (cm[1].viewpoint and cm[1].viewpoint.id == realVpRef.id) else None
+        filtered = list(filter(f, comments))
+        return filtered
+
+
+    @_writingWhenIdle
+    def copyFileToProject(self, path: str, destName: str = "", topic: Topic = None):
+
+        """ Copy the file behind `path` into the working directory.
+
+        If `topic` is not None and references an existing topic in the project then
+        the file behind path is copied into the topic directory. Otherwise it is
+        copied into the root directory of the project.
+        If `destName` is given the resulting filename will be the value of
+        `destName`. Otherwise the original filename is used.
+        The modifications are recorded in an UndoLog. If an error occurs, they
+        are reverted.
+        """
+
+        logger.info("Copying file {} into the project".format(path))
+        if not os.path.exists(path):
+            logger.error("File `{}` does not exist. Nothing is beeing copied.")
             return OperationResults.FAILURE
 
-    if not doNotAdd:
-        realMarkup = realTopic.containingObject
-        vpGuid = uuid4()
-        oCamera = None
-        pCamera = None
-        if isinstance(camSettings, OrthogonalCamera):
-            oCamera = camSettings
-        elif isinstance(camSettings, PerspectiveCamera):
-            pCamera = camSettings
-
-        logger.info(str(camSettings))
-        vp = Viewpoint(vpGuid, None, oCamera, pCamera)
-        vp.state = State.States.ADDED
-        vpFileName = writer.generateViewpointFileName(realMarkup)
-        vpRef = ViewpointReference(vpGuid, Uri(vpFileName), None, -1, realMarkup,
-                State.States.ADDED)
-        vpRef.viewpoint = vp
-        realMarkup.viewpoints.append(vpRef)
+        if not self.isProjectOpen():
+            return OperationResults.FAILURE
 
-        writer.addProjectUpdate(curProject, vpRef, None)
-        return _handleProjectUpdate("Viewpoint could not be added. Rolling"\
-                " back to previous state", projectBackup)
+        # the topic directory might not be created yet
+        if self._flushProjectUpdates() != OperationResults.SUCCESS:
+            return OperationResults.FAILURE
 
-    print(camSettings)
-    return OperationResults.SUCCESS
+        srcFileName = os.path.basename(path)
+        dstFileName = srcFileName if destName == "" else destName
+        destPath = self.context.getBcfDir()
+        if topic is not None:
+            realTopic = self._searchRealTopic(topic)
+            if realTopic is None:
+                return OperationResults.FAILURE
 
+            destPath = os.path.join(destPath, str(realTopic.xmlId))
+        destPath = os.path.join(destPath, dstFileName)
 
-def addTopic(title: str, author: str, type: str = "", description = "",
-        status: str = "", priority: str = "", index: int = -1,
-        labels: List[str] = list(), dueDate: datetime = None, assignee: str = "",
-        stage: str = "", relatedTopics: List[UUID] = list(),
-        referenceLinks: List[str] = list(), bimSnippet: BimSnippet = None):
+        i = 1
+        while os.path.exists(destPath):
+            if i == 1:
+                logger.info("{} already exists.".format(destPath))
 
-    """ Adds a new topic to the project.
+            dir, file = os.path.split(destPath)
+            splitFN = dstFileName.split(".")
+            splitFN[0] += "({})".format(i)
+            file = ".".join(splitFN)
+            destPath = os.path.join(dir, file)
+            i += 1
 
-    That entails that a new topic folder is created in the bcf file as well as
-    a new markup file created, with nothing set but the topic.
-    """
+        if i != 1:
+            logger.info("Changed filename to {}.".format(destPath))
 
-    global curProject
-    projectBackup = copy.deepcopy(curProject)
-    logger.info("Adding new topic({}) to project({})".format(title,
-        curProject.name))
+        shutil.copyfile(path, destPath)
 
-    if not isProjectOpen():
-        return OperationResults.FAILURE
 
-    # new guid for topic
-    guid = uuid4()
+    def _pooled(self, value):
 
-    # create and add new markup to curProject, bot nto write yet
-    newMarkup = Markup(None, state = State.States.ADDED,
-            containingElement = curProject)
-    curProject.topicList.append(newMarkup)
+        """ Returns the object equal to `value` out of the string pool of
+        `project`. See `project.StringPool`. """
 
-    # create new topic and assign it to newMarkup
-    creationDate = utc.localize(datetime.datetime.now())
-    newTopic = Topic(guid, title, creationDate, author, type, status,
-            referenceLinks, list(), priority, index, labels, None, "",
-            dueDate, assignee, description, stage, relatedTopics, bimSnippet,
-            newMarkup)
-    # state does not have to be set. Topic will be automatically added when
-    # adding the markup
+        return self.project.stringPool.intern(value)
 
-    newMarkup.topic = newTopic
-    writer.addProjectUpdate(curProject, newMarkup, None)
 
-    return _handleProjectUpdate("Could not add topic {} to"\
-            " project.".format(title), projectBackup)
+    def _addMemberUpdate(self, member, oldValue):
 
+        """ Add the change of the leaf element `member` as update to the writer.
 
-def addComment(topic: Topic, text: str, author: str,
-        viewpoint: Viewpoint = None):
+        `member` already has to hold its new value. Depending on whether the old
+        or the new value equals the default value, the XML node respectively
+        attribute has to be newly added, deleted or just modified in the file.
+        Afterwards `member` is set back to State.States.ORIGINAL.
+        """
 
-    """ Add a new comment with content `text` to the topic.
+        dflValue = member.defaultValue
+        newValue = member.value
+        if oldValue == dflValue and newValue != dflValue:
+            member.state = State.States.ADDED
+            self.updates.add(self.project, member, None)
 
-    The date of creation is sampled right at the start of this function.
-    Before everything takes place, a backup of the current project is made. If
-    an error occurs, the current project will be rolled back to the backup.
-    """
+        elif newValue == dflValue and oldValue != dflValue:
+            # the node is searched for in the file by its old value
+            member.value = oldValue
+            member.state = State.States.DELETED
+            self.updates.add(self.project, member, None)
+            member.value = newValue
 
-    global curProject
-    projectBackup = copy.deepcopy(curProject)
-    logger.info("Adding comment {} to topic {}".format(text, topic.title))
+        else:
+            member.state = State.States.MODIFIED
+            self.updates.add(self.project, member, oldValue)
 
-    if not isProjectOpen():
-        return OperationResults.FAILURE
+        member.state = State.States.ORIGINAL
 
-    realTopic = _searchRealTopic(topic)
-    if realTopic is None:
-        return OperationResults.FAILURE
 
-    realMarkup = realTopic.containingObject
+    @rwlock.writing
+    def setModDateAuthor(self, element, author="", addUpdate=True, undo=None):
 
-    creationDate = datetime.datetime.now()
-    localisedDate = utc.localize(creationDate)
-    guid = uuid4() # generate new random id
-    state = State.States.ADDED
-    comment = Comment(guid, localisedDate, author, text, viewpoint,
-            containingElement = realMarkup, state=state)
-    realMarkup.comments.append(comment)
+        """ Update the modAuthor and modDate members of element
 
-    writer.addProjectUpdate(curProject, comment, None)
-    errorenousUpdate = writer.processProjectUpdates()
-    if errorenousUpdate is not None:
-        logger.error("Error while adding {}".format(errorenousUpdate[1]))
-        logger.error("Project is reset to before the addition.")
-        logger.info("Please fix comment {}".format(comment))
-        curProject = projectBackup
+        The modifications are recorded in the UndoLog `undo`, if given.
+        """
 
-        return OperationResults.FAILURE
+        logger.debug("Updating ModifiedDate and ModifiedAuthor in"\
+                " {}".format(element))
+        if undo is None:
+            undo = UndoLog(self.project)
+        # timestamp used as modification datetime
+        modDate = utc.localize(datetime.datetime.now())
 
-    return OperationResults.SUCCESS
+        oldDate = element.modDate
+        undo.setMember(element, "modDate", modDate)
 
+        oldAuthor = element.modAuthor
+        # set the modAuthor if `author` is set
+        if author != "" and author is not None:
+            undo.setMember(element, "modAuthor", self._pooled(author))
+        # if author is left empty, the previous modification author will be
+        # overwritten
+        elif author == "" or author is None:
+            # print info if the author is not set
+            logger.info("Author is not set.")
+            undo.setMember(element, "modAuthor",
+                    element._modAuthor.defaultValue)
 
-def addFile(topic: Topic, ifcProject: str = "",
-        ifcSpatialStructureElement: str = "",
-        isExternal: bool = False,
-        filename: str = "",
-        reference: str = ""):
+        # add the author/date modification as update to the writers module
+        if addUpdate:
+            self._addMemberUpdate(element._modDate, oldDate)
 
-    """ Add a new IFC file to the project.
+            if element.modAuthor != oldAuthor:
+                self._addMemberUpdate(element._modAuthor, oldAuthor)
 
-    This function assumes that the file already exists and only creates a
-    reference to it inside the data model. It does not copy an external file
-    into the project.
-    Before everything takes place, a backup of the current project is made. If
-    an error occurs, the current project will be rolled back to the backup.
-    """
 
-    global curProject
-    projectBackup = copy.deepcopy(curProject)
-    logger.info("Adding new file({}) to topic({})".format(filename, topic.title))
+    @rwlock.reading
+    def getProjectName(self):
+
+        """ Return the name of the open project """
+
+        return self.project.name
+
 
-    if not isExternal:
-        if not util.doesFileExistInProject(reference):
-            logger.error("{} does not exist inside the project. Please check"\
-                    " the path. Or for copiing a new file to the project use: "\
-                    " plugin.copyFile(topic, fileAbsPath)".format(reference))
+    @rwlock.reading
+    def getTopics(self):
+
+        """ Retrieves ordered list of topics from the currently open project.
+
+        A list is constructed that holds tuples, in which the first element contains
+        the name of the topic and the second element is a copy of the topic object
+        itself.
+        The list is sorted based on the index a topic is assigned to. Topics without
+        an index are shown as last elements.
+        """
+
+        logger.debug("Retrieving list of topics in the project")
+        if not self.isProjectOpen():
             return OperationResults.FAILURE
-    elif not os.path.exists(reference):
-        logger.error("{} could not be found. Please check the path for"\
-                " typos".format(reference))
-        return OperationResults.FAILURE
 
-    if not _isIfcGuid(ifcProject) or ifcProject == "":
-        logger.error("{} is not a valid IfcGuid. An Ifc guid has to be of"\
-                " length 22 and contain alphanumeric characters including '_'"\
-                " and '$'".format(ifcProject))
+        topics = list()
+        for markup in self.project.topicList:
+            topic = copy.deepcopy(markup.topic)
+            topics.append((topic.title, topic))
 
-    if (not _isIfcGuid(ifcSpatialStructureElement) or
-            ifcSpatialStructureElement == ""):
-        logger.error("{} is not a valid IfcGuid. An Ifc guid has to be of"\
-                " length 22 and contain alphanumeric characters including '_'"\
-                " and '$'".format(ifcProject))
+        # move all topics without an index to the end of the list
+        topics = sorted(topics, key=lambda topic: topic[1].index)
+        for i in range(0, len(topics)):
+            topic = topics[i][1]
 
-    if not isProjectOpen():
-        return OperationResults.FAILURE
+            if topic.index != topic._index.defaultValue:
+                # first element with a valid index. No invalid indices will follow
+                break
 
-    realTopic = _searchRealTopic(topic)
-    if realTopic is None:
-        return OperationResults.FAILURE
+            if topic.index == topic._index.defaultValue:
+                topics.append(topics[i])
+                del topics[i]
 
-    realMarkup = realTopic.containingObject
-
-    # create new header file and insert it into the data model
-    creationDate = datetime.datetime.now()
-    localisedDate = utc.localize(creationDate)
-    newFile = HeaderFile(ifcProject, ifcSpatialStructureElement, isExternal,
-            filename, localisedDate, reference, state = State.States.ADDED)
-    # create markup.header if needed
-    if realMarkup.header is None:
-        realMarkup.header = Header([newFile])
-        realMarkup.header.state = State.States.ADDED
-        realMarkup.header.containingObject = realMarkup
-        writer.addProjectUpdate(curProject, realMarkup.header, None)
-    else:
-        realMarkup.header.files.append(newFile)
-    newFile.containingObject = realMarkup.header
+        return topics
 
-    writer.addProjectUpdate(curProject, newFile, None)
-    return _handleProjectUpdate("File could not be added. Project is reset to"\
-            " last valid state", projectBackup)
 
+    @rwlock.reading
+    def getComments(self, topic: Topic, viewpoint: Viewpoint = None):
 
-def addDocumentReference(topic: Topic,
-        guid: str = "",
-        isExternal: bool = False,
-        path: str = "",
-        description: str = ""):
+        """ Collect an ordered list of comments inside of topic.
 
-    """ Creates a new document reference and adds it to `topic`.
-
-    guid is the guid of the documentreference. If left alone a new random guid
-    is generated using uuid.uuid4().
-    isExternal == True => `path` is expected to be an absolute url,
-    isExternal == False => `path` is expected to be a relative url pointing to
-    a file in the project directory.
-    `path` to the file, and `description` is a human readable name of the
-    document.
-    Before everything takes place, a backup of the current project is made. If
-    an error occurs, the current project will be rolled back to the backup.
-    """
+        The list of comments is sorted by the date they were created in ascending
+        order => oldest entries will be first in the list.
+        Every list element item will be a tuple where the first element is the
+        comments string representation and the second is the comment object itself.
 
-    global curProject
-    projectBackup = copy.deepcopy(curProject)
-    logger.info("Adding new document reference({}) to topic"\
-            " {}".format(description, topic.title))
+        If this cannot be done OperationsResult.FAILURE is returned instead.
 
-    if (path == "" and description == ""):
-        logger.info("Not adding an empty document reference")
-        return OperationResults.FAILURE
+        If viewpoint is set then the list of comments is filtered for ones
+        referencing viewpoint.
+        """
 
-    if not isExternal:
-        if not util.doesFileExistInProject(topic, path):
-            logger.error("{} does not exist inside the project. Please check"\
-                    " the path. Or for copiing a new file to the project use: "\
-                    " plugin.copyFile(topic, fileAbsPath)".format(path))
+        logger.debug("Retrieving comments to topic {}".format(topic.title))
+        if not self.isProjectOpen():
             return OperationResults.FAILURE
-    elif not os.path.exists(path):
-        logger.info("{} could not be found on the file system. Assuming"\
-                " that it resides somewhere on a network.".format(path))
-
-    # check if `guid` is a valid UUID and create a UUID object
-    guidU = UUID(int=0)
-    if isinstance(guid, UUID):
-        guidU = guid
-    elif guid == "":
-        # just generate a new guid
-        guidU = uuid4()
-    else:
-        try:
-            guidU = UUID(guid)
-        except ValueError as err:
-            logger.error("The supplied guid is malformed ({}).".format(guid))
+
+        realTopic = self._searchRealTopic(topic)
+        if realTopic is None:
             return OperationResults.FAILURE
 
-    if not isProjectOpen():
-        return OperationResults.FAILURE
+        markup = realTopic.containingObject
+        comments = [ (str(comment), copy.deepcopy(comment)) for comment in markup.comments ]
 
-    # get a reference of the tainted, supplied topic reference in the working
-    # copy of the project
-    realTopic = _searchRealTopic(topic)
-    if realTopic is None:
-        return OperationResults.FAILURE
+        # compare the integer timestamps instead of the datetime objects
+        comments = sorted(comments, key=lambda cm: cm[1]._date.timestamp)
+        comments = self._filterCommentsForViewpoint(comments, viewpoint)
+        return comments
 
-    docRef = DocumentReference(guidU,
-            isExternal, path,
-            description, realTopic,
-            State.States.ADDED)
-    realTopic.docRefs.append(docRef)
 
-    writer.addProjectUpdate(curProject, docRef, None)
-    return _handleProjectUpdate("Document reference could not be added."\
-            " Returning to last valid state...", projectBackup)
+    @rwlock.reading
+    def getViewpoints(self, topic: Topic, realViewpoint = True):
 
+        """ Collect a list of viewpoints associated with the given topic.
 
-def addLabel(topic: Topic, label: str):
+        The list is constructed of tuples. Each tuple element contains the name of
+        the viewpoint file and a reference to the read-in viewpoint.
+        If the list cannot be constructed, because for example no project is
+        currently open, OperationResults.FAILURE is returned.
+        If `realViewpoint` == True then the second element of every tuple is the
+        viewpoint object itself referenced by the viewpoint reference. Otherwise it
+        is the viewpoint reference.
+        """
 
-    """ Add `label` as new label to `topic`
+        logger.debug("Retrieving viewpoints to topic {}".format(topic.title))
+        if not self.isProjectOpen():
+            return OperationResults.FAILURE
 
-    Before everything takes place, a backup of the current project is made. If
-    an error occurs, the current project will be rolled back to the backup.
-    """
+        # given topic is a copy of the topic contained in `project`
+        realTopic = self._searchRealTopic(topic)
+        if realTopic is None:
+            return OperationResults.FAILURE
 
-    global curProject
-    projectBackup = copy.deepcopy(curProject)
-    logger.info("Adding new label({}) to topic {}".format(label, topic.title))
+        markup = realTopic.containingObject
+        viewpoints = []
+        if realViewpoint:
+            viewpoints = [ (str(vpRef.file), copy.deepcopy(vpRef.viewpoint))
+                    for vpRef in markup.viewpoints ]
+        else:
+            viewpoints = [ (str(vpRef.file), copy.deepcopy(vpRef))
+                    for vpRef in markup.viewpoints ]
 
-    if label == "":
-        logger.info("Not adding an empty label.")
-        return OperationResults.FAILURE
 
-    if not isProjectOpen():
-        return OperationResults.FAILURE
+        return viewpoints
 
-    # get a reference of the tainted, supplied topic reference in the working
-    # copy of the project
-    realTopic = _searchRealTopic(topic)
-    if realTopic is None:
-        return OperationResults.FAILURE
 
-    # create and add a new label to curProject
-    realTopic.labels.append(label)
-    addedLabel = realTopic.labels[-1] # get reference to added label
+    @rwlock.reading
+    def getSnapshots(self, topic: Topic):
 
-    writer.addProjectUpdate(curProject, addedLabel, None)
-    return _handleProjectUpdate("Label '{}' could not be added. Returning"\
-            " to last valid state...".format(label), projectBackup)
+        """ Returns a list of files representing the snapshots contained in `topic`.
 
+        No deep copy has to made here, since the list returnde by
+        `markup.getSnapshotFileList()` is already a list of strings with no tie to
+        the data model.
+        Every entry of the list returned by `markup.getSnapshotFileList()` is
+        assumed to be just the filename of the snapshot file. Thus the string is
+        joined with the path to the working directory.
+        """
 
-def deleteObject(object):
+        logger.debug("Retrieving snapshots for topic {}".format(topic.title))
+        if not self.isProjectOpen():
+            return OperationResults.FAILURE
 
-    """ Deletes an arbitrary object from curProject.
+        realTopic = self._searchRealTopic(topic)
+        if realTopic is None:
+            return OperationResults.FAILURE
 
-    The heavy lifting is done by writer.processProjectUpdates() and
-    project.deleteObject(). Former deletes the object from the file and latter
-    one deletes the object from the data model.
-    """
+        markup = realTopic.containingObject
+        snapshots = markup.getSnapshotFileList()
 
-    global curProject
-    projectBackup = copy.deepcopy(curProject)
-    logger.info("Deleting object {} from project".format(object.__class__))
+        topicDir = os.path.join(self.context.getBcfDir(), str(realTopic.xmlId))
+        return [ os.path.join(topicDir, snapshot) for snapshot in snapshots ]
 
-    if not issubclass(type(object), Identifiable):
-        logger.error("Cannot delete {} since it doesn't inherit from"\
-            " interfaces.Identifiable".format(object))
-        return OperationResults.FAILURE
 
-    if not issubclass(type(object), Hierarchy):
-        logger.error("Cannot delete {} since it seems to be not part of" \
-            " the data model. It has to inherit from"\
-            " hierarchy.Hierarchy".format(object))
-        return OperationResults.FAILURE
+    @rwlock.reading
+    def getRelevantIfcFiles(self, topic: Topic):
 
-    if not isProjectOpen():
-        return OperationResults.FAILURE
+        """ Return a list of Ifc files relevant to this topic.
 
-    realObject = curProject.searchObject(object)
-    if realObject is None:
-        # No rollback has to be done here, since the state of the project is not
-        # changed anyways.
-        logger.error("Object {} could not be found in project {}".format(
-            object.__class__, curProject.__class__))
-        return OperationResults.FAILURE
+        This list is basically markup.Header.files. files is further filtered for
+        ones that at least have the attribute IfcProjectId and a path associated.
+        If the list cannot be constructed, because for example no project is
+        currently open, OperationResults.FAILURE is returned.
+        """
 
-    realObject.state = State.States.DELETED
-    writer.addProjectUpdate(curProject, realObject, None)
-    result = _handleProjectUpdate("Object could not be deleted from "\
-            "data model" , projectBackup)
+        logger.debug("Retrieving list of relevant IFC files for topic"\
+                " {}".format(topic.title))
+        if not self.isProjectOpen():
+            return OperationResults.FAILURE
 
-    # `result == None` if the update could not be processed.
-    if result ==  OperationResults.FAILURE:
-        curProject = projectBackup
-        errMsg = "Couldn't delete {} from the file.".format(object)
-        logger.error(errMsg)
-        return OperationResults.FAILURE
+        realTopic = self._searchRealTopic(topic)
+        if realTopic is None:
+            return OperationResults.FAILURE
 
-    # otherwise the updated project is returned
-    else:
-        curProject = curProject.deleteObject(realObject)
-        return OperationResults.SUCCESS
+        markup = realTopic.containingObject
+        if markup.header is None:
+            return []
 
+        files = copy.deepcopy(markup.header.files)
 
-def modifyComment(comment: Comment, newText: str, author: str):
+        hasIfcProjectId = lambda file: file.ifcProjectId != file._ifcProjectId.defaultValue
+        hasReference = lambda file: file.reference != file._reference.defaultValue
+        files = filter(lambda f: hasIfcProjectId(f) and hasReference(f), files)
 
-    """ Change the text of `comment` to `newText` in the data model.
+        logger.info("If you want to open one of the files in FreeCAD run:\n"\
+                "\t plugin.openIfcProject(file)")
 
-    Alongside with the text, the modAuthor and modDate fields get overwritten
-    with `author` and the current datetime respectively.
-    If `newText` was left empty then the comment is going to be deleted.
-    Before everything takes place, a backup of the current project is made. If
-    an error occurs, the current project will be rolled back to the backup.
-    """
+        return list(files)
 
-    global curProject
-    projectBackup = copy.deepcopy(curProject)
-    logger.info("Modifying comment({})".format(comment))
 
-    if newText == "":
-        logger.info("newText is empty. Deleting comment now.")
-        deleteObject(comment)
-        return OperationResults.SUCCESS
+    @rwlock.reading
+    def getAdditionalDocumentReferences(self, topic: Topic):
 
-    if not isProjectOpen():
-        return OperationResults.FAILURE
+        """ Returns a list of all document references of a topic """
 
-    realComment = curProject.searchObject(comment)
-    if realComment is None:
-        logger.error("Comment {} could not be found in the data model. Not"\
-                "modifying anything".format(comment))
-        return OperationResulsts.FAILURE
+        logger.debug("Retrieving list of document references to topic"\
+                " {}".format(topic.title))
+        if not self.isProjectOpen():
+            return OperationResults.FAILURE
 
-    oldVal = realComment.comment
-    realComment.comment = newText
-    realComment._comment.state = State.States.MODIFIED
-    writer.addProjectUpdate(curProject, realComment._comment, oldVal)
+        realTopic = self._searchRealTopic(topic)
+        if realTopic is None:
+            return OperationResults.FAILURE
 
-    # update `modDate` and `modAuthor`
-    setModDateAuthor(realComment, author)
+        docRefs = [ (ref.description, copy.deepcopy(ref))
+                    for ref in realTopic.docRefs ]
+        return docRefs
 
-    return _handleProjectUpdate("Could not modify comment.", projectBackup)
 
+    def _getRealTopic(self, element):
 
-def modifyElement(element, author=""):
+        """ Returns the topic of `project` to which `element` is associated.
 
-    """ Replace the old element in the data model with element.
+        If `element` could not be found inside the current project `None` is
+        returned. If `element` could not be associated to any existing topic `None`
+        is returned.
+        """
 
-    A reference to the old element in the data model is acquired via the `id`
-    member of `element`. This old element is updated with the new values. The
-    corresponding XML element is first deleted from file and then added again
-    with the new values.
+        logger.debug("Retrieving topic associated to {}".format(element))
+        realElement = self.project.searchObject(element)
+        if realElement is None:
+            logger.erroror("Element {} could not be found in the current project.")
+            return None
 
-    If `element` is of type Topic or Comment then `author` must be set, and then
-    `modAuthor` and `modDate` are updated.
-    """
+        elemHierarchy = realElement.getHierarchyList()
 
-    global curProject
-    projectBackup = copy.deepcopy(curProject)
-    logger.info("Modifying element {} in the"\
-            " project".format(element.__class__))
+        topic = None
+        for elem in elemHierarchy:
+            if isinstance(elem, Markup):
+                topic = elem.topic
+                break
+            elif isinstance(elem, Topic):
+                topic = elem
+                break
+            else:
+                continue
 
-    # ---- Checks ---- #
-    if not isProjectOpen():
-        return OperationResults.FAILURE
+        return topic
 
-    # is element of the right type
-    if not (issubclass(type(element), Identifiable) and
-            issubclass(type(element), State) and
-            issubclass(type(element), XMLName)):
-        logger.error("Element is not an object from the data model. Cannot"\
-                " update it")
-        return OperationResults.FAILURE
 
-    # ---- Operation ---- #
-    # get a reference to the real element in the data model
-    realElement = curProject.searchObject(element)
-    if realElement is None:
-        logger.error("{} object, that shall be changed, could not be"\
-                " found in the current project.".format(element.xmlName))
-        return OperationResults.FAILURE
+    @rwlock.reading
+    def getTopic(self, element):
 
-    # get the associated topic
-    realTopic = getTopic(realElement)
-    if realTopic is None:
-        logger.error("{} currently it is only possible to modify values of"\
-                " markup.bcf.")
-        return OperationResults.FAILURE
+        """ Returns a deep copy of the topic to which `element` is associated.
 
-    realElement.state = State.States.DELETED
-    writer.addProjectUpdate(curProject, realElement, None)
+        If `element` could not be found inside the current project, or could
+        not be associated to any existing topic `None` is returned.
+        """
 
-    # copy the state of the given element to the real element
-    for property, value in vars(element).items():
-        if property == "containingObject":
-            continue
-        setattr(realElement, property, copy.deepcopy(value))
+        topic = self._getRealTopic(element)
+        if topic is None:
+            return None
+        return copy.deepcopy(topic)
+
+
+    @rwlock.reading
+    def getTopicFromUUID(self, uid: UUID):
+
+        """ Search the data model for a topic where `topic.xmlId == uid` holds. """
+
+        logger.debug("Searching data model for topic with UUID {}".format(uid))
+        if not self.isProjectOpen():
+            logger.error("The project is not open. Open a project before"\
+                    " trying to retrieve a topic by UUID.")
+            return OperationResults.FAILURE
+
+        if not isinstance(uid, UUID):
+            logger.error("uid is not of type UUID. Can only get topic by UUID.")
+            return OperationResults.FAILURE
+
+        match = None
+        topics = [ item.topic for item in self.project.topicList ]
+        for topic in topics:
+            if topic.xmlId == uid:
+                match = copy.deepcopy(topic)
+                break
+
+        if match is None:
+            logger.error("Could not find a topic to that uid: {}".format(str(uid)))
+            return OperationResults.FAILURE
+
+        return match
+
+
+    @_writingWhenIdle
+    def addProject(self, name: str, extensionSchemaUri: ""):
+
+        """ Adds a new project to the current working directory.
+
+        This means essentially creating a new folder named `name` and placing one
+        new file in it, namely `project.bcfp`."""
+
+        logger.info("Adding new project with name {}".format(name))
+        newProject = p.Project(uuid4(), name, extensionSchemaUri)
+        newProject.stringPool = self.stringPool
+        newProject.state = State.States.ADDED
+
+        self.updates.add(newProject, newProject, None)
+        # the working directory has to exist right away
+        result = self._handleProjectUpdate("Project could not be created", None,
+                deferred=False)
+        if result == OperationResults.SUCCESS:
+            self.project = copy.deepcopy(newProject)
+
+        return result
+
+
+    @rwlock.writing
+    def addViewpointToComment(self, comment: Comment, viewpoint: ViewpointReference, author: str):
+
+        """ Add a reference to `viewpoint` inside `comment`.
+
+        If `comment` already referenced a viewpoint then it is updated. If no
+        viewpoint was refrerenced before then a new xml node is created. In both
+        cases `ModifiedAuthor` (`modAuthor`) and `ModifiedDate` (`modDate`) are
+        updated/set.
+        The modifications are recorded in an UndoLog. If an error occurs, they
+        are reverted.
+        """
+
+        undo = UndoLog(self.project)
+        logger.info("Adding new viewpoint reference to comment {}".format(comment))
+
+        if author == "":
+            logger.info("`author` is empty. Cannot update without an author.")
+            return OperationResults.FAILURE
+
+        if not self.isProjectOpen():
+            return OperationResults.FAILURE
+
+        realComment = self.project.searchObject(comment)
+        realViewpoint = self.project.searchObject(viewpoint)
+        if realComment == None:
+            logger.error("No matching comment was found in the current project.")
+            return OperationResults.FAILURE
+
+        if realViewpoint == None:
+            logger.error("No matching viewpoint was found in the current project.")
+            return OperationResults.FAILURE
+
+        modDate = utc.localize(datetime.datetime.now())
+
+        undo.setMember(realComment, "state", State.States.DELETED)
+        self.updates.add(self.project, realComment, None)
+
+        undo.setMember(realComment, "viewpoint", viewpoint)
+        realComment.state = State.States.ADDED
+        self.updates.add(self.project, realComment, None)
+
+        oldDate = realComment.modDate
+        undo.setMember(realComment, "modDate", modDate)
+        undo.setMember(realComment._modDate, "state", State.States.MODIFIED)
+        self.updates.add(self.project, realComment._modDate, oldDate)
+
+        oldAuthor = realComment.modAuthor
+        undo.setMember(realComment, "modAuthor", author)
+        undo.setMember(realComment._modAuthor, "state", State.States.MODIFIED)
+        self.updates.add(self.project, realComment._modAuthor, oldAuthor)
+
+        return self._handleProjectUpdate("Could not assign viewpoint.", undo)
+
+
+    @rwlock.writing
+    def addCurrentViewpoint(self, topic: Topic):
+
+        """ Reads the current view settings and adds them as viewpoint to `topic`
+
+        The view settings include:
+            - selection state of each ifc object
+            - color of each ifc object
+            - camera position and orientation
+        """
+
+        undo = UndoLog(self.project)
+        logger.info("Adding current view settings as viewpoint to topic"\
+                " {}".format(topic.title))
+
+        if not (GUI and FREECAD):
+            logger.error("Application is running either not inside FreeCAD or without"\
+                    " GUI. Thus cannot set camera position")
+            return OperationResults.FAILURE
+
+        doNotAdd = False
+        if not self.isProjectOpen():
+            logger.info("Project is not open. Viewpoint cannot be added to any"\
+                    " topic")
+            doNotAdd = True
+
+        realTopic = self._searchRealTopic(topic)
+        if realTopic is None:
+            logger.info("Viewpoint will not be added.")
+            doNotAdd = True
+
+        camSettings = None
+        try:
+            camSettings = vCtrl.readCamera()
+        except AttributeError as err:
+            logger.error("Camera settings could not be read. Make sure the 3D"\
+                    " view is active.")
+            logger.error(str(err))
+            return OperationResults.FAILURE
+        else:
+            if camSettings is None:
+                return OperationResults.FAILURE
+
+        if not doNotAdd:
+            realMarkup = realTopic.containingObject
+            vpGuid = uuid4()
+            oCamera = None
+            pCamera = None
+            if isinstance(camSettings, OrthogonalCamera):
+                oCamera = camSettings
+            elif isinstance(camSettings, PerspectiveCamera):
+                pCamera = camSettings
+
+            logger.info(str(camSettings))
+            vp = Viewpoint(vpGuid, None, oCamera, pCamera)
+            vp.state = State.States.ADDED
+            vpFileName = writer.generateViewpointFileName(realMarkup)
+            vpRef = ViewpointReference(vpGuid, Uri(vpFileName), None, -1, realMarkup,
+                    State.States.ADDED)
+            vpRef.viewpoint = vp
+            undo.append(realMarkup.viewpoints, vpRef)
+
+            self.updates.add(self.project, vpRef, None)
+            return self._handleProjectUpdate("Viewpoint could not be added. Rolling"\
+                    " back to previous state", undo)
+
+        print(camSettings)
+        return OperationResults.SUCCESS
+
+
+    @rwlock.writing
+    def addTopic(self, title: str, author: str, type: str = "", description = "",
+            status: str = "", priority: str = "", index: int = -1,
+            labels: List[str] = list(), dueDate: datetime = None, assignee: str = "",
+            stage: str = "", relatedTopics: List[UUID] = list(),
+            referenceLinks: List[str] = list(), bimSnippet: BimSnippet = None):
+
+        """ Adds a new topic to the project.
+
+        That entails that a new topic folder is created in the bcf file as well as
+        a new markup file created, with nothing set but the topic.
+        """
+
+        undo = UndoLog(self.project)
+        logger.info("Adding new topic({}) to project({})".format(title,
+            self.project.name))
+
+        if not self.isProjectOpen():
+            return OperationResults.FAILURE
+
+        # new guid for topic
+        guid = uuid4()
+
+        # create and add new markup to `project`, bot nto write yet
+        newMarkup = Markup(None, state = State.States.ADDED,
+                containingElement = self.project)
+        undo.append(self.project.topicList, newMarkup)
+
+        # create new topic and assign it to newMarkup
+        creationDate = utc.localize(datetime.datetime.now())
+        newTopic = Topic(guid, title, creationDate, self._pooled(author),
+                self._pooled(type), self._pooled(status), referenceLinks, list(),
+                self._pooled(priority), index, [ self._pooled(l) for l in labels ], None, "",
+                dueDate, self._pooled(assignee), description, self._pooled(stage),
+                relatedTopics, bimSnippet, newMarkup)
+        # state does not have to be set. Topic will be automatically added when
+        # adding the markup
+
+        newMarkup.topic = newTopic
+        self.updates.add(self.project, newMarkup, None)
+
+        return self._handleProjectUpdate("Could not add topic {} to"\
+                " project.".format(title), undo)
+
+
+    @rwlock.writing
+    def addComment(self, topic: Topic, text: str, author: str,
+            viewpoint: Viewpoint = None):
+
+        """ Add a new comment with content `text` to the topic.
+
+        The date of creation is sampled right at the start of this function.
+        The modifications are recorded in an UndoLog. If an error occurs, they
+        are reverted.
+        """
+
+        undo = UndoLog(self.project)
+        logger.info("Adding comment {} to topic {}".format(text, topic.title))
+
+        if not self.isProjectOpen():
+            return OperationResults.FAILURE
+
+        realTopic = self._searchRealTopic(topic)
+        if realTopic is None:
+            return OperationResults.FAILURE
+
+        realMarkup = realTopic.containingObject
+
+        creationDate = datetime.datetime.now()
+        localisedDate = utc.localize(creationDate)
+        guid = uuid4() # generate new random id
+        state = State.States.ADDED
+        comment = Comment(guid, localisedDate, self._pooled(author), text, viewpoint,
+                containingElement = realMarkup, state=state)
+        undo.append(realMarkup.comments, comment)
+
+        self.updates.add(self.project, comment, None)
+        return self._handleProjectUpdate("Error while adding {}".format(comment),
+                undo)
+
+
+    @rwlock.writing
+    def addFile(self, topic: Topic, ifcProject: str = "",
+            ifcSpatialStructureElement: str = "",
+            isExternal: bool = False,
+            filename: str = "",
+            reference: str = ""):
+
+        """ Add a new IFC file to the project.
+
+        This function assumes that the file already exists and only creates a
+        reference to it inside the data model. It does not copy an external file
+        into the project.
+        The modifications are recorded in an UndoLog. If an error occurs, they
+        are reverted.
+        """
+
+        undo = UndoLog(self.project)
+        logger.info("Adding new file({}) to topic({})".format(filename, topic.title))
+
+        if not isExternal:
+            if not util.doesFileExistInProject(reference):
+                logger.error("{} does not exist inside the project. Please check"\
+                        " the path. Or for copiing a new file to the project use: "\
+                        " plugin.copyFile(topic, fileAbsPath)".format(reference))
+                return OperationResults.FAILURE
+        elif not os.path.exists(reference):
+            logger.error("{} could not be found. Please check the path for"\
+                    " typos".format(reference))
+            return OperationResults.FAILURE
+
+        if not _isIfcGuid(ifcProject) or ifcProject == "":
+            logger.error("{} is not a valid IfcGuid. An Ifc guid has to be of"\
+                    " length 22 and contain alphanumeric characters including '_'"\
+                    " and '$'".format(ifcProject))
+
+        if (not _isIfcGuid(ifcSpatialStructureElement) or
+                ifcSpatialStructureElement == ""):
+            logger.error("{} is not a valid IfcGuid. An Ifc guid has to be of"\
+                    " length 22 and contain alphanumeric characters including '_'"\
+                    " and '$'".format(ifcProject))
+
+        if not self.isProjectOpen():
+            return OperationResults.FAILURE
+
+        realTopic = self._searchRealTopic(topic)
+        if realTopic is None:
+            return OperationResults.FAILURE
+
+        realMarkup = realTopic.containingObject
+
+        # create new header file and insert it into the data model
+        creationDate = datetime.datetime.now()
+        localisedDate = utc.localize(creationDate)
+        newFile = HeaderFile(self._pooled(ifcProject),
+                self._pooled(ifcSpatialStructureElement), isExternal,
+                self._pooled(filename), localisedDate, reference,
+                state = State.States.ADDED)
+        # create markup.header if needed
+        if realMarkup.header is None:
+            undo.setMember(realMarkup, "header", Header([newFile]))
+            realMarkup.header.state = State.States.ADDED
+            realMarkup.header.containingObject = realMarkup
+            self.updates.add(self.project, realMarkup.header, None)
+        else:
+            undo.append(realMarkup.header.files, newFile)
+        newFile.containingObject = realMarkup.header
+
+        self.updates.add(self.project, newFile, None)
+        return self._handleProjectUpdate("File could not be added. Project is reset to"\
+                " last valid state", undo)
+
+
+    @rwlock.writing
+    def addDocumentReference(self, topic: Topic,
+            guid: str = "",
+            isExternal: bool = False,
+            path: str = "",
+            description: str = ""):
+
+        """ Creates a new document reference and adds it to `topic`.
+
+        guid is the guid of the documentreference. If left alone a new random guid
+        is generated using uuid.uuid4().
+        isExternal == True => `path` is expected to be an absolute url,
+        isExternal == False => `path` is expected to be a relative url pointing to
+        a file in the project directory.
+        `path` to the file, and `description` is a human readable name of the
+        document.
+        The modifications are recorded in an UndoLog. If an error occurs, they
+        are reverted.
+        """
+
+        undo = UndoLog(self.project)
+        logger.info("Adding new document reference({}) to topic"\
+                " {}".format(description, topic.title))
+
+        if (path == "" and description == ""):
+            logger.info("Not adding an empty document reference")
+            return OperationResults.FAILURE
+
+        if not isExternal:
+            if not util.doesFileExistInProject(topic, path):
+                logger.error("{} does not exist inside the project. Please check"\
+                        " the path. Or for copiing a new file to the project use: "\
+                        " plugin.copyFile(topic, fileAbsPath)".format(path))
+                return OperationResults.FAILURE
+        elif not os.path.exists(path):
+            logger.info("{} could not be found on the file system. Assuming"\
+                    " that it resides somewhere on a network.".format(path))
+
+        # check if `guid` is a valid UUID and create a UUID object
+        guidU = UUID(int=0)
+        if isinstance(guid, UUID):
+            guidU = guid
+        elif guid == "":
+            # just generate a new guid
+            guidU = uuid4()
+        else:
+            try:
+                guidU = UUID(guid)
+            except ValueError as err:
+                logger.error("The supplied guid is malformed ({}).".format(guid))
+                return OperationResults.FAILURE
+
+        if not self.isProjectOpen():
+            return OperationResults.FAILURE
+
+        # get a reference of the tainted, supplied topic reference in the working
+        # copy of the project
+        realTopic = self._searchRealTopic(topic)
+        if realTopic is None:
+            return OperationResults.FAILURE
+
+        docRef = DocumentReference(guidU,
+                isExternal, path,
+                description, realTopic,
+                State.States.ADDED)
+        undo.append(realTopic.docRefs, docRef)
+
+        self.updates.add(self.project, docRef, None)
+        return self._handleProjectUpdate("Document reference could not be added."\
+                " Returning to last valid state...", undo)
+
+
+    @rwlock.writing
+    def addLabel(self, topic: Topic, label: str):
+
+        """ Add `label` as new label to `topic`
+
+        The modifications are recorded in an UndoLog. If an error occurs, they
+        are reverted.
+        """
+
+        undo = UndoLog(self.project)
+        logger.info("Adding new label({}) to topic {}".format(label, topic.title))
+
+        if label == "":
+            logger.info("Not adding an empty label.")
+            return OperationResults.FAILURE
+
+        if not self.isProjectOpen():
+            return OperationResults.FAILURE
+
+        # get a reference of the tainted, supplied topic reference in the working
+        # copy of the project
+        realTopic = self._searchRealTopic(topic)
+        if realTopic is None:
+            return OperationResults.FAILURE
+
+        # create and add a new label to `project`
+        addedLabel = undo.append(realTopic.labels, self._pooled(label))
+
+        self.updates.add(self.project, addedLabel, None)
+        return self._handleProjectUpdate("Label '{}' could not be added. Returning"\
+                " to last valid state...".format(label), undo)
+
+
+    @rwlock.writing
+    def deleteObject(self, object):
+
+        """ Deletes an arbitrary object from `project`.
+
+        The heavy lifting is done by writer.processProjectUpdates() and
+        project.deleteObject(). Former deletes the object from the file and latter
+        one deletes the object from the data model.
+        """
+
+        undo = UndoLog(self.project)
+        logger.info("Deleting object {} from project".format(object.__class__))
+
+        if not issubclass(type(object), Identifiable):
+            logger.error("Cannot delete {} since it doesn't inherit from"\
+                " interfaces.Identifiable".format(object))
+            return OperationResults.FAILURE
+
+        if not issubclass(type(object), Hierarchy):
+            logger.error("Cannot delete {} since it seems to be not part of" \
+                " the data model. It has to inherit from"\
+                " hierarchy.Hierarchy".format(object))
+            return OperationResults.FAILURE
+
+        if not self.isProjectOpen():
+            return OperationResults.FAILURE
+
+        realObject = self.project.searchObject(object)
+        if realObject is None:
+            # No rollback has to be done here, since the state of the project is not
+            # changed anyways.
+            logger.error("Object {} could not be found in project {}".format(
+                object.__class__, self.project.__class__))
+            return OperationResults.FAILURE
+
+        undo.setMember(realObject, "state", State.States.DELETED)
+        self.updates.add(self.project, realObject, None)
+        result = self._handleProjectUpdate("Object could not be deleted from "\
+                "data model" , undo)
+
+        # the modifications were already reverted by _handleProjectUpdate()
+        if result ==  OperationResults.FAILURE:
+            errMsg = "Couldn't delete {} from the file.".format(object)
+            logger.error(errMsg)
+            return OperationResults.FAILURE
+
+        # otherwise the object is removed from the data model as well. This is
+        # part of the same UndoLog, in case the worker reports a failure later
+        else:
+            undo.recordDeletion(realObject)
+            self.project.deleteObject(realObject)
+            return OperationResults.SUCCESS
+
+
+    @rwlock.writing
+    def modifyComment(self, comment: Comment, newText: str, author: str):
+
+        """ Change the text of `comment` to `newText` in the data model.
+
+        Alongside with the text, the modAuthor and modDate fields get overwritten
+        with `author` and the current datetime respectively.
+        If `newText` was left empty then the comment is going to be deleted.
+        The modifications are recorded in an UndoLog. If an error occurs, they
+        are reverted.
+        """
+
+        undo = UndoLog(self.project)
+        logger.info("Modifying comment({})".format(comment))
+
+        if newText == "":
+            logger.info("newText is empty. Deleting comment now.")
+            self.deleteObject(comment)
+            return OperationResults.SUCCESS
+
+        if not self.isProjectOpen():
+            return OperationResults.FAILURE
+
+        realComment = self.project.searchObject(comment)
+        if realComment is None:
+            logger.error("Comment {} could not be found in the data model. Not"\
+                    "modifying anything".format(comment))
+            return OperationResulsts.FAILURE
+
+        oldVal = realComment.comment
+        undo.setMember(realComment, "comment", newText)
+        undo.setMember(realComment._comment, "state", State.States.MODIFIED)
+        self.updates.add(self.project, realComment._comment, oldVal)
+
+        # update `modDate` and `modAuthor`
+        self.setModDateAuthor(realComment, author, undo=undo)
+
+        return self._handleProjectUpdate("Could not modify comment.", undo)
+
+
+    @rwlock.writing
+    def modifyElement(self, element, author=""):
+
+        """ Replace the old element in the data model with element.
+
+        A reference to the old element in the data model is acquired via the `id`
+        member of `element`. This old element is updated with the new values.
+        Only the simple elements and attributes whose values actually changed are
+        written, each one patched in place in the corresponding file. If the
+        structure of `element` differs from the old one (e.g. a list item was
+        added) the corresponding XML element is first deleted from file and then
+        added again with the new values.
+
+        If `element` is of type Topic or Comment then `author` must be set, and then
+        `modAuthor` and `modDate` are updated.
+        """
+
+        undo = UndoLog(self.project)
+        logger.info("Modifying element {} in the"\
+                " project".format(element.__class__))
+
+        # ---- Checks ---- #
+        if not self.isProjectOpen():
+            return OperationResults.FAILURE
+
+        # is element of the right type
+        if not (issubclass(type(element), Identifiable) and
+                issubclass(type(element), State) and
+                issubclass(type(element), XMLName)):
+            logger.error("Element is not an object from the data model. Cannot"\
+                    " update it")
+            return OperationResults.FAILURE
+
+        hasModification = (isinstance(element, Topic) or
+                isinstance(element, Comment))
+        if hasModification and (author == "" or author is None):
+            logger.error("{} can only be modified if the author of the"\
+                    " modification is given.".format(element.xmlName))
+            return OperationResults.FAILURE
+
+        # ---- Operation ---- #
+        # get a reference to the real element in the data model
+        realElement = self.project.searchObject(element)
+        if realElement is None:
+            logger.error("{} object, that shall be changed, could not be"\
+                    " found in the current project.".format(element.xmlName))
+            return OperationResults.FAILURE
+
+        # get the associated topic
+        realTopic = self._getRealTopic(realElement)
+        if realTopic is None:
+            logger.error("{} currently it is only possible to modify values of"\
+                    " markup.bcf.")
+            return OperationResults.FAILURE
+
+        changedMembers = _collectChangedMembers(realElement, element)
+        if changedMembers is not None:
+            logger.debug("Modifying {} value(s) in place".format(
+                len(changedMembers)))
+            for (member, newValue) in changedMembers:
+                oldValue = member.value
+                if member.xmlName in p.POOLED_NAMES:
+                    newValue = self._pooled(newValue)
+                undo.setMember(member, "value", newValue)
+                self._addMemberUpdate(member, oldValue)
+
+            if hasModification:
+                self.setModDateAuthor(realElement, author, undo=undo)
+
+        else:
+            logger.debug("Structure of {} changed. Replacing the whole"\
+                    " element".format(element.xmlName))
+            undo.setMember(realElement, "state", State.States.DELETED)
+            self.updates.add(self.project, realElement, None)
+
+            # copy the state of the given element to the real element
+            for property, value in element.getMembers().items():
+                if property in ("containingObject", "_fingerprint"):
+                    continue
+                undo.setMember(realElement, property, copy.deepcopy(value))
+
+            # if topic/comment was modified update `modDate` and `modAuthor`
+            if hasModification:
+                self.setModDateAuthor(realElement, author, False, undo)
+
+            realElement.state = State.States.ADDED
+            self.updates.add(self.project, realElement, None)
+            realElement.state = State.States.ORIGINAL
+
+        return self._handleProjectUpdate("Could not modify element {}".format(element.xmlName),
+                undo)
+
+
+defaultSession = ProjectSession(util.session, writer.updateQueue)
+""" Session the module level functions operate on """
+
+
+def __getattr__(name):
+
+    """ Resolves the names the members of `defaultSession` were available under
+    before they were moved into ProjectSession. """
+
+    if name in DEFAULT_SESSION_MEMBERS:
+        return getattr(defaultSession, DEFAULT_SESSION_MEMBERS[name])
+    raise AttributeError("module {} has no attribute {}".format(__name__,
+        name))
+
+
+def startUpdateWorker(dispatch=updateworker.directDispatch):
+
+    """ Wrapper for `defaultSession.startUpdateWorker()` """
+
+    defaultSession.startUpdateWorker(dispatch)
+
+
+def stopUpdateWorker():
+
+    """ Wrapper for `defaultSession.stopUpdateWorker()` """
+
+    defaultSession.stopUpdateWorker()
+
+
+def getLockMetrics():
+
+    """ Wrapper for `defaultSession.getLockMetrics()` """
+
+    return defaultSession.getLockMetrics()
+
+
+def isProjectOpen():
+
+    """ Wrapper for `defaultSession.isProjectOpen()` """
+
+    return defaultSession.isProjectOpen()
+
+
+def isProjectDirty():
+
+    """ Wrapper for `defaultSession.isProjectDirty()` """
+
+    return defaultSession.isProjectDirty()
+
+
+def saveProject(dstFile, serialize=False):
+
+    """ Wrapper for `defaultSession.saveProject()` """
+
+    return defaultSession.saveProject(dstFile, serialize)
+
+
+def saveProjectInBackground(dstFile, serialize=False, onProgress=None,
+        onDone=None, dispatch=updateworker.directDispatch):
+
+    """ Wrapper for `defaultSession.saveProjectInBackground()` """
+
+    return defaultSession.saveProjectInBackground(dstFile, serialize,
+            onProgress, onDone, dispatch)
+
+
+def waitForSaves():
+
+    """ Wrapper for `defaultSession.waitForSaves()` """
+
+    defaultSession.waitForSaves()
+
+
+def hasChangedSinceOpening(element):
+
+    """ Wrapper for `defaultSession.hasChangedSinceOpening()` """
+
+    return defaultSession.hasChangedSinceOpening(element)
+
+
+def openProject(bcfFile):
+
+    """ Wrapper for `defaultSession.openProject()` """
+
+    return defaultSession.openProject(bcfFile)
+
+
+def closeProject():
+
+    """ Wrapper for `defaultSession.closeProject()` """
+
+    defaultSession.closeProject()
+
+
+def discardProject():
+
+    """ Wrapper for `defaultSession.discardProject()` """
+
+    defaultSession.discardProject()
+
+
+def copyFileToProject(path: str, destName: str = "", topic: Topic = None):
+
+    """ Wrapper for `defaultSession.copyFileToProject()` """
+
+    return defaultSession.copyFileToProject(path, destName, topic)
+
+
+def setModDateAuthor(element, author="", addUpdate=True):
+
+    """ Wrapper for `defaultSession.setModDateAuthor()` """
+
+    return defaultSession.setModDateAuthor(element, author, addUpdate)
+
+
+def getProjectName():
+
+    """ Wrapper for `defaultSession.getProjectName()` """
+
+    return defaultSession.getProjectName()
+
+
+def getTopics():
+
+    """ Wrapper for `defaultSession.getTopics()` """
+
+    return defaultSession.getTopics()
+
+
+def getComments(topic: Topic, viewpoint: Viewpoint = None):
+
+    """ Wrapper for `defaultSession.getComments()` """
+
+    return defaultSession.getComments(topic, viewpoint)
+
+
+def getViewpoints(topic: Topic, realViewpoint = True):
+
+    """ Wrapper for `defaultSession.getViewpoints()` """
+
+    return defaultSession.getViewpoints(topic, realViewpoint)
+
+
+def getSnapshots(topic: Topic):
+
+    """ Wrapper for `defaultSession.getSnapshots()` """
+
+    return defaultSession.getSnapshots(topic)
+
+
+def getRelevantIfcFiles(topic: Topic):
+
+    """ Wrapper for `defaultSession.getRelevantIfcFiles()` """
+
+    return defaultSession.getRelevantIfcFiles(topic)
+
+
+def getAdditionalDocumentReferences(topic: Topic):
+
+    """ Wrapper for `defaultSession.getAdditionalDocumentReferences()` """
+
+    return defaultSession.getAdditionalDocumentReferences(topic)
+
+
+def getTopic(element):
+
+    """ Wrapper for `defaultSession.getTopic()` """
+
+    return defaultSession.getTopic(element)
+
+
+def getTopicFromUUID(uid: UUID):
+
+    """ Wrapper for `defaultSession.getTopicFromUUID()` """
+
+    return defaultSession.getTopicFromUUID(uid)
+
+
+def addProject(name: str, extensionSchemaUri: ""):
+
+    """ Wrapper for `defaultSession.addProject()` """
+
+    return defaultSession.addProject(name, extensionSchemaUri)
+
+
+def addViewpointToComment(comment: Comment, viewpoint: ViewpointReference, author: str):
+
+    """ Wrapper for `defaultSession.addViewpointToComment()` """
+
+    return defaultSession.addViewpointToComment(comment, viewpoint, author)
+
+
+def addCurrentViewpoint(topic: Topic):
+
+    """ Wrapper for `defaultSession.addCurrentViewpoint()` """
+
+    return defaultSession.addCurrentViewpoint(topic)
+
+
+def addTopic(title: str, author: str, type: str = "", description = "",
+        status: str = "", priority: str = "", index: int = -1,
+        labels: List[str] = list(), dueDate: datetime = None, assignee: str = "",
+        stage: str = "", relatedTopics: List[UUID] = list(),
+        referenceLinks: List[str] = list(), bimSnippet: BimSnippet = None):
+
+    """ Wrapper for `defaultSession.addTopic()` """
+
+    return defaultSession.addTopic(title, author, type, description, status,
+            priority, index, labels, dueDate, assignee, stage, relatedTopics,
+            referenceLinks, bimSnippet)
+
+
+def addComment(topic: Topic, text: str, author: str,
+        viewpoint: Viewpoint = None):
+
+    """ Wrapper for `defaultSession.addComment()` """
+
+    return defaultSession.addComment(topic, text, author, viewpoint)
+
+
+def addFile(topic: Topic, ifcProject: str = "",
+        ifcSpatialStructureElement: str = "",
+        isExternal: bool = False,
+        filename: str = "",
+        reference: str = ""):
+
+    """ Wrapper for `defaultSession.addFile()` """
+
+    return defaultSession.addFile(topic, ifcProject,
+            ifcSpatialStructureElement, isExternal, filename, reference)
+
+
+def addDocumentReference(topic: Topic,
+        guid: str = "",
+        isExternal: bool = False,
+        path: str = "",
+        description: str = ""):
+
+    """ Wrapper for `defaultSession.addDocumentReference()` """
+
+    return defaultSession.addDocumentReference(topic, guid, isExternal, path,
+            description)
+
+
+def addLabel(topic: Topic, label: str):
+
+    """ Wrapper for `defaultSession.addLabel()` """
+
+    return defaultSession.addLabel(topic, label)
+
+
+def deleteObject(object):
+
+    """ Wrapper for `defaultSession.deleteObject()` """
+
+    return defaultSession.deleteObject(object)
+
+
+def modifyComment(comment: Comment, newText: str, author: str):
+
+    """ Wrapper for `defaultSession.modifyComment()` """
+
+    return defaultSession.modifyComment(comment, newText, author)
+
+
+def modifyElement(element, author=""):
 
-    # if topic/comment was modified update `modDate` and `modAuthor`
-    if isinstance(realElement, Topic) or isinstance(realElement, Comment):
-        setModDateAuthor(realElement, author, False)
+    """ Wrapper for `defaultSession.modifyElement()` """
 
-    realElement.state = State.States.ADDED
-    writer.addProjectUpdate(curProject, realElement, None)
-    realElement.state = State.States.ORIGINAL
-    return _handleProjectUpdate("Could not modify element {}".format(element.xmlName),
-            projectBackup)
+    return defaultSession.modifyElement(element, author)
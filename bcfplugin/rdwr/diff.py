@@ -0,0 +1,438 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+"""
+Author: Patrick Podest
+Date: 2019-08-16
+Github: @podestplatz
+
+**** Description ****
+This file compares two revisions of a BCF file without reading them into the
+data model as a whole (see `diffArchives()`).
+
+Topics, comments and viewpoints are matched by their GUIDs. Each file inside
+an archive is first compared by the crc32 and the size the central directory
+of the zip file holds for it. Only if these differ the markup.bcf, or the
+viewpoint file, gets decoded from both archives and compared field by field.
+The result is a ChangeSet.
+"""
+
+import zipfile
+import xml.etree.ElementTree as ET
+from enum import Enum
+
+import bcfplugin
+import bcfplugin.rdwr.reader as reader
+from bcfplugin.rdwr.project import SimpleElement, Attribute, StringPool
+from bcfplugin.rdwr.uri import Uri
+
+logger = bcfplugin.createLogger(__name__)
+
+MARKUP_FILE = "markup.bcf"
+""" Name of the markup file inside every topic directory """
+
+VIEWPOINT_FIELDS = ["components", "oCamera", "pCamera", "lines",
+        "clippingPlanes", "bitmaps"]
+""" Members of Viewpoint that are compared if a viewpoint file changed """
+
+
+class ChangeType(Enum):
+
+    """ Kind of change of an element or file between two revisions """
+
+    ADDED = 1
+    REMOVED = 2
+    MODIFIED = 3
+
+
+class FieldChange(object):
+
+    """ Change of the value of one field, e.g. the title of a topic """
+
+    __slots__ = ("name", "oldValue", "newValue")
+
+    def __init__(self, name, oldValue, newValue):
+
+        self.name = name
+        self.oldValue = oldValue
+        self.newValue = newValue
+
+
+    def __str__(self):
+
+        return "{}: '{}' -> '{}'".format(self.name, self.oldValue,
+                self.newValue)
+
+
+class ElementChange(object):
+
+    """ Change of one comment or viewpoint, identified by its GUID (as
+    string).
+
+    `fields` lists the changed fields of modified elements, it is empty for
+    added and removed ones.
+    """
+
+    __slots__ = ("guid", "changeType", "fields")
+
+    def __init__(self, guid, changeType: ChangeType, fields = None):
+
+        self.guid = guid
+        self.changeType = changeType
+        self.fields = fields if fields is not None else list()
+
+
+    def __str__(self):
+
+        ret_str = "{} {}".format(self.changeType.name, self.guid)
+        for field in self.fields:
+            ret_str += "\n    {}".format(field)
+        return ret_str
+
+
+class TopicChange(ElementChange):
+
+    """ Change of one topic, identified by its GUID.
+
+    Apart from the changed fields of the topic itself, it holds the changes of
+    its comments and viewpoints. `files` lists the files of the topic
+    directory, other than markup.bcf, that were added, removed or modified,
+    as tuples `(name, ChangeType)`.
+    """
+
+    __slots__ = ("comments", "viewpoints", "files")
+
+    def __init__(self, guid, changeType: ChangeType, fields = None):
+
+        ElementChange.__init__(self, guid, changeType, fields)
+        self.comments = list()
+        self.viewpoints = list()
+        self.files = list()
+
+
+    def isEmpty(self):
+
+        """ Returns whether nothing but the content of a file changed, that is
+        not part of the data model (e.g. a snapshot was replaced) """
+
+        return (len(self.fields) == 0 and len(self.comments) == 0 and
+                len(self.viewpoints) == 0)
+
+
+    def __str__(self):
+
+        ret_str = ElementChange.__str__(self)
+        for comment in self.comments:
+            ret_str += "\n  Comment {}".format(comment)
+        for viewpoint in self.viewpoints:
+            ret_str += "\n  Viewpoint {}".format(viewpoint)
+        for (name, changeType) in self.files:
+            ret_str += "\n  File {} {}".format(changeType.name, name)
+        return ret_str
+
+
+class ChangeSet(object):
+
+    """ All changes between two revisions of a BCF file.
+
+    `topics` holds a TopicChange for every added, removed or modified topic,
+    ordered by GUID. `files` lists the files outside of the topic directories
+    (e.g. project.bcfp) that changed, as tuples `(name, ChangeType)`.
+    """
+
+    __slots__ = ("topics", "files")
+
+    def __init__(self):
+
+        self.topics = list()
+        self.files = list()
+
+
+    def getTopics(self, changeType: ChangeType):
+
+        """ Returns the changes of all topics of type `changeType` """
+
+        return [ topic for topic in self.topics
+                if topic.changeType == changeType ]
+
+
+    def isEmpty(self):
+
+        return len(self.topics) == 0 and len(self.files) == 0
+
+
+    def __str__(self):
+
+        lines = [ "File {} {}".format(changeType.name, name)
+                for (name, changeType) in self.files ]
+        lines += [ "Topic {}".format(topic) for topic in self.topics ]
+        return "\n".join(lines)
+
+
+def getMembers(archive: zipfile.ZipFile):
+
+    """ Groups the files of `archive` by the directory they are in.
+
+    Returns a dictionary mapping the name of each topic directory to another
+    dictionary, that maps the names of its files to their ZipInfo objects.
+    Files at the top level are listed under the key `""`.
+    """
+
+    directories = dict()
+    for info in archive.infolist():
+        if info.filename.endswith("/"):
+            continue
+
+        (directory, sep, name) = info.filename.rpartition("/")
+        directories.setdefault(directory, dict())[name] = info
+
+    return directories
+
+
+def isSameFile(oldInfo: zipfile.ZipInfo, newInfo: zipfile.ZipInfo):
+
+    """ Compares two archive members by their entries of the central
+    directory, without reading their contents. """
+
+    return oldInfo.CRC == newInfo.CRC and oldInfo.file_size == newInfo.file_size
+
+
+def diffFiles(oldFiles, newFiles):
+
+    """ Returns a list of tuples `(name, ChangeType)` for every file that
+    differs between the dictionaries `oldFiles` and `newFiles`, both mapping
+    names to ZipInfo objects. """
+
+    changes = list()
+    for name in sorted(set(oldFiles) | set(newFiles)):
+        if name not in newFiles:
+            changes.append((name, ChangeType.REMOVED))
+        elif name not in oldFiles:
+            changes.append((name, ChangeType.ADDED))
+        elif not isSameFile(oldFiles[name], newFiles[name]):
+            changes.append((name, ChangeType.MODIFIED))
+
+    return changes
+
+
+def _plainValue(value):
+
+    """ Unwraps the values of leaf elements and Uris, also inside lists """
+
+    if isinstance(value, (SimpleElement, Attribute)):
+        value = value.value
+    if isinstance(value, Uri):
+        value = value.uri
+    if isinstance(value, list):
+        value = [ _plainValue(item) for item in value ]
+    return value
+
+
+def getFieldValues(element):
+
+    """ Returns a dictionary mapping the name of every field of `element` to
+    its value.
+
+    The fields are the members contributing to the fingerprint of `element`
+    without the GUID, named after their properties (e.g. `title` for
+    `_title`). Referenced elements are represented by their GUID.
+    """
+
+    values = dict()
+    for (name, isReference) in element.getFingerprintMembers():
+        if name in ("_id", "_xmlname"):
+            continue
+
+        value = getattr(element, name, None)
+        if isReference and value is not None:
+            value = value.xmlId
+        values[name.lstrip("_")] = _plainValue(value)
+
+    return values
+
+
+def diffFields(oldValues, newValues):
+
+    """ Returns a FieldChange for every field that differs between the
+    dictionaries `oldValues` and `newValues` """
+
+    return [ FieldChange(name, oldValues.get(name), newValues.get(name))
+            for name in oldValues
+            if oldValues.get(name) != newValues.get(name) ]
+
+
+def diffElements(oldElements, newElements, getChangedFields):
+
+    """ Matches the elements of both lists by their GUID and returns an
+    ElementChange for every added, removed or modified one.
+
+    `getChangedFields(old, new)` has to return the list of FieldChanges of two
+    elements with the same GUID.
+    """
+
+    oldByGuid = { str(element.xmlId): element for element in oldElements }
+    newByGuid = { str(element.xmlId): element for element in newElements }
+
+    changes = list()
+    for (guid, element) in oldByGuid.items():
+        if guid not in newByGuid:
+            changes.append(ElementChange(guid, ChangeType.REMOVED))
+            continue
+
+        fields = getChangedFields(element, newByGuid[guid])
+        if len(fields) > 0:
+            changes.append(ElementChange(guid, ChangeType.MODIFIED, fields))
+
+    changes += [ ElementChange(guid, ChangeType.ADDED)
+            for guid in newByGuid if guid not in oldByGuid ]
+    return changes
+
+
+def readViewpoint(archive: zipfile.ZipFile, directory: str, vpRef):
+
+    """ Streams the viewpoint file `vpRef` references out of `archive`.
+    Returns `None` if it does not exist or is invalid. """
+
+    if vpRef.file is None:
+        return None
+
+    memberName = "{}/{}".format(directory, vpRef.file.uri)
+    try:
+        with archive.open(memberName) as vpFile:
+            return reader.streamViewpoint(vpFile)
+    except (ET.ParseError, KeyError, ValueError) as err:
+        logger.error("Viewpoint {} of {} could not be read: {}".format(
+            memberName, archive.filename, str(err)))
+        return None
+
+
+def readMarkup(archive: zipfile.ZipFile, directory: str, pool):
+
+    """ Decodes the markup.bcf of the topic `directory` out of `archive`.
+    Returns `None` if it is invalid. """
+
+    memberName = "{}/{}".format(directory, MARKUP_FILE)
+    try:
+        with archive.open(memberName) as markupFile:
+            return reader.decodeMarkup(markupFile, pool)
+    except (ET.ParseError, KeyError, ValueError) as err:
+        logger.error("{} of {} could not be read: {}".format(memberName,
+            archive.filename, str(err)))
+        return None
+
+
+def diffTopic(oldArchive, newArchive, directory, oldFiles, newFiles, pool):
+
+    """ Compares the topic in `directory` of both archives. Returns a
+    TopicChange, or `None` if the topic did not change at all. """
+
+    fileChanges = diffFiles(oldFiles, newFiles)
+    if len(fileChanges) == 0:
+        return None
+
+    change = TopicChange(directory, ChangeType.MODIFIED)
+    if MARKUP_FILE not in oldFiles or MARKUP_FILE not in newFiles:
+        logger.error("Topic {} has no {} in both files".format(directory,
+            MARKUP_FILE))
+        change.files = fileChanges
+        return change
+
+    oldMarkup = readMarkup(oldArchive, directory, pool)
+    newMarkup = readMarkup(newArchive, directory, pool)
+    if oldMarkup is None or newMarkup is None:
+        # the changes of the markup cannot be told, only that it changed
+        change.files = fileChanges
+        return change
+
+    change.files = [ (name, changeType) for (name, changeType) in fileChanges
+            if name != MARKUP_FILE ]
+    changedFiles = set([ name for (name, changeType) in fileChanges ])
+
+    change.fields = diffFields(getFieldValues(oldMarkup.topic),
+            getFieldValues(newMarkup.topic))
+    if oldMarkup.header != newMarkup.header:
+        change.fields.append(FieldChange("header", oldMarkup.header,
+            newMarkup.header))
+
+    change.comments = diffElements(oldMarkup.comments, newMarkup.comments,
+            lambda old, new: diffFields(getFieldValues(old),
+                getFieldValues(new)))
+
+    def diffViewpoints(oldVpRef, newVpRef):
+
+        fields = diffFields(getFieldValues(oldVpRef),
+                getFieldValues(newVpRef))
+        # the viewpoint files are only read if they changed
+        if (newVpRef.file is None or
+                (newVpRef.file.uri not in changedFiles and
+                oldVpRef.file == newVpRef.file)):
+            return fields
+
+        oldVp = readViewpoint(oldArchive, directory, oldVpRef)
+        newVp = readViewpoint(newArchive, directory, newVpRef)
+        for name in VIEWPOINT_FIELDS:
+            oldValue = getattr(oldVp, name, None)
+            newValue = getattr(newVp, name, None)
+            if oldValue != newValue:
+                fields.append(FieldChange(name, oldValue, newValue))
+        return fields
+
+    change.viewpoints = diffElements(oldMarkup.viewpoints,
+            newMarkup.viewpoints, diffViewpoints)
+
+    if change.isEmpty() and len(change.files) == 0:
+        # e.g. only the formatting of markup.bcf changed
+        return None
+    return change
+
+
+def diffArchives(oldFile: str, newFile: str):
+
+    """ Compares the BCF files `oldFile` and `newFile` and returns a
+    ChangeSet holding every difference of the latter to the former.
+
+    Only files whose crc32 or size differ are read, thus the time needed
+    depends mainly on the number of changed topics, not on the size of both
+    archives. Neither file is validated.
+    """
+
+    logger.info("Comparing {} to {}".format(oldFile, newFile))
+    changeSet = ChangeSet()
+    # the values of both revisions are compared, interning them makes most
+    # comparisons identity checks
+    pool = StringPool()
+    with zipfile.ZipFile(oldFile) as oldArchive, \
+            zipfile.ZipFile(newFile) as newArchive:
+        oldDirs = getMembers(oldArchive)
+        newDirs = getMembers(newArchive)
+
+        changeSet.files = diffFiles(oldDirs.pop("", {}), newDirs.pop("", {}))
+        for directory in sorted(set(oldDirs) | set(newDirs)):
+            if directory not in newDirs:
+                change = TopicChange(directory, ChangeType.REMOVED)
+            elif directory not in oldDirs:
+                change = TopicChange(directory, ChangeType.ADDED)
+            else:
+                change = diffTopic(oldArchive, newArchive, directory,
+                        oldDirs[directory], newDirs[directory], pool)
+
+            if change is not None:
+                changeSet.topics.append(change)
+
+    logger.info("{} topic(s) changed".format(len(changeSet.topics)))
+    return changeSet
@@ -0,0 +1,249 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+"""
+Author: Patrick Podest
+Date: 2019-08-16
+Github: @podestplatz
+
+**** Description ****
+This file exports the topics, comments and viewpoint references of a BCF
+archive as flat records, either as JSON lines or as CSV.
+
+The archive is neither extracted nor read into a project. Its markup files are
+parsed incrementally, one after the other, straight from the archive. Every
+record is written as soon as its element was parsed, and the element is
+dropped afterwards. Thereby the memory needed does not grow with the size of
+the archive, and no objects of the data model have to be created.
+
+Every record is a dictionary holding the columns of its type, listed in
+`RECORD_COLUMNS`, and the column "Record" naming the type. The columns are
+named after the elements and attributes of markup.xsd, the values are the ones
+written in the file (e.g. dates in ISO 8601). Which columns are written can be
+chosen, a column a record does not have is left empty. The files are not
+validated, see `rdwr.validator` for that.
+"""
+
+import csv
+import json
+import xml.etree.ElementTree as ET
+from zipfile import ZipFile
+
+import bcfplugin
+
+logger = bcfplugin.createLogger(__name__)
+
+RECORD_COLUMNS = {
+        "topic": ("Guid", "Title", "TopicType", "TopicStatus", "Priority",
+            "Index", "Labels", "CreationDate", "CreationAuthor",
+            "ModifiedDate", "ModifiedAuthor", "DueDate", "AssignedTo",
+            "Stage", "Description"),
+        "comment": ("Guid", "TopicGuid", "Date", "Author", "Comment",
+            "Viewpoint", "ModifiedDate", "ModifiedAuthor"),
+        "viewpoint": ("Guid", "TopicGuid", "Viewpoint", "Snapshot", "Index") }
+""" Columns of every type of record """
+
+RECORD_ELEMENTS = { "Topic": "topic", "Comment": "comment",
+        "Viewpoints": "viewpoint" }
+""" Type of the record every child element of Markup results in """
+
+FORMATS = ("jsonl", "csv")
+""" Formats `export()` can write """
+
+LIST_SEPARATOR = ";"
+""" Separates the items of a list, like the labels, in a CSV field """
+
+
+def getColumns(recordTypes=tuple(RECORD_COLUMNS)):
+
+    """ Returns the columns of all `recordTypes`, in the order they are first
+    listed in `RECORD_COLUMNS`, preceded by "Record" """
+
+    columns = [ "Record" ]
+    for recordType in recordTypes:
+        for column in RECORD_COLUMNS[recordType]:
+            if column not in columns:
+                columns.append(column)
+
+    return columns
+
+
+def _elementRecord(elem, recordType: str, topicGuid: str):
+
+    """ Create the record of type `recordType` out of the element `elem`.
+
+    Values are taken over as they are written in the file, only indices are
+    converted to int and labels are collected into a list. Empty elements
+    result in `None`.
+    """
+
+    columns = RECORD_COLUMNS[recordType]
+    record = dict.fromkeys(("Record",) + columns)
+    record["Record"] = recordType
+    for (name, value) in elem.attrib.items():
+        if name in record:
+            record[name] = value
+    if "TopicGuid" in record:
+        record["TopicGuid"] = topicGuid
+    if "Labels" in record:
+        record["Labels"] = list()
+
+    for child in elem:
+        column = child.tag
+        if column not in record or column == "Record":
+            continue
+
+        if column == "Viewpoint" and recordType == "comment":
+            value = child.get("Guid")
+        elif column == "Index" and child.text is not None:
+            value = int(child.text)
+        else:
+            value = child.text
+
+        if column == "Labels":
+            record[column].append(value)
+        else:
+            record[column] = value
+
+    return record
+
+
+def iterMarkupRecords(markupFile, recordTypes=tuple(RECORD_COLUMNS)):
+
+    """ Yield the records of the types `recordTypes` of the markup file
+    `markupFile`, a path or file object.
+
+    The file is parsed incrementally, the elements of a record are dropped as
+    soon as the record was created.
+    """
+
+    depth = 0
+    root = None
+    topicGuid = None
+    for (event, elem) in ET.iterparse(markupFile, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth != 1:
+            continue
+
+        recordType = RECORD_ELEMENTS.get(elem.tag)
+        if recordType == "topic":
+            # the topic precedes comments and viewpoints in markup.xsd
+            topicGuid = elem.get("Guid")
+        if recordType in recordTypes:
+            yield _elementRecord(elem, recordType, topicGuid)
+        root.clear()
+
+
+def iterRecords(bcfFile: str, recordTypes=tuple(RECORD_COLUMNS)):
+
+    """ Yield the records of the types `recordTypes` of all topics of the
+    archive `bcfFile`, one markup file after the other """
+
+    with ZipFile(bcfFile) as zipFile:
+        for member in zipFile.namelist():
+            if member.endswith("/markup.bcf"):
+                with zipFile.open(member) as markupFile:
+                    yield from iterMarkupRecords(markupFile, recordTypes)
+
+
+def writeJsonLines(records, out, columns=None):
+
+    """ Write every record of `records` as one line of JSON to the text file
+    `out`. If `columns` is given, exactly these are written in this order,
+    otherwise the columns of the respective record.
+
+    Returns the number of written records.
+    """
+
+    count = 0
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    for record in records:
+        if columns is not None:
+            record = { column: record.get(column) for column in columns }
+        out.write(encode(record))
+        out.write("\n")
+        count += 1
+
+    return count
+
+
+def writeCsv(records, out, columns):
+
+    """ Write `records` as CSV, with a header line of `columns`, to the text
+    file `out`. Lists are joined by `LIST_SEPARATOR`.
+
+    Returns the number of written records.
+    """
+
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    count = 0
+    for record in records:
+        row = list()
+        for column in columns:
+            value = record.get(column)
+            if value is None:
+                value = ""
+            elif isinstance(value, list):
+                value = LIST_SEPARATOR.join(value)
+            row.append(value)
+        writer.writerow(row)
+        count += 1
+
+    return count
+
+
+def export(bcfFile: str, out, format: str = "jsonl", columns=None,
+        recordTypes=tuple(RECORD_COLUMNS)):
+
+    """ Export the records of the types `recordTypes` of `bcfFile` to the text
+    file `out` in `format`, one of `FORMATS`.
+
+    If `columns` is not given, all columns of `recordTypes` are written (see
+    `getColumns()`), JSON lines only contain the columns of the respective
+    record then. A ValueError is raised for unknown formats, record types
+    or columns. Returns the number of written records.
+    """
+
+    if format not in FORMATS:
+        raise ValueError("Unknown format {}. Supported formats are:"\
+                " {}".format(format, FORMATS))
+    for recordType in recordTypes:
+        if recordType not in RECORD_COLUMNS:
+            raise ValueError("Unknown record type {}. Supported types are:"\
+                    " {}".format(recordType, tuple(RECORD_COLUMNS)))
+
+    allColumns = getColumns(recordTypes)
+    for column in (columns if columns is not None else list()):
+        if column not in allColumns:
+            raise ValueError("Records of type {} have no column {}".format(
+                recordTypes, column))
+
+    logger.debug("Exporting {} of {} as {}".format(recordTypes, bcfFile,
+        format))
+    records = iterRecords(bcfFile, recordTypes)
+    if format == "csv":
+        return writeCsv(records, out, columns if columns is not None else
+                allColumns)
+    return writeJsonLines(records, out, columns)
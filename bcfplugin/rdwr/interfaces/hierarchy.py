@@ -25,17 +25,145 @@ Github: @podestplatz
 See the class documentation.
 """
 
+import hashlib
+
+FINGERPRINT_SIZE = 16
+""" Size of a fingerprint in bytes """
+
+slotNames = dict()
+""" Maps a class to the names of all slots it and its bases define. See
+`getSlotNames()`. """
+
+fingerprintMembers = dict()
+""" Maps a class implementing Hierarchy to the members contributing to the
+fingerprint of its objects. See `Hierarchy.getFingerprintMembers()`. """
+
+
+def getSlotNames(cls):
+
+    """ Returns the names of all slots of `cls`, in the order of the method
+    resolution order, base classes first. """
+
+    names = slotNames.get(cls)
+    if names is None:
+        names = list()
+        for base in reversed(cls.__mro__):
+            for name in base.__dict__.get("__slots__", ()):
+                if name not in ("__weakref__", "__dict__"):
+                    names.append(name)
+        names = slotNames.setdefault(cls, tuple(names))
+
+    return names
+
+
+def updateDigest(digest, value):
+
+    """ Feed the contents of the member value `value` into `digest`.
+
+    Elements of the data model contribute their fingerprint, if they cache it,
+    otherwise their contents. Lists are fed element by element if they contain
+    elements of the data model, all other values by their representation.
+    Column-wise containers, like the ComponentList of a viewpoint, are
+    recognized by `containingObject` and contribute all other slots.
+    """
+
+    if isinstance(value, Hierarchy):
+        if value.cachesFingerprint():
+            digest.update(value.fingerprint)
+        else:
+            value.updateDigest(digest)
+
+    elif (isinstance(value, (list, tuple)) and
+            any(isinstance(item, Hierarchy) for item in value)):
+        digest.update("[{}".format(len(value)).encode("utf-8"))
+        for item in value:
+            updateDigest(digest, item)
+        digest.update(b"]")
+
+    elif (hasattr(type(value), "__slots__") and
+            hasattr(value, "containingObject")):
+        for name in getSlotNames(type(value)):
+            if name != "containingObject":
+                updateDigest(digest, getattr(value, name))
+
+    else:
+        digest.update(repr(value).encode("utf-8"))
+        digest.update(b"\0")
+
+
 class Hierarchy:
 
     """
     Every class implementing Hierarchy gets the member containingObject. This
     shall reference the object that hierarchically preceeds the object itself.
+
+    Like all other interfaces it does not define slots itself, the
+    implementing class has to list `containingObject` in its `__slots__`.
+
+    Along with the hierarchy every object gets a fingerprint, a hash over its
+    contents and the fingerprints of its children. Two objects are equal if
+    their fingerprints are. Classes that list `_fingerprint` in their
+    `__slots__` cache their fingerprint. Every assignment to a member of an
+    object drops the cached fingerprint of the object and of all its parents,
+    so after a modification only the modified branch has to be hashed again.
     """
 
+    __slots__ = ()
+
+    fingerprintIgnored = ("containingObject", "state", "_objectId",
+            "_fingerprint")
+    """ Members that do not contribute to the fingerprint """
+
+    fingerprintReferences = ()
+    """ Members that only reference an element somewhere else in the data model.
+    They contribute just their id to the fingerprint. """
+
     def __init__(self, containingObject=None):
         self.containingObject = containingObject
 
 
+    def __setattr__(self, name, value):
+
+        if name == "containingObject":
+            # the old parent loses a child, the new one gains one
+            oldParent = getattr(self, "containingObject", None)
+            super().__setattr__(name, value)
+            for parent in (oldParent, value):
+                if isinstance(parent, Hierarchy):
+                    parent.invalidateFingerprint()
+        elif name == "state":
+            # State keeps track of changes of `state`
+            super().__setattr__(name, value)
+        else:
+            object.__setattr__(self, name, value)
+            if name not in ("_objectId", "_fingerprint"):
+                self.invalidateFingerprint()
+
+
+    def __getstate__(self):
+
+        """ Leave the cached fingerprint out of pickles, it is computed again
+        when it is needed. """
+
+        members = self.getMembers()
+        members.pop("_fingerprint", None)
+        return (None, members)
+
+
+    def __setstate__(self, state):
+
+        """ Restore the members of a pickle created by `__getstate__()`.
+
+        The pickle holds the whole part of the hierarchy consistently, so
+        nothing has to be invalidated or tracked while it is restored. The
+        members are therefore set directly, bypassing `__setattr__()`.
+        """
+
+        (instanceDict, members) = state
+        for (name, value) in members.items():
+            object.__setattr__(self, name, value)
+
+
     def __eq__(self, other):
         if other is None:
             return False
@@ -71,6 +199,118 @@ class Hierarchy:
         return hierarchy
 
 
+    def getMembers(self):
+
+        """ Returns a dictionary mapping the name of every member of self to
+        its value.
+
+        This replaces `vars()`, which is not available for objects of classes
+        defining `__slots__`. Members that were not assigned yet are left out.
+        """
+
+        members = dict()
+        for name in getSlotNames(type(self)):
+            try:
+                members[name] = getattr(self, name)
+            except AttributeError:
+                pass
+
+        members.update(getattr(self, "__dict__", {}))
+        return members
+
+
+    def cachesFingerprint(self):
+
+        """ Returns whether the class of self lists `_fingerprint` in its
+        slots. """
+
+        return hasattr(type(self), "_fingerprint")
+
+
+    @property
+    def fingerprint(self):
+
+        """ Hash over the contents of self, as bytes.
+
+        It is calculated on first access and, if the class caches it, kept
+        until a member of self or one of its children is assigned.
+        """
+
+        fingerprint = getattr(self, "_fingerprint", None)
+        if fingerprint is None:
+            digest = hashlib.blake2b(digest_size=FINGERPRINT_SIZE)
+            self.updateDigest(digest)
+            fingerprint = digest.digest()
+            if self.cachesFingerprint():
+                object.__setattr__(self, "_fingerprint", fingerprint)
+
+        return fingerprint
+
+
+    @classmethod
+    def getFingerprintMembers(cls):
+
+        """ Returns a tuple `(name, isReference)` for every slot of `cls` that
+        contributes to the fingerprint. """
+
+        members = fingerprintMembers.get(cls)
+        if members is None:
+            members = list()
+            for name in getSlotNames(cls):
+                if name not in cls.fingerprintIgnored:
+                    members.append((name,
+                        name in cls.fingerprintReferences))
+            members = fingerprintMembers.setdefault(cls, tuple(members))
+
+        return members
+
+
+    def updateDigest(self, digest):
+
+        """ Feed the contents of self into `digest`. """
+
+        digest.update(type(self).__name__.encode("utf-8"))
+        for (name, isReference) in self.getFingerprintMembers():
+            value = getattr(self, name, None)
+            digest.update(name.encode("utf-8"))
+            if isReference and value is not None:
+                value = getattr(value, "xmlId", value.id)
+            updateDigest(digest, value)
+
+        if isinstance(self, list):
+            updateDigest(digest, list(self))
+
+
+    def invalidateFingerprint(self):
+
+        """ Drop the cached fingerprint of self and all its parents.
+
+        Going up the hierarchy stops at the first object that has no
+        fingerprint cached. Its parents do not have one either, since the
+        fingerprint of a parent is always calculated from the ones of its
+        children.
+        """
+
+        element = self
+        while element is not None:
+            if element.cachesFingerprint():
+                if getattr(element, "_fingerprint", None) is None:
+                    break
+                object.__setattr__(element, "_fingerprint", None)
+            element = getattr(element, "containingObject", None)
+
+
+    def fingerprintEquals(self, other):
+
+        """ Returns whether `other` is of the same type as self and has the
+        same fingerprint. """
+
+        if type(self) != type(other):
+            return False
+
+        return self.fingerprint == other.fingerprint
+
+
     @staticmethod
     def checkAndGetHierarchy(element):
 
@@ -32,10 +32,29 @@ class Identifiable:
     """
     This class supplies every object, that inherits it, with a unique id. This
     id shall not be changed during runtime and is only set at object creation.
+    The implementing class has to list `_objectId` in its `__slots__`.
     """
 
+    __slots__ = ()
+
     def __init__(self):
-        self.id = id(self)
+        self._objectId = None
+
+
+    @property
+    def id(self):
+
+        """ Defaults to the builtin `id()` of the object. Only if an id is
+        assigned explicitly, e.g. to a copy that shall keep the id of the
+        original object, it is stored. """
+
+        if self._objectId is None:
+            return id(self)
+        return self._objectId
+
+    @id.setter
+    def id(self, newVal):
+        self._objectId = newVal
 
 
     def searchObject(self, object):
@@ -55,8 +74,11 @@ class XMLIdentifiable:
     Holds the id the inheriting class should hold according to the xml file.
     This id is intended to be of type: UUID. Although it can also be a string,
     which, however, must be parsable as GUID for UUID.
+    The implementing class has to list `_id` in its `__slots__`.
     """
 
+    __slots__ = ()
+
     def __init__(self, uId = UUID):
         if not uId:
             raise ValueError("XMLId may not be `None`")
@@ -27,6 +27,65 @@ See the class documentation.
 
 from enum import Enum
 
+
+class DirtySet(object):
+
+    """ Keeps track of the objects of one project whose state is not
+    `State.States.ORIGINAL`, and of whether the project holds modifications
+    that were not saved yet (the dirty bit).
+
+    Objects register and unregister themselves whenever their state changes
+    (see `State`), so the pending changes are known without traversing the
+    whole project.
+    """
+
+    __slots__ = ("elements", "dirty")
+
+    def __init__(self):
+
+        # maps the id() of every object to the object, in insertion order
+        self.elements = dict()
+        self.dirty = False
+
+
+    def __reduce__(self):
+
+        """ The registered objects are left out of pickles, their states do
+        not outlast an update. """
+
+        return (DirtySet, ())
+
+
+    def __len__(self):
+
+        return len(self.elements)
+
+
+    def add(self, element):
+
+        self.elements[id(element)] = element
+
+
+    def discard(self, element):
+
+        self.elements.pop(id(element), None)
+
+
+    def getElements(self):
+
+        """ Returns all registered objects still part of the project.
+
+        Objects that were removed from the project together with one of their
+        parents did not unregister themselves, they are dropped here.
+        """
+
+        for element in list(self.elements.values()):
+            if element.isOriginal() or element.getDirtySet() is not self:
+                self.discard(element)
+
+        return list(self.elements.values())
+
+
 class State:
 
     """ Provides every implementing class with the notion of a state.
@@ -34,8 +93,17 @@ class State:
     Four states are provided: ORIGINAL, ADDED, DELETED and MODIFIEd. Alongside
     these state also convenience functions are provided, that exploit the added
     state property of an object.
+    The implementing class has to list `state` in its `__slots__`.
+
+    Every object whose state is not ORIGINAL is registered in the DirtySet of
+    the project it is part of, i.e. the one its topmost containing object
+    holds in `dirtySet`. An object that is not part of a project when its
+    state changes is registered once it gets added to one, its children are
+    not.
     """
 
+    __slots__ = ()
+
     class States(Enum):
         ORIGINAL = 1
         ADDED = 2
@@ -46,22 +114,80 @@ class State:
         self.state = state
 
 
+    def __setattr__(self, name, value):
+
+        original = State.States.ORIGINAL
+        if name == "state":
+            oldState = getattr(self, "state", original)
+            super().__setattr__(name, value)
+            if (oldState == original) != (value == original):
+                dirtySet = self.getDirtySet()
+                if dirtySet is not None and value == original:
+                    dirtySet.discard(self)
+                elif dirtySet is not None:
+                    dirtySet.add(self)
+
+        elif (name == "containingObject" and
+                getattr(self, "state", original) != original):
+            # move self to the dirty set of the new project
+            oldDirtySet = self.getDirtySet()
+            super().__setattr__(name, value)
+            dirtySet = self.getDirtySet()
+            if oldDirtySet is not dirtySet:
+                if oldDirtySet is not None:
+                    oldDirtySet.discard(self)
+                if dirtySet is not None:
+                    dirtySet.add(self)
+
+        else:
+            super().__setattr__(name, value)
+
+
     def isOriginal(self)-> 'bool':
         return self.state == State.States.ORIGINAL
 
 
+    def getDirtySet(self):
+
+        """ Returns the DirtySet of the project self is part of, or `None` if
+        self is not part of a project. """
+
+        element = self
+        parent = getattr(element, "containingObject", None)
+        while parent is not None:
+            element = parent
+            parent = getattr(element, "containingObject", None)
+
+        return getattr(element, "dirtySet", None)
+
+
     def getStateList(self)-> 'List[Tuple[State, Object]]':
 
         """
-        Every class implementing this function shall compile a list of tuples
-        one list element for each member object. Each list element has as first
-        tuple element the state of the object
-        (state.State.States.[ADDED|DELETED|MODIFIED|ORIGINAL]) and as second
-        element the object itself.
+        Compiles a list of tuples, one for self and every object below self
+        whose state is not ORIGINAL. Each list element has as first tuple
+        element the state of the object
+        (state.State.States.[ADDED|DELETED|MODIFIED]) and as second element
+        the object itself.
+
+        The objects are taken from the DirtySet of the project, so the time
+        needed depends on the number of changed objects, not on the size of
+        the project. Of an object that is not part of a project only the state
+        of self is known.
         """
+
+        dirtySet = self.getDirtySet()
+        if dirtySet is None:
+            if self.isOriginal():
+                return []
+            return [ (self.state, self) ]
+
         stateList = list()
-        if not self.isOriginal():
-            stateList.append((self.state, self))
+        for element in dirtySet.getElements():
+            parent = element
+            while parent is not None and parent is not self:
+                parent = getattr(parent, "containingObject", None)
+            if parent is self:
+                stateList.append((element.state, element))
 
         return stateList
-
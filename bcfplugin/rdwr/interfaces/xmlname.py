@@ -33,8 +33,11 @@ class XMLName:
     the node/attribute. Every class that corresponds to a node is also expected
     to implement getEtElement() which serializes the contents of itself into a
     object of type xml.etree.ElementTree.Element.
+    The implementing class has to list `_xmlname` in its `__slots__`.
     """
 
+    __slots__ = ()
+
     def __init__(self, name = ""):
         if name == "":
             self._xmlname = self.__class__.__name__
@@ -48,7 +51,7 @@ class XMLName:
         if type(self) != type(other):
             return False
 
-        return self._xmlname == other.xmlName
+        return self.xmlName == other.xmlName
 
 
     @property
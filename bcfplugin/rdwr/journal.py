@@ -0,0 +1,532 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+"""
+Author: Patrick Podest
+Date: 2019-08-16
+Github: @podestplatz
+
+**** Description ****
+The journal records every update of the data model, that was not yet written
+to the BCF file, in a file inside the state directory of the user. Thereby the
+writer is able to defer applying updates to the files of the working
+directory, while no update is lost if the application crashes in the
+meantime. On the next opening of the same BCF file the recorded updates are
+replayed.
+
+A journal file consists of a sequence of records. Each record is made up of a
+header, holding the length and the crc32 of the payload, followed by the
+payload as JSON. The first record holds the path of the BCF file the journal
+belongs to, every following record one update `(element, prevVal)`, or a
+rollback marker. A rollback marker revokes the updates recorded last, after
+they could not be written to file.
+The element of an update is the copy made by `writer.copyUpdateElement()`. It
+only contains the updated element and the objects above it, without their
+other children, so a record stays small regardless of the size of the
+project. Objects are encoded by their class and members, only classes of the
+data model are accepted when a record is decoded and their constructors are
+not run. Nothing read from a journal is executed.
+
+While a project is saved in the background, records may still be appended.
+Those that were appended after the snapshot of the save was taken are moved to
+the journal of the saved file afterwards (see `rebase()`).
+"""
+
+import os
+import json
+import time
+import zlib
+import struct
+import hashlib
+import threading
+from uuid import UUID
+from datetime import datetime
+from enum import Enum
+
+import bcfplugin
+import bcfplugin.util as util
+import bcfplugin.rdwr.project as p
+import bcfplugin.rdwr.markup as m
+import bcfplugin.rdwr.topic as t
+import bcfplugin.rdwr.viewpoint as v
+import bcfplugin.rdwr.threedvector as tdv
+import bcfplugin.rdwr.modification as mod
+import bcfplugin.rdwr.uri as u
+import bcfplugin.rdwr.interfaces.state as iS
+from bcfplugin.rdwr.interfaces.hierarchy import getSlotNames
+
+logger = bcfplugin.createLogger(__name__)
+
+JOURNAL_DIR = "journals"
+""" Name of the directory, inside the state directory of the user, holding the
+journal files """
+
+JOURNAL_FILE = "journal_{}.bin"
+""" Name of the journal file. It is formatted with a hash of the path of the
+BCF file the journal belongs to. """
+
+JOURNAL_FORMAT = 3
+""" Version of the layout of the records. Journals of other versions are
+ignored. """
+
+RECORD_HEADER = struct.Struct("<II")
+""" Header of every record: length and crc32 of the payload """
+
+SKIPPED_MEMBERS = ("_fingerprint", "_objectId", "dirtySet", "stringPool")
+""" Members that are not recorded. The fingerprint is computed again, object
+ids are only valid inside one process, the dirty set and string pool of a
+project are created anew. """
+
+
+class FsyncPolicy(Enum):
+
+    """ Determines when appended records are forced onto the disk.
+
+    Records are always handed to the operating system before an update
+    returns, so a crash of the application loses none of them. The policy
+    only matters if the operating system crashes or the power fails.
+    """
+
+    ALWAYS = 1 # after every appended batch of records
+    NEVER = 2 # leave it to the operating system
+    GROUP = 3 # at most once every `groupCommitInterval` seconds
+
+
+fsyncPolicy = FsyncPolicy.GROUP
+""" Policy used by `appendUpdates()`. With the default policy the records
+appended in the last `groupCommitInterval` seconds may be lost in a crash of
+the operating system. `FsyncPolicy.ALWAYS` closes that window, but costs a
+write to the disk on every update. """
+
+groupCommitInterval = 1.0
+""" Seconds between two forced writes under `FsyncPolicy.GROUP` """
+
+lastSync = dict()
+""" Maps the path of a journal to the time it was last forced onto the disk """
+
+lock = threading.RLock()
+""" Serializes the access to journal files. Hold it to keep the BCF file
+a journal belongs to from changing in between. """
+
+
+def _getClassName(cls):
+
+    return "{}.{}".format(cls.__module__.rsplit(".", 1)[-1], cls.__qualname__)
+
+
+def _collectClasses():
+
+    """ Returns a dictionary mapping the names of the classes of the data
+    model, as written to records, to the classes. """
+
+    classes = { _getClassName(iS.State.States): iS.State.States }
+    for module in (p, m, t, v, tdv, mod, u):
+        for value in vars(module).values():
+            if (isinstance(value, type) and
+                    value.__module__ == module.__name__):
+                classes[_getClassName(value)] = value
+
+    return classes
+
+
+modelClasses = _collectClasses()
+""" The only classes that objects of a record may be of """
+
+
+def _encodeJson(value):
+
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _encode(value, objects):
+
+    """ Returns `value` as value that can be written by `json`.
+
+    `objects` maps the `id()` of every object of the data model encoded so far
+    to its index. Objects referenced a second time, e.g. by `containingObject`,
+    are encoded by that index.
+    """
+
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    elif isinstance(value, UUID):
+        return { "uuid": str(value) }
+    elif isinstance(value, datetime):
+        return { "datetime": value.isoformat() }
+    elif isinstance(value, Enum):
+        return { "enum": _getClassName(type(value)), "name": value.name }
+    elif isinstance(value, tuple):
+        return { "tuple": [ _encode(item, objects) for item in value ] }
+    elif type(value) is list:
+        return [ _encode(item, objects) for item in value ]
+
+    className = _getClassName(type(value))
+    if modelClasses.get(className) is not type(value):
+        raise TypeError("{} cannot be recorded in the journal".format(
+            type(value)))
+
+    if id(value) in objects:
+        return { "ref": objects[id(value)] }
+    objects[id(value)] = len(objects)
+
+    # members that are left out are `None` after decoding
+    members = dict()
+    for name in getSlotNames(type(value)):
+        member = getattr(value, name, None)
+        if name not in SKIPPED_MEMBERS and member is not None:
+            members[name] = _encode(member, objects)
+    encoded = { "class": className, "members": members }
+    if isinstance(value, list):
+        encoded["items"] = [ _encode(item, objects) for item in value ]
+
+    return encoded
+
+
+def _decode(value, objects):
+
+    """ Inverse of `_encode()`. `objects` is the list of all objects of the
+    data model decoded so far. """
+
+    if isinstance(value, list):
+        return [ _decode(item, objects) for item in value ]
+    elif not isinstance(value, dict):
+        return value
+    elif "uuid" in value:
+        return UUID(value["uuid"])
+    elif "datetime" in value:
+        return datetime.fromisoformat(value["datetime"])
+    elif "enum" in value:
+        cls = modelClasses[value["enum"]]
+        if not issubclass(cls, Enum):
+            raise ValueError("{} is no enumeration".format(value["enum"]))
+        return cls[value["name"]]
+    elif "tuple" in value:
+        return tuple(_decode(item, objects) for item in value["tuple"])
+    elif "ref" in value:
+        return objects[value["ref"]]
+
+    cls = modelClasses[value["class"]]
+    if issubclass(cls, Enum):
+        raise ValueError("{} is no class of the data model".format(
+            value["class"]))
+    # the members are set as they were recorded, nothing is tracked or
+    # invalidated meanwhile
+    obj = cls.__new__(cls)
+    objects.append(obj)
+    slots = getSlotNames(cls)
+    for name in slots:
+        object.__setattr__(obj, name, None)
+    for (name, member) in value["members"].items():
+        if name not in slots:
+            raise ValueError("{} has no member {}".format(value["class"],
+                name))
+        object.__setattr__(obj, name, _decode(member, objects))
+    if isinstance(obj, list):
+        list.extend(obj, _decode(value.get("items", []), objects))
+    if isinstance(obj, p.Project):
+        object.__setattr__(obj, "dirtySet", iS.DirtySet())
+        object.__setattr__(obj, "stringPool", p.StringPool())
+
+    return obj
+
+
+def encodeUpdate(element, prevVal):
+
+    """ Returns the payload of the record of the update `(element, prevVal)`
+    """
+
+    objects = dict()
+    record = { "element": _encode(element, objects),
+            "prevVal": _encode(prevVal, objects) }
+    return _encodeJson(record)
+
+
+def decodeRecord(payload):
+
+    """ Returns the record `payload` holds. That is either a tuple
+    `(element, prevVal)` or a dictionary. """
+
+    record = json.loads(payload.decode("utf-8"))
+    if "element" not in record:
+        return record
+
+    objects = list()
+    element = _decode(record["element"], objects)
+    prevVal = _decode(record["prevVal"], objects)
+    return (element, prevVal)
+
+
+def getJournalDir():
+
+    """ Returns the directory holding the journal files.
+
+    The directory is created, accessible by the user only, if it does not
+    exist. A PermissionError is raised if it is not private to the user, since
+    the updates read from it are applied to the project.
+    """
+
+    journalDir = os.path.join(util.getUserStateDir(), JOURNAL_DIR)
+    os.makedirs(journalDir, mode=0o700, exist_ok=True)
+    if not util.isPrivateDir(journalDir):
+        raise PermissionError("{} is not private to the current user. Its"\
+                " journals are not trusted.".format(journalDir))
+
+    return journalDir
+
+
+def getJournalPath(archive):
+
+    """ Returns the path of the journal file belonging to the BCF file
+    `archive`. """
+
+    archiveHash = hashlib.sha1(os.path.abspath(archive).encode("utf-8"))
+    journalName = JOURNAL_FILE.format(archiveHash.hexdigest()[:16])
+    return os.path.join(getJournalDir(), journalName)
+
+
+def _packRecord(payload):
+
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _writeRecords(journalPath, records, mode):
+
+    with open(journalPath, mode) as f:
+        for record in records:
+            f.write(record)
+        f.flush()
+
+        now = time.monotonic()
+        if (fsyncPolicy == FsyncPolicy.ALWAYS or
+                (fsyncPolicy == FsyncPolicy.GROUP and
+                now - lastSync.get(journalPath, 0) >= groupCommitInterval)):
+            os.fsync(f.fileno())
+            lastSync[journalPath] = now
+
+
+def _getArchiveStats(archive):
+
+    """ Returns the list `[size, mtime]` of the BCF file `archive`, with the
+    modification time in nanoseconds, or `None` if it cannot be accessed.
+
+    The journal only applies to the revision of `archive` it was started for.
+    If another file is copied to the same path, its size or modification time
+    differ.
+    """
+
+    try:
+        stats = os.stat(archive)
+    except OSError:
+        return None
+    return [ stats.st_size, stats.st_mtime_ns ]
+
+
+def reset(archive):
+
+    """ Start a new, empty journal for the BCF file `archive`. """
+
+    logger.debug("Starting new journal for {}".format(archive))
+    header = _encodeJson({ "archive": os.path.abspath(archive),
+        "format": JOURNAL_FORMAT, "stats": _getArchiveStats(archive) })
+    with lock:
+        _writeRecords(getJournalPath(archive), [ _packRecord(header) ], "wb")
+
+
+def discard(archive):
+
+    """ Delete the journal of the BCF file `archive`. """
+
+    journalPath = getJournalPath(archive)
+    with lock:
+        if os.path.exists(journalPath):
+            logger.debug("Discarding journal {}".format(journalPath))
+            os.remove(journalPath)
+        lastSync.pop(journalPath, None)
+
+
+def appendUpdates(archive, updates):
+
+    """ Append one record for every update in `updates` to the journal of
+    `archive`.
+
+    `updates` is a list of tuples as stored in `writer.UpdateQueue.updates`. The
+    function returns after all records are written, and depending on
+    `fsyncPolicy`, forced onto the disk.
+    """
+
+    records = [ _packRecord(encodeUpdate(element, prevVal))
+            for (project, element, prevVal) in updates ]
+
+    journalPath = getJournalPath(archive)
+    with lock:
+        if not os.path.exists(journalPath):
+            reset(archive)
+
+        logger.debug("Appending {} record(s) to {}".format(len(records),
+            journalPath))
+        _writeRecords(journalPath, records, "ab")
+
+
+def appendRollback(archive, count):
+
+    """ Revoke the last `count` updates recorded in the journal of
+    `archive`. """
+
+    journalPath = getJournalPath(archive)
+    marker = _encodeJson({ "rollback": count })
+    with lock:
+        if not os.path.exists(journalPath):
+            return
+
+        logger.debug("Revoking {} record(s) of {}".format(count, journalPath))
+        _writeRecords(journalPath, [ _packRecord(marker) ], "ab")
+
+
+def getOffset(archive):
+
+    """ Returns the current end of the journal of `archive`, to be passed to
+    `rebase()` later on. """
+
+    journalPath = getJournalPath(archive)
+    with lock:
+        if not os.path.exists(journalPath):
+            return 0
+        return os.path.getsize(journalPath)
+
+
+def _readRecords(journalPath):
+
+    """ Returns the payloads of all complete records of the journal file
+    `journalPath`, each as tuple `(offset, payload)`. `offset` is the position
+    of the record in the file. """
+
+    with open(journalPath, "rb") as f:
+        content = f.read()
+
+    records = list()
+    offset = 0
+    while offset + RECORD_HEADER.size <= len(content):
+        (length, crc) = RECORD_HEADER.unpack_from(content, offset)
+        start = offset + RECORD_HEADER.size
+        payload = content[start:start+length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            logger.warning("Journal {} ends in an incomplete record. It is"\
+                    " ignored".format(journalPath))
+            break
+        records.append((offset, payload))
+        offset = start + length
+
+    return records
+
+
+def rebase(archive, offset, newArchive):
+
+    """ Move the records appended to the journal of `archive` after `offset`
+    to the journal of `newArchive`.
+
+    This is used after the working directory, in the state it had when the
+    journal of `archive` ended at `offset`, was saved to `newArchive`. All
+    records before `offset` are contained in `newArchive`, thus only the later
+    ones are kept. The journal of `archive` is discarded, and if no record is
+    left, the one of `newArchive` as well.
+    """
+
+    with lock:
+        journalPath = getJournalPath(archive)
+        kept = list()
+        if os.path.exists(journalPath):
+            # the first record is the header of `archive`
+            kept = [ payload for (start, payload) in
+                    _readRecords(journalPath)[1:] if start >= offset ]
+
+        discard(archive)
+        discard(newArchive)
+        if len(kept) > 0:
+            logger.debug("Moving {} record(s) to the journal of {}".format(
+                len(kept), newArchive))
+            reset(newArchive)
+            _writeRecords(getJournalPath(newArchive), [ _packRecord(payload)
+                for payload in kept ], "ab")
+
+
+def _readHeader(payload):
+
+    """ Returns the header record `payload` holds, or `None` if it is no valid
+    one """
+
+    try:
+        header = json.loads(payload.decode("utf-8"))
+    except ValueError:
+        return None
+    if not isinstance(header, dict):
+        return None
+    return header
+
+
+def readUpdates(archive):
+
+    """ Read all updates recorded in the journal of `archive`.
+
+    Returns a list of tuples `(element, prevVal)` in the order they were
+    recorded. A record that was not written completely, because of a crash,
+    ends the journal, so does a record that cannot be decoded. If no journal
+    exists for `archive` an empty list is returned. The same holds if
+    `archive` was replaced since the journal was started, in this case the
+    journal is discarded.
+    """
+
+    journalPath = getJournalPath(archive)
+    with lock:
+        if not os.path.exists(journalPath):
+            return []
+        payloads = [ payload for (start, payload) in
+                _readRecords(journalPath) ]
+
+    header = _readHeader(payloads[0]) if len(payloads) > 0 else None
+    if (header is None or header.get("format") != JOURNAL_FORMAT or
+            header.get("archive") != os.path.abspath(archive)):
+        logger.warning("Journal {} does not belong to {}. It is"\
+                " ignored.".format(journalPath, archive))
+        return []
+
+    if header.get("stats") != _getArchiveStats(archive):
+        logger.warning("{} changed since its journal was started, the"\
+                " unsaved changes recorded in it are discarded.".format(
+                    archive))
+        with lock:
+            discard(archive)
+        return []
+
+    updates = list()
+    for payload in payloads[1:]:
+        try:
+            record = decodeRecord(payload)
+            if isinstance(record, dict):
+                count = int(record["rollback"])
+                updates = updates[:len(updates)-count]
+                continue
+        except (ValueError, TypeError, KeyError, IndexError,
+                AttributeError) as exc:
+            logger.warning("Journal {} contains a record that cannot be"\
+                    " read, the rest of it is ignored. Error: {}".format(
+                        journalPath, exc))
+            break
+
+        updates.append(record)
+
+    return updates
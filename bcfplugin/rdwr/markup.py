@@ -51,6 +51,10 @@ class HeaderFile(Hierarchy, State, XMLName, Identifiable):
 
     """ Represents the XML type markup.xsd:Header/File """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "_objectId",
+            "_ifcProjectId", "_ifcSpatialStructureElement", "_external",
+            "_filename", "_time", "_reference", "_fingerprint")
+
     def __init__(self,
             ifcProjectId: str = "",
             ifcSpatialStructureElement: str = "",
@@ -71,7 +75,8 @@ class HeaderFile(Hierarchy, State, XMLName, Identifiable):
                 self)
         self._external = Attribute(isExternal, "isExternal", True, self)
         self._filename = SimpleElement(filename, "Filename", "", self)
-        self._time = SimpleElement(time, "Date", None, self)
+        self._time = ModificationDate(time, self)
+        self._time.xmlName = "Date"
         self._reference = SimpleElement(reference, "Reference", "", self)
 
 
@@ -108,19 +113,11 @@ class HeaderFile(Hierarchy, State, XMLName, Identifiable):
     def __eq__(self, other):
 
         """
-        Returns true if every variable member of both classes are the same
+        Returns true if both objects are of the same type and have the same
+        fingerprint
         """
 
-        if type(self) != type(other):
-            return False
-
-        return (self.ifcProjectId == other.ifcProjectId and
-                self.ifcSpatialStructureElement ==
-                other.ifcSpatialStructureElement and
-                self.external == other.external and
-                self.filename == other.filename and
-                self.time == other.time and
-                self.reference == other.reference)
+        return self.fingerprintEquals(other)
 
 
     def __str__(self):
@@ -233,21 +230,6 @@ class HeaderFile(Hierarchy, State, XMLName, Identifiable):
         return elem
 
 
-    def getStateList(self):
-
-        stateList = list()
-        if not self.isOriginal():
-            stateList.append((self.state, self))
-
-        stateList += self._ifcProjectId.getStateList()
-        stateList += self._ifcSpatialStructureElement.getStateList()
-        stateList += self._external.getStateList()
-        stateList += self._filename.getStateList()
-        stateList += self._reference.getStateList()
-
-        return stateList
-
-
     def searchObject(self, object):
 
         if not issubclass(type(object), Identifiable):
@@ -267,6 +249,9 @@ class Header(Hierarchy, State, XMLName, Identifiable):
 
     """ Represents the XML type markup.xsd:Header. """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "_objectId", "files",
+            "_fingerprint")
+
     def __init__(self,
                 files: List[HeaderFile] = list(),
                 containingElement = None,
@@ -298,16 +283,14 @@ class Header(Hierarchy, State, XMLName, Identifiable):
         return cpy
 
 
-    def getStateList(self):
-
-        stateList = list()
-        if not self.isOriginal():
-            stateList.append((self.state, self))
+    def __eq__(self, other):
 
-        for f in self.files:
-            stateList += f.getStateList()
+        """
+        Returns true if both objects are of the same type and have the same
+        fingerprint
+        """
 
-        return stateList
+        return self.fingerprintEquals(other)
 
 
     def searchObject(self, object):
@@ -355,6 +338,9 @@ class ViewpointReference(Hierarchy, State, XMLIdentifiable, XMLName,
     It represents the XML type markup.xsd:ViewPoint
     """
 
+    __slots__ = ("containingObject", "state", "_id", "_xmlname", "_objectId",
+            "_file", "_snapshot", "_index", "_viewpoint", "_fingerprint")
+
     def __init__(self,
             id: UUID,
             file: Uri = None,
@@ -405,20 +391,11 @@ class ViewpointReference(Hierarchy, State, XMLIdentifiable, XMLName,
     def __eq__(self, other):
 
         """
-        Returns true if every variable member of both classes are the same
+        Returns true if both objects are of the same type and have the same
+        fingerprint
         """
 
-        if other is None:
-            return False
-
-        if type(self) != type(other):
-            return False
-
-        return (self.xmlId == other.xmlId and
-                self.file == other.file and
-                self.snapshot == other.snapshot and
-                self.index == other.index and
-                self.viewpoint == other.viewpoint)
+        return self.fingerprintEquals(other)
 
 
     def __str__(self):
@@ -509,22 +486,6 @@ class ViewpointReference(Hierarchy, State, XMLIdentifiable, XMLName,
         return elem
 
 
-    def getStateList(self):
-
-        stateList = list()
-        if not self.isOriginal():
-            stateList.append((self.state, self))
-
-        stateList += self._file.getStateList()
-        stateList += self._snapshot.getStateList()
-        stateList += self._index.getStateList()
-
-        if self.viewpoint is not None:
-            stateList += self._viewpoint.getStateList()
-
-        return stateList
-
-
     def searchObject(self, object):
 
         if not issubclass(type(object), Identifiable):
@@ -544,6 +505,13 @@ class Comment(Hierarchy, XMLIdentifiable, State, XMLName, Identifiable):
 
     """ Class representing the XML type markup.bcf:Comment. """
 
+    __slots__ = ("containingObject", "_id", "state", "_xmlname", "_objectId",
+            "_comment", "viewpoint", "_date", "_author", "_modDate",
+            "_modAuthor", "_fingerprint")
+
+    # the viewpoint belongs to the markup, the comment just refers to it
+    fingerprintReferences = ("viewpoint",)
+
     def __init__(self,
             guid: UUID,
             date: datetime,
@@ -608,30 +576,11 @@ class Comment(Hierarchy, XMLIdentifiable, State, XMLName, Identifiable):
     def __eq__(self, other):
 
         """
-        Returns true if every variable member of both classes are the same
+        Returns true if both objects are of the same type and have the same
+        fingerprint
         """
 
-        if other is None:
-            return False
-
-        if type(self) != type(other):
-            return False
-
-        return (self.idEquals(other.xmlId) and
-                (self.date == other.date or
-                    (self.date is None and
-                    other.date is None)) and
-                (self.author == other.author) and
-                (self.comment == other.comment or
-                    (self.comment is None and
-                    other.comment is None)) and
-                (self.viewpoint == other.viewpoint or
-                    (self.viewpoint is None and
-                    other.viewpoint is None)) and
-                (self.modDate == other.modDate or
-                    (self.modDate is None and
-                    other.modDate is None)) and
-                (self.modAuthor == other.modAuthor))
+        return self.fingerprintEquals(other)
 
 
     def __str__(self):
@@ -731,20 +680,6 @@ class Comment(Hierarchy, XMLIdentifiable, State, XMLName, Identifiable):
         return elem
 
 
-    def getStateList(self):
-
-        stateList = list()
-        if not self.isOriginal():
-            stateList.append((self.state, self))
-
-        stateList += self.creation.getStateList()
-        stateList += self._comment.getStateList()
-        # viewpoint is already added to list by Markup
-        stateList += self.lastModification.getStateList()
-
-        return stateList
-
-
     def searchObject(self, object):
 
         if not issubclass(type(object), Identifiable):
@@ -766,6 +701,12 @@ class Markup(Hierarchy, State, XMLName, Identifiable):
     """ Represents both the XML type markup.bcf:Markup and the markup.bcf file
     itself. """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "_objectId", "header",
+            "topic", "comments", "viewpoints", "snapshotFiles", "_fingerprint")
+
+    # paths into the working directory, they differ from session to session
+    fingerprintIgnored = Hierarchy.fingerprintIgnored + ("snapshotFiles",)
+
     def __init__(self,
             topic: Topic,
             header: Header = None,
@@ -821,16 +762,11 @@ class Markup(Hierarchy, State, XMLName, Identifiable):
     def __eq__(self, other):
 
         """
-        Returns true if every variable member of both classes are the same
+        Returns true if both objects are of the same type and have the same
+        fingerprint
         """
 
-        if type(self) != type(other):
-            return False
-
-        return (self.header == other.header and
-                self.topic == other.topic and
-                self.comments == other.comments and
-                self.viewpoints == other.viewpoints)
+        return self.fingerprintEquals(other)
 
 
     def __str__(self):
@@ -922,26 +858,6 @@ class Markup(Hierarchy, State, XMLName, Identifiable):
         return elem
 
 
-    def getStateList(self):
-
-        stateList = list()
-        if not self.isOriginal():
-            stateList.append((self.state, self))
-
-        stateList += self.topic.getStateList()
-        if self.header is not None:
-            stateList += self.header.getStateList()
-
-        for comment in self.comments:
-            stateList += comment.getStateList()
-
-        for viewpoint in self.viewpoints:
-            stateList += viewpoint.getStateList()
-
-
-        return stateList
-
-
     def searchObject(self, object):
 
         if not issubclass(type(object), Identifiable):
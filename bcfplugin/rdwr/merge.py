@@ -0,0 +1,669 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+"""
+Author: Patrick Podest
+Date: 2019-08-16
+Github: @podestplatz
+
+**** Description ****
+This file merges two revisions of a BCF file, "ours" and "theirs", that were
+both derived from the same "base" revision (see `mergeArchives()`). It can
+also be run from the command line:
+
+    python -m bcfplugin.rdwr.merge base.bcf ours.bcf theirs.bcf merged.bcf
+
+The archives are processed one topic directory at a time. A directory that was
+changed by at most one side is copied from that side as raw zip members,
+without being decompressed. Only the markup.bcf of topics changed by both
+sides is decoded from all three archives and merged:
+    - the fields of the topic (title, status, ...), the header and the
+      viewpoints are merged three-way.
+    - comments are matched by their GUIDs and merged three-way.
+    - labels and related topics are merged as sets: values added by either
+      side are added, values removed by either side are removed.
+Files outside of topic directories and files inside of them that no viewpoint
+references are merged by their crc32 and size.
+
+Conflicts, i.e. both sides changed the same value differently, are resolved
+deterministically:
+    - a modification wins over a deletion.
+    - of two modified topics, or comments, the one with the later
+      modification date wins. If the dates are equal or not set, ours wins.
+    - for everything else ours wins.
+Every resolved conflict is reported in the returned MergeResult.
+"""
+
+import os
+import sys
+import time
+import zipfile
+import argparse
+import copy as c
+import xml.etree.ElementTree as ET
+from enum import Enum
+
+import bcfplugin
+import bcfplugin.rdwr.reader as reader
+import bcfplugin.rdwr.writer as writer
+import bcfplugin.rdwr.rawzip as rawzip
+from bcfplugin.rdwr.diff import (MARKUP_FILE, getMembers, isSameFile,
+        getFieldValues)
+from bcfplugin.rdwr.project import SimpleList, StringPool, \
+        listSetContainingElement
+from bcfplugin.rdwr.uri import Uri
+
+logger = bcfplugin.createLogger(__name__)
+
+MERGED_LISTS = ("labels", "relatedTopics")
+""" Members of Topic that are merged as sets """
+
+
+class Side(Enum):
+
+    """ Revision a merged value was taken from """
+
+    OURS = 1
+    THEIRS = 2
+
+
+class Conflict(object):
+
+    """ Value both sides changed differently.
+
+    `guid` is the GUID of the topic, or `""` for files outside of topic
+    directories. `name` denotes the value, e.g. the field `title` or
+    `comment 98b5802c-...`. `winner` is the Side the value was taken from.
+    """
+
+    __slots__ = ("guid", "name", "winner")
+
+    def __init__(self, guid, name, winner: Side):
+
+        self.guid = guid
+        self.name = name
+        self.winner = winner
+
+
+    def __str__(self):
+
+        return "{} {}: took {}".format(self.guid, self.name,
+                self.winner.name.lower())
+
+
+class MergeResult(object):
+
+    """ Summary of a merge.
+
+    `copiedTopics` counts the topic directories copied as they are,
+    `mergedTopics` the ones whose markup.bcf was merged. `conflicts` lists
+    every resolved Conflict.
+    """
+
+    __slots__ = ("copiedTopics", "mergedTopics", "conflicts")
+
+    def __init__(self):
+
+        self.copiedTopics = 0
+        self.mergedTopics = 0
+        self.conflicts = list()
+
+
+    def __str__(self):
+
+        lines = [ "{} topic(s) copied, {} topic(s) merged, {} conflict(s)"\
+                "".format(self.copiedTopics, self.mergedTopics,
+                    len(self.conflicts)) ]
+        lines += [ "Conflict {}".format(conflict)
+                for conflict in self.conflicts ]
+        return "\n".join(lines)
+
+
+def isSameDir(files, otherFiles):
+
+    """ Compares two topic directories, given as dictionaries mapping names to
+    ZipInfo objects, by their entries of the central directory. Missing
+    directories are passed as `None`. """
+
+    if files is None or otherFiles is None:
+        return files is None and otherFiles is None
+
+    return (files.keys() == otherFiles.keys() and
+            all(isSameFile(files[name], otherFiles[name]) for name in files))
+
+
+def isSame(value, otherValue):
+
+    """ Compares two values, of which either may be `None` """
+
+    if value is None or otherValue is None:
+        return value is None and otherValue is None
+    return value == otherValue
+
+
+def isLater(timestamp, otherTimestamp):
+
+    """ Returns whether `timestamp` is later than `otherTimestamp`. A missing
+    timestamp is never later. """
+
+    if timestamp is None:
+        return False
+    return otherTimestamp is None or timestamp > otherTimestamp
+
+
+def mergeValue(base, ours, theirs, same, theirsWins):
+
+    """ Merges the three revisions of one value.
+
+    Returns a tuple `(side, conflict)`, the Side the merged value shall be
+    taken from and whether both sides changed it differently. `same(a, b)`
+    compares two values, `theirsWins` resolves conflicts.
+    """
+
+    if same(ours, theirs) or same(base, theirs):
+        return (Side.OURS, False)
+    if same(base, ours):
+        return (Side.THEIRS, False)
+    return (Side.THEIRS if theirsWins else Side.OURS, True)
+
+
+def mergeElements(base, ours, theirs, same, theirsWins):
+
+    """ Matches the elements of three revisions by their GUIDs and merges
+    them.
+
+    `base`, `ours` and `theirs` are lists of elements. Returns a list of
+    tuples `(element, side, conflict)` for every element of the merged
+    revision, in the order of `ours` followed by the ones only `theirs`
+    contains. `theirsWins(ourElement, theirElement)` resolves conflicts of
+    elements both sides modified. An element one side modified and the other
+    one deleted is kept.
+    """
+
+    baseByGuid = { str(element.xmlId): element for element in base }
+    oursByGuid = { str(element.xmlId): element for element in ours }
+    theirsByGuid = { str(element.xmlId): element for element in theirs }
+    guids = list(oursByGuid) + [ guid for guid in theirsByGuid
+            if guid not in oursByGuid ]
+
+    merged = list()
+    for guid in guids:
+        baseElem = baseByGuid.get(guid)
+        ourElem = oursByGuid.get(guid)
+        theirElem = theirsByGuid.get(guid)
+
+        if ourElem is None or theirElem is None:
+            (elem, side) = ((theirElem, Side.THEIRS) if ourElem is None
+                    else (ourElem, Side.OURS))
+            if baseElem is None:
+                # added by one side
+                merged.append((elem, side, False))
+            elif not same(baseElem, elem):
+                # modified by one side, deleted by the other
+                merged.append((elem, side, True))
+            continue
+
+        (side, conflict) = mergeValue(baseElem, ourElem, theirElem, same,
+                theirsWins(ourElem, theirElem))
+        merged.append((ourElem if side == Side.OURS else theirElem, side,
+            conflict))
+
+    return merged
+
+
+def adopt(value, parent):
+
+    """ Make `parent` the containing object of `value`, or of every element
+    of `value` if it is a list """
+
+    if isinstance(value, list):
+        listSetContainingElement(value, parent)
+        if isinstance(value, SimpleList):
+            value.containingObject = parent
+    elif value is not None:
+        value.containingObject = parent
+
+
+def mergeSet(base, ours, theirs):
+
+    """ Merges the values of three revisions of a SimpleList.
+
+    Values either side added are kept, values either side removed are
+    dropped. The merged values are returned in the order of `ours` followed by
+    the ones added by `theirs`.
+    """
+
+    baseValues = set([ item.value for item in base ])
+    ourValues = [ item.value for item in ours ]
+    theirValues = [ item.value for item in theirs ]
+    removed = ((baseValues - set(ourValues)) |
+            (baseValues - set(theirValues)))
+
+    merged = list()
+    for value in ourValues + theirValues:
+        if value not in removed and value not in merged:
+            merged.append(value)
+    return merged
+
+
+def mergeTopic(guid, base, ours, theirs, result: MergeResult):
+
+    """ Merges the fields of the topics of the markups `base`, `ours` and
+    `theirs` into the topic of `ours`. `base` is `None` if both sides added
+    the topic. """
+
+    ourTopic = ours.topic
+    theirTopic = theirs.topic
+    baseTopic = base.topic if base is not None else None
+    theirsWins = isLater(theirTopic._modDate.timestamp,
+            ourTopic._modDate.timestamp)
+
+    baseValues = getFieldValues(baseTopic) if baseTopic is not None else {}
+    ourValues = getFieldValues(ourTopic)
+    theirValues = getFieldValues(theirTopic)
+    for (name, isReference) in ourTopic.getFingerprintMembers():
+        field = name.lstrip("_")
+        if field not in ourValues:
+            continue
+
+        if name in MERGED_LISTS:
+            ourList = getattr(ourTopic, name)
+            baseList = getattr(baseTopic, name) if baseTopic is not None \
+                    else []
+            values = mergeSet(baseList, ourList, getattr(theirTopic, name))
+            if values != ourValues[field]:
+                setattr(ourTopic, name, SimpleList(values, ourList.xmlName,
+                    ourList.defaultListElement, ourTopic))
+            continue
+
+        (side, conflict) = mergeValue(baseValues.get(field),
+                ourValues[field], theirValues[field], isSame, theirsWins)
+        if conflict:
+            result.conflicts.append(Conflict(guid, field, side))
+        if side == Side.THEIRS:
+            value = getattr(theirTopic, name)
+            setattr(ourTopic, name, value)
+            adopt(value, ourTopic)
+
+
+def getViewpointKey(vpRef, files):
+
+    """ Returns the state of the viewpoint `vpRef` as tuple, including the
+    contents of its viewpoint and snapshot file as listed in `files`. """
+
+    def fileKey(uri):
+        info = files.get(str(uri)) if uri is not None else None
+        return (info.CRC, info.file_size) if info is not None else None
+
+    return (vpRef, fileKey(vpRef.file), fileKey(vpRef.snapshot))
+
+
+def getUniqueName(name, takenNames):
+
+    """ Returns `name`, or if it is contained in `takenNames`, `name` with the
+    smallest number appended to its stem that makes it unique. """
+
+    (stem, extension) = os.path.splitext(name)
+    uniqueName = name
+    idx = 1
+    while uniqueName in takenNames:
+        uniqueName = "{}_{}{}".format(stem, idx, extension)
+        idx += 1
+    return uniqueName
+
+
+def mergeViewpoints(guid, markups, files, result: MergeResult):
+
+    """ Merges the viewpoints of the three markups into the one of ours.
+
+    `markups` and `files` map each Side, and `None` for base, to the markup
+    respectively the files of the topic directory in that revision. A
+    viewpoint is merged together with its viewpoint and snapshot file.
+    Returns a dictionary mapping the names of these files of the merged
+    viewpoints to tuples `(side, ZipInfo)`. Files of different content but
+    with the same name are renamed.
+    """
+
+    keys = dict()
+    for (key, markup) in markups.items():
+        if markup is None:
+            continue
+        for vpRef in markup.viewpoints:
+            keys[id(vpRef)] = getViewpointKey(vpRef, files[key] or {})
+
+    ours = markups[Side.OURS]
+    base = markups[None]
+    merged = mergeElements(base.viewpoints if base is not None else [],
+            ours.viewpoints, markups[Side.THEIRS].viewpoints,
+            lambda vpRef, other: keys[id(vpRef)] == keys[id(other)],
+            lambda ourVpRef, theirVpRef: False)
+
+    members = dict()
+    for (vpRef, side, conflict) in merged:
+        if conflict:
+            result.conflicts.append(Conflict(guid, "viewpoint {}".format(
+                vpRef.xmlId), side))
+
+        for attr in ("file", "snapshot"):
+            uri = getattr(vpRef, attr)
+            info = files[side].get(str(uri)) if uri is not None else None
+            if info is None:
+                continue
+
+            name = str(uri)
+            if name in members and not isSameFile(members[name][1], info):
+                name = getUniqueName(name, members)
+                setattr(vpRef, attr, Uri(name))
+            members[name] = (side, info)
+
+    ours.viewpoints = [ vpRef for (vpRef, side, conflict) in merged ]
+    adopt(ours.viewpoints, ours)
+    return members
+
+
+def mergeComments(guid, base, ours, theirs, result: MergeResult):
+
+    """ Merges the comments of the three markups into `ours`. Has to be called
+    after the viewpoints were merged. """
+
+    def getTimestamp(comment):
+        if comment._modDate.timestamp is not None:
+            return comment._modDate.timestamp
+        return comment._date.timestamp
+
+    merged = mergeElements(base.comments if base is not None else [],
+            ours.comments, theirs.comments, isSame,
+            lambda ourComment, theirComment: isLater(
+                getTimestamp(theirComment), getTimestamp(ourComment)))
+
+    viewpoints = { str(vpRef.xmlId): vpRef for vpRef in ours.viewpoints }
+    for (comment, side, conflict) in merged:
+        if conflict:
+            result.conflicts.append(Conflict(guid, "comment {}".format(
+                comment.xmlId), side))
+        # refer to the viewpoint of the merged markup
+        if comment.viewpoint is not None:
+            comment.viewpoint = viewpoints.get(str(comment.viewpoint.xmlId))
+
+    ours.comments = [ comment for (comment, side, conflict) in merged ]
+    adopt(ours.comments, ours)
+
+
+def mergeMarkups(guid, markups, files, result: MergeResult):
+
+    """ Merges the markups of the three revisions into the one of ours.
+
+    `markups` and `files` map each Side, and `None` for base, to the markup
+    respectively the files of the topic directory in that revision.
+    Returns the files of the merged viewpoints (see `mergeViewpoints()`).
+    """
+
+    (base, ours, theirs) = (markups[None], markups[Side.OURS],
+            markups[Side.THEIRS])
+    mergeTopic(guid, base, ours, theirs, result)
+
+    (side, conflict) = mergeValue(base.header if base is not None else None,
+            ours.header, theirs.header, isSame, False)
+    if conflict:
+        result.conflicts.append(Conflict(guid, "header", side))
+    if side == Side.THEIRS:
+        ours.header = theirs.header
+        adopt(ours.header, ours)
+
+    members = mergeViewpoints(guid, markups, files, result)
+    mergeComments(guid, base, ours, theirs, result)
+    return members
+
+
+def isSameMember(info, otherInfo):
+
+    """ Compares two archive members, of which either may be `None` """
+
+    if info is None or otherInfo is None:
+        return info is None and otherInfo is None
+    return isSameFile(info, otherInfo)
+
+
+def mergeFiles(guid, base, ours, theirs, result: MergeResult):
+
+    """ Merges files by their crc32 and size.
+
+    `base`, `ours` and `theirs` are dictionaries mapping names to ZipInfo
+    objects. Returns a dictionary mapping the names of the merged files to
+    tuples `(side, ZipInfo)`.
+    """
+
+    merged = dict()
+    for name in sorted(set(ours) | set(theirs)):
+        (ourInfo, theirInfo) = (ours.get(name), theirs.get(name))
+        (side, conflict) = mergeValue(base.get(name), ourInfo, theirInfo,
+                isSameMember, ourInfo is None)
+        if conflict:
+            result.conflicts.append(Conflict(guid, name, side))
+
+        info = ourInfo if side == Side.OURS else theirInfo
+        if info is not None:
+            merged[name] = (side, info)
+
+    return merged
+
+
+def readMarkup(archive, directory, files, pool):
+
+    """ Decodes the markup.bcf of the topic `directory` out of `archive`.
+    Returns `None` if the topic does not contain one or it is invalid. """
+
+    if files is None or MARKUP_FILE not in files:
+        return None
+
+    try:
+        with archive.open(files[MARKUP_FILE]) as markupFile:
+            return reader.decodeMarkup(markupFile, pool)
+    except (ET.ParseError, KeyError, ValueError) as err:
+        logger.error("{}/{} of {} could not be read: {}".format(directory,
+            MARKUP_FILE, archive.filename, str(err)))
+        return None
+
+
+class _MergeEntries(object):
+
+    """ Generates the entries of the merged archive for
+    `writer.writeEntries()`, one topic directory after the other. """
+
+    def __init__(self, archives, result: MergeResult):
+
+        # maps each Side, and `None` for base, to the ZipFile of the revision
+        self.archives = archives
+        self.result = result
+        # values of all three revisions are compared
+        self.pool = StringPool()
+        self.dateTime = time.localtime(time.time())[:6]
+
+
+    def dirEntry(self, directory):
+
+        info = zipfile.ZipInfo(directory + "/", self.dateTime)
+        info.external_attr = (0o40755 << 16) | 0x10
+        return (info, None)
+
+
+    def fileEntries(self, directory, members):
+
+        """ Entries copying `members`, as returned by `mergeFiles()`, from
+        their archives in compressed form """
+
+        prefix = directory + "/" if directory else ""
+        for name in sorted(members):
+            (side, info) = members[name]
+            if info.filename != prefix + name:
+                # a renamed viewpoint or snapshot file
+                info = c.copy(info)
+                info.filename = prefix + name
+            yield (info, self.archives[side])
+
+
+    def copyTopic(self, directory, side, files):
+
+        self.result.copiedTopics += 1
+        yield self.dirEntry(directory)
+        yield from self.fileEntries(directory, { name: (side, info)
+            for (name, info) in files.items() })
+
+
+    def topicEntries(self, directory, files):
+
+        """ Entries of the topic `directory`. `files` maps each Side, and
+        `None` for base, to the files of the topic directory in that revision,
+        or `None` if it does not exist there. """
+
+        (base, ours, theirs) = (files[None], files[Side.OURS],
+                files[Side.THEIRS])
+        if isSameDir(ours, theirs) or isSameDir(base, theirs):
+            side = Side.OURS
+        elif isSameDir(base, ours):
+            side = Side.THEIRS
+        elif ours is None or theirs is None:
+            # modified by one side, deleted by the other
+            side = Side.THEIRS if ours is None else Side.OURS
+            self.result.conflicts.append(Conflict(directory, "topic", side))
+        else:
+            side = None
+
+        if side is not None:
+            if files[side] is not None:
+                yield from self.copyTopic(directory, side, files[side])
+            return
+
+        markups = { key: readMarkup(self.archives[key], directory,
+            files[key], self.pool) for key in files }
+        if markups[Side.OURS] is None or markups[Side.THEIRS] is None:
+            logger.error("The topic {} could not be merged. It is taken from"\
+                    " {}".format(directory, self.archives[Side.OURS].filename))
+            self.result.conflicts.append(Conflict(directory, "topic",
+                Side.OURS))
+            yield from self.copyTopic(directory, Side.OURS, ours)
+            return
+
+        self.result.mergedTopics += 1
+        vpMembers = mergeMarkups(directory, markups, files, self.result)
+
+        # viewpoint files are merged along with their viewpoints
+        vpFiles = set([ MARKUP_FILE ])
+        for markup in markups.values():
+            if markup is None:
+                continue
+            for vpRef in markup.viewpoints:
+                vpFiles.update([ str(uri) for uri in (vpRef.file,
+                    vpRef.snapshot) if uri is not None ])
+
+        (base, ours, theirs) = [ { name: info for (name, info) in
+            (files[key] or {}).items() if name not in vpFiles }
+            for key in (None, Side.OURS, Side.THEIRS) ]
+        members = mergeFiles(directory, base, ours, theirs, self.result)
+        members.update(vpMembers)
+
+        info = zipfile.ZipInfo("{}/{}".format(directory, MARKUP_FILE),
+                self.dateTime)
+        info.external_attr = 0o644 << 16
+        info.compress_type = writer.getCompressionType(MARKUP_FILE)
+        markupXMLRoot = markups[Side.OURS].getEtElement(ET.Element("Markup",
+            {}))
+
+        yield self.dirEntry(directory)
+        yield (info, writer.xmlPrettify(markupXMLRoot))
+        yield from self.fileEntries(directory, members)
+
+
+    def __iter__(self):
+
+        dirs = { key: getMembers(archive)
+                for (key, archive) in self.archives.items() }
+        topLevel = { key: dirs[key].pop("", {}) for key in dirs }
+        yield from self.fileEntries("", mergeFiles("", topLevel[None],
+            topLevel[Side.OURS], topLevel[Side.THEIRS], self.result))
+
+        directories = set()
+        for key in dirs:
+            directories.update(dirs[key])
+        for directory in sorted(directories):
+            yield from self.topicEntries(directory, { key: dirs[key].get(
+                directory) for key in dirs })
+
+
+def mergeArchives(baseFile: str, oursFile: str, theirsFile: str, dstFile: str,
+        level=writer.COMPRESSION_LEVEL):
+
+    """ Merges the BCF files `oursFile` and `theirsFile`, that were both
+    derived from `baseFile`, into `dstFile`.
+
+    Topic directories that only one side changed are copied from it in their
+    compressed form, the others are merged topic by topic. Thereby only the
+    markups of one topic are held in memory at a time. `dstFile` is replaced
+    after the merged archive was written completely, it may also be one of
+    the merged files. None of the files is validated.
+    Returns a MergeResult.
+    """
+
+    logger.info("Merging {} and {} based on {}".format(oursFile, theirsFile,
+        baseFile))
+    result = MergeResult()
+    tmpFile = writer.createTmpFileFor(dstFile)
+    try:
+        with zipfile.ZipFile(baseFile) as baseZip, \
+                zipfile.ZipFile(oursFile) as oursZip, \
+                zipfile.ZipFile(theirsFile) as theirsZip, \
+                rawzip.RawZipWriter(tmpFile) as dstZip:
+            entries = _MergeEntries({ None: baseZip, Side.OURS: oursZip,
+                Side.THEIRS: theirsZip }, result)
+            writer.writeEntries(dstZip, entries, level)
+        os.replace(tmpFile, dstFile)
+    except Exception:
+        os.remove(tmpFile)
+        raise
+
+    logger.info("{} topic(s) merged, {} conflict(s) resolved".format(
+        result.mergedTopics, len(result.conflicts)))
+    return result
+
+
+def main(argv = None):
+
+    """ Command line interface of `mergeArchives()`. Prints the MergeResult
+    and returns the exit status. """
+
+    parser = argparse.ArgumentParser(prog="python -m bcfplugin.rdwr.merge",
+            description="Three-way merge of BCF files. Conflicts are"\
+                    " resolved automatically and listed on stdout.")
+    parser.add_argument("base", help="BCF file both others derive from")
+    parser.add_argument("ours", help="BCF file that wins conflicts")
+    parser.add_argument("theirs", help="BCF file merged into ours")
+    parser.add_argument("output", help="path of the merged BCF file")
+    args = parser.parse_args(argv)
+
+    try:
+        result = mergeArchives(args.base, args.ours, args.theirs, args.output)
+    except (OSError, zipfile.BadZipFile) as err:
+        print("Merge failed: {}".format(str(err)), file=sys.stderr)
+        return 1
+
+    print(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
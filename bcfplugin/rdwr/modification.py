@@ -30,13 +30,14 @@ ModifiedDate node of the markup.bcf file.
 """
 
 import logging
+import dateutil.parser
 
 import bcfplugin
 import bcfplugin.rdwr.project as p
 
 from copy import deepcopy
 from enum import Enum
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from bcfplugin.rdwr.interfaces.hierarchy import Hierarchy
 from bcfplugin.rdwr.interfaces.state import State
 from bcfplugin.rdwr.interfaces.identifiable import Identifiable
@@ -66,6 +67,8 @@ class ModificationAuthor(p.SimpleElement):
     "ModifiedAuthor".
     """
 
+    __slots__ = ()
+
     def __init__(self,
             author: str,
             containingElement = None,
@@ -117,14 +120,85 @@ class ModificationAuthor(p.SimpleElement):
         return None
 
 
+EPOCH = datetime(1970, 1, 1)
+""" Reference point of the timestamps of ModificationDate """
+
+MICROSECOND = timedelta(microseconds=1)
+
+timezones = { 0: timezone.utc }
+""" Timezone objects by their UTC offset in seconds, shared by all dates
+materialized by `fromTimestamp()` """
+
+utcOffsets = dict()
+""" Pool of the UTC offsets stored by ModificationDate """
+
+
+def _getTimezone(utcOffset: int):
+
+    tz = timezones.get(utcOffset)
+    if tz is None:
+        tz = timezones.setdefault(utcOffset,
+                timezone(timedelta(seconds=utcOffset)))
+    return tz
+
+
+def toTimestamp(date: datetime):
+
+    """ Returns the tuple `(timestamp, utcOffset)` representing `date`.
+
+    `timestamp` are the microseconds since 1970-01-01 UTC, `utcOffset` the
+    offset to UTC in seconds. If `date` is naive, `utcOffset` is None and
+    `timestamp` counts from 1970-01-01 in the same unspecified timezone. The
+    timestamps of two aware dates therefore compare like the dates themselves.
+    For `None`, `(None, None)` is returned.
+    """
+
+    if date is None:
+        return (None, None)
+    if not isinstance(date, datetime): # a plain date
+        date = datetime(date.year, date.month, date.day)
+
+    offset = date.utcoffset()
+    if offset is None:
+        return ((date - EPOCH) // MICROSECOND, None)
+
+    utcDate = date.replace(tzinfo=None) - offset
+    utcOffset = offset // timedelta(seconds=1)
+    # share the offset int, there are only a handful of distinct ones
+    utcOffset = utcOffsets.setdefault(utcOffset, utcOffset)
+    return ((utcDate - EPOCH) // MICROSECOND, utcOffset)
+
+
+def fromTimestamp(timestamp: int, utcOffset: int):
+
+    """ Materializes the datetime object of `(timestamp, utcOffset)` as it was
+    returned by `toTimestamp()` """
+
+    if timestamp is None:
+        return None
+
+    if utcOffset is None:
+        return EPOCH + timestamp * MICROSECOND
+
+    localDate = EPOCH + (timestamp + utcOffset * 1000000) * MICROSECOND
+    return localDate.replace(tzinfo=_getTimezone(utcOffset))
+
+
 class ModificationDate(p.SimpleElement):
 
     """ Represents the XML type datetime.
 
     But this class is also used to discern between the XML nodes "Date" and
     "ModifiedDate".
+
+    Instead of a datetime object only the integers returned by `toTimestamp()`
+    are kept, in `_value` and `utcOffset`. The datetime object is created
+    whenever `value` (respectively `date`) is read. Sorting and comparing
+    dates should use `timestamp` instead.
     """
 
+    __slots__ = ("dateFormat", "utcOffset")
+
     def __init__(self,
             date: datetime,
             containingElement = None,
@@ -138,7 +212,8 @@ class ModificationDate(p.SimpleElement):
             name = "CreationDate"
         if modType == ModificationType.MODIFICATION:
             name = "ModifiedDate"
-        p.SimpleElement.__init__(self, date, name, None, containingElement, state)
+        p.SimpleElement.__init__(self, None, name, None, containingElement, state)
+        (self._value, self.utcOffset) = toTimestamp(date)
         self.dateFormat = dateFormat
 
 
@@ -160,16 +235,49 @@ class ModificationDate(p.SimpleElement):
 
     def __deepcopy__(self, memo):
 
-        cpysuper = p.SimpleElement.__deepcopy__(self, memo)
-        cpy = ModificationDate(deepcopy(self.date))
-        cpy.id = cpysuper.id
-        cpy.state = cpysuper.state
-        cpy.xmlName = cpysuper.xmlName
-        cpy.defaultValue = cpysuper.defaultValue
+        cpy = ModificationDate(None)
+        cpy._value = self._value
+        cpy.utcOffset = self.utcOffset
+        cpy.id = deepcopy(self.id, memo)
+        cpy.state = self.state
+        cpy._meta = self._meta
+        cpy.dateFormat = self.dateFormat
 
         return cpy
 
 
+    def __eq__(self, other):
+
+        if type(self) != type(other):
+            return False
+
+        # a naive date never equals an aware one
+        return (self._value == other._value and
+                (self.utcOffset is None) == (other.utcOffset is None) and
+                self.xmlName == other.xmlName)
+
+
+    @property
+    def value(self):
+        return fromTimestamp(self._value, self.utcOffset)
+
+    @value.setter
+    def value(self, newValue):
+        # values entered in the GUI arrive as ISO 8601 strings
+        if isinstance(newValue, str):
+            newValue = dateutil.parser.parse(newValue) if newValue else None
+        (self._value, self.utcOffset) = toTimestamp(newValue)
+
+
+    @property
+    def timestamp(self):
+
+        """ Microseconds since 1970-01-01 UTC, or `None` if no date is set.
+        See `toTimestamp()`. """
+
+        return self._value
+
+
     @property
     def date(self):
         return self.value
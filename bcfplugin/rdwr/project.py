@@ -36,7 +36,7 @@ from copy import deepcopy
 import bcfplugin
 from bcfplugin.rdwr.uri import Uri
 from bcfplugin.rdwr.interfaces.hierarchy import Hierarchy
-from bcfplugin.rdwr.interfaces.state import State
+from bcfplugin.rdwr.interfaces.state import State, DirtySet
 from bcfplugin.rdwr.interfaces.xmlname import XMLName
 from bcfplugin.rdwr.interfaces.identifiable import XMLIdentifiable, Identifiable
 
@@ -82,7 +82,62 @@ def searchListObject(object, elementList):
     return searchResult
 
 
-class SimpleElement(XMLName, Hierarchy, State, Identifiable):
+leafMetas = dict()
+""" Tuples `(xmlName, defaultValue)` shared by the objects of SimpleElement and
+Attribute. See `getLeafMeta()`. """
+
+
+def getLeafMeta(xmlName, defaultValue):
+
+    """ Returns the tuple `(xmlName, defaultValue)` shared by all leaf elements
+    with the same name and default value.
+
+    Thereby the, often thousands of, leaf elements of one kind (e.g. the
+    authors of all comments) refer to one tuple instead of holding both
+    members themselves. Default values that are not hashable get a tuple of
+    their own.
+    """
+
+    try:
+        key = (xmlName, type(defaultValue), defaultValue)
+        meta = leafMetas.get(key)
+        if meta is None:
+            meta = leafMetas.setdefault(key, (xmlName, defaultValue))
+    except TypeError:
+        meta = (xmlName, defaultValue)
+
+    return meta
+
+
+class LeafMeta:
+
+    """ Provides `xmlName` and `defaultValue` of SimpleElement and Attribute.
+
+    Both are stored in the tuple returned by `getLeafMeta()`. The implementing
+    class has to list `_meta` in its `__slots__`.
+    """
+
+    __slots__ = ()
+
+    @property
+    def xmlName(self):
+        return self._meta[0]
+
+    @xmlName.setter
+    def xmlName(self, newVal):
+        self._meta = getLeafMeta(newVal, self._meta[1])
+
+
+    @property
+    def defaultValue(self):
+        return self._meta[1]
+
+    @defaultValue.setter
+    def defaultValue(self, newVal):
+        self._meta = getLeafMeta(self._meta[0], newVal)
+
+
+class SimpleElement(LeafMeta, XMLName, Hierarchy, State, Identifiable):
 
     """
     Used for representing elements that are defined to be simple elements
@@ -94,17 +149,18 @@ class SimpleElement(XMLName, Hierarchy, State, Identifiable):
     XML node.
     """
 
+    __slots__ = ("containingObject", "state", "_meta", "_objectId", "_value")
+
     typeDict = { "int": int, "float": float, "str": str }
 
     def __init__(self, value, xmlName, defaultValue, containingElement,
             state = State.States.ORIGINAL):
-        XMLName.__init__(self, xmlName)
         Hierarchy.__init__(self, containingElement)
         State.__init__(self, state)
         Identifiable.__init__(self)
+        self._meta = getLeafMeta(xmlName, defaultValue)
         # set value to default if it is None
         self._value = value if value else defaultValue
-        self.defaultValue = defaultValue
 
 
     def __deepcopy__(self, memo):
@@ -204,6 +260,9 @@ class SimpleList(list, XMLName, Hierarchy, State, Identifiable):
     element just contains a string (and therefore is a simple type).
     """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "_objectId",
+            "defaultListElement")
+
     def __init__(self, data=[], xmlName = "", defaultValue = None,
             containingElement = None, state = State.States.ORIGINAL):
 
@@ -269,6 +328,7 @@ class SimpleList(list, XMLName, Hierarchy, State, Identifiable):
         """
 
         list.append(self, newElem)
+        self.invalidateFingerprint()
 
 
     def __eq__(self, other):
@@ -277,7 +337,7 @@ class SimpleList(list, XMLName, Hierarchy, State, Identifiable):
                 XMLName.__eq__(self, other))
 
 
-class Attribute(XMLName, Hierarchy, State, Identifiable):
+class Attribute(LeafMeta, XMLName, Hierarchy, State, Identifiable):
 
     """ Class used to represent XML attributes.
 
@@ -287,15 +347,16 @@ class Attribute(XMLName, Hierarchy, State, Identifiable):
     id.
     """
 
+    __slots__ = ("containingObject", "state", "_meta", "_objectId", "value")
+
     def __init__(self, value, xmlName, defaultValue, containingElement,
             state = State.States.ORIGINAL):
-        XMLName.__init__(self, xmlName)
         Hierarchy.__init__(self, containingElement)
         State.__init__(self, state)
         Identifiable.__init__(self)
+        self._meta = getLeafMeta(xmlName, defaultValue)
         # use default value if `value is None`
         self.value = value if value else defaultValue
-        self.defaultValue = defaultValue
 
 
     def __deepcopy__(self, memo):
@@ -331,6 +392,56 @@ class Attribute(XMLName, Hierarchy, State, Identifiable):
             return None
 
 
+POOLED_NAMES = ["Author", "CreationAuthor", "ModifiedAuthor", "AssignedTo",
+        "TopicType", "TopicStatus", "Priority", "Stage", "Labels",
+        "Filename", "IfcProject", "IfcSpatialStructureElement",
+        "OriginatingSystem", "AuthoringToolId"]
+""" XML names of the simple elements and attributes whose values are put into
+the StringPool of the project. Their values repeat over and over again
+throughout a project. """
+
+
+class StringPool(object):
+
+    """ Holds one object per distinct string value of a project.
+
+    Authors, statuses, labels and the like repeat thousands of times in a large
+    project. Values that are passed through `intern()` share one object instead
+    of being held in memory once per occurrence. As a side effect comparing two
+    of those values mostly boils down to an identity check.
+    Other than `sys.intern()` the strings are released together with the
+    projects using the pool.
+    """
+
+    __slots__ = ("strings",)
+
+    def __init__(self):
+
+        self.strings = dict()
+
+
+    def __len__(self):
+
+        return len(self.strings)
+
+
+    def clear(self):
+
+        """ Release all pooled strings """
+
+        self.strings.clear()
+
+
+    def intern(self, value):
+
+        """ Returns the pooled object equal to `value`. Values that are no
+        strings are returned as they are. """
+
+        if not isinstance(value, str):
+            return value
+        return self.strings.setdefault(value, value)
+
+
 class Project(Hierarchy, State, XMLName, XMLIdentifiable, Identifiable):
 
     """ Represents for one the XML type project.xsd:Project and for the other
@@ -359,6 +470,13 @@ class Project(Hierarchy, State, XMLName, XMLIdentifiable, Identifiable):
            also be copied or not.
     """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "_id", "_objectId",
+            "_name", "_extSchemaSrc", "topicList", "stringPool", "dirtySet",
+            "_fingerprint")
+
+    fingerprintIgnored = Hierarchy.fingerprintIgnored + ("stringPool",
+            "dirtySet")
+
     def __init__(self,
             uuid: UUID,
             name: str = "",
@@ -369,6 +487,8 @@ class Project(Hierarchy, State, XMLName, XMLIdentifiable, Identifiable):
         """ Initialisation function of Project """
 
         Hierarchy.__init__(self, None) # Project is the topmost element
+        # has to exist before any state is set
+        self.dirtySet = DirtySet()
         State.__init__(self, state)
         XMLName.__init__(self, xmlName)
         XMLIdentifiable.__init__(self, uuid)
@@ -377,6 +497,7 @@ class Project(Hierarchy, State, XMLName, XMLIdentifiable, Identifiable):
         self._extSchemaSrc = SimpleElement(extSchemaSrc, "ExtensionSchema",
                 None, self)
         self.topicList = list()
+        self.stringPool = StringPool()
 
 
     def __deepcopy__(self, memo):
@@ -395,11 +516,20 @@ class Project(Hierarchy, State, XMLName, XMLIdentifiable, Identifiable):
         cpy._name = cpyname
         cpy._extSchemaSrc = cpyextschemasrc
         cpy.topicList = cpytopics
+        # the pooled strings are immutable, copy and original can share them
+        cpy.stringPool = self.stringPool
         listSetContainingElement(cpy.topicList, cpy)
 
         members = [ cpy._name, cpy._extSchemaSrc ]
         listSetContainingElement(members, cpy)
 
+        # children of the copied markups were not part of a project when
+        # their states were copied
+        for element in self.dirtySet.getElements():
+            if id(element) in memo:
+                cpy.dirtySet.add(memo[id(element)])
+        cpy.dirtySet.dirty = self.dirtySet.dirty
+
         return cpy
 
 
@@ -420,19 +550,30 @@ class Project(Hierarchy, State, XMLName, XMLIdentifiable, Identifiable):
         self._extSchemaSrc.value = newVal
 
 
+    def setDirty(self, bit: bool):
+
+        """ Sets the dirty bit, marking whether the project holds
+        modifications that were not saved yet """
+
+        self.dirtySet.dirty = bit
+
+
+    def getDirtyBit(self):
+
+        """ Returns whether the project holds modifications that were not
+        saved yet, or elements whose state is not ORIGINAL. """
+
+        return self.dirtySet.dirty or len(self.dirtySet.getElements()) > 0
+
+
     def __eq__(self, other):
 
         """
-        Returns true if every variable member of both classes are the same
+        Returns true if both objects are of the same type and have the same
+        fingerprint
         """
 
-        if type(self) != type(other):
-            return False
-
-        return self.xmlId == other.xmlId \
-            and self.name == other.name \
-            and self.extSchemaSrc == other.extSchemaSrc \
-            and self.topicList == other.topicList
+        return self.fingerprintEquals(other)
 
 
     def __str__(self):
@@ -448,21 +589,6 @@ topicList='{}')""".format(str(self.xmlId),
         return ret_str
 
 
-    def getStateList(self):
-
-        stateList = list()
-        if not self.isOriginal():
-            stateList.append((self.state, self))
-
-        stateList += self._name.getStateList()
-        stateList += self._extSchemaSrc.getStateList()
-
-        for markup in self.topicList:
-            stateList += markup.getStateList()
-
-        return stateList
-
-
     def searchObject(self, object):
 
         """ Searches this object and its members for one that matches
@@ -511,9 +637,10 @@ topicList='{}')""".format(str(self.xmlId),
         # find out the name of the member variable that references `object`
         # if `object` is part of a list then its name will be referenced by
         # `memberName`
-        for (mName, mValue) in vars(parent).items():
+        for (mName, mValue) in parent.getMembers().items():
             if issubclass(type(mValue), list):
-                if object in mValue:
+                # compare identities, `==` would compare whole subtrees
+                if any(item is object for item in mValue):
                     memberName = mName
                     isList = True
                     break
@@ -534,8 +661,9 @@ topicList='{}')""".format(str(self.xmlId),
         # remove the object fom the list
         if isList:
             l = getattr(parent, memberName)
-            objIdx = l.index(object)
-            l.remove(object)
+            objIdx = next(idx for (idx, item) in enumerate(l) if item is object)
+            del l[objIdx]
+            parent.invalidateFingerprint()
 
         # set the object back to its default state
         else:
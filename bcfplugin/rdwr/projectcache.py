@@ -0,0 +1,331 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+"""
+Author: Patrick Podest
+Date: 2019-08-16
+Github: @podestplatz
+
+**** Description ****
+This file caches the projects built by `reader.readBcfFile()`, so that an
+archive that did not change since it was last read does not have to be
+validated and decoded again.
+
+An entry is keyed by the SHA-256 of the contents of the archive, of the source
+files of the data model and the reader and of the options the reader was run
+with. Hence an entry is neither used if the archive changed, nor after the
+plugin was updated, nor if the project would be read differently. The project
+is stored as a pickle (protocol 5), together with the working directory it was
+read from. The absolute paths of the snapshots are moved to the current
+working directory when the entry is loaded. The string pool of the project is
+not stored, the project is assigned the pool of the caller instead.
+
+The cache is only used if `reader.useProjectCache` is set. The entries are
+kept in the cache directory of the user (see `getCacheDir()`). After every new
+entry the least recently used entries are removed until all of them together
+are not larger than `maxSize`.
+"""
+
+import os
+import sys
+import pickle
+import hashlib
+import tempfile
+
+import bcfplugin
+from bcfplugin.rdwr.project import StringPool
+
+logger = bcfplugin.createLogger(__name__)
+
+CACHE_FORMAT = 1
+""" Version of the layout of an entry, entries of other versions are dropped
+"""
+
+ENTRY_EXTENSION = ".pickle"
+""" Extension of the files holding the entries """
+
+MODEL_MODULES = ("project", "markup", "topic", "viewpoint", "threedvector",
+        "modification", "uri", "reader")
+""" Modules of `rdwr` the cached projects depend on, see `getModelHash()` """
+
+cacheDir = None
+""" Directory holding the entries. If `None` the directory returned by
+`getCacheDir()` is used. """
+
+maxSize = 512 * 1024 * 1024
+""" Maximum number of bytes all entries together may take up """
+
+modelHash = None
+""" Hash of the source of the data model, computed by `getModelHash()` """
+
+STRING_POOL_ID = "stringPool"
+""" Persistent id the string pool of the project is pickled as """
+
+
+def getCacheDir():
+
+    """ Returns the directory the entries are stored in.
+
+    Unless `cacheDir` is set, this is the directory "bcfplugin" in the cache
+    directory of the user, which depends on the platform.
+    """
+
+    if cacheDir is not None:
+        return cacheDir
+
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA",
+                os.path.join(os.path.expanduser("~"), "AppData", "Local"))
+    elif sys.platform == "darwin":
+        base = os.path.join(os.path.expanduser("~"), "Library", "Caches")
+    else:
+        base = (os.environ.get("XDG_CACHE_HOME") or
+                os.path.join(os.path.expanduser("~"), ".cache"))
+
+    return os.path.join(base, "bcfplugin")
+
+
+def getModelHash():
+
+    """ Returns the hash of the source files of the data model and the reader.
+
+    A pickle only fits the classes it was created from, and the project
+    depends on how it was read. The hash is therefore part of the key of
+    every entry.
+    """
+
+    global modelHash
+
+    if modelHash is None:
+        rdwrDir = os.path.dirname(os.path.abspath(__file__))
+        sources = [ os.path.join(rdwrDir, "{}.py".format(module))
+                for module in MODEL_MODULES ]
+        interfacesDir = os.path.join(rdwrDir, "interfaces")
+        sources += sorted(os.path.join(interfacesDir, name)
+                for name in os.listdir(interfacesDir) if name.endswith(".py"))
+
+        sha = hashlib.sha256(str(CACHE_FORMAT).encode())
+        for source in sources:
+            with open(source, "rb") as f:
+                sha.update(f.read())
+        modelHash = sha.hexdigest()
+
+    return modelHash
+
+
+def getKey(bcfFile: str, options: dict = None):
+
+    """ Returns the key of the entry of `bcfFile`.
+
+    `options` maps the names of the options the project is read with to their
+    values, a project read with other options gets a different key.
+    """
+
+    sha = hashlib.sha256(getModelHash().encode())
+    if options is not None:
+        sha.update(repr(sorted(options.items())).encode())
+    with open(bcfFile, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+
+    return sha.hexdigest()
+
+
+def getEntryPath(key: str):
+
+    return os.path.join(getCacheDir(), key + ENTRY_EXTENSION)
+
+
+class _ProjectPickler(pickle.Pickler):
+
+    """ Pickles a project, leaving out its string pool """
+
+    def __init__(self, file, stringPool):
+
+        super().__init__(file, protocol=5)
+        self.stringPool = stringPool
+
+
+    def persistent_id(self, obj):
+
+        if obj is self.stringPool:
+            return STRING_POOL_ID
+        return None
+
+
+class _ProjectUnpickler(pickle.Unpickler):
+
+    """ Unpickles a project, assigning it `stringPool` """
+
+    def __init__(self, file, stringPool):
+
+        super().__init__(file)
+        self.stringPool = stringPool
+
+
+    def persistent_load(self, pid):
+
+        if pid != STRING_POOL_ID:
+            raise pickle.UnpicklingError("Unknown persistent id"\
+                    " {}".format(pid))
+        return self.stringPool
+
+
+def _relocateSnapshots(project, oldDir: str, newDir: str):
+
+    """ Move the paths of the snapshots of all topics of `project` from the
+    working directory `oldDir` to `newDir` """
+
+    if oldDir == newDir:
+        return
+
+    for markup in project.topicList:
+        snapshots = list()
+        for snapshot in markup.snapshotFiles:
+            relPath = os.path.relpath(snapshot, oldDir)
+            snapshots.append(os.path.join(newDir, relPath))
+        # the snapshots are not part of the fingerprint, nothing to invalidate
+        object.__setattr__(markup, "snapshotFiles", snapshots)
+
+
+def remove(key: str):
+
+    """ Remove the entry of `key`, if there is one """
+
+    try:
+        os.remove(getEntryPath(key))
+    except FileNotFoundError:
+        pass
+
+
+def load(key: str, bcfExtractedPath: str, stringPool: StringPool = None):
+
+    """ Returns the project stored under `key`, or `None` if there is no
+    usable entry.
+
+    The snapshots of the project refer to files in `bcfExtractedPath`, the
+    working directory the archive was extracted to this time. The project uses
+    `stringPool`, or a new pool if it is not given. A hit makes the entry the
+    most recently used one.
+    """
+
+    entryPath = getEntryPath(key)
+    if stringPool is None:
+        stringPool = StringPool()
+    try:
+        with open(entryPath, "rb") as f:
+            (cacheFormat, oldExtractedPath, project) = _ProjectUnpickler(f,
+                    stringPool).load()
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        logger.warning("Cached project {} could not be loaded, it is"\
+                " removed. Error: {}".format(entryPath, exc))
+        remove(key)
+        return None
+
+    if cacheFormat != CACHE_FORMAT:
+        remove(key)
+        return None
+
+    _relocateSnapshots(project, oldExtractedPath, bcfExtractedPath)
+    try:
+        os.utime(entryPath)
+    except OSError:
+        pass
+
+    logger.debug("Project taken from the cache {}".format(entryPath))
+    return project
+
+
+def evict(limit: int = None):
+
+    """ Remove the least recently used entries until all entries together
+    take up at most `limit` bytes, by default `maxSize` """
+
+    if limit is None:
+        limit = maxSize
+
+    directory = getCacheDir()
+    entries = list()
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in names:
+        if not name.endswith(ENTRY_EXTENSION):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for (mtime, size, path) in entries)
+    for (mtime, size, path) in sorted(entries):
+        if total <= limit:
+            break
+        logger.debug("Removing cached project {}".format(path))
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def store(key: str, bcfExtractedPath: str, project):
+
+    """ Store `project`, read from the working directory `bcfExtractedPath`,
+    under `key` and evict old entries afterwards.
+
+    The entry is written to a temporary file first and then renamed, so that
+    concurrent readers never see a partially written entry. Errors are only
+    logged, the cache is not essential.
+    """
+
+    directory = getCacheDir()
+    tmpPath = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        (fd, tmpPath) = tempfile.mkstemp(suffix=".tmp", dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            _ProjectPickler(f, project.stringPool).dump((CACHE_FORMAT,
+                bcfExtractedPath, project))
+            size = f.tell()
+        if size > maxSize:
+            logger.debug("Project is larger than the cache, it is not"\
+                    " stored")
+            os.remove(tmpPath)
+            return
+        os.replace(tmpPath, getEntryPath(key))
+    except Exception as exc:
+        logger.warning("Project could not be stored in the cache {}."\
+                " Error: {}".format(directory, exc))
+        if tmpPath is not None and os.path.exists(tmpPath):
+            os.remove(tmpPath)
+        return
+
+    evict()
+
+
+def clear():
+
+    """ Remove all entries """
+
+    evict(0)
@@ -0,0 +1,293 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+"""
+Author: Patrick Podest
+Date: 2019-08-16
+Github: @podestplatz
+
+**** Description ****
+This file provides RawZipWriter, a minimal writer of zip archives whose
+members are handed over already compressed. Thereby the members can be
+compressed concurrently (see `writer.writeEntries()`), and members of another
+archive can be copied over without being decompressed and compressed again
+(see `readRawMember()`).
+
+`zipfile.ZipFile` offers neither of both, hence the headers are written here.
+Only what BCF files need is supported: there is no encryption and no archive
+comment. ZIP64 extensions are written only where a size, an offset or the
+number of members exceeds the limits of the plain format. The members are
+described by `zipfile.ZipInfo` objects.
+"""
+
+import os
+import struct
+import zipfile
+
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+""" Layout of the local file header preceding the data of every member """
+
+LOCAL_SIGNATURE = b"PK\x03\x04"
+
+CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+""" Layout of the entry of a member in the central directory """
+
+CENTRAL_SIGNATURE = b"PK\x01\x02"
+
+END_RECORD = struct.Struct("<4s4H2LH")
+""" Layout of the record terminating the central directory """
+
+END_SIGNATURE = b"PK\x05\x06"
+
+ZIP64_END_RECORD = struct.Struct("<4sQ2H2L4Q")
+""" Layout of the ZIP64 record, preceding the end record, that holds the
+number of members, size and offset of the central directory in full """
+
+ZIP64_END_SIGNATURE = b"PK\x06\x06"
+
+ZIP64_LOCATOR = struct.Struct("<4sLQL")
+""" Layout of the locator of the ZIP64 end record, placed in between it and
+the end record """
+
+ZIP64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+
+ZIP64_EXTRA = struct.Struct("<2H")
+""" Header of the ZIP64 extra field, followed by the values that did not fit
+into their fields as 8 byte integers """
+
+ZIP64_EXTRA_ID = 0x0001
+
+MAX_SIZE = 0xFFFFFFFF
+""" Largest size and offset that can be recorded without ZIP64 """
+
+MAX_MEMBERS = 0xFFFF
+""" Largest number of members that can be recorded without ZIP64 """
+
+SIZE_IN_ZIP64 = 0xFFFFFFFF
+""" Value of a size or offset field whose value is in the ZIP64 extra field """
+
+MEMBERS_IN_ZIP64 = 0xFFFF
+""" Value of a member count whose value is in the ZIP64 end record """
+
+FLAG_DATA_DESCRIPTOR = 0x08
+""" Sizes and crc follow the data instead of being in the local header """
+
+FLAG_UTF8 = 0x800
+""" The name of the member is encoded in UTF-8 """
+
+VERSION_STORED = 10
+""" Version of the zip specification needed to extract a stored member """
+
+VERSION_DEFLATED = 20
+""" Version of the zip specification needed to extract a deflated member """
+
+VERSION_ZIP64 = 45
+""" Version of the zip specification needed to read ZIP64 extensions """
+
+
+def readRawMember(srcFile, info):
+
+    """ Returns the compressed bytes of the member `info`.
+
+    `srcFile` is a binary file object of the archive `info` was taken from.
+    The bytes are the ones following the local file header of the member.
+    """
+
+    srcFile.seek(info.header_offset)
+    header = srcFile.read(LOCAL_HEADER.size)
+    if len(header) != LOCAL_HEADER.size:
+        raise zipfile.BadZipFile("Truncated local header of"\
+                " {}".format(info.filename))
+
+    fields = LOCAL_HEADER.unpack(header)
+    if fields[0] != LOCAL_SIGNATURE:
+        raise zipfile.BadZipFile("Bad local header of"\
+                " {}".format(info.filename))
+
+    (nameLength, extraLength) = fields[-2:]
+    srcFile.seek(nameLength + extraLength, os.SEEK_CUR)
+    data = srcFile.read(info.compress_size)
+    if len(data) != info.compress_size:
+        raise zipfile.BadZipFile("Truncated data of {}".format(info.filename))
+
+    return data
+
+
+def _encodeName(name):
+
+    """ Returns the bytes `name` is recorded as, and the flags telling its
+    encoding """
+
+    try:
+        return (name.encode("ascii"), 0)
+    except UnicodeEncodeError:
+        return (name.encode("utf-8"), FLAG_UTF8)
+
+
+def _packZip64Extra(values):
+
+    """ Returns the ZIP64 extra field holding `values`, or an empty byte string
+    if there are none """
+
+    if len(values) == 0:
+        return b""
+    return (ZIP64_EXTRA.pack(ZIP64_EXTRA_ID, 8 * len(values)) +
+            struct.pack("<{}Q".format(len(values)), *values))
+
+
+def _dosDateTime(dateTime):
+
+    """ Returns the tuple `(date, time)` of `dateTime`, a tuple as found in
+    `ZipInfo.date_time`, in the format of MS-DOS """
+
+    (year, month, day, hour, minute, second) = dateTime
+    date = (year - 1980) << 9 | month << 5 | day
+    time = hour << 11 | minute << 5 | second // 2
+    return (date, time)
+
+
+class RawZipWriter(object):
+
+    """ Writes a zip archive to `path`, from members that are compressed
+    already.
+
+    The archive is complete only after `close()` wrote the central directory,
+    which is done on leaving the `with` block. If the block is left through an
+    exception, the file is just closed.
+    """
+
+    def __init__(self, path):
+
+        self.fp = open(path, "wb")
+        self.centralDirectory = list()
+        """ Entries of the central directory of the members written so far """
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, excType, excValue, traceback):
+
+        if excType is None:
+            self.close()
+        else:
+            self.fp.close()
+
+
+    def writeMember(self, info, data=b""):
+
+        """ Append the compressed `data` as member `info`.
+
+        `data` has to be compressed with `info.compress_type`, and `info` has
+        to carry the crc and the sizes matching `data`. Directories are always
+        written empty and stored.
+        """
+
+        if info.is_dir():
+            (compressType, crc, fileSize, data) = (zipfile.ZIP_STORED, 0, 0,
+                    b"")
+        else:
+            (compressType, crc, fileSize) = (info.compress_type, info.CRC,
+                    info.file_size)
+
+        offset = self.fp.tell()
+        compressSize = len(data)
+        (name, flags) = _encodeName(info.filename)
+        # sizes and crc are known upfront, so no data descriptor is written
+        flags |= info.flag_bits & ~(FLAG_DATA_DESCRIPTOR | FLAG_UTF8)
+        version = (VERSION_DEFLATED if compressType == zipfile.ZIP_DEFLATED
+                else VERSION_STORED)
+        (date, time) = _dosDateTime(info.date_time)
+
+        # the local header records either both sizes or none of them in the
+        # ZIP64 extra field
+        localExtra = b""
+        (localCompressSize, localFileSize) = (compressSize, fileSize)
+        if compressSize > MAX_SIZE or fileSize > MAX_SIZE:
+            localExtra = _packZip64Extra([ fileSize, compressSize ])
+            (localCompressSize, localFileSize) = (SIZE_IN_ZIP64,
+                    SIZE_IN_ZIP64)
+            version = max(version, VERSION_ZIP64)
+
+        # the central directory records only the values that do not fit, in
+        # the order of the fields
+        centralValues = list()
+        (centralFileSize, centralCompressSize, centralOffset) = (fileSize,
+                compressSize, offset)
+        if fileSize > MAX_SIZE:
+            centralValues.append(fileSize)
+            centralFileSize = SIZE_IN_ZIP64
+        if compressSize > MAX_SIZE:
+            centralValues.append(compressSize)
+            centralCompressSize = SIZE_IN_ZIP64
+        if offset > MAX_SIZE:
+            centralValues.append(offset)
+            centralOffset = SIZE_IN_ZIP64
+        centralExtra = _packZip64Extra(centralValues)
+        if len(centralExtra) > 0:
+            version = max(version, VERSION_ZIP64)
+
+        self.fp.write(LOCAL_HEADER.pack(LOCAL_SIGNATURE, version, flags,
+            compressType, time, date, crc, localCompressSize, localFileSize,
+            len(name), len(localExtra)))
+        self.fp.write(name)
+        self.fp.write(localExtra)
+        self.fp.write(data)
+
+        comment = info.comment
+        madeBy = info.create_system << 8 | max(version, VERSION_DEFLATED)
+        header = CENTRAL_HEADER.pack(CENTRAL_SIGNATURE, madeBy, version,
+                flags, compressType, time, date, crc, centralCompressSize,
+                centralFileSize, len(name), len(centralExtra), len(comment),
+                0, info.internal_attr, info.external_attr, centralOffset)
+        self.centralDirectory.append(header + name + centralExtra + comment)
+
+
+    def close(self):
+
+        """ Write the central directory and close the file """
+
+        if self.fp.closed:
+            return
+
+        try:
+            start = self.fp.tell()
+            for entry in self.centralDirectory:
+                self.fp.write(entry)
+            size = self.fp.tell() - start
+
+            members = len(self.centralDirectory)
+            if members >= MAX_MEMBERS or start > MAX_SIZE or size > MAX_SIZE:
+                zip64Start = self.fp.tell()
+                # the size of the record excludes the leading 12 bytes
+                self.fp.write(ZIP64_END_RECORD.pack(ZIP64_END_SIGNATURE,
+                    ZIP64_END_RECORD.size - 12, VERSION_ZIP64, VERSION_ZIP64,
+                    0, 0, members, members, size, start))
+                self.fp.write(ZIP64_LOCATOR.pack(ZIP64_LOCATOR_SIGNATURE, 0,
+                    zip64Start, 1))
+
+                members = min(members, MEMBERS_IN_ZIP64)
+                size = min(size, SIZE_IN_ZIP64)
+                start = min(start, SIZE_IN_ZIP64)
+
+            self.fp.write(END_RECORD.pack(END_SIGNATURE, 0, 0, members,
+                members, size, start, 0))
+        finally:
+            self.fp.close()
@@ -32,22 +32,27 @@ need for any other function to be called from the outside.
 
 import sys
 import os
+import shutil
+import hashlib
+import threading
 import dateutil.parser
 import logging
+import xml.etree.ElementTree as ET
 from zipfile import ZipFile
-from xmlschema import XMLSchema
+from xmlschema import XMLSchema, XMLResource
 from uuid import UUID
 from typing import List, Dict
 
 import bcfplugin
 import bcfplugin.util as util
-from bcfplugin.rdwr.project import Project
+import bcfplugin.rdwr.projectcache as projectcache
+from bcfplugin.rdwr.project import Project, StringPool
 from bcfplugin.rdwr.uri import Uri as Uri
 from bcfplugin.rdwr.markup import (Comment, Header, HeaderFile, ViewpointReference, Markup)
 from bcfplugin.rdwr.topic import (Topic, BimSnippet, DocumentReference)
 from bcfplugin.rdwr.viewpoint import (Viewpoint, Component, Components, ViewSetupHints,
-        ComponentColour, PerspectiveCamera, OrthogonalCamera, BitmapFormat,
-        Bitmap)
+        ComponentColour, ComponentList, ColourGroups, PerspectiveCamera,
+        OrthogonalCamera, BitmapFormat, Bitmap)
 from bcfplugin.rdwr.threedvector import (Point, Line, Direction, ClippingPlane)
 
 SUPPORTED_VERSIONS = ["2.1"]
@@ -55,6 +60,26 @@ SUPPORTED_VERSIONS = ["2.1"]
 
 logger = bcfplugin.createLogger(__name__)
 
+strictMarkupDecoding = False
+""" If set, markup files are decoded through xmlschema by `buildMarkup()`.
+Otherwise the faster `decodeMarkup()` is used, the files are validated in a
+separate pass anyway. """
+
+validateViewpoints = True
+""" If set, every viewpoint file is validated against the schema in a separate
+pass before it is read by `streamViewpoint()` """
+
+useProjectCache = False
+""" If set, projects read by `readBcfFile()` are stored in, and taken from, the
+cache of `rdwr.projectcache`. """
+
+schemaCache = dict()
+""" Compiled schemas by the contents of their file, see `loadSchema()`. Shared
+by all projects that are read. """
+
+schemaCacheLock = threading.Lock()
+""" Held while `schemaCache` is looked up and filled """
+
 
 def modifyVisinfoSchema(schema):
 
@@ -64,25 +89,57 @@ def modifyVisinfoSchema(schema):
     able to support fieldOfView values between 0 and 360 degrees.
     """
 
+    fieldOfView = schema.types["FieldOfView"]
     # set maximum value
-    schema.__dict__["types"].__dict__["target_dict"]["FieldOfView"].__dict__["validators"][1].value = 360
+    fieldOfView.validators[1].value = 360
     # set minimum value
-    schema.__dict__["types"].__dict__["target_dict"]["FieldOfView"].__dict__["validators"][0].value = 0
+    fieldOfView.validators[0].value = 0
+
+    return schema
+
+
+def loadSchema(schemaPath: str, modify=None):
+
+    """ Returns the compiled XMLSchema of the XSD file `schemaPath`.
+
+    Compiling a schema takes longer than reading a small project, so every
+    schema is compiled only once and afterwards taken from `schemaCache`.
+    Every session copies the schema files into a temporary directory of its
+    own, hence they are told apart by their contents and not by their paths.
+    If given, `modify` (e.g. `modifyVisinfoSchema()`) is applied to the
+    schema once after it was compiled.
+    """
+
+    with open(schemaPath, "rb") as f:
+        key = (hashlib.sha1(f.read()).hexdigest(), modify)
+
+    with schemaCacheLock:
+        schema = schemaCache.get(key)
+        if schema is None:
+            logger.debug("Compiling schema {}".format(schemaPath))
+            schema = XMLSchema(schemaPath)
+            if modify is not None:
+                schema = modify(schema)
+            schemaCache[key] = schema
 
     return schema
 
 
-def extractFileToTmp(zipFilePath: str):
+def extractFileToTmp(zipFilePath: str, session=util.session):
 
     """
-    Extracts the zipFile to the temporary directory of the system.
+    Extracts the zipFile to the temporary directory of `session`.
     """
 
     zipFile = ZipFile(zipFilePath)
 
-    tmpDir = util.getSystemTmp()
+    tmpDir = session.getSystemTmp()
     extractionPath = os.path.join(tmpDir, os.path.basename(zipFilePath))
 
+    # leftovers of a previous session would end up in the project otherwise
+    if os.path.exists(extractionPath):
+        shutil.rmtree(extractionPath)
+
     logger.debug("Extracting {} to {}".format(zipFile.filename, extractionPath))
     zipFile.extractall(extractionPath)
     return extractionPath
@@ -108,7 +165,7 @@ def getVersion(extrBcfPath: str, versionSchemaPath: str):
                     versionFileName,
                     os.path.basename(extrBcfPath)))
 
-    versionSchema = XMLSchema(versionSchemaPath)
+    versionSchema = loadSchema(versionSchemaPath)
     if not versionSchema.is_valid(versionFilePath):
         return None
 
@@ -205,7 +262,7 @@ def buildProject(projectFilePath: str, projectSchema: str):
                 " '{}'".format(projectSchema))
         return None
 
-    schema = XMLSchema(projectSchema)
+    schema = loadSchema(projectSchema)
     (projectDict, errors) = schema.to_dict(projectFilePath, validation="lax")
     errorList = [ str(err) for err in errors ]
     if len(errorList) > 0:
@@ -418,7 +475,7 @@ def buildSnapshotList(topicDir: str):
 def buildMarkup(markupFilePath: str, markupSchemaPath: str):
 
     logger.debug("Building new Markup object")
-    markupSchema = XMLSchema(markupSchemaPath)
+    markupSchema = loadSchema(markupSchemaPath)
     (markupDict, errors) = markupSchema.to_dict(markupFilePath, validation="lax")
     errorList = [ str(err) for err in errors ]
     if len(errorList) > 0:
@@ -440,8 +497,21 @@ def buildMarkup(markupFilePath: str, markupSchemaPath: str):
     viewpoints = [ buildViewpointReference(vpDict)
                     for vpDict in viewpointList ]
 
-    markupDir = os.path.abspath(os.path.dirname(markupFilePath))
-    snapshotList = buildSnapshotList(markupDir)
+    return assembleMarkup(markupFilePath, topic, header, comments,
+            viewpoints)
+
+
+def assembleMarkup(markupFilePath: str, topic, header, comments, viewpoints):
+
+    """ Creates the Markup object out of its already built parts. The
+    snapshots are taken from the directory of `markupFilePath`. If
+    `markupFilePath` is a file object instead, e.g. a member of an archive,
+    the markup does not get any snapshots. """
+
+    snapshotList = list()
+    if isinstance(markupFilePath, str):
+        markupDir = os.path.abspath(os.path.dirname(markupFilePath))
+        snapshotList = buildSnapshotList(markupDir)
     markup = Markup(topic, header, comments, viewpoints, snapshotList)
 
     # Add the right viewpoint references to each comment
@@ -455,6 +525,238 @@ def buildMarkup(markupFilePath: str, markupSchemaPath: str):
     return markup
 
 
+########## Schema-free markup decoder ##########
+"""
+`decodeMarkup()` builds a Markup object directly from the ElementTree of a
+markup.bcf file, without going through the dictionary of xmlschema. For every
+complex element there is a table, mapping the tag of a child element to a
+tuple `(key, decode, isList)`. `decode` converts the child element into its
+value, which is passed as keyword argument `key` to the constructor of the
+model class. If `isList` is set, the values of all children with this tag are
+collected into a list.
+Values that repeat throughout a project, like authors, labels or file names,
+are put into the StringPool `pool` of the project while decoding.
+The values are converted according to the types of markup.xsd, the same way
+xmlschema does it. An empty element therefore results in `None`. Nothing is
+validated though, this is left to `validateFile()`.
+"""
+
+def _parseBool(value: str):
+
+    """ Converts the lexical representation of xs:boolean into a bool """
+
+    return value.strip() in ("true", "1")
+
+
+def _decodeText(elem, pool):
+
+    # whitespace is preserved for xs:string
+    return elem.text
+
+
+def _decodeInt(elem, pool):
+
+    return int(elem.text) if elem.text is not None else None
+
+
+def _decodeDate(elem, pool):
+
+    if elem.text is None:
+        return None
+    return dateutil.parser.parse(elem.text)
+
+
+def _decodeName(elem, pool):
+
+    """ Decodes a xs:string that is one of `POOLED_NAMES` """
+
+    return pool.intern(elem.text)
+
+
+def _decodeUri(elem, pool):
+
+    # mostly names of files inside the topic directory, which repeat in every
+    # topic
+    return Uri(pool.intern(elem.text)) if elem.text else None
+
+
+def _decodeChildren(elem, fields: Dict, pool: StringPool):
+
+    """ Decodes the children of `elem` using the table `fields`. Children
+    not listed in `fields` are ignored. """
+
+    values = { key: list() for (key, decode, isList) in fields.values()
+            if isList }
+    for child in elem:
+        field = fields.get(child.tag)
+        if field is None:
+            continue
+
+        (key, decode, isList) = field
+        if isList:
+            values[key].append(decode(child, pool))
+        else:
+            values[key] = decode(child, pool)
+
+    return values
+
+
+def _decodeCommentViewpoint(elem, pool):
+
+    return ViewpointReference(id=UUID(elem.attrib["Guid"]))
+
+
+COMMENT_FIELDS = {
+        "Date": ("date", _decodeDate, False),
+        "Author": ("author", _decodeName, False),
+        "Comment": ("comment", _decodeText, False),
+        "Viewpoint": ("viewpoint", _decodeCommentViewpoint, False),
+        "ModifiedDate": ("modDate", _decodeDate, False),
+        "ModifiedAuthor": ("modAuthor", _decodeName, False) }
+
+
+def _decodeComment(elem, pool):
+
+    values = _decodeChildren(elem, COMMENT_FIELDS, pool)
+    if values.get("comment") is None:
+        values["comment"] = ""
+
+    return Comment(UUID(elem.attrib["Guid"]), **values)
+
+
+BIMSNIPPET_FIELDS = {
+        "Reference": ("reference", _decodeUri, False),
+        "ReferenceSchema": ("schema", _decodeUri, False) }
+
+
+def _decodeBimSnippet(elem, pool):
+
+    values = _decodeChildren(elem, BIMSNIPPET_FIELDS, pool)
+    return BimSnippet(elem.attrib["SnippetType"],
+            _parseBool(elem.get("isExternal", "false")), **values)
+
+
+DOCREF_FIELDS = {
+        "ReferencedDocument": ("reference", _decodeUri, False),
+        "Description": ("description", _decodeText, False) }
+
+
+def _decodeDocRef(elem, pool):
+
+    values = _decodeChildren(elem, DOCREF_FIELDS, pool)
+    # same default as `buildDocRef()`
+    values.setdefault("description", None)
+    docId = elem.get("Guid")
+    if docId:
+        docId = UUID(docId)
+
+    return DocumentReference(docId,
+            _parseBool(elem.get("isExternal", "false")), **values)
+
+
+def _decodeRelatedTopic(elem, pool):
+
+    return UUID(elem.attrib["Guid"])
+
+
+TOPIC_FIELDS = {
+        "ReferenceLink": ("referenceLinks", _decodeText, True),
+        "Title": ("title", _decodeText, False),
+        "Priority": ("priority", _decodeName, False),
+        "Index": ("index", _decodeInt, False),
+        "Labels": ("labels", _decodeName, True),
+        "CreationDate": ("date", _decodeDate, False),
+        "CreationAuthor": ("author", _decodeName, False),
+        "ModifiedDate": ("modDate", _decodeDate, False),
+        "ModifiedAuthor": ("modAuthor", _decodeName, False),
+        "DueDate": ("dueDate", _decodeDate, False),
+        "AssignedTo": ("assignee", _decodeName, False),
+        "Stage": ("stage", _decodeName, False),
+        "Description": ("description", _decodeText, False),
+        "BimSnippet": ("bimSnippet", _decodeBimSnippet, False),
+        "DocumentReference": ("docRefs", _decodeDocRef, True),
+        "RelatedTopic": ("relatedTopics", _decodeRelatedTopic, True) }
+
+
+def _decodeTopic(elem, pool):
+
+    values = _decodeChildren(elem, TOPIC_FIELDS, pool)
+    return Topic(UUID(elem.attrib["Guid"]),
+            type=pool.intern(elem.get("TopicType", "")),
+            status=pool.intern(elem.get("TopicStatus", "")),
+            **values)
+
+
+HEADERFILE_FIELDS = {
+        "Filename": ("filename", _decodeName, False),
+        "Date": ("time", _decodeDate, False),
+        "Reference": ("reference", _decodeUri, False) }
+
+
+def _decodeHeaderFile(elem, pool):
+
+    values = _decodeChildren(elem, HEADERFILE_FIELDS, pool)
+    return HeaderFile(pool.intern(elem.get("IfcProject", "")),
+            pool.intern(elem.get("IfcSpatialStructureElement", "")),
+            _parseBool(elem.get("isExternal", "true")), **values)
+
+
+def _decodeHeader(elem, pool):
+
+    # the Header object itself is only created if at least one file is listed
+    return [ _decodeHeaderFile(f, pool) for f in elem.findall("File") ]
+
+
+VIEWPOINTREFERENCE_FIELDS = {
+        "Viewpoint": ("file", _decodeUri, False),
+        "Snapshot": ("snapshot", _decodeUri, False),
+        "Index": ("index", _decodeInt, False) }
+
+
+def _decodeViewpointReference(elem, pool):
+
+    values = _decodeChildren(elem, VIEWPOINTREFERENCE_FIELDS, pool)
+    return ViewpointReference(UUID(elem.attrib["Guid"]), **values)
+
+
+MARKUP_FIELDS = {
+        "Header": ("header", _decodeHeader, False),
+        "Topic": ("topic", _decodeTopic, False),
+        "Comment": ("comments", _decodeComment, True),
+        "Viewpoints": ("viewpoints", _decodeViewpointReference, True) }
+
+
+def decodeMarkup(markupFilePath: str, pool: StringPool = None):
+
+    """ Builds a Markup object out of `markupFilePath` without xmlschema.
+
+    The resulting object is the same `buildMarkup()` returns for a valid file,
+    it is just created several times faster. The file is not validated.
+    Repeating values are taken from `pool`, which should be the StringPool of
+    the project the markup is added to.
+    `markupFilePath` may also be a file object, like a member of an archive
+    opened by `zipfile.ZipFile.open()`.
+    """
+
+    logger.debug("Decoding new Markup object")
+    if pool is None:
+        pool = StringPool()
+
+    root = ET.parse(markupFilePath).getroot()
+    values = _decodeChildren(root, MARKUP_FIELDS, pool)
+    if "topic" not in values:
+        raise KeyError("Topic")
+
+    header = None
+    # there may be instances that define an empty header element
+    headerFiles = values.get("header")
+    if headerFiles:
+        header = Header(headerFiles)
+
+    return assembleMarkup(markupFilePath, values["topic"], header,
+            values["comments"], values["viewpoints"])
+
+
 def buildViewSetupHints(vshDict: Dict):
 
     logger.debug("Building new ViewSetupHints object")
@@ -485,15 +787,26 @@ def buildComponent(componentDict: Dict):
     return component
 
 
+def appendComponents(componentList: ComponentList, componentDicts: List):
+
+    """ Append the values of every component of `componentDicts` to the
+    columns of `componentList`, without creating Component objects. """
+
+    for componentDict in componentDicts:
+        componentList.appendValues(
+                getOptionalFromDict(componentDict, "@IfcGuid", None),
+                getOptionalFromDict(componentDict, "OriginatingSystem", ""),
+                getOptionalFromDict(componentDict, "AuthoringToolId", ""))
+
+
 def buildComponentColour(ccDict: Dict):
 
     logger.debug("Building new ComponentColour object")
     colour = getOptionalFromDict(ccDict, "@Color", None)
-    colourComponents = list()
     cc = None
     if colour: # if a colour is defined then at least one component has to exist
-        colourComponentList = [ buildComponent(cp)
-                                for cp in ccDict["Component"] ]
+        colourComponentList = ComponentList()
+        appendComponents(colourComponentList, ccDict["Component"])
         cc = ComponentColour(colour, colourComponentList)
 
 
@@ -510,27 +823,32 @@ def buildComponents(componentsDict: Dict):
         vsh = buildViewSetupHints(vshDict)
 
     componentDict = getOptionalFromDict(componentsDict, "Selection", None)
-    sel = list()
+    sel = ComponentList()
     if componentDict:
-        componentList = componentDict["Component"]
-        sel = [ buildComponent(cpDict) for cpDict in componentList ]
+        appendComponents(sel, componentDict["Component"])
 
     visibilityDict = componentsDict["Visibility"]
     defaultVisibility = getOptionalFromDict(visibilityDict,
             "@DefaultVisibility", True)
 
     exceptionDict = getOptionalFromDict(visibilityDict, "Exceptions", None)
-    exceptions = list()
+    exceptions = ComponentList()
     if exceptionDict:
-        exceptionList = exceptionDict["Component"] # at least one element has to be present
-        exceptions = [ buildComponent(cp) for cp in exceptionList ]
+        # at least one element has to be present
+        appendComponents(exceptions, exceptionDict["Component"])
 
     colourComponentDict = getOptionalFromDict(componentsDict, "Coloring", None)
-    componentColours = list()
+    componentColours = ColourGroups()
     if colourComponentDict:
         colourComponentList = colourComponentDict["Color"] # at least one color is required
-        componentColours = [ buildComponentColour(ccDict)
-                                for ccDict in colourComponentList ]
+        for ccDict in colourComponentList:
+            # components are only listed if a colour is defined
+            if not getOptionalFromDict(ccDict, "@Color", None):
+                continue
+            componentColours.startGroup(ccDict["@Color"])
+            appendComponents(componentColours.components,
+                    ccDict["Component"])
+            componentColours.endGroup()
 
     components = Components(defaultVisibility, exceptions, sel,
             vsh, componentColours)
@@ -622,8 +940,7 @@ def buildBitmap(bmDict: Dict):
 def buildViewpoint(viewpointFilePath: str, viewpointSchemaPath: str):
 
     logger.debug("Building new Viewpoint object")
-    vpSchema = XMLSchema(viewpointSchemaPath)
-    vpSchema = modifyVisinfoSchema(vpSchema)
+    vpSchema = loadSchema(viewpointSchemaPath, modifyVisinfoSchema)
     (vpDict, errors) = vpSchema.to_dict(viewpointFilePath, validation="lax")
     errorList = [ str(err) for err in errors ]
     if len(errorList) > 0:
@@ -668,25 +985,226 @@ def buildViewpoint(viewpointFilePath: str, viewpointSchemaPath: str):
     logger.debug("New Viewpoint object created")
     return viewpoint
 
+
+VISINFO_CONTAINERS = ["VisualizationInfo", "Components", "Selection",
+        "Visibility", "Exceptions", "Coloring", "Color", "Lines",
+        "ClippingPlanes"]
+""" Elements of a viewpoint file whose children are completely processed as
+soon as their end tag is read by `streamViewpoint()` """
+
+
+def _requireChild(elem, tag: str):
+
+    """ Returns the child `tag` of `elem`. Raises a KeyError if it does not
+    exist, just like a missing key in the dictionary of `buildViewpoint()`
+    does. """
+
+    child = elem.find(tag)
+    if child is None:
+        raise KeyError(tag)
+    return child
+
+
+def _elementToPoint(elem):
+
+    return Point(float(_requireChild(elem, "X").text),
+            float(_requireChild(elem, "Y").text),
+            float(_requireChild(elem, "Z").text))
+
+
+def _elementToDirection(elem):
+
+    return Direction(float(_requireChild(elem, "X").text),
+            float(_requireChild(elem, "Y").text),
+            float(_requireChild(elem, "Z").text))
+
+
+def _elementToViewSetupHints(elem):
+
+    return ViewSetupHints(
+            _parseBool(elem.get("OpeningsVisible", "false")),
+            _parseBool(elem.get("SpacesVisible", "false")),
+            _parseBool(elem.get("SpaceBoundariesVisible", "false")))
+
+
+def _elementToOrthogonalCamera(elem):
+
+    return OrthogonalCamera(
+            _elementToPoint(_requireChild(elem, "CameraViewPoint")),
+            _elementToDirection(_requireChild(elem, "CameraDirection")),
+            _elementToDirection(_requireChild(elem, "CameraUpVector")),
+            float(_requireChild(elem, "ViewToWorldScale").text))
+
+
+def _elementToPerspectiveCamera(elem):
+
+    return PerspectiveCamera(
+            _elementToPoint(_requireChild(elem, "CameraViewPoint")),
+            _elementToDirection(_requireChild(elem, "CameraDirection")),
+            _elementToDirection(_requireChild(elem, "CameraUpVector")),
+            float(_requireChild(elem, "FieldOfView").text))
+
+
+def _elementToLine(elem):
+
+    return Line(_elementToPoint(_requireChild(elem, "StartPoint")),
+            _elementToPoint(_requireChild(elem, "EndPoint")))
+
+
+def _elementToClippingPlane(elem):
+
+    return ClippingPlane(_elementToPoint(_requireChild(elem, "Location")),
+            _elementToDirection(_requireChild(elem, "Direction")))
+
+
+def _elementToBitmap(elem):
+
+    bmFormatStr = _requireChild(elem, "Bitmap").text # either JPG or PNG
+    bmFormat = BitmapFormat.PNG if bmFormatStr == "PNG" else BitmapFormat.JPG
+
+    return Bitmap(bmFormat,
+            _requireChild(elem, "Reference").text,
+            _elementToPoint(_requireChild(elem, "Location")),
+            _elementToDirection(_requireChild(elem, "Normal")),
+            _elementToDirection(_requireChild(elem, "Up")),
+            float(_requireChild(elem, "Height").text))
+
+
+def streamViewpoint(viewpointFilePath: str):
+
+    """ Builds a Viewpoint object while reading `viewpointFilePath`.
+
+    In contrast to `buildViewpoint()` the file is neither decoded into a
+    dictionary nor kept in memory as a whole. Components are appended to the
+    columns of their lists as soon as they are read, every other element
+    (cameras, lines, ...) is built as soon as its end tag is reached. Processed
+    elements are removed from the tree right away, thus the memory needed is
+    proportional to the resulting viewpoint only.
+    The file is not validated, this has to be done in a separate pass (see
+    `validateFile()`). Like `buildViewpoint()` a KeyError is raised if a
+    required element or attribute is missing.
+    """
+
+    logger.debug("Streaming new Viewpoint object from"\
+            " {}".format(viewpointFilePath))
+    id = None
+    componentsFound = False
+    visibilityFound = False
+    defaultVisibility = True
+    selection = ComponentList()
+    exceptions = ComponentList()
+    colourings = ColourGroups()
+    target = None # list the next component is appended to
+    vsh = None
+    oCam = None
+    pCam = None
+    lines = list()
+    clippingPlanes = list()
+    bitmaps = list()
+
+    stack = list() # elements from the root to the current one
+    for (event, elem) in ET.iterparse(viewpointFilePath,
+            events=("start", "end")):
+        if event == "start":
+            parentTag = stack[-1].tag if len(stack) > 0 else None
+            stack.append(elem)
+            if parentTag is None:
+                id = UUID(elem.attrib["Guid"])
+            elif elem.tag == "Components" and len(stack) == 2:
+                componentsFound = True
+            elif elem.tag == "Selection" and parentTag == "Components":
+                target = selection
+            elif elem.tag == "Visibility" and parentTag == "Components":
+                visibilityFound = True
+                defaultVisibility = _parseBool(elem.get("DefaultVisibility",
+                    "true"))
+            elif elem.tag == "Exceptions" and parentTag == "Visibility":
+                target = exceptions
+            elif elem.tag == "Color" and parentTag == "Coloring":
+                # components are only listed if a colour is defined
+                colour = elem.get("Color")
+                target = None
+                if colour:
+                    colourings.startGroup(colour)
+                    target = colourings.components
+            continue
+
+        stack.pop()
+        parentTag = stack[-1].tag if len(stack) > 0 else None
+        if elem.tag == "Component":
+            if target is not None:
+                target.appendValues(elem.get("IfcGuid"),
+                        elem.findtext("OriginatingSystem", ""),
+                        elem.findtext("AuthoringToolId", ""))
+        elif elem.tag in ("Selection", "Exceptions"):
+            target = None
+        elif elem.tag == "Color" and parentTag == "Coloring":
+            if target is not None:
+                colourings.endGroup()
+            target = None
+        elif elem.tag == "ViewSetupHints" and parentTag == "Components":
+            vsh = _elementToViewSetupHints(elem)
+        elif len(stack) == 1:
+            if elem.tag == "OrthogonalCamera":
+                oCam = _elementToOrthogonalCamera(elem)
+            elif elem.tag == "PerspectiveCamera":
+                pCam = _elementToPerspectiveCamera(elem)
+            elif elem.tag == "Bitmap":
+                bitmaps.append(_elementToBitmap(elem))
+        elif elem.tag == "Line" and parentTag == "Lines":
+            lines.append(_elementToLine(elem))
+        elif elem.tag == "ClippingPlane" and parentTag == "ClippingPlanes":
+            clippingPlanes.append(_elementToClippingPlane(elem))
+
+        if parentTag in VISINFO_CONTAINERS:
+            # `elem` is the only child left, removing it is therefore cheap
+            stack[-1].remove(elem)
+
+    if id is None:
+        raise KeyError("@Guid")
+
+    components = None
+    if componentsFound:
+        if not visibilityFound:
+            raise KeyError("Visibility")
+        components = Components(defaultVisibility, exceptions, selection,
+                vsh, colourings)
+
+    viewpoint = Viewpoint(id, components, oCam,
+            pCam, lines, clippingPlanes, bitmaps)
+
+    logger.debug("New Viewpoint object created")
+    return viewpoint
+
 """ ************ End of build functions ***************** """
 
 
 def validateFile(validateFilePath: str,
         schemaPath: str,
-        bcfFile: str):
+        bcfFile: str,
+        lazy: bool = False):
 
     """ Validates `validateFileName` against the XSD file referenced by
     `schemaPath`.
 
     If successful an empty string is returned, else an error string is
-    returned.
+    returned. `schemaPath` may also be an already loaded XMLSchema object. If
+    `lazy` is set the file is validated while it is read, without building its
+    whole tree in memory.
     """
 
     logger.debug("Validating file {} against {}".format(validateFilePath,
         schemaPath))
-    schema = XMLSchema(schemaPath)
+    if isinstance(schemaPath, XMLSchema):
+        schema = schemaPath
+        schemaPath = schema.url
+    else:
+        schema = loadSchema(schemaPath)
     try:
-        schema.validate(validateFilePath)
+        if lazy:
+            schema.validate(XMLResource(validateFilePath, lazy=True))
+        else:
+            schema.validate(validateFilePath)
     except Exception as e:
         # get parent directory of file, useful for the user if the file is a
         # markup.bcf file inside some topic
@@ -698,18 +1216,42 @@ def validateFile(validateFilePath: str,
     return ""
 
 
-def readBcfFile(bcfFile: str):
+def getCacheKey(bcfFile: str):
+
+    """ Returns the key `bcfFile` is stored under in `rdwr.projectcache`.
+
+    Besides the archive the key covers the options changing how the project is
+    read, so a project read with other options is not taken from the cache.
+    """
+
+    options = { "strictMarkupDecoding": strictMarkupDecoding,
+            "validateViewpoints": validateViewpoints }
+    return projectcache.getKey(bcfFile, options)
+
+
+def readBcfFile(bcfFile: str, prepareDir=None, session=util.session,
+        stringPool: StringPool = None):
 
     """ Reads the bcfFile into the memory.
 
     Before each file is parsed into the class structure it gets validated
     against its corresponding XSD file.  If parsing went successful then a
     value other than a object of type Project is returned.
+    If `prepareDir` is given, it is called with the path of the extracted
+    working directory before any file is parsed. This can be used to replay
+    changes onto the files.
+    The file is extracted into the temporary directory of `session`, which
+    afterwards refers to the extracted working directory.
+    If `stringPool` is given, the project uses it instead of a pool of its own.
+    Thereby several projects can share one pool.
+    Unless `prepareDir` is given, the project is taken from the cache of
+    `rdwr.projectcache` if `bcfFile` was already read before, and stored
+    there otherwise (see `useProjectCache`).
     """
 
     logger.debug("Reading file {} and instantiating the data"\
             " model".format(bcfFile))
-    tmpDir = util.getSystemTmp()
+    tmpDir = session.getSystemTmp()
     (projectSchemaPath, extensionsSchemaPath,\
         markupSchemaPath, versionSchemaPath,\
         visinfoSchemaPath) = util.copySchemas(tmpDir)
@@ -723,7 +1265,20 @@ def readBcfFile(bcfFile: str):
                 "Please try again in a few moments")
         return None
 
-    bcfExtractedPath = extractFileToTmp(bcfFile)
+    bcfExtractedPath = extractFileToTmp(bcfFile, session)
+    # stats have to reflect the files as they are in `bcfFile`
+    fileStats = util.getFileStats(bcfExtractedPath)
+    if prepareDir is not None:
+        prepareDir(bcfExtractedPath)
+
+    # replayed changes are not part of the archive, hence not of the cache
+    cacheKey = None
+    if useProjectCache and prepareDir is None:
+        cacheKey = getCacheKey(bcfFile)
+        proj = projectcache.load(cacheKey, bcfExtractedPath, stringPool)
+        if proj is not None:
+            return _openWorkingDir(proj, bcfFile, bcfExtractedPath, fileStats,
+                    session)
 
     # before a file gets read into memory it needs to get validated (i.e.:
     # before the corresponding build* function is called, validate with
@@ -757,8 +1312,11 @@ def readBcfFile(bcfFile: str):
             logger.error("{}.\n Following the error"\
                     " message:\n{}".format(msg, error))
         proj = buildProject(projectFilePath, projectSchemaPath)
+    if stringPool is not None:
+        proj.stringPool = stringPool
 
     ### Iterate over the topic directories ###
+    visinfoSchema = None # loaded on first use
     topicDirectories = util.getDirectories(bcfExtractedPath)
     for topic in topicDirectories:
         logger.debug("Topic {} gets builded next".format(topic))
@@ -775,17 +1333,27 @@ def readBcfFile(bcfFile: str):
                         SUPPORTED_VERSIONS))
             logger.error(msg)
             logger.error("{}\nError:\n{}".format(msg, error))
-        markup = buildMarkup(markupFilePath, markupSchemaPath)
+        if strictMarkupDecoding:
+            markup = buildMarkup(markupFilePath, markupSchemaPath)
+        else:
+            markup = decodeMarkup(markupFilePath, proj.stringPool)
 
         # generate a viewpoint object for all viewpoints listed in the markup
         # object and add them to the ViewpointReference object (`viewpoint`)
         # inside markup
         for vpRef in markup.viewpoints:
             vpPath = os.path.join(topicDir, vpRef.file.uri)
+            if validateViewpoints:
+                if visinfoSchema is None:
+                    visinfoSchema = loadSchema(visinfoSchemaPath,
+                            modifyVisinfoSchema)
+                error = validateFile(vpPath, visinfoSchema, bcfFile, True)
+                if error != "":
+                    logger.error(error)
             try:
                 # if some required element was not found, indicated by a key
                 # error then skip the viewpoint
-                vp = buildViewpoint(vpPath, visinfoSchemaPath)
+                vp = streamViewpoint(vpPath)
             except KeyError as err:
                 logger.error("{} is required in a viewpoint file."
                     " Viewpoint {}/{} is skipped"\
@@ -798,7 +1366,22 @@ def readBcfFile(bcfFile: str):
         # add the finished markup object to the project
         proj.topicList.append(markup)
 
-    util.setBcfDir(bcfExtractedPath)
+    if cacheKey is not None:
+        projectcache.store(cacheKey, bcfExtractedPath, proj)
+
+    return _openWorkingDir(proj, bcfFile, bcfExtractedPath, fileStats, session)
+
+
+def _openWorkingDir(proj, bcfFile, bcfExtractedPath, fileStats, session):
+
+    """ Let `session` refer to the working directory `bcfExtractedPath` of
+    `bcfFile`, out of which `proj` was read, and return `proj` """
+
+    session.setBcfDir(bcfExtractedPath)
+    # remember where the working directory came from, so that unchanged files
+    # can be taken over from there on save
+    session.setSourceArchive(os.path.abspath(bcfFile))
+    session.storeFileStats(fileStats)
     logger.debug("BCF file is read in and open in"\
             " {}".format(bcfExtractedPath))
     return proj
@@ -40,6 +40,8 @@ class ThreeDVector(Hierarchy, State, XMLName):
     specialised to a point or a direction vector
     """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "x", "y", "z")
+
     def __init__(self,
             x: float,
             y: float,
@@ -105,6 +107,8 @@ class Point(ThreeDVector):
     Therefore it represents a point in the three dimensional space
     """
 
+    __slots__ = ()
+
     def __init__(self,
             x: float,
             y: float,
@@ -145,6 +149,8 @@ class Direction(ThreeDVector, XMLName):
     Therefore it represents a vector in the three dimensional space
     """
 
+    __slots__ = ()
+
     def __init__(self,
             x: float,
             y: float,
@@ -186,6 +192,8 @@ class Line(Hierarchy, State, XMLName):
     Represents a line that goes throught the three dimensional space.
     """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "start", "end")
+
     def __init__(self,
             start: Point,
             end: Point,
@@ -198,11 +206,13 @@ class Line(Hierarchy, State, XMLName):
         self.start = start
         self.end = end
 
-        # set containingObject of complex members
+        # set containingObject and node name of complex members
         if self.start is not None:
             self.start.containingObject = self
+            self.start.xmlName = "StartPoint"
         if self.end is not None:
             self.end.containingObject = self
+            self.end.xmlName = "EndPoint"
 
 
     def __deepcopy__(self, memo):
@@ -243,8 +253,8 @@ class Line(Hierarchy, State, XMLName):
         startElem = ET.SubElement(elem, "StartPoint")
         startElem = self.start.getEtElement(startElem)
 
-        stopElem = ET.SubElement(elem, "StopPoint")
-        stopElem = self.stop.getEtElement(stopElem)
+        endElem = ET.SubElement(elem, "EndPoint")
+        endElem = self.end.getEtElement(endElem)
 
         return elem
 
@@ -258,6 +268,9 @@ class ClippingPlane(Hierarchy, State, XMLName):
     everything else shall be left visible.
     """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "location",
+            "direction")
+
     def __init__(self,
             location: Point,
             direction: Direction,
@@ -270,9 +283,10 @@ class ClippingPlane(Hierarchy, State, XMLName):
         self.location = location
         self.direction = direction
 
-        # set containingObject of complex members
+        # set containingObject and node name of complex members
         if self.location is not None:
             self.location.containingObject = self
+            self.location.xmlName = "Location"
         if self.direction is not None:
             self.direction.containingObject = self
 
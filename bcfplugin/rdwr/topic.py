@@ -50,6 +50,9 @@ class DocumentReference(Hierarchy, State, XMLName, Identifiable):
 
     """ Represents the XML type markup.xsd:DocumentReference """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "_objectId", "_guid",
+            "_external", "_reference", "_description", "_fingerprint")
+
     def __init__(self,
                 guid: UUID = None,
                 external: bool = False,
@@ -100,16 +103,11 @@ class DocumentReference(Hierarchy, State, XMLName, Identifiable):
     def __eq__(self, other):
 
         """
-        Returns true if every variable member of both classes are the same
+        Returns true if both objects are of the same type and have the same
+        fingerprint
         """
 
-        if type(self) != type(other):
-            return False
-
-        return (self.guid == other.guid and
-                self.external == other.external and
-                self.reference == other.reference and
-                self.description == other.description)
+        return self.fingerprintEquals(other)
 
 
     def __str__(self):
@@ -187,20 +185,6 @@ class DocumentReference(Hierarchy, State, XMLName, Identifiable):
         return elem
 
 
-    def getStateList(self):
-
-        stateList = list()
-        if not self.isOriginal():
-            stateList.append((self.state, self))
-
-        stateList += self._guid.getStateList()
-        stateList += self._external.getStateList()
-        stateList += self._reference.getStateList()
-        stateList += self._description.getStateList()
-
-        return stateList
-
-
     def searchObject(self, object):
 
         if not issubclass(type(object), Identifiable):
@@ -220,6 +204,9 @@ class BimSnippet(Hierarchy, State, XMLName, Identifiable):
 
     """ Represents the XML type markup.xsd:BimSnippet """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "_objectId", "_type",
+            "_external", "_reference", "_schema", "_fingerprint")
+
     def __init__(self,
             type: str = "",
             external: bool = False,
@@ -268,16 +255,12 @@ class BimSnippet(Hierarchy, State, XMLName, Identifiable):
     def __eq__(self, other):
 
         """
-        Returns true if every variable member of both classes are the same
+        Returns true if both objects are of the same type and have the same
+        fingerprint
         """
 
-        if type(self) != type(other):
-            return False
+        return self.fingerprintEquals(other)
 
-        return (self.type == other.type and
-                self.external == other.external and
-                self.reference == other.reference and
-                self.schema == other.schema)
 
     def __str__(self):
 
@@ -344,20 +327,6 @@ class BimSnippet(Hierarchy, State, XMLName, Identifiable):
         return elem
 
 
-    def getStateList(self):
-
-        stateList = list()
-        if not self.isOriginal():
-            stateList.append((self.state, self))
-
-        stateList += self._type.getStateList()
-        stateList += self._external.getStateList()
-        stateList += self._reference.getStateList()
-        stateList += self._schema.getStateList()
-
-        return stateList
-
-
     def searchObject(self, object):
 
         if not issubclass(type(object), Identifiable):
@@ -377,6 +346,12 @@ class Topic(Hierarchy, XMLIdentifiable, State, XMLName, Identifiable):
 
     """ Represents the XML type markup.xsd:Topic """
 
+    __slots__ = ("containingObject", "_id", "state", "_xmlname", "_objectId",
+            "_title", "_date", "_author", "_type", "_status", "referenceLinks",
+            "docRefs", "_priority", "_index", "labels", "_modDate",
+            "_modAuthor", "_dueDate", "_assignee", "_description", "_stage",
+            "relatedTopics", "bimSnippet", "_fingerprint")
+
     def __init__(self,
             id: UUID,
             title: str,
@@ -422,7 +397,8 @@ class Topic(Hierarchy, XMLIdentifiable, State, XMLName, Identifiable):
                 ModificationType.MODIFICATION)
         self._modAuthor = ModificationAuthor(modAuthor, self,
                 ModificationType.MODIFICATION)
-        self._dueDate = SimpleElement(dueDate, "DueDate", None, self)
+        self._dueDate = ModificationDate(dueDate, self)
+        self._dueDate.xmlName = "DueDate"
         self._assignee = SimpleElement(assignee, "AssignedTo", "", self)
         self._description = SimpleElement(description, "Description",
                 "", self)
@@ -477,7 +453,7 @@ class Topic(Hierarchy, XMLIdentifiable, State, XMLName, Identifiable):
         cpy._index = cpyindex
         cpy.labels = cpylabels
         cpy._modDate = cpymoddate
-        cpy._modauthor = cpymodauthor
+        cpy._modAuthor = cpymodauthor
         cpy._dueDate = cpyduedate
         cpy._assignee = cpyassignee
         cpy._description = cpydescription
@@ -499,34 +475,6 @@ class Topic(Hierarchy, XMLIdentifiable, State, XMLName, Identifiable):
         return cpy
 
 
-    def __eq__(self, other):
-
-        """
-        Returns true if every variable member of both classes are the same
-        """
-
-        if type(self) != type(other):
-            return False
-
-        return (self.xmlId == other.xmlId and
-                self.title == other.title and
-                self.__checkNone(self.date, other.date) and
-                self.author == other.author and
-                self.type == other.type and
-                self.status == other.status and
-                self.docRefs == other.docRefs and
-                self.priority == other.priority and
-                self.index == other.index and
-                self.labels == other.labels and
-                self.__checkNone(self.modDate, other.modDate) and
-                self.modAuthor, other.modAuthor and
-                self.__checkNone(self.dueDate, other.dueDate) and
-                self.assignee == other.assignee and
-                self.description == other.description and
-                self.stage == other.stage and
-                self.relatedTopics == other.relatedTopics and
-                self.bimSnippet == other.bimSnippet)
-
     def __str__(self):
 
         doc_ref_str = "None"
@@ -667,46 +615,15 @@ class Topic(Hierarchy, XMLIdentifiable, State, XMLName, Identifiable):
         self._title.value = newVal
 
 
-    def __checkNone(self, this, that):
-
-        """ Checks whether `this` and `that` are equal considering "None"
-        values """
-
-        equal = False
-        if this and that:
-            equal = this == that
-        elif (this is None and that is None):
-            equal = True
-        return equal
-
-
     def __eq__(self, other):
 
         """
-        Returns true if every variable member of both classes are the same
+        Returns true if both objects are of the same type and have the same
+        fingerprint
         """
 
-        if type(self) != type(other):
-            return False
-
-        return (self.xmlId == other.xmlId and
-                self.title == other.title and
-                self.__checkNone(self.date, other.date) and
-                self.author == other.author and
-                self.type == other.type and
-                self.status == other.status and
-                self.docRefs == other.docRefs and
-                self.priority == other.priority and
-                self.index == other.index and
-                self.labels == other.labels and
-                self.__checkNone(self.modDate, other.modDate) and
-                self.modAuthor, other.modAuthor and
-                self.__checkNone(self.dueDate, other.dueDate) and
-                self.assignee == other.assignee and
-                self.description == other.description and
-                self.stage == other.stage and
-                self.relatedTopics == other.relatedTopics and
-                self.bimSnippet == other.bimSnippet)
+        return self.fingerprintEquals(other)
+
 
     def __str__(self):
 
@@ -823,37 +740,6 @@ class Topic(Hierarchy, XMLIdentifiable, State, XMLName, Identifiable):
         return elem
 
 
-    def getStateList(self):
-
-        stateList = list()
-        if not self.isOriginal():
-            stateList.append((self.state, self))
-
-        stateList += self._title.getStateList()
-        stateList += self.creation.getStateList()
-        stateList += self._type.getStateList()
-        stateList += self._status.getStateList()
-        stateList += self.referenceLinks.getStateList()
-        for ref in self.refs:
-            stateList += ref.getStateList()
-
-        stateList += self._priority.getStateList()
-        stateList += self._index.getStateList()
-        stateList += self.labels.getStateList()
-        if self.lastModification is not None:
-            stateList += self.lastModification.getStateList()
-
-        stateList += self._dueDate.getStateList()
-        stateList += self._assignee.getStateList()
-        stateList += self._description.getStateList()
-        stateList += self._stage.getStateList()
-        stateList += self.relatedTopics.getStateList()
-        if self.bimSnippet is not None:
-            stateList += self.bimSnippet.getStateList()
-
-        return stateList
-
-
     def searchObject(self, object):
 
         if not issubclass(type(object), Identifiable):
@@ -0,0 +1,151 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+"""
+Author: Patrick Podest
+Date: 2019-08-16
+Github: @podestplatz
+
+**** Description ****
+This file provides the UndoLog, the backup the operations of the
+programmaticInterface roll back to if their updates cannot be written.
+
+An operation makes its modifications of the data model through the methods of
+an UndoLog, which records for each one how to revert it. Thereby rolling back
+only costs as much as the operation itself, whereas a copy of the whole
+project, taken before every operation, grows with the project.
+"""
+
+import bcfplugin
+from bcfplugin.rdwr.interfaces.hierarchy import Hierarchy
+
+logger = bcfplugin.createLogger(__name__)
+
+
+def _indexOf(container, item):
+
+    """ Returns the index of `item` in `container`, compared by identity, or
+    -1. `==` would compare whole subtrees. """
+
+    for (index, contained) in enumerate(container):
+        if contained is item:
+            return index
+    return -1
+
+
+def _invalidate(container, item):
+
+    """ Drop the fingerprint of the object holding the list `container`.
+    Changing the contents of a list is not noticed by its owner. """
+
+    if isinstance(container, Hierarchy):
+        container.invalidateFingerprint()
+    elif isinstance(getattr(item, "containingObject", None), Hierarchy):
+        item.containingObject.invalidateFingerprint()
+
+
+def _removeItem(container, item):
+
+    index = _indexOf(container, item)
+    if index != -1:
+        del container[index]
+        _invalidate(container, item)
+    if hasattr(item, "containingObject"):
+        # leaves the dirty set of the project as well
+        item.containingObject = None
+
+
+def _insertItem(container, index, item):
+
+    # bypass wrapping the item, as `SimpleList.append()` does
+    list.insert(container, index, item)
+    _invalidate(container, item)
+
+
+class UndoLog(object):
+
+    """ Records how to revert the modifications one operation makes to
+    `project`.
+
+    `undo()` reverts all recorded modifications in reverse order and restores
+    the dirty bit of the project. Undoing several logs has to happen in the
+    reverse order of their operations.
+    """
+
+    __slots__ = ("project", "dirty", "actions")
+
+    def __init__(self, project):
+
+        self.project = project
+        self.dirty = project.dirtySet.dirty if project is not None else False
+        """ Dirty bit of `project` before the operation """
+        self.actions = list()
+        """ Tuples `(function, args)` reverting one modification each """
+
+
+    def setMember(self, obj, name, value):
+
+        """ Set the member, or property, `name` of `obj` to `value` """
+
+        self.actions.append((setattr, (obj, name, getattr(obj, name))))
+        setattr(obj, name, value)
+
+
+    def append(self, container, item):
+
+        """ Append `item` to the list `container` and return the appended
+        element. A SimpleList wraps `item` into a SimpleElement. """
+
+        container.append(item)
+        appended = container[-1]
+        self.actions.append((_removeItem, (container, appended)))
+        return appended
+
+
+    def recordDeletion(self, obj):
+
+        """ Record that `obj` is going to be removed by
+        `Project.deleteObject()`. Call it right before. """
+
+        parent = obj.containingObject
+        for (name, value) in parent.getMembers().items():
+            if isinstance(value, list):
+                index = _indexOf(value, obj)
+                if index != -1:
+                    self.actions.append((_insertItem, (value, index, obj)))
+                    return
+            elif value is obj:
+                self.actions.append((setattr, (parent, name, obj)))
+                break
+
+        if hasattr(obj, "value"):
+            # leaves are reset to their default value instead
+            self.actions.append((setattr, (obj, "value", obj.value)))
+            self.actions.append((setattr, (obj, "state", obj.state)))
+
+
+    def undo(self):
+
+        """ Revert all recorded modifications """
+
+        logger.debug("Reverting {} modification(s)".format(len(self.actions)))
+        for (function, args) in reversed(self.actions):
+            function(*args)
+        self.actions = list()
+        if self.project is not None:
+            self.project.setDirty(self.dirty)
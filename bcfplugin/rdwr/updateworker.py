@@ -0,0 +1,176 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+"""
+Author: Patrick Podest
+Date: 2019-08-16
+Github: @podestplatz
+
+**** Description ****
+This file provides the UpdateWorker, a thread that writes updates of the data
+model to the files of the working directory. Thereby the thread calling the
+programmaticInterface, in the plugin the Qt GUI thread, does not have to wait
+for the XML files to be parsed and rewritten.
+
+Updates are handed over in batches, one batch per operation of the
+programmaticInterface. The batches are processed strictly in the order they
+were submitted, so updates of the same file are always applied in order.
+As soon as one batch fails, every batch that is still waiting is dropped, since
+it was based on the state the failed batch would have created. The worker
+continues processing only after `reset()` was called.
+"""
+
+import queue
+import threading
+
+import bcfplugin
+import bcfplugin.rdwr.writer as writer
+
+logger = bcfplugin.createLogger(__name__)
+
+
+def directDispatch(function, *args):
+
+    """ Default dispatcher, calls `function` on the worker thread """
+
+    function(*args)
+
+
+class UpdateWorker(object):
+
+    """ Thread processing batches of updates in the order of submission.
+
+    For every batch `onSuccess(context)` or `onFailure(context, dropped)` is
+    called, `context` being the value passed to `submit()` alongside the
+    batch. `dropped` is set if the batch was not processed at all because a
+    previous one failed. The callbacks are run through `dispatch`, which can be
+    used to run them on another thread (e.g. the Qt GUI thread).
+    """
+
+    def __init__(self, onSuccess=None, onFailure=None,
+            dispatch=directDispatch, updateQueue=None):
+
+        self.updateQueue = (updateQueue if updateQueue is not None else
+                writer.updateQueue)
+        """ UpdateQueue the batches are processed by """
+        self.onSuccess = onSuccess
+        self.onFailure = onFailure
+        self.dispatch = dispatch
+        self.failed = False
+        """ Set as soon as a batch failed, until `reset()` is called """
+        self.generation = 0
+        """ Incremented by `reset()`. Batches of an older generation are
+        dropped. """
+        self.pending = 0
+        """ Number of submitted batches whose callback did not return yet """
+        self.pendingLock = threading.Lock()
+
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run,
+                name="bcfplugin-updateworker", daemon=True)
+        self.thread.start()
+
+
+    def submit(self, updates, context=None):
+
+        """ Queue the list `updates` to be written to file. """
+
+        logger.debug("Submitting batch of {} update(s)".format(len(updates)))
+        with self.pendingLock:
+            self.pending += 1
+        self.queue.put((self.generation, updates, context))
+
+
+    def isIdle(self):
+
+        """ Returns whether every submitted batch was processed or dropped """
+
+        with self.pendingLock:
+            return self.pending == 0
+
+
+    def flush(self):
+
+        """ Block until every submitted batch was processed or dropped.
+
+        Returns `False` if a batch failed since the last `reset()`.
+        """
+
+        self.queue.join()
+        return not self.failed
+
+
+    def reset(self):
+
+        """ Resume processing after a failed batch.
+
+        Batches submitted before this call that are still waiting are dropped.
+        This may also be called from within a callback.
+        """
+
+        self.generation += 1
+        self.failed = False
+
+
+    def stop(self):
+
+        """ Process all submitted batches and stop the thread afterwards. """
+
+        self.queue.put(None)
+        self.thread.join()
+
+
+    def _notify(self, callback, *args):
+
+        if callback is not None:
+            self.dispatch(callback, *args)
+
+
+    def _run(self):
+
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                break
+
+            (generation, updates, context) = item
+            try:
+                if self.failed or generation < self.generation:
+                    logger.debug("Dropping batch of {} update(s), a previous"\
+                            " batch failed".format(len(updates)))
+                    self._notify(self.onFailure, context, True)
+                    continue
+
+                (processed, errorenousUpdate) = \
+                        self.updateQueue.processUpdates(updates)
+                if errorenousUpdate is not None:
+                    self.failed = True
+                    self._notify(self.onFailure, context, False)
+                else:
+                    self._notify(self.onSuccess, context)
+
+            except Exception as exc:
+                logger.error("Batch could not be processed: {}".format(exc))
+                self.failed = True
+                self._notify(self.onFailure, context, False)
+
+            finally:
+                with self.pendingLock:
+                    self.pending -= 1
+                self.queue.task_done()
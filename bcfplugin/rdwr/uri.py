@@ -38,6 +38,8 @@ class Uri(Hierarchy, State, Identifiable):
     No checks are done, though.
     """
 
+    __slots__ = ("containingObject", "state", "_objectId", "uri")
+
     def __init__(self,
             uri: str,
             containingElement = None,
@@ -0,0 +1,249 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+"""
+Author: Patrick Podest
+Date: 2019-08-16
+Github: @podestplatz
+
+**** Description ****
+This file validates BCF archives against the schemas of the standard, without
+reading them into the data model. The members are validated straight from the
+archive, nothing is extracted.
+
+Many archives are validated by `validateArchives()` in a pool of processes.
+Every process compiles the schemas once, when it is started, and validates one
+archive after the other. The result of every archive is a dictionary that can
+be serialized to JSON as it is:
+
+    { "file": path of the archive,
+      "valid": whether no error was found,
+      "version": the VersionId of bcf.version or None,
+      "members": number of validated members,
+      "errors": [ { "member": name of the member or None,
+                    "path": XPath of the invalid element or None,
+                    "reason": description of the error }, ... ],
+      "seconds": time it took to validate the archive }
+"""
+
+import io
+import os
+import time
+import shutil
+import tempfile
+from zipfile import ZipFile, BadZipFile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from xmlschema import XMLResource
+
+import bcfplugin
+import bcfplugin.util as util
+import bcfplugin.rdwr.reader as reader
+
+logger = bcfplugin.createLogger(__name__)
+
+ARCHIVE_EXTENSIONS = (".bcf", ".bcfzip")
+""" Extensions of the files searched for in directories """
+
+SCHEMA_DIR_PREFIX = "bcfvalidator_"
+""" Prefix of the directory the schemas are copied to. It must not start with
+`util.PREFIX`, otherwise the directory would be deleted by `util.deleteTmp()`
+of another instance of the plugin. """
+
+workerSchemas = None
+""" Compiled schemas of the current worker process, set by `initWorker()` """
+
+
+def copySchemas(dstDir: str):
+
+    """ Copy the schema files to `dstDir` and return their paths.
+
+    The returned dictionary maps the members of `util.Schema` to the paths.
+    The extension schema is not used for validation, hence left out.
+    """
+
+    (projectSchemaPath, extensionsSchemaPath, markupSchemaPath,
+            versionSchemaPath, visinfoSchemaPath) = util.copySchemas(dstDir)
+
+    return { util.Schema.PROJECT: projectSchemaPath,
+            util.Schema.MARKUP: markupSchemaPath,
+            util.Schema.VERSION: versionSchemaPath,
+            util.Schema.VISINFO: visinfoSchemaPath }
+
+
+def loadSchemas(schemaPaths):
+
+    """ Compile the schemas of `schemaPaths`, as returned by `copySchemas()`
+    """
+
+    schemas = dict()
+    for (schemaType, schemaPath) in schemaPaths.items():
+        modify = None
+        if schemaType == util.Schema.VISINFO:
+            modify = reader.modifyVisinfoSchema
+        schemas[schemaType] = reader.loadSchema(schemaPath, modify)
+
+    return schemas
+
+
+def initWorker(schemaPaths):
+
+    """ Initializer of the worker processes of `validateArchives()` """
+
+    global workerSchemas
+
+    workerSchemas = loadSchemas(schemaPaths)
+
+
+def getMemberSchema(member: str):
+
+    """ Returns the member of `util.Schema` the archive member `member` has to
+    comply with, or `None` if it is not an XML file of the standard. """
+
+    name = os.path.basename(member)
+    if member == "bcf.version":
+        return util.Schema.VERSION
+    elif member == "project.bcfp":
+        return util.Schema.PROJECT
+    elif name == "markup.bcf":
+        return util.Schema.MARKUP
+    elif name.endswith(".bcfv"):
+        return util.Schema.VISINFO
+    return None
+
+
+def _error(member, reason, path=None):
+
+    return { "member": member, "path": path, "reason": reason }
+
+
+def _validateMember(zipFile, member, schema, schemaType, result):
+
+    """ Validate `member` of `zipFile` against `schema` and add its errors,
+    and its version in case of bcf.version, to `result` """
+
+    resource = XMLResource(io.BytesIO(zipFile.read(member)))
+    errors = [ _error(member, error.reason or str(error), error.path)
+            for error in schema.iter_errors(resource) ]
+    result["errors"].extend(errors)
+
+    if schemaType == util.Schema.VERSION and len(errors) == 0:
+        version = schema.to_dict(resource)["@VersionId"]
+        result["version"] = version
+        if version not in reader.SUPPORTED_VERSIONS:
+            result["errors"].append(_error(member, "BCF version {} is not"\
+                    " supported. Supported versions are: {}".format(version,
+                        reader.SUPPORTED_VERSIONS)))
+
+
+def validateArchive(bcfFile: str, schemas=None):
+
+    """ Validate every member of the archive `bcfFile` against its schema.
+
+    `schemas` are the compiled schemas as returned by `loadSchemas()`, by
+    default the ones of the worker process are used. Returns the result as
+    described at the top of this file.
+    """
+
+    if schemas is None:
+        schemas = workerSchemas
+
+    start = time.perf_counter()
+    result = { "file": bcfFile, "valid": False, "version": None,
+            "members": 0, "errors": list(), "seconds": 0.0 }
+    errors = result["errors"]
+    try:
+        with ZipFile(bcfFile) as zipFile:
+            members = zipFile.namelist()
+            if "bcf.version" not in members:
+                errors.append(_error(None, "bcf.version is missing. This file"\
+                        " is not optional."))
+
+            for member in members:
+                schemaType = getMemberSchema(member)
+                if schemaType is None:
+                    continue
+
+                result["members"] += 1
+                try:
+                    _validateMember(zipFile, member, schemas[schemaType],
+                            schemaType, result)
+                except Exception as exc:
+                    # e.g. the member is not even well-formed XML
+                    errors.append(_error(member, "{}: {}".format(
+                        exc.__class__.__name__, exc)))
+
+    except (OSError, BadZipFile) as exc:
+        errors.append(_error(None, str(exc)))
+
+    result["valid"] = len(errors) == 0
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def findArchives(paths):
+
+    """ Yield every file of `paths`, and every archive found in the
+    directories of `paths`.
+
+    Directories are searched recursively for files ending in one of
+    `ARCHIVE_EXTENSIONS`. Files given directly are yielded regardless of their
+    extension.
+    """
+
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+
+        for (dirpath, dirnames, filenames) in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith(ARCHIVE_EXTENSIONS):
+                    yield os.path.join(dirpath, filename)
+
+
+def validateArchives(paths, jobs: int = None):
+
+    """ Validate all archives of `paths`, see `findArchives()`, and yield the
+    result of every archive as soon as it is available.
+
+    The archives are validated by `jobs` processes, by default one per CPU.
+    If `jobs` is 1 they are validated in the calling process, in the order
+    they were found.
+    """
+
+    schemaDir = tempfile.mkdtemp(prefix=SCHEMA_DIR_PREFIX)
+    try:
+        schemaPaths = copySchemas(schemaDir)
+        archives = findArchives(paths)
+        if jobs == 1:
+            schemas = loadSchemas(schemaPaths)
+            for archive in archives:
+                yield validateArchive(archive, schemas)
+            return
+
+        with ProcessPoolExecutor(max_workers=jobs, initializer=initWorker,
+                initargs=(schemaPaths,)) as executor:
+            pending = [ executor.submit(validateArchive, archive)
+                    for archive in archives ]
+            for future in as_completed(pending):
+                yield future.result()
+
+    finally:
+        shutil.rmtree(schemaDir, ignore_errors=True)
@@ -26,6 +26,7 @@ This file provides classes needed for representing the contents of a viewpoints
 file.
 """
 
+import sys
 from copy import deepcopy
 from enum import Enum
 from typing import List, Dict
@@ -38,6 +39,14 @@ from bcfplugin.rdwr.interfaces.xmlname import XMLName
 from bcfplugin.rdwr.interfaces.identifiable import Identifiable, XMLIdentifiable
 
 
+class CamType(Enum):
+
+    """ Defines the two types of camera a viewpoint can be viewed through """
+
+    ORTHOGONAL = 1
+    PERSPECTIVE = 2
+
+
 class BitmapFormat(Enum):
 
     """ Defines the two formats a bitmap might assume """
@@ -50,6 +59,9 @@ class Bitmap(Hierarchy, State, XMLName):
 
     """ Represents the XML type visinfo.xsd:Bitmap """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "format",
+            "reference", "location", "normal", "upVector", "height")
+
     def __init__(self,
             format: BitmapFormat,
             reference: str, # name of the bitmap file in the topic folder
@@ -72,13 +84,16 @@ class Bitmap(Hierarchy, State, XMLName):
         self.upVector = upVector
         self.height = height
 
-        # set containingObject of complex members
+        # set containingObject and node name of complex members
         if self.location is not None:
             self.location.containingObject = self
+            self.location.xmlName = "Location"
         if self.normal is not None:
             self.normal.containingObject = self
+            self.normal.xmlName = "Normal"
         if self.upVector is not None:
             self.upVector.containingObject = self
+            self.upVector.xmlName = "Up"
 
 
     def __deepcopy__(self, memo):
@@ -152,6 +167,9 @@ class Camera(Hierarchy, State, XMLName):
 
     """ Base class of PerspectiveCamera and OrthogonalCamera """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "viewPoint",
+            "direction", "upVector")
+
     def __init__(self,
             viewPoint: Point,
             direction: Direction,
@@ -166,7 +184,7 @@ class Camera(Hierarchy, State, XMLName):
         State.__init__(self, state)
         XMLName.__init__(self, xmlName)
         self.viewPoint = viewPoint
-        self.viewPoint.xmlName = "CameraViewpoint"
+        self.viewPoint.xmlName = "CameraViewPoint"
         self.direction = direction
         self.direction.xmlName = "CameraDirection"
         self.upVector = upVector
@@ -235,6 +253,8 @@ class PerspectiveCamera(Camera, XMLName):
 
     """ Representing the XML type visinfo.xsd:PerspectiveCamera """
 
+    __slots__ = ("fieldOfView",)
+
     def __init__(self,
             viewPoint: Point,
             direction: Direction,
@@ -299,6 +319,8 @@ class OrthogonalCamera(Camera, XMLName):
 
     """ Representing the XML type visinfo.xsd:OrthogonalCamera """
 
+    __slots__ = ("viewWorldScale",)
+
     def __init__(self,
             viewPoint: Point,
             direction: Direction,
@@ -367,6 +389,9 @@ class Component(Hierarchy, State, XMLName):
 
     """ Representing the XML type visinfo.xsd:Component """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "ifcId",
+            "originatingSystem", "authoringtoolId")
+
     def __init__(self,
             ifcId: UUID = None,
             originatingSystem: str = "",
@@ -446,6 +471,9 @@ class ComponentColour(Hierarchy, State, XMLName):
 
     """ Representing the XML type visinfo.xsd:ComponentColoring """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "colour",
+            "components")
+
     def __init__(self,
             colour: str,
             components: List[Component], # has to have at least one element
@@ -461,7 +489,10 @@ class ComponentColour(Hierarchy, State, XMLName):
         self.components = components
 
         # set containingObject of complex members
-        listSetContainingElement(self.components, self)
+        if isinstance(self.components, ComponentList):
+            self.components.containingObject = self
+        else:
+            listSetContainingElement(self.components, self)
 
 
     def __deepcopy__(self, memo):
@@ -502,6 +533,9 @@ class ViewSetupHints(Hierarchy, State, XMLName):
 
     """ Representing the XML type visinfo.xsd:ViewSetupHints """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "openingsVisible",
+            "spaceBoundariesVisible", "spacesVisible")
+
     def __init__(self, openingsVisible: bool = False,
             spacesVisible: bool = False,
             spaceBoundariesVisible: bool = False,
@@ -561,9 +595,258 @@ class ViewSetupHints(Hierarchy, State, XMLName):
         return elem
 
 
+def internValue(value):
+
+    """ Returns the interned version of `value` if it is a string.
+
+    Thereby every IfcGuid, originating system and authoring tool id is held in
+    memory only once, no matter how often it is listed in the viewpoints.
+    """
+
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+class ComponentList(object):
+
+    """ Sequence of components, stored column-wise.
+
+    Viewpoints exported from authoring tools often list hundreds of thousands of
+    components. Instead of one Component object per entry, the IfcGuids,
+    originating systems and authoring tool ids are stored in one list each
+    (`ifcIds`, `originatingSystems`, `authoringToolIds`), all strings being
+    interned.
+    Component objects are created only on demand, when an entry is accessed by
+    index or by iterating over the list. These are copies, modifying them does
+    not alter the list. Code that just needs the values, like the
+    viewController, shall use the columns directly.
+    """
+
+    __slots__ = ("containingObject", "ifcIds", "originatingSystems",
+            "authoringToolIds")
+
+    def __init__(self, components = (), containingElement = None):
+
+        self.containingObject = containingElement
+        self.ifcIds = list()
+        self.originatingSystems = list()
+        self.authoringToolIds = list()
+        for component in components:
+            self.append(component)
+
+
+    def appendValues(self, ifcId = None, originatingSystem = "",
+            authoringToolId = ""):
+
+        """ Append a component given by its values """
+
+        self.ifcIds.append(internValue(ifcId))
+        self.originatingSystems.append(internValue(originatingSystem))
+        self.authoringToolIds.append(internValue(authoringToolId))
+
+
+    def append(self, component: Component):
+
+        self.appendValues(component.ifcId, component.originatingSystem,
+                component.authoringtoolId)
+
+
+    def __len__(self):
+
+        return len(self.ifcIds)
+
+
+    def __getitem__(self, index):
+
+        """ Returns a Component object for `index`, or a new ComponentList if
+        `index` is a slice. """
+
+        if isinstance(index, slice):
+            sliced = ComponentList(containingElement=self.containingObject)
+            sliced.ifcIds = self.ifcIds[index]
+            sliced.originatingSystems = self.originatingSystems[index]
+            sliced.authoringToolIds = self.authoringToolIds[index]
+            return sliced
+
+        return Component(self.ifcIds[index], self.originatingSystems[index],
+                self.authoringToolIds[index], self.containingObject)
+
+
+    def __iter__(self):
+
+        for index in range(len(self.ifcIds)):
+            yield self[index]
+
+
+    def __deepcopy__(self, memo):
+
+        """ Create a copy of the columns without copying `containingObject`.
+        The values themselves are immutable and thus shared. """
+
+        return self[:]
+
+
+    def __eq__(self, other):
+
+        if isinstance(other, ComponentList):
+            return (self.ifcIds == other.ifcIds and
+                    self.originatingSystems == other.originatingSystems and
+                    self.authoringToolIds == other.authoringToolIds)
+
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return False
+
+
+    def __str__(self):
+
+        return "ComponentList({} component(s))".format(len(self))
+
+    __repr__ = __str__
+
+
+    def getEtElements(self, parent):
+
+        """ Serializes every component, appending a new "Component" node to
+        `parent` for each. """
+
+        for (ifcId, originatingSystem, authoringToolId) in zip(self.ifcIds,
+                self.originatingSystems, self.authoringToolIds):
+            componentElem = ET.SubElement(parent, "Component")
+            if ifcId is not None:
+                componentElem.attrib["IfcGuid"] = str(ifcId)
+            if originatingSystem != "":
+                origSysElem = ET.SubElement(componentElem, "OriginatingSystem")
+                origSysElem.text = originatingSystem
+            if authoringToolId != "":
+                authToolIdElem = ET.SubElement(componentElem,
+                        "AuthoringToolId")
+                authToolIdElem.text = authoringToolId
+
+        return parent
+
+
+class ColourGroups(object):
+
+    """ Sequence of component colourings, stored column-wise.
+
+    The components of all colours are held by one ComponentList
+    (`components`). For every colour `ranges` holds the range of indices
+    `(start, end)` of its components in there, `colours` the colour itself.
+    ComponentColour objects are created only on demand, like the components
+    of ComponentList.
+    """
+
+    __slots__ = ("containingObject", "colours", "ranges", "components")
+
+    def __init__(self, colourings = (), containingElement = None):
+
+        self.containingObject = containingElement
+        self.colours = list()
+        self.ranges = list()
+        self.components = ComponentList(containingElement=containingElement)
+        for colouring in colourings:
+            self.append(colouring)
+
+
+    def startGroup(self, colour: str):
+
+        """ Start a new colour. Components appended to `components` afterwards
+        belong to it, until `endGroup()` is called. """
+
+        self.colours.append(colour)
+        self.ranges.append((len(self.components), len(self.components)))
+
+
+    def endGroup(self):
+
+        """ Ends the colour started by `startGroup()` """
+
+        (start, end) = self.ranges[-1]
+        if start == len(self.components):
+            raise ValueError("A colour has to have at least one component")
+        self.ranges[-1] = (start, len(self.components))
+
+
+    def append(self, colouring: ComponentColour):
+
+        self.startGroup(colouring.colour)
+        for component in colouring.components:
+            self.components.append(component)
+        self.endGroup()
+
+
+    def iterGroups(self):
+
+        """ Yields a tuple `(colour, ifcIds)` for every colour, `ifcIds` being
+        the IfcGuids of its components. """
+
+        for (colour, (start, end)) in zip(self.colours, self.ranges):
+            yield (colour, self.components.ifcIds[start:end])
+
+
+    def __len__(self):
+
+        return len(self.colours)
+
+
+    def __getitem__(self, index):
+
+        (start, end) = self.ranges[index]
+        return ComponentColour(self.colours[index],
+                self.components[start:end], self.containingObject)
+
+
+    def __iter__(self):
+
+        for index in range(len(self.colours)):
+            yield self[index]
+
+
+    def __deepcopy__(self, memo):
+
+        cpy = ColourGroups()
+        cpy.colours = list(self.colours)
+        cpy.ranges = list(self.ranges)
+        cpy.components = deepcopy(self.components, memo)
+        return cpy
+
+
+    def __eq__(self, other):
+
+        if isinstance(other, ColourGroups):
+            return (self.colours == other.colours and
+                    self.ranges == other.ranges and
+                    self.components == other.components)
+
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return False
+
+
+    def __str__(self):
+
+        return "ColourGroups(colours={})".format(self.colours)
+
+    __repr__ = __str__
+
+
 class Components(Hierarchy, State, XMLName):
 
-    """ Representing the XML type visinfo.xsd:Components """
+    """ Representing the XML type visinfo.xsd:Components
+
+    The components of `selection` and `visibilityExceptions` are stored in
+    objects of ComponentList, the colourings in an object of ColourGroups.
+    Lists of Component and ComponentColour objects assigned to them are
+    converted accordingly.
+    """
+
+    __slots__ = ("containingObject", "state", "_xmlname", "viewSetuphints",
+            "_selection", "visibilityDefault", "_visibilityExceptions",
+            "_colouring", "_fingerprint")
 
     def __init__(self,
             visibilityDefault: bool,
@@ -586,9 +869,43 @@ class Components(Hierarchy, State, XMLName):
         # set containingObject for complex members
         if self.viewSetuphints is not None:
             self.viewSetuphints.containingObject = self
-        listSetContainingElement(self.selection, self)
-        listSetContainingElement(self.colouring, self)
-        listSetContainingElement(self.visibilityExceptions, self)
+
+
+    @property
+    def selection(self):
+        return self._selection
+
+    @selection.setter
+    def selection(self, newVal):
+        if not isinstance(newVal, ComponentList):
+            newVal = ComponentList(newVal)
+        newVal.containingObject = self
+        self._selection = newVal
+
+
+    @property
+    def visibilityExceptions(self):
+        return self._visibilityExceptions
+
+    @visibilityExceptions.setter
+    def visibilityExceptions(self, newVal):
+        if not isinstance(newVal, ComponentList):
+            newVal = ComponentList(newVal)
+        newVal.containingObject = self
+        self._visibilityExceptions = newVal
+
+
+    @property
+    def colouring(self):
+        return self._colouring
+
+    @colouring.setter
+    def colouring(self, newVal):
+        if not isinstance(newVal, ColourGroups):
+            newVal = ColourGroups(newVal)
+        newVal.containingObject = self
+        newVal.components.containingObject = self
+        self._colouring = newVal
 
 
     def __deepcopy__(self, memo):
@@ -611,44 +928,25 @@ class Components(Hierarchy, State, XMLName):
     def __eq__(self, other):
 
         """
-        Returns true if every variable member of both classes are the same
+        Returns true if both objects are of the same type and have the same
+        fingerprint
         """
 
-        if type(self) != type(other):
-            return False
-
-        return (self.viewSetuphints == other.viewSetuphints and
-                self.selection == other.selection and
-                self.visibilityDefault == other.visibilityDefault and
-                self.visibilityExceptions == other.visibilityExceptions and
-                self.colouring == other.colouring)
+        return self.fingerprintEquals(other)
 
 
     def __str__(self):
 
-        visibilityExcStr = [ str(exc) for exc in self.visibilityExceptions ]
-        selectionStr = [ str(sel) for sel in self.selection ]
         ret_str = """Components(visibilityDefault='{}',
         visibilityExceptions='{}',
         selection='{}',
         viewSetupHints='{}',
         colouring='{}')""".format(self.visibilityDefault,
-                visibilityExcStr, selectionStr,
+                str(self.visibilityExceptions), str(self.selection),
                 str(self.viewSetuphints), str(self.colouring))
         return ret_str
 
 
-    def _generateComponentList(self, parent, compList):
-
-        """ Serializes `compList` and appens the new nodes to `parent` """
-
-        for component in compList:
-            newComponent = ET.SubElement(parent, "Component")
-            newComponent = component.getEtElement(newComponent)
-
-        return parent
-
-
     def getEtElement(self, elem):
 
         """
@@ -665,22 +963,25 @@ class Components(Hierarchy, State, XMLName):
 
         if len(self.selection) > 0:
             selElem = ET.SubElement(elem, "Selection")
-            selElem = self._generateComponentList(selElem, self.selection)
+            self.selection.getEtElements(selElem)
 
         visibilityElem = ET.SubElement(elem, "Visibility")
-        exceptionsElem = ET.SubElement(visibilityElem, "Exceptions")
-        exceptionsElem = self._generateComponentList(exceptionsElem,
-                self.visibilityExceptions)
+        visibilityElem.attrib["DefaultVisibility"] = str(
+                self.visibilityDefault).lower()
+        # an empty Exceptions node is invalid
+        if len(self.visibilityExceptions) > 0:
+            exceptionsElem = ET.SubElement(visibilityElem, "Exceptions")
+            self.visibilityExceptions.getEtElements(exceptionsElem)
 
         if len(self.colouring) > 0:
             colouringElem = ET.SubElement(elem, "Coloring")
-            for col in self.colouring:
-                colourElem = ET.SubElement(elem, "Color")
-                if col.colour != "":
-                    colourElem.attrib["Color"] = col.colour
-
-                colourElem = self._generateComponentList(colourElem,
-                        col.components)
+            components = self.colouring.components
+            for (colour, (start, end)) in zip(self.colouring.colours,
+                    self.colouring.ranges):
+                colourElem = ET.SubElement(colouringElem, "Color")
+                if colour != "":
+                    colourElem.attrib["Color"] = colour
+                components[start:end].getEtElements(colourElem)
 
         return elem
 
@@ -696,6 +997,10 @@ class Viewpoint(Hierarchy, State, XMLName, Identifiable, XMLIdentifiable):
     deleted with the viewpoint object.
     """
 
+    __slots__ = ("containingObject", "state", "_xmlname", "_objectId", "_id",
+            "components", "oCamera", "pCamera", "lines", "clippingPlanes",
+            "bitmaps", "_fingerprint")
+
     def __init__(self,
             id: UUID,
             components: Components = None,
@@ -755,19 +1060,11 @@ class Viewpoint(Hierarchy, State, XMLName, Identifiable, XMLIdentifiable):
     def __eq__(self, other):
 
         """
-        Returns true if every variable member of both classes are the same
+        Returns true if both objects are of the same type and have the same
+        fingerprint
         """
 
-        if type(self) != type(other):
-            return False
-
-        return (self.xmlId == other.xmlId and
-                self.components == other.components and
-                self.oCamera == other.oCamera and
-                self.pCamera == other.pCamera and
-                self.lines == other.lines and
-                self.clippingPlanes == other.clippingPlanes and
-                self.bitmaps == other.bitmaps)
+        return self.fingerprintEquals(other)
 
 
     def __str__(self):
@@ -30,15 +30,22 @@ file.
 
 The main functions of this file are `processProjectUpdates()` and
 `addProjectUpdate()`. These build the interface to the outside world.
+If `deferUpdates` is set, updates are first only recorded in the journal (see
+journal.py) and written to file later on by `flushProjectUpdates()`.
 """
 
 import os
 import io # used for writing files in utf8
 import sys
+import zlib
+import time
+import shutil
 import logging
 import zipfile
+import tempfile
 from uuid import UUID, uuid4
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import copy as c
 import xml.etree.ElementTree as ET
@@ -46,6 +53,8 @@ import xml.dom.minidom as MD
 import bcfplugin
 import bcfplugin.util as util
 import bcfplugin.rdwr.reader as reader
+import bcfplugin.rdwr.journal as journal
+import bcfplugin.rdwr.rawzip as rawzip
 import bcfplugin.rdwr.interfaces.hierarchy as iH
 import bcfplugin.rdwr.interfaces.state as iS
 import bcfplugin.rdwr.interfaces.identifiable as iI
@@ -94,34 +103,31 @@ listElements = ["Comment", "DocumentReference", "RelatedTopic", "Labels"]
 """ A list of elements that can occur multiple times in the corresponding XML file """
 
 
-projectUpdates = list()
-""" An ordered list of tuples.
-
-Every tuple element denotes an addition,
-modification or deletion of exactly one object in the project. A tuple thereby
-consists of an project object, the object in question and a third value holding
-the old value iff the object shall be modified, otherwise this will be `None`.
-It is assumed that as soon as a new entry is added to the list, nothing holds
-the reference to the contents of the project object anymore. The project and
-object shall therefore be deep copies of the original state.
-Following a schematic element is depicted:
-
-    projectUpdats[x] = (project, element, prevVal)
-
-This list will contain all updates that were not processed.
-"""
+deferUpdates = True
+""" If set, updates are not written to the working directory right away.
+Instead they are recorded in the journal by `UpdateQueue.journal()` and
+applied in bulk by `UpdateQueue.flush()`. """
 
 SNAPSHOT_CNT = 5
 """ Amount of snapshots that will be kept in memory. """
 
-projectSnapshots = deque([None]*SNAPSHOT_CNT, SNAPSHOT_CNT)
-""" An ordered list of N elements.
+COMPRESSION_LEVEL = 6
+""" zlib compression level (0-9) used for deflating members of a BCF file """
 
-Every element is a tuple previously
-held by `projectUpdates`. Every element of former list is, as soon as it is
-processed, appended to this list.
-It therefore serves as storage past plugin states and enables undo operations.
-"""
+STORED_EXTENSIONS = [ ".png", ".jpg", ".jpeg", ".gif", ".zip", ".gz", ".7z",
+        ".rar", ".pdf", ".docx", ".xlsx", ".ifczip" ]
+""" Extensions of files whose contents are compressed already. Those are stored
+as they are, every other file (e.g. markup.bcf, viewpoint files and
+bcf.version) gets deflated. """
+
+ZIP_WORKERS = os.cpu_count() or 1
+""" Number of threads used for compressing members of a BCF file """
+
+DEFAULT_QUEUE_MEMBERS = { "projectUpdates": "updates",
+        "unjournaledUpdates": "unjournaled", "updateCount": "count",
+        "projectSnapshots": "snapshots" }
+""" Maps the former module level names of the update state to the members of
+`updateQueue` they are resolved to (see `__getattr__()`) """
 
 
 def getUniqueIdOfListElementInHierarchy(element):
@@ -216,7 +222,7 @@ def getTopicOfElement(element):
                 markupElem = item
                 break
         logger.debug("Element {} is associated to topic {}".format(element,
-            markupElem.topic))
+            markupElem.topic.xmlId))
         return markupElem.topic
 
     return None
@@ -550,12 +556,23 @@ def getTopicDir(element):
 
 def writeXMLFile(xmlroot, filePath):
 
-    """ Formats `xmlroot` and then writes it to `filePath` (UTF8 encoded) """
+    """ Formats `xmlroot` and then writes it to `filePath` (UTF8 encoded)
+
+    The file is not rewritten in place, a new file replaces it instead. Thereby
+    snapshots of the working directory, that hard link the files, are not
+    affected (see `snapshotWorkingDir()`).
+    """
 
     logger.debug("Writing {} to file {}".format(xmlroot, filePath))
     xmlPrettyText = xmlPrettify(xmlroot)
-    with open(filePath, "wb") as f:
-        f.write(xmlPrettyText)
+    tmpFile = createTmpFileFor(filePath)
+    try:
+        with open(tmpFile, "wb") as f:
+            f.write(xmlPrettyText)
+        os.replace(tmpFile, filePath)
+    except Exception:
+        os.remove(tmpFile)
+        raise
 
 
 def _addAttribute(element, xmlroot):
@@ -650,7 +667,7 @@ def _createMarkup(element, topicPath):
         _createViewpoint(viewpoint, topicPath)
 
 
-def _createProject(element, workDir):
+def _createProject(element, workDir, session=util.session):
 
     """ Create a project file inside `bcfPath` with the contents of `element`
     """
@@ -678,11 +695,11 @@ def _createProject(element, workDir):
         f.write(version.version_str)
     logger.info("version file created at {}".format(versionFilePath))
 
-    util.setBcfDir(newProjectDir)
+    session.setBcfDir(newProjectDir)
     logger.info("bcf directory set to {}".format(newProjectDir))
 
 
-def addElement(element):
+def addElement(element, session=util.session):
 
     """ Adds a new element to the correct file in the working directory.
 
@@ -701,6 +718,7 @@ def addElement(element):
     predefined sequence of the parent the right insertion index is looked up,
     since the element cant just be appended, otherwise it would not be schema
     conform anymore.
+    The working directory is the one of `session`.
     """
 
     logger.debug("Adding element {} to the working"\
@@ -718,7 +736,7 @@ def addElement(element):
         raise NotImplementedError("Writing of bcf.version"\
                 " is not supported")
 
-    bcfPath = util.getBcfDir()
+    bcfPath = session.getBcfDir()
     topicPath = ""
     if not addToProject:
         topicDir = getTopicDir(element)
@@ -740,9 +758,9 @@ def addElement(element):
     logger.debug("Element is going to be added to"\
             " {}".format(filePath))
     if isinstance(element, p.Project):
-        workDir = util.getSystemTmp()
+        workDir = session.getSystemTmp()
         logger.debug("Creating new project in {}".format(workDir))
-        _createProject(element, workDir)
+        _createProject(element, workDir, session)
         return
 
     # adds a complete new topic folder to the zip file
@@ -794,7 +812,7 @@ def deleteXMLIdentifiableElement(element, xmlroot):
     return xmlroot
 
 
-def deleteElement(element):
+def deleteElement(element, session=util.session):
 
     """ Deletes `element` from the correct file in the working directory.
 
@@ -813,7 +831,7 @@ def deleteElement(element):
         raise ValueError("For {} no file can be found to delete from"\
             "".format(element.__class__.__name__))
 
-    bcfPath = util.getBcfDir()
+    bcfPath = session.getBcfDir()
     # path of the topic `element` is contained in
     topicPath = os.path.join(bcfPath, getTopicDir(element))
     # filepath of the file `element` is contained in
@@ -864,7 +882,7 @@ def deleteElement(element):
 
 
 
-def modifyElement(element, previousValue):
+def modifyElement(element, previousValue, session=util.session):
 
     """ Updates the xml node corresponding to `element` in the correct file in
     the working directory.
@@ -888,7 +906,7 @@ def modifyElement(element, previousValue):
         raise ValueError("For {} no file can be found that contains it."\
             "file".format(element))
 
-    bcfPath = util.getBcfDir()
+    bcfPath = session.getBcfDir()
     # path of the topic `element` is contained in
     topicPath = os.path.join(bcfPath, getTopicDir(element))
     # filepath of the file `element` is contained in
@@ -904,51 +922,34 @@ def modifyElement(element, previousValue):
     element.value = previousValue
     if issubclass(type(element), p.SimpleElement):
         logger.debug("Modifying the text of a simple xml node")
-        parentElem = element.containingObject
         etElem = getEtElementFromFile(xmlroot, element, [])
-        etElem.text = str(newValue)
+        if etElem is None:
+            raise ValueError("{} could not be found in {}".format(element,
+                filePath))
+
+        # let the element serialize its new value itself, to keep type
+        # specific formats (e.g. of datetimes) intact
+        element.value = newValue
+        etElem.text = element.getEtElement(ET.Element("", {})).text
 
     elif issubclass(type(element), p.Attribute):
         logger.debug("Modifying the value of an attribute")
         parentElem = element.containingObject
         parentEtElem = getEtElementFromFile(xmlroot, parentElem, [])
-        parentEtElem.attrib[element.xmlName] = str(newValue)
+        if parentEtElem is None:
+            raise ValueError("The parent of {} could not be found in"\
+                    " {}".format(element, filePath))
+
+        element.value = newValue
+        if isinstance(newValue, bool):
+            # xml bool is lowercase
+            parentEtElem.attrib[element.xmlName] = str(newValue).lower()
+        else:
+            parentEtElem.attrib[element.xmlName] = str(newValue)
 
     writeXMLFile(xmlroot, filePath)
 
 
-def addProjectUpdate(project: p.Project, element, prevVal):
-
-    """ Adds `project`, `element` and `prevVal` as tuple to `projectUpdates` iff
-    `element` actually has changed since the last read/write.
-    """
-
-    global projectUpdates
-
-    projectCpy = c.deepcopy(project)
-    # copy element and morph it into the hierarchy of the copied project
-    elementCpy = c.deepcopy(element)
-    oldElement = projectCpy.searchObject(element)
-    elementCpy.containingObject = oldElement.containingObject
-
-    if elementCpy is None:
-        raise RuntimeError("Could not find element id {} in project"\
-                " {}".format(element.id, projectCpy))
-    prevValCpy = None
-    if prevVal is not None:
-        prevValCpy = copy.deepcopy(prevVal)
-
-    if element.state != iS.State.States.ORIGINAL:
-        logger.debug("Adding update of {} to"
-                " projectUpdates. Its state is {}".format(element.__class__,
-                    element.state))
-        projectUpdates.append((projectCpy, elementCpy, prevValCpy))
-        util.setDirty(True)
-    else:
-        raise ValueError("Element is in its original state. Cannot be added as"\
-                " update")
-
-
 def writeHandlerErrMsg(msg, err):
 
     """ Writes `msg` and `err` to the error log. """
@@ -957,7 +958,7 @@ def writeHandlerErrMsg(msg, err):
     logger.error(msg)
 
 
-def handleAddElement(element, oldVal):
+def handleAddElement(element, oldVal, session=util.session):
 
     """ Wrapper for `addElement()` that handles raised exceptions.
 
@@ -968,7 +969,7 @@ def handleAddElement(element, oldVal):
     """
 
     try:
-        addElement(element)
+        addElement(element, session)
     except (RuntimeWarning, ValueError, NotImplementedError) as err:
         msg = ("Element {} could not be added. Reverting to previous" \
             " state".format(element))
@@ -986,7 +987,7 @@ def handleAddElement(element, oldVal):
         return True
 
 
-def handleDeleteElement(element, oldVal):
+def handleDeleteElement(element, oldVal, session=util.session):
 
     """ Wrapper for `deleteElement()` that handles raised exceptions.
 
@@ -998,7 +999,7 @@ def handleDeleteElement(element, oldVal):
 
     try:
         elementHierarchy = element.getHierarchyList()
-        deleteElement(element)
+        deleteElement(element, session)
 
     except ValueError as err:
         msg = ("Element {} could not be deleted. Reverting to previous "\
@@ -1016,7 +1017,7 @@ def handleDeleteElement(element, oldVal):
         return True
 
 
-def handleModifyElement(element, prevVal):
+def handleModifyElement(element, prevVal, session=util.session):
 
     """ Wrapper for `modifyElement()` that handles raised exceptions.
 
@@ -1027,7 +1028,7 @@ def handleModifyElement(element, prevVal):
     """
 
     try:
-        modifyElement(element, prevVal)
+        modifyElement(element, prevVal, session)
     except ValueError as err:
         msg = ("Element {} could not be modified. Reverting to previous "\
                 "state".format(element))
@@ -1042,130 +1043,911 @@ def handleModifyElement(element, prevVal):
         return True
 
 
-def updateProjectSnapshots(newUpdates):
+shellMembers = { m.Markup: ("topic",) }
+""" Members that are copied along with an object above an updated element
+(see `_copyShell()`). The directory of a markup is named after its topic. """
+
 
-    """ Adds the elements of processed updates (`newUpdates`) to the snapshot
-    deque. """
+def _isModelObject(value):
 
-    logger.debug("Adding {} new snapshots to snapshot"\
-            " dequeue".format(len(newUpdates)))
-    for newUpdate in newUpdates:
-        projectSnapshots.append(newUpdate)
+    """ Returns whether `value` is an object of the data model, i.e. has a
+    place in the hierarchy. """
 
+    return (hasattr(type(value), "__slots__") and
+            hasattr(value, "containingObject"))
 
-def updateProjectUpdates(successfullyProcessed):
 
-    """ Remove all elements in `successfullyProcessed` from `projectUpdates` """
+def _copyShell(obj, child, childCpy):
 
-    global projectUpdates
+    """ Returns a copy of `obj` that holds `childCpy` in place of its child
+    `child`, and otherwise only the values of its members that are no elements
+    of the data model, like its name and id.
 
-    logger.debug("Removing {} successfully processed update(s) from the"\
-        " projectUpdates list".format(len(successfullyProcessed)))
-    for success in successfullyProcessed:
-        projectUpdates.remove(success)
+    All other children are left out, except the ones listed in
+    `shellMembers`, which are copied the same way. Thereby the copy contains
+    all that is needed to find `obj` in a file, while its size does not depend
+    on the size of the project. `containingObject` is left `None`.
+    """
+
+    cls = type(obj)
+    cpy = cls.__new__(cls)
+    object.__setattr__(cpy, "containingObject", None)
+    keptMembers = shellMembers.get(cls, ())
+    for name in iH.getSlotNames(cls):
+        if name in ("containingObject", "_fingerprint") or not hasattr(obj,
+                name):
+            continue
+
+        value = getattr(obj, name)
+        if value is child:
+            value = childCpy
+        elif name == "dirtySet":
+            value = iS.DirtySet()
+        elif name == "stringPool":
+            value = p.StringPool()
+        elif _isModelObject(value):
+            if name in keptMembers:
+                value = _copyShell(value, None, None)
+                object.__setattr__(value, "containingObject", cpy)
+            else:
+                value = None
+        elif (isinstance(value, list) and
+                any(_isModelObject(item) for item in value)):
+            value = [ childCpy for item in value if item is child ]
+        elif isinstance(value, list):
+            value = list(value)
+        object.__setattr__(cpy, name, value)
 
+    if isinstance(obj, iI.Identifiable):
+        object.__setattr__(cpy, "_objectId", obj.id)
 
-def processProjectUpdates():
+    return cpy
 
-    """ Process all updates stored in `projectUpdates`.
 
-    The updates are processed in chronological order in a loop. If one update
-    fails the processing is stopped. Every update that was processed in a
-    successful manner is added to the `processedUpdates`.
+def copyUpdateElement(element):
 
-    If all updates were processed successfully then `None` is returned.
-    Otherwise the failed update will be returned.
+    """ Returns a copy of `element` to be recorded as update.
+
+    Only `element` is copied deeply, or its parent if `element` is an
+    attribute, since attributes are found in a file by the contents of their
+    parent. Each object above is copied by `_copyShell()`, holding only the
+    copy below it. This is all the handlers need, they only walk up the
+    hierarchy from the element.
     """
 
-    global projectUpdates
-
-    logger.debug("Processing {} update(s)".format(len(projectUpdates)))
-    # list of all updates that were successfully processed
-    processedUpdates = list()
-    # holds the update that failed to be able to revert back
-    errorenousUpdate = None
-    for update in projectUpdates:
-        element = update[1]
-        oldVal = update[2]
-        updateType = element.state
-
-        # selecting right handler
-        handler = None
-        if updateType == iS.State.States.ADDED:
-            handler = handleAddElement
-        elif updateType == iS.State.States.DELETED:
-            handler = handleDeleteElement
-        elif updateType == iS.State.States.MODIFIED:
-            handler = handleModifyElement
-
-        if handler is not None:
-            if handler(element, oldVal):
-                processedUpdates.append(update)
+    unit = element
+    if isinstance(element, p.Attribute) and element.containingObject:
+        unit = element.containingObject
+
+    unitCpy = c.deepcopy(unit)
+    elementCpy = unitCpy
+    if unit is not element:
+        for name in iH.getSlotNames(type(unit)):
+            if getattr(unit, name, None) is element:
+                elementCpy = getattr(unitCpy, name)
+                break
+
+    (child, childCpy) = (unit, unitCpy)
+    for ancestor in unit.getHierarchyList()[1:]:
+        ancestorCpy = _copyShell(ancestor, child, childCpy)
+        object.__setattr__(childCpy, "containingObject", ancestorCpy)
+        (child, childCpy) = (ancestor, ancestorCpy)
+
+    return elementCpy
+
+
+class UpdateQueue(object):
+
+    """ Holds the updates of one project that were not yet written to its
+    working directory.
+
+    The working directory is the one of the SessionContext `session`. Every
+    open project has its own queue, the module level functions below operate
+    on `updateQueue`.
+    """
+
+    def __init__(self, session=util.session):
+
+        self.session = session
+        """ Session context the updates are written to """
+        self.updates = list()
+        """ An ordered list of tuples.
+
+        Every tuple element denotes an addition, modification or deletion of
+        exactly one object in the project. A tuple thereby consists of an
+        project object, the object in question and a third value holding the
+        old value iff the object shall be modified, otherwise this will be
+        `None`.
+        It is assumed that as soon as a new entry is added to the list, nothing
+        holds the reference to the contents of the project object anymore. The
+        object is therefore a copy of the original state, made by
+        `copyUpdateElement()`, and the project the topmost object of that
+        copy.
+        Following a schematic element is depicted:
+
+            updates[x] = (project, element, prevVal)
+
+        This list will contain all updates that were not processed.
+        """
+        self.unjournaled = list()
+        """ Updates of `updates` that were not yet recorded in the journal by
+        `journal()` """
+        self.count = 0
+        """ Number of updates added to `updates` so far. Used to determine
+        whether the project was modified since a given point in time. """
+        self.snapshots = deque([None]*SNAPSHOT_CNT, SNAPSHOT_CNT)
+        """ An ordered list of N elements.
+
+        Every element is a tuple previously held by `updates`. Every element
+        of former list is, as soon as it is processed, appended to this list.
+        It therefore serves as storage past plugin states and enables undo
+        operations.
+        """
+
+
+    def add(self, project: p.Project, element, prevVal):
+
+        """ Adds `project`, `element` and `prevVal` as tuple to `updates` iff
+        `element` actually has changed since the last read/write.
+        """
+
+        # only the part of the project the handlers need is copied
+        elementCpy = copyUpdateElement(element)
+        projectCpy = elementCpy.getHierarchyList()[-1]
+        prevValCpy = None
+        if prevVal is not None:
+            prevValCpy = c.deepcopy(prevVal)
+
+        if element.state != iS.State.States.ORIGINAL:
+            logger.debug("Adding update of {} to the queue. Its state is"\
+                    " {}".format(element.__class__, element.state))
+            update = (projectCpy, elementCpy, prevValCpy)
+            self.updates.append(update)
+            self.unjournaled.append(update)
+            self.count += 1
+            project.setDirty(True)
+        else:
+            raise ValueError("Element is in its original state. Cannot be added"\
+                    " as update")
+
+
+    def _removeUnjournaled(self, updates):
+
+        """ Remove `updates` from `unjournaled`.
+
+        The updates are compared by identity, comparing them by value would
+        compare whole projects.
+        """
+
+        ids = [ id(update) for update in updates ]
+        self.unjournaled = [ update for update in self.unjournaled
+                if id(update) not in ids ]
+
+
+    def _removeProcessed(self, successfullyProcessed):
+
+        """ Remove all elements in `successfullyProcessed` from `updates` """
+
+        logger.debug("Removing {} successfully processed update(s) from the"\
+            " queue".format(len(successfullyProcessed)))
+        for success in successfullyProcessed:
+            self.updates.remove(success)
+        self._removeUnjournaled(successfullyProcessed)
+
+
+    def processUpdates(self, updates):
+
+        """ Process all updates in the list `updates`.
+
+        The updates are processed in chronological order in a loop, on the
+        working directory of `session`. If one update fails the processing is
+        stopped. Every update that was processed in a successful manner is
+        added to `snapshots`.
+
+        Returns a tuple of the list of successfully processed updates and the
+        update that failed, or `None` if none failed.
+        """
+
+        logger.debug("Processing {} update(s)".format(len(updates)))
+        # list of all updates that were successfully processed
+        processedUpdates = list()
+        # holds the update that failed to be able to revert back
+        errorenousUpdate = None
+        for update in updates:
+            element = update[1]
+            oldVal = update[2]
+            updateType = element.state
+
+            # selecting right handler
+            handler = None
+            if updateType == iS.State.States.ADDED:
+                handler = handleAddElement
+            elif updateType == iS.State.States.DELETED:
+                handler = handleDeleteElement
+            elif updateType == iS.State.States.MODIFIED:
+                handler = handleModifyElement
+
+            if handler is not None:
+                if handler(element, oldVal, self.session):
+                    processedUpdates.append(update)
+                else:
+                    errorenousUpdate = update
+                    break
             else:
+                logger.debug("Element has a state associated with it that is"\
+                    " unknown {}".format(updateType))
                 errorenousUpdate = update
                 break
-        else:
-            logger.debug("Element has a state associated with it that is"\
-                " unknown {}".format(updateType))
-            errorenousUpdate = update
-            break
 
-    # delete processed updates from pending updates list `projectUpdates`
-    updateProjectUpdates(processedUpdates)
-    # add all processed updates to snapshots
-    updateProjectSnapshots(processedUpdates)
-    if errorenousUpdate is not None:
+        logger.debug("Adding {} new snapshots to snapshot"\
+                " dequeue".format(len(processedUpdates)))
+        self.snapshots.extend(processedUpdates)
+        return (processedUpdates, errorenousUpdate)
+
+
+    def process(self):
+
+        """ Process all updates stored in `updates`.
+
+        The updates are processed by `processUpdates()`. Every update that was
+        processed in a successful manner is removed from `updates`.
+
+        If all updates were processed successfully then `None` is returned.
+        Otherwise the failed update will be returned.
+        """
+
+        (processedUpdates, errorenousUpdate) = self.processUpdates(
+                list(self.updates))
+        # delete processed updates from the pending updates
+        self._removeProcessed(processedUpdates)
         return errorenousUpdate
+
+
+    def take(self):
+
+        """ Remove all updates from `updates` and return them.
+
+        This is used to hand the pending updates over to the `UpdateWorker`.
+        """
+
+        updates = self.updates
+        self.updates = list()
+        self._removeUnjournaled(updates)
+
+        return updates
+
+
+    def journal(self):
+
+        """ Record all updates, not yet recorded, in the journal of the BCF
+        file the project was opened from.
+
+        If the project was not opened from a file, there is nothing to replay
+        the updates on, thus nothing is recorded. If the updates could not be
+        recorded they are removed from `updates` and `False` is returned,
+        otherwise `True`.
+        """
+
+        try:
+            # a background save may change the source archive otherwise
+            with journal.lock:
+                archive = self.session.getSourceArchive()
+                if archive is not None:
+                    journal.appendUpdates(archive, self.unjournaled)
+        except Exception as exc:
+            writeHandlerErrMsg("Updates could not be recorded in the journal",
+                    exc)
+            ids = [ id(update) for update in self.unjournaled ]
+            self.updates = [ update for update in self.updates
+                    if id(update) not in ids ]
+            self.unjournaled = list()
+            return False
+
+        self.unjournaled = list()
+        return True
+
+
+    def flush(self):
+
+        """ Apply all deferred updates to the files of the working directory.
+
+        In contrast to `process()` the processing does not stop at the first
+        update that cannot be applied. Such an update is logged and dropped,
+        the processing continues with the next one.
+        Returns the list of updates that could not be applied.
+        """
+
+        failedUpdates = list()
+        errorenousUpdate = self.process()
+        while errorenousUpdate is not None:
+            logger.error("{} could not be written to the working"\
+                    " directory.".format(errorenousUpdate[1]))
+            self.updates.remove(errorenousUpdate)
+            self._removeUnjournaled([ errorenousUpdate ])
+            failedUpdates.append(errorenousUpdate)
+            errorenousUpdate = self.process()
+
+        return failedUpdates
+
+
+    def replay(self, updates):
+
+        """ Apply `updates`, as returned by `journal.readUpdates()`, to the
+        files of the working directory.
+
+        Returns the list of updates that could not be applied.
+        """
+
+        logger.debug("Replaying {} update(s) from the journal".format(
+            len(updates)))
+        for (element, prevVal) in updates:
+            self.updates.append((None, element, prevVal))
+
+        return self.flush()
+
+
+    def clear(self):
+
+        """ Drop all updates that were not yet applied to the working
+        directory """
+
+        logger.debug("Dropping {} pending update(s)".format(len(self.updates)))
+        self.updates = list()
+        self.unjournaled = list()
+
+
+updateQueue = UpdateQueue()
+""" Queue of the updates of the project opened through the module level
+functions of the programmaticInterface """
+
+
+def __getattr__(name):
+
+    """ Resolves the names the members of `updateQueue` were available under
+    before they were moved into UpdateQueue. """
+
+    if name in DEFAULT_QUEUE_MEMBERS:
+        return getattr(updateQueue, DEFAULT_QUEUE_MEMBERS[name])
+    raise AttributeError("module {} has no attribute {}".format(__name__,
+        name))
+
+
+def addProjectUpdate(project: p.Project, element, prevVal):
+
+    """ Wrapper for `updateQueue.add()` """
+
+    updateQueue.add(project, element, prevVal)
+
+
+def processUpdates(updates):
+
+    """ Wrapper for `updateQueue.processUpdates()` """
+
+    return updateQueue.processUpdates(updates)
+
+
+def processProjectUpdates():
+
+    """ Wrapper for `updateQueue.process()` """
+
+    return updateQueue.process()
+
+
+def takeProjectUpdates():
+
+    """ Wrapper for `updateQueue.take()` """
+
+    return updateQueue.take()
+
+
+def journalProjectUpdates():
+
+    """ Wrapper for `updateQueue.journal()` """
+
+    return updateQueue.journal()
+
+
+def flushProjectUpdates():
+
+    """ Wrapper for `updateQueue.flush()` """
+
+    return updateQueue.flush()
+
+
+def replayUpdates(updates):
+
+    """ Wrapper for `updateQueue.replay()` """
+
+    return updateQueue.replay(updates)
+
+
+def clearProjectUpdates():
+
+    """ Wrapper for `updateQueue.clear()` """
+
+    updateQueue.clear()
+
+
+def getCompressionType(fileName):
+
+    """ Returns the compression method `fileName` shall be archived with.
+
+    Files with an extension listed in `STORED_EXTENSIONS` are already
+    compressed and therefore stored, everything else is deflated.
+    """
+
+    extension = os.path.splitext(fileName)[1].lower()
+    if extension in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def compressData(content, compressType, level):
+
+    """ Compress the bytes `content` with `compressType`.
+
+    Returns a tuple consisting of the compressed bytes, the crc32 and the
+    size of `content`.
+    This function is run concurrently by multiple threads. zlib releases the
+    GIL while compressing.
+    """
+
+    crc = zlib.crc32(content)
+    if compressType == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        data = compressor.compress(content) + compressor.flush()
     else:
-        return None
+        data = content
+
+    return (data, crc, len(content))
 
 
-def recursiveZipping(curDir, zipFile):
+def compressFile(filePath, compressType, level):
 
-    """ Recursively walks through curDir and adds the contents to zipFile.
+    """ Read `filePath` and compress its contents with `compressType`.
 
-    Directories are added before the files in the directory. For every step
-    deeper recursiveZipping is called => for every sudirectory recursiveZipping
-    is called once.
+    Returns the same tuple as `compressData()`.
     """
 
+    with open(filePath, "rb") as f:
+        content = f.read()
+
+    return compressData(content, compressType, level)
+
+
+class WriteProgress(object):
+
+    """ Counts the members and bytes written to an archive.
+
+    After every member `callback(bytesWritten, membersWritten)` is called with
+    the totals so far. The bytes are counted as they are stored in the
+    archive, i.e. compressed.
+    """
+
+    def __init__(self, callback):
+
+        self.callback = callback
+        self.bytesWritten = 0
+        self.membersWritten = 0
+
+
+    def add(self, info):
+
+        """ Account for the member `info` that was just written """
+
+        self.bytesWritten += info.compress_size
+        self.membersWritten += 1
+        self.callback(self.bytesWritten, self.membersWritten)
+
+
+def writeEntries(zipFile, entries, level=COMPRESSION_LEVEL, progress=None):
+
+    """ Write `entries` to `zipFile`, a `rawzip.RawZipWriter`, in the order
+    they are listed in.
+
+    Every entry is a tuple of a ZipInfo object and the source of its contents:
+        - `None` for directories
+        - a ZipFile from which the member is copied in its compressed form
+        - the path to a file, whose contents shall be written
+        - the bytes that shall be written
+    Contents of files and bytes are compressed with `info.compress_type`
+    concurrently by `ZIP_WORKERS` threads.
+    Every written member is reported to `progress`, a `WriteProgress` object,
+    if given.
+    """
+
+    # binary file objects of the archives members are copied from
+    srcFiles = dict()
+    with ThreadPoolExecutor(max_workers=ZIP_WORKERS) as executor:
+        # bound the number of compressed files held in memory at once
+        pending = deque()
+        maxPending = 2 * ZIP_WORKERS
+
+        def writePending():
+            (info, source) = pending.popleft()
+            if source is None:
+                zipFile.writeMember(info)
+            elif isinstance(source, zipfile.ZipFile):
+                # reading from srcZip is not thread safe, thus done here
+                srcFile = srcFiles.get(source.filename)
+                if srcFile is None:
+                    srcFile = open(source.filename, "rb")
+                    srcFiles[source.filename] = srcFile
+                zipFile.writeMember(info, rawzip.readRawMember(srcFile, info))
+            else:
+                (data, crc, size) = source.result()
+                info.CRC = crc
+                info.file_size = size
+                info.compress_size = len(data)
+                zipFile.writeMember(info, data)
+
+            if progress is not None:
+                progress.add(info)
+
+        for (info, source) in entries:
+            if isinstance(source, str):
+                source = executor.submit(compressFile, source,
+                        info.compress_type, level)
+            elif isinstance(source, bytes):
+                source = executor.submit(compressData, source,
+                        info.compress_type, level)
+            pending.append((info, source))
+
+            while len(pending) > maxPending:
+                writePending()
+
+        try:
+            while len(pending) > 0:
+                writePending()
+        finally:
+            for srcFile in srcFiles.values():
+                srcFile.close()
+
+
+def isMemberUnchanged(relPath, absPath, fileStats, srcZip):
+
+    """ Check whether the file at `absPath` still equals its counterpart in
+    `srcZip`.
+
+    A file is regarded as unchanged if its modification time and size did not
+    change since the stats `fileStats` were recorded, and `srcZip` contains a
+    member `relPath` of the same size, compressed according to
+    `getCompressionType()`.
+    """
+
+    if srcZip is None or relPath not in fileStats:
+        return False
+
+    try:
+        info = srcZip.getinfo(relPath)
+    except KeyError:
+        return False
+
+    stat = os.stat(absPath)
+    (mtime, size) = fileStats[relPath]
+    return (stat.st_mtime_ns == mtime and stat.st_size == size and
+            info.file_size == size and
+            info.compress_type == getCompressionType(relPath))
+
+
+def listMembers(curDir):
+
+    """ Recursively walks through curDir and returns the paths of all
+    directories and files.
+
+    Directories are listed before the files in the directory. Every element of
+    the returned list is a tuple of the path and a boolean, `True` indicating a
+    directory.
+    """
+
+    members = list()
     for (root, dirs, files) in os.walk(curDir):
         for dir in dirs:
             dirPath = os.path.join(curDir, dir)
-            zipFile.write(dirPath)
-            zipFile = recursiveZipping(dirPath, zipFile)
+            members.append((dirPath, True))
+            members += listMembers(dirPath)
 
         for file in files:
             filePath = os.path.join(curDir, file)
-            zipFile.write(filePath)
+            members.append((filePath, False))
 
         # don't use the recursive behavior of os.walk()
         # only look in the current directory `curDir`
         break
 
-    return zipFile
+    return members
+
+
+def getMemberEntries(members, srcZip=None, fileStats=None):
+
+    """ Generate the entries for `writeEntries()` from `members` as returned
+    by `listMembers()`.
+
+    Files that did not change since they were extracted from `srcZip` are
+    copied over from there in their compressed form. All other files are
+    compressed according to `getCompressionType()`.
+    """
+
+    for (path, isDir) in members:
+        relPath = os.path.normpath(path).replace(os.sep, "/")
+        if isDir:
+            yield (zipfile.ZipInfo.from_file(path), None)
+
+        elif (fileStats is not None and
+                isMemberUnchanged(relPath, path, fileStats, srcZip)):
+            yield (srcZip.getinfo(relPath), srcZip)
+
+        else:
+            info = zipfile.ZipInfo.from_file(path)
+            info.compress_type = getCompressionType(relPath)
+            yield (info, path)
+
 
+def createTmpFileFor(dstFile):
 
-def zipToBcfFile(bcfRootPath, dstFile):
+    """ Create an empty temporary file next to `dstFile` and return its path.
+
+    The file gets the permissions of `dstFile` if it exists, otherwise the
+    default permissions for new files.
+    """
+
+    (fd, tmpFile) = tempfile.mkstemp(prefix=util.PREFIX,
+            dir=os.path.dirname(os.path.abspath(dstFile)))
+    os.close(fd)
+    # mkstemp() creates the file only readable by the owner
+    if os.path.exists(dstFile):
+        shutil.copymode(dstFile, tmpFile)
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmpFile, 0o666 & ~umask)
+
+    return tmpFile
+
+
+def snapshotWorkingDir(bcfRootPath, session=util.session):
+
+    """ Create a snapshot of the working directory `bcfRootPath` and return
+    the path of the snapshot.
+
+    The snapshot is a directory inside the temporary directory, into which
+    every file of `bcfRootPath` is hard linked. If the file system does not
+    support hard links, the files are copied. Since the files of the working
+    directory are always replaced and never rewritten in place, the snapshot
+    retains their contents at the time of its creation, also the modification
+    times and sizes match `util.getFileStats()` of `bcfRootPath` at that time.
+    The snapshot has to be deleted by the caller.
+    """
+
+    logger.debug("Creating snapshot of {}".format(bcfRootPath))
+    snapshotDir = tempfile.mkdtemp(prefix="{}snapshot_".format(util.PREFIX),
+            dir=session.getSystemTmp())
+
+    dirs = list()
+    for (root, subDirs, files) in os.walk(bcfRootPath):
+        dstRoot = os.path.join(snapshotDir, os.path.relpath(root,
+            bcfRootPath))
+        for subDir in subDirs:
+            dstDir = os.path.join(dstRoot, subDir)
+            os.mkdir(dstDir)
+            dirs.append((os.path.join(root, subDir), dstDir))
+
+        for file in files:
+            srcFile = os.path.join(root, file)
+            dstFile = os.path.join(dstRoot, file)
+            try:
+                os.link(srcFile, dstFile)
+            except OSError:
+                shutil.copy2(srcFile, dstFile)
+
+    # adding files changed the modification times of the directories
+    for (srcDir, dstDir) in reversed(dirs):
+        shutil.copystat(srcDir, dstDir)
+
+    return snapshotDir
+
+
+def packBcfFile(bcfRootPath, dstFile, srcArchive=None, fileStats=None,
+        level=COMPRESSION_LEVEL, progress=None):
 
     """ Packs the contents of `bcfRootPath` into a single archive `dstFile`.
 
     All files are archived with their relative paths in relation to
     `bcfRootPath`.
+    Files that did not change since `fileStats` were recorded are copied over
+    from `srcArchive` as they are, only modified or new files are written anew.
+    XML files are deflated with the zlib compression `level`, images and other
+    compressed files are stored.
+    The archive is first written to a temporary file next to `dstFile`, which
+    then replaces `dstFile`. Thereby `dstFile` may also be `srcArchive`.
+    Written members are reported to `progress`, a `WriteProgress` object.
+    `dstFile` and `bcfRootPath` are expected to be absolute paths!
+    """
+
+    logger.debug("Writing {} to file {}".format(bcfRootPath, dstFile))
+    tmpFile = createTmpFileFor(dstFile)
+    try:
+        with util.cd(bcfRootPath):
+            members = listMembers("./")
+            with rawzip.RawZipWriter(tmpFile) as zipFile:
+                if srcArchive is None:
+                    writeEntries(zipFile, getMemberEntries(members), level,
+                            progress)
+                else:
+                    with zipfile.ZipFile(srcArchive) as srcZip:
+                        writeEntries(zipFile, getMemberEntries(members,
+                            srcZip, fileStats), level, progress)
+        os.replace(tmpFile, dstFile)
+    except Exception:
+        os.remove(tmpFile)
+        raise
+
+
+def zipToBcfFile(bcfRootPath, dstFile, level=COMPRESSION_LEVEL,
+        progress=None, session=util.session):
+
+    """ Packs the contents of `bcfRootPath` into a single archive `dstFile`.
+
+    Files that were not modified since the project was opened (or saved the
+    last time) are copied over from that archive as they are (see
+    `packBcfFile()`). Afterwards `session` regards the working directory as
+    extracted from `dstFile`.
     `dstFile` and `bcfRootPath` are expected to be absolute paths!
     Returns the path of the zipped file `dstFile`
     """
 
-    logger.debug("Writing working directory to file {}".format(dstFile))
-    with util.cd(bcfRootPath):
-        with zipfile.ZipFile(dstFile, "w") as zipFile:
-            recursiveZipping("./", zipFile)
+    srcArchive = session.getSourceArchive()
+    fileStats = session.readFileStats() if srcArchive is not None else {}
+    packBcfFile(bcfRootPath, dstFile, srcArchive, fileStats, level, progress)
+
+    # the working directory now corresponds to `dstFile`
+    session.setSourceArchive(os.path.abspath(dstFile))
+    session.storeFileStats(util.getFileStats(bcfRootPath))
+    return dstFile
+
+
+def getSerializedEntries(project: p.Project, generatedNames):
+
+    """ Generate the entries for `writeEntries()` of all files that are
+    serialized from `project`.
+
+    These are bcf.version, project.bcfp, every markup.bcf and every viewpoint
+    file whose viewpoint could be read in. The name of every generated member
+    is added to the set `generatedNames`.
+    """
+
+    dateTime = time.localtime(time.time())[:6]
+
+    def newEntry(name, content):
+        info = zipfile.ZipInfo(name, dateTime)
+        info.external_attr = 0o644 << 16
+        info.compress_type = getCompressionType(name)
+        generatedNames.add(name)
+        return (info, content)
+
+    yield newEntry(versionFileName, version.version_str.encode("UTF-8"))
+
+    projectXMLRoot = project.getEtElement(ET.Element(project.xmlName, {}))
+    yield newEntry(projectFileName, xmlPrettify(projectXMLRoot))
+
+    for markup in project.topicList:
+        topicDir = str(markup.topic.xmlId)
+        dirInfo = zipfile.ZipInfo(topicDir + "/", dateTime)
+        dirInfo.external_attr = (0o40755 << 16) | 0x10
+        generatedNames.add(dirInfo.filename)
+        yield (dirInfo, None)
+
+        markupXMLRoot = markup.getEtElement(ET.Element("Markup", {}))
+        yield newEntry("{}/{}".format(topicDir, markupFileName),
+                xmlPrettify(markupXMLRoot))
+
+        for vpRef in markup.viewpoints:
+            # viewpoints that could not be read are taken over as they are
+            if vpRef.viewpoint is None or vpRef.file is None:
+                continue
+            visinfoRootEtElem = vpRef.viewpoint.getEtElement(
+                    ET.Element("", {}))
+            yield newEntry("{}/{}".format(topicDir, vpRef.file),
+                    xmlPrettify(visinfoRootEtElem))
+
+
+def isTopicDirName(name):
+
+    """ Check whether `name` can be the name of a topic directory, i.e. is a
+    UUID. """
+
+    try:
+        UUID(name)
+    except ValueError:
+        return False
+    return True
+
+
+def getBinaryEntries(project: p.Project, generatedNames, srcZip=None,
+        bcfRootPath=None, session=util.session):
+
+    """ Generate the entries for `writeEntries()` of all files that are not
+    serialized from `project`, like snapshots and documents.
+
+    If `bcfRootPath` is given, the files are taken from this working
+    directory. Files that did not change since they were extracted from
+    `srcZip` are still copied over from there in their compressed form.
+    Without a working directory all members of `srcZip` are copied.
+    Files listed in `generatedNames` and files inside topic directories of
+    topics that are not part of `project` anymore are skipped.
+    """
+
+    topicDirs = [ str(markup.topic.xmlId) for markup in project.topicList ]
+
+    def isSkipped(name):
+        if name.rstrip("/") in generatedNames or name in generatedNames:
+            return True
+        # only the first level contains topic directories
+        parts = name.split("/", 1)
+        return (len(parts) > 1 and isTopicDirName(parts[0]) and
+                parts[0] not in topicDirs)
+
+    if bcfRootPath is not None:
+        fileStats = session.readFileStats() if srcZip is not None else None
+        with util.cd(bcfRootPath):
+            for (info, source) in getMemberEntries(listMembers("./"), srcZip,
+                    fileStats):
+                if isSkipped(info.filename):
+                    continue
+                # files are read after the working directory was left again
+                if isinstance(source, str):
+                    source = os.path.join(bcfRootPath, source)
+                yield (info, source)
+
+    elif srcZip is not None:
+        for info in srcZip.infolist():
+            if isSkipped(info.filename):
+                continue
+            yield (info, None if info.is_dir() else srcZip)
+
+
+def serializeToBcfFile(project: p.Project, dstFile, srcArchive=None,
+        bcfRootPath=None, level=COMPRESSION_LEVEL, progress=None,
+        session=util.session):
+
+    """ Serialize `project` directly into the archive `dstFile`.
 
-    util.setDirty(False)
+    In contrast to `zipToBcfFile()` all XML files are generated from the data
+    model, using the `getEtElement()` methods of the respective objects.
+    Snapshots, documents and all other files are taken from the working
+    directory `bcfRootPath` or, if it is `None`, copied from `srcArchive`.
+    Thereby the data model can be saved without a working directory being
+    present at all.
+    `dstFile` is replaced only after the archive was written successfully.
+    Written members are reported to `progress`, a `WriteProgress` object.
+    Returns the path of the written file `dstFile`.
+    """
+
+    logger.debug("Serializing the data model to file {}".format(dstFile))
+    generatedNames = set()
+    tmpFile = createTmpFileFor(dstFile)
+    try:
+        with rawzip.RawZipWriter(tmpFile) as zipFile:
+            writeEntries(zipFile, getSerializedEntries(project,
+                generatedNames), level, progress)
+            if srcArchive is None:
+                writeEntries(zipFile, getBinaryEntries(project, generatedNames,
+                    None, bcfRootPath, session), level, progress)
+            else:
+                with zipfile.ZipFile(srcArchive) as srcZip:
+                    writeEntries(zipFile, getBinaryEntries(project,
+                        generatedNames, srcZip, bcfRootPath, session), level,
+                        progress)
+        os.replace(tmpFile, dstFile)
+    except Exception:
+        os.remove(tmpFile)
+        raise
+
+    project.setDirty(False)
     return dstFile
 
 
-def createNewBcfFile(name):
+def createNewBcfFile(name, session=util.session):
 
     """ Create a new working directory called `name`.
 
@@ -1175,12 +1957,13 @@ def createNewBcfFile(name):
 
     logger.debug("Creating new working directory {}".format(name))
     project = p.Project(uuid4(), name)
-    newTmpDir = util.getSystemTmp(createNew = True)
+    newTmpDir = session.getSystemTmp(createNew = True)
 
     newBcfDir = os.path.join(newTmpDir, name)
-    util.setBcfDir(newBcfDir)
+    session.setBcfDir(newBcfDir)
+    session.setSourceArchive("")
     os.mkdir(newBcfDir)
-    addElement(project)
+    addElement(project, session)
 
     return project
 
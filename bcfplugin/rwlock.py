@@ -0,0 +1,290 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+"""
+Author: Patrick Podest
+Date: 2019-08-16
+Github: @podestplatz
+
+**** Description ****
+This file provides RWLock, the lock guarding the data model of a
+`ProjectSession` of the programmaticInterface. Any number of threads can read
+the data model at the same time, while a modification has exclusive access to
+it. How long the lock was held is recorded in `HoldTimes`, one for read and
+one for write access.
+
+The methods of an object holding an RWLock in `lock` can be guarded by the
+decorators `reading` and `writing`.
+"""
+
+import time
+import functools
+import threading
+from contextlib import contextmanager
+
+
+class HoldTimes(object):
+
+    """ Statistic of how long a lock was held.
+
+    Nested acquisitions by the same thread are counted as one. All durations
+    are in seconds.
+    """
+
+    __slots__ = ("count", "total", "longest")
+
+    def __init__(self):
+
+        self.count = 0
+        self.total = 0.0
+        self.longest = 0.0
+
+
+    def __str__(self):
+
+        return "HoldTimes(count={}, total={:.6f}s, mean={:.6f}s,"\
+                " longest={:.6f}s)".format(self.count, self.total, self.mean,
+                        self.longest)
+
+
+    @property
+    def mean(self):
+
+        if self.count == 0:
+            return 0.0
+        return self.total / self.count
+
+
+    def add(self, duration):
+
+        """ Record that the lock was held for `duration` seconds """
+
+        self.count += 1
+        self.total += duration
+        if duration > self.longest:
+            self.longest = duration
+
+
+    def asDict(self):
+
+        return { "count": self.count, "total": self.total, "mean": self.mean,
+                "longest": self.longest }
+
+
+class RWLock(object):
+
+    """ Lock that is either held by any number of readers or by one writer.
+
+    Waiting writers take precedence over new readers, so a steady stream of
+    readers cannot starve a modification. Both modes are reentrant: a thread
+    holding the write lock may take the read or write lock again, and a thread
+    holding the read lock may take it again even if a writer is waiting.
+    Upgrading a read to a write lock is not possible, since two readers
+    doing that at the same time would wait for each other forever.
+    """
+
+    def __init__(self):
+
+        self.condition = threading.Condition(threading.Lock())
+        self.readers = 0
+        """ Number of threads holding the read lock """
+        self.writer = None
+        """ Identifier of the thread holding the write lock """
+        self.writeDepth = 0
+        """ Number of nested acquisitions of `writer` """
+        self.waitingWriters = 0
+        self.local = threading.local()
+        """ Read depth and acquisition time of the read lock per thread """
+        self.readTimes = HoldTimes()
+        self.writeTimes = HoldTimes()
+        self.writeAcquired = 0.0
+
+
+    def _readDepth(self):
+
+        return getattr(self.local, "readDepth", 0)
+
+
+    def acquireRead(self, blocking=True):
+
+        """ Block until the read lock is acquired by the calling thread.
+
+        If `blocking` is cleared, the lock is only acquired if that is possible
+        without waiting. Returns whether the lock was acquired.
+        """
+
+        me = threading.get_ident()
+        depth = self._readDepth()
+        with self.condition:
+            if self.writer == me:
+                # reading inside a modification is part of it
+                self.writeDepth += 1
+                return True
+            if depth == 0:
+                while self.writer is not None or self.waitingWriters > 0:
+                    if not blocking:
+                        return False
+                    self.condition.wait()
+                self.readers += 1
+                self.local.acquired = time.perf_counter()
+
+        self.local.readDepth = depth + 1
+        return True
+
+
+    def releaseRead(self):
+
+        """ Release the read lock held by the calling thread """
+
+        with self.condition:
+            if self.writer == threading.get_ident():
+                self._releaseWrite()
+                return
+
+            depth = self._readDepth()
+            if depth == 0:
+                raise RuntimeError("Read lock released without being held")
+            self.local.readDepth = depth - 1
+            if depth == 1:
+                self.readTimes.add(time.perf_counter() - self.local.acquired)
+                self.readers -= 1
+                if self.readers == 0:
+                    self.condition.notify_all()
+
+
+    def acquireWrite(self):
+
+        """ Block until the write lock is acquired by the calling thread """
+
+        me = threading.get_ident()
+        with self.condition:
+            if self.writer == me:
+                self.writeDepth += 1
+                return
+            if self._readDepth() > 0:
+                raise RuntimeError("Read lock cannot be upgraded to a write"\
+                        " lock")
+
+            self.waitingWriters += 1
+            try:
+                while self.writer is not None or self.readers > 0:
+                    self.condition.wait()
+            finally:
+                self.waitingWriters -= 1
+            self.writer = me
+            self.writeDepth = 1
+            self.writeAcquired = time.perf_counter()
+
+
+    def _releaseWrite(self):
+
+        """ Release one level of the write lock. `condition` has to be held """
+
+        self.writeDepth -= 1
+        if self.writeDepth == 0:
+            self.writeTimes.add(time.perf_counter() - self.writeAcquired)
+            self.writer = None
+            self.condition.notify_all()
+
+
+    def releaseWrite(self):
+
+        """ Release the write lock held by the calling thread """
+
+        with self.condition:
+            if self.writer != threading.get_ident():
+                raise RuntimeError("Write lock released without being held")
+            self._releaseWrite()
+
+
+    @contextmanager
+    def read(self):
+
+        """ Context manager holding the read lock """
+
+        self.acquireRead()
+        try:
+            yield
+        finally:
+            self.releaseRead()
+
+
+    @contextmanager
+    def write(self):
+
+        """ Context manager holding the write lock """
+
+        self.acquireWrite()
+        try:
+            yield
+        finally:
+            self.releaseWrite()
+
+
+    def isWriting(self):
+
+        """ Returns whether the calling thread holds the write lock """
+
+        with self.condition:
+            return self.writer == threading.get_ident()
+
+
+    def getMetrics(self):
+
+        """ Returns the hold times of the lock as dictionary.
+
+        The keys "read" and "write" map to the statistic of the respective
+        mode, see `HoldTimes.asDict()`.
+        """
+
+        with self.condition:
+            return { "read": self.readTimes.asDict(),
+                    "write": self.writeTimes.asDict() }
+
+
+    def resetMetrics(self):
+
+        """ Start recording the hold times anew """
+
+        with self.condition:
+            self.readTimes = HoldTimes()
+            self.writeTimes = HoldTimes()
+
+
+def reading(method):
+
+    """ Decorator running `method` under the read lock of `self.lock` """
+
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self.lock.read():
+            return method(self, *args, **kwargs)
+
+    return locked
+
+
+def writing(method):
+
+    """ Decorator running `method` under the write lock of `self.lock` """
+
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self.lock.write():
+            return method(self, *args, **kwargs)
+
+    return locked
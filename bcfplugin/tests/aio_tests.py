@@ -0,0 +1,96 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+import os
+import sys
+import shutil
+import asyncio
+import tempfile
+import unittest
+
+sys.path.insert(0, "../../") # plugin root
+import bcfplugin.aio as aio
+import bcfplugin.rdwr.journal as journal
+
+
+class AsyncSessionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.testFile = os.path.join(self.tmpDir, "Issues-Example.bcf")
+        shutil.copyfile("./interface_tests/Issues-Example.bcf", self.testFile)
+        self.session = aio.AsyncSession()
+
+
+    def tearDown(self):
+        if self.session.session.isProjectOpen():
+            self.session.session.discardProject()
+        journal.discard(self.testFile)
+        shutil.rmtree(self.tmpDir, ignore_errors=True)
+
+
+    def test_modifyConcurrently(self):
+
+        """ Tests whether retrievals and modifications can be awaited
+        concurrently """
+
+        async def run():
+            result = await self.session.openProject(self.testFile)
+            self.assertTrue(result == aio.OperationResults.SUCCESS)
+
+            topic = (await self.session.getTopics())[0][1]
+            results = await asyncio.gather(
+                    *[ self.session.addComment(topic, "comment {}".format(i),
+                        "a@b.c") for i in range(10) ],
+                    *[ self.session.getTopics() for i in range(10) ])
+            for result in results[:10]:
+                self.assertTrue(result == aio.OperationResults.SUCCESS)
+
+            comments = await self.session.getComments(topic)
+            texts = [ comment[1].comment for comment in comments ]
+            for i in range(10):
+                self.assertTrue("comment {}".format(i) in texts)
+            self.assertTrue(await self.session.isProjectDirty())
+
+            dstFile = os.path.join(self.tmpDir, "saved.bcf")
+            result = await self.session.saveProject(dstFile)
+            self.assertTrue(result == aio.OperationResults.SUCCESS)
+            self.assertTrue(os.path.exists(dstFile))
+
+        asyncio.run(run())
+
+
+    def test_cancelSave(self):
+
+        """ Tests whether a cancelled save leaves the destination untouched """
+
+        async def run():
+            await self.session.openProject(self.testFile)
+            dstFile = os.path.join(self.tmpDir, "cancelled.bcf")
+            save = asyncio.ensure_future(self.session.saveProject(dstFile))
+            await asyncio.sleep(0)
+            save.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await save
+            self.assertFalse(os.path.exists(dstFile))
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+import os
+import sys
+import zipfile
+import unittest
+import tempfile
+
+from shutil import rmtree
+
+sys.path.insert(0, "../")
+import rdwr.diff as diff
+
+
+def copyArchive(srcFile, dstFile, replacements = {}, removed = (),
+        added = {}):
+
+    """ Copy every member of `srcFile` to `dstFile`, except the ones listed in
+    `removed`. `replacements` maps member names to a tuple `(old, new)` of
+    bytes replaced in the content of the member, `added` maps member names to
+    the content of members appended to `dstFile`. """
+
+    with zipfile.ZipFile(srcFile) as src, \
+            zipfile.ZipFile(dstFile, "w", zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            if info.filename in removed:
+                continue
+            content = src.read(info.filename)
+            if info.filename in replacements:
+                (old, new) = replacements[info.filename]
+                content = content.replace(old, new)
+            dst.writestr(info.filename, content)
+
+        for (name, content) in added.items():
+            dst.writestr(name, content)
+
+
+class DiffArchivesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.testFile = "./interface_tests/Issues-Example.bcf"
+        self.topicDir = "2e92784b-80fc-4e0e-ac02-b424dfd8e664"
+        self.markupFile = "{}/markup.bcf".format(self.topicDir)
+        self.tmpDir = tempfile.mkdtemp()
+        self.newFile = os.path.join(self.tmpDir, "new.bcf")
+
+
+    def tearDown(self):
+        rmtree(self.tmpDir)
+
+
+    def test_sameArchive(self):
+
+        copyArchive(self.testFile, self.newFile)
+        changeSet = diff.diffArchives(self.testFile, self.newFile)
+        self.assertTrue(changeSet.isEmpty())
+
+
+    def test_modifiedTopicField(self):
+
+        copyArchive(self.testFile, self.newFile, { self.markupFile:
+            (b"<Title>Intersection", b"<Title>Overlap") })
+        changeSet = diff.diffArchives(self.testFile, self.newFile)
+
+        self.assertTrue(len(changeSet.topics) == 1)
+        topicChange = changeSet.topics[0]
+        self.assertTrue(topicChange.guid == self.topicDir)
+        self.assertTrue(topicChange.changeType == diff.ChangeType.MODIFIED)
+        self.assertTrue([ f.name for f in topicChange.fields ] == ["title"])
+        self.assertTrue(topicChange.fields[0].newValue ==
+                "Overlap ventilation and wall")
+        self.assertTrue(len(topicChange.comments) == 0)
+
+
+    def test_addedAndRemovedComment(self):
+
+        oldGuid = b"98b5802c-4ca0-4032-9128-b9c606955c4f"
+        newGuid = b"11b5802c-4ca0-4032-9128-b9c606955c4f"
+        copyArchive(self.testFile, self.newFile, { self.markupFile:
+            (oldGuid, newGuid) })
+        changeSet = diff.diffArchives(self.testFile, self.newFile)
+
+        comments = changeSet.topics[0].comments
+        changes = sorted([ (c.changeType.name, c.guid) for c in comments ])
+        self.assertTrue(changes == [ ("ADDED", newGuid.decode()),
+            ("REMOVED", oldGuid.decode()) ])
+
+
+    def test_modifiedViewpoint(self):
+
+        vpFile = "{}/viewpoint.bcfv".format(self.topicDir)
+        copyArchive(self.testFile, self.newFile, { vpFile:
+            (b"<FieldOfView>", b"<FieldOfView>1") })
+        changeSet = diff.diffArchives(self.testFile, self.newFile)
+
+        topicChange = changeSet.topics[0]
+        self.assertTrue(len(topicChange.fields) == 0)
+        self.assertTrue(topicChange.files == [ ("viewpoint.bcfv",
+            diff.ChangeType.MODIFIED) ])
+        self.assertTrue(len(topicChange.viewpoints) == 1)
+        self.assertTrue([ f.name for f in topicChange.viewpoints[0].fields ]
+                == ["pCamera"])
+
+
+    def test_malformedMarkup(self):
+
+        copyArchive(self.testFile, self.newFile, { self.markupFile:
+            (b"</Title>", b"</Titel>") })
+        changeSet = diff.diffArchives(self.testFile, self.newFile)
+
+        topicChange = changeSet.topics[0]
+        self.assertTrue(topicChange.changeType == diff.ChangeType.MODIFIED)
+        self.assertTrue(topicChange.files == [ ("markup.bcf",
+            diff.ChangeType.MODIFIED) ])
+        self.assertTrue(len(topicChange.fields) == 0)
+
+
+    def test_malformedViewpoint(self):
+
+        vpFile = "{}/viewpoint.bcfv".format(self.topicDir)
+        copyArchive(self.testFile, self.newFile, { vpFile:
+            (b"</FieldOfView>", b"</FieldOfVision>") })
+        changeSet = diff.diffArchives(self.testFile, self.newFile)
+
+        topicChange = changeSet.topics[0]
+        self.assertTrue(topicChange.files == [ ("viewpoint.bcfv",
+            diff.ChangeType.MODIFIED) ])
+
+
+    def test_addedAndRemovedTopic(self):
+
+        newTopicDir = "00000000-80fc-4e0e-ac02-b424dfd8e664"
+        with zipfile.ZipFile(self.testFile) as src:
+            markup = src.read(self.markupFile)
+            removed = [ name for name in src.namelist()
+                    if name.startswith(self.topicDir) ]
+        copyArchive(self.testFile, self.newFile, removed = removed,
+                added = { "{}/markup.bcf".format(newTopicDir): markup })
+        changeSet = diff.diffArchives(self.testFile, self.newFile)
+
+        self.assertTrue([ t.guid for t in
+            changeSet.getTopics(diff.ChangeType.ADDED) ] == [ newTopicDir ])
+        self.assertTrue([ t.guid for t in
+            changeSet.getTopics(diff.ChangeType.REMOVED) ] == [ self.topicDir ])
+
+
+if __name__ == "__main__":
+    unittest.main()
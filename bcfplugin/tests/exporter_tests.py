@@ -0,0 +1,85 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+import io
+import csv
+import sys
+import json
+import unittest
+
+sys.path.insert(0, "../../") # plugin root
+import bcfplugin.rdwr.exporter as exporter
+
+
+class ExportTests(unittest.TestCase):
+
+    def setUp(self):
+        self.testFile = "./interface_tests/Issues-Example.bcf"
+        self.topicGuid = "2e92784b-80fc-4e0e-ac02-b424dfd8e664"
+
+
+    def test_exportJsonLines(self):
+
+        """ Tests whether every topic, comment and viewpoint reference results
+        in one line holding the columns of its record type """
+
+        out = io.StringIO()
+        count = exporter.export(self.testFile, out)
+        records = [ json.loads(line) for line in out.getvalue().splitlines() ]
+        self.assertTrue(count == 3)
+        self.assertTrue([ record["Record"] for record in records ] ==
+                [ "topic", "comment", "viewpoint" ])
+
+        (topic, comment, viewpoint) = records
+        self.assertTrue(topic["Guid"] == self.topicGuid)
+        self.assertTrue(topic["Title"] == "Intersection ventilation and wall")
+        self.assertTrue(topic["Index"] == 11)
+        self.assertTrue(topic["Labels"] == [ "architecture", "structure",
+            "mechanical" ])
+        self.assertTrue(comment["TopicGuid"] == self.topicGuid)
+        self.assertTrue(comment["Author"] == "fleopard@bim.col")
+        self.assertTrue(viewpoint["Snapshot"] == "snapshot.png")
+        self.assertTrue(set(comment.keys()) == set(("Record",) +
+            exporter.RECORD_COLUMNS["comment"]))
+
+
+    def test_exportCsvProjection(self):
+
+        """ Tests whether only the selected records and columns are written """
+
+        out = io.StringIO()
+        count = exporter.export(self.testFile, out, "csv",
+                [ "Guid", "TopicGuid", "Author" ], ("comment",))
+        rows = list(csv.reader(io.StringIO(out.getvalue())))
+        self.assertTrue(count == 1)
+        self.assertTrue(rows == [ [ "Guid", "TopicGuid", "Author" ],
+            [ "98b5802c-4ca0-4032-9128-b9c606955c4f", self.topicGuid,
+                "fleopard@bim.col" ] ])
+
+
+    def test_unknownColumn(self):
+
+        """ Tests whether columns the record types do not have are rejected """
+
+        with self.assertRaises(ValueError):
+            exporter.export(self.testFile, io.StringIO(), "csv", [ "Title" ],
+                    ("comment",))
+
+
+if __name__ == "__main__":
+    unittest.main()
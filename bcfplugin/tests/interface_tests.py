@@ -16,13 +16,18 @@ License along with this library; if not, write to the Free Software
 Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 """
 
+import gc
 import os
 import sys
 import copy
+import json
 import pprint
 import difflib
 import logging
+import zipfile
+import tempfile
 import unittest
+import threading
 import xmlschema
 import dateutil.parser
 import xml.etree.ElementTree as ET
@@ -75,6 +80,7 @@ class DeleteObjectTest(unittest.TestCase):
     def tearDown(self):
         dirPath = os.path.join(util.getSystemTmp(), self.testBCFName)
         rmtree(dirPath)
+        pI.discardProject()
 
 
     def test_deleteComment(self):
@@ -316,11 +322,13 @@ class ModifyElementTests(unittest.TestCase):
     def setUp(self):
         import bcfplugin as p
         self.plugin = p
-        self.plugin.openProject("./interface_tests/Issues_BIMcollab_Example.bcf.original")
+        self.testFile = "./interface_tests/Issues-Example.bcf"
+        self.plugin.openProject(self.testFile)
         self.topics = self.retrieveTopics()
 
 
     def tearDown(self):
+        self.plugin.discardProject()
         del self.plugin
 
 
@@ -473,5 +481,508 @@ class ModifyElementTests(unittest.TestCase):
         self.assertTrue(self.topics[topicIdx].status == newStatus,
                 "Status of topic does not get updated properly.")
 
+
+    def test_modifyTopicTitleInPlace(self):
+
+        """ Test whether only the changed values are written as modification
+
+        Expected: no element is deleted and added again, only the title,
+        `modDate` and `modAuthor` are patched.
+        """
+
+        topicToUpdate = self.topics[0]
+        topicToUpdate.title = "a brand new title"
+        self.plugin.modifyElement(topicToUpdate, "a@b.c")
+        pI.writer.flushProjectUpdates()
+
+        updates = [ u for u in pI.writer.projectSnapshots
+                if u is not None ][-3:]
+        updateStates = [ u[1].state for u in updates ]
+        self.assertTrue(s.State.States.DELETED not in updateStates,
+                "Topic got deleted and added again.")
+
+
+    def test_hasChangedSinceOpening(self):
+
+        """ Tests whether only the modified topic is reported as changed """
+
+        topicToUpdate = self.topics[0]
+        self.assertFalse(self.plugin.hasChangedSinceOpening(topicToUpdate))
+
+        topicToUpdate.title = "a brand new title"
+        self.plugin.modifyElement(topicToUpdate, "a@b.c")
+        for topic in self.retrieveTopics():
+            changed = self.plugin.hasChangedSinceOpening(topic)
+            self.assertTrue(changed == (topic.xmlId == topicToUpdate.xmlId))
+
+
+class JournalTests(unittest.TestCase):
+
+    def setUp(self):
+        self.testFile = "./interface_tests/Issues-Example.bcf"
+        pI.openProject(self.testFile)
+
+
+    def tearDown(self):
+        pI.discardProject()
+
+
+    def test_replayUnsavedChanges(self):
+
+        """ Tests whether modifications that were not written to file before
+        the project got reopened (e.g. after a crash) are restored """
+
+        newTitle = "title that was never saved"
+        topic = pI.getTopics()[0][1]
+        topic.title = newTitle
+        pI.modifyElement(topic, "a@b.c")
+        # simulate a crash before the update was written to file
+        pI.writer.clearProjectUpdates()
+
+        pI.openProject(self.testFile)
+        self.assertTrue(pI.getTopics()[0][1].title == newTitle)
+
+
+    def test_discardedChangesNotReplayed(self):
+
+        """ Tests whether modifications of a project that was closed without
+        saving are not restored on reopening """
+
+        oldTitle = pI.getTopics()[0][1].title
+        topic = pI.getTopics()[0][1]
+        topic.title = "title that was discarded"
+        pI.modifyElement(topic, "a@b.c")
+        pI.discardProject()
+
+        pI.openProject(self.testFile)
+        self.assertTrue(pI.getTopics()[0][1].title == oldTitle)
+        self.assertFalse(pI.isProjectDirty())
+
+
+    def test_replacedArchiveNotReplayed(self):
+
+        """ Tests whether modifications recorded for an archive are dropped
+        if another revision of it was copied to the same path """
+
+        tmpDir = tempfile.mkdtemp()
+        self.addCleanup(rmtree, tmpDir)
+        bcfFile = os.path.join(tmpDir, "Issues-Example.bcf")
+        copyfile(self.testFile, bcfFile)
+        pI.openProject(bcfFile)
+
+        oldTitle = pI.getTopics()[0][1].title
+        topic = pI.getTopics()[0][1]
+        topic.title = "title of the old revision"
+        pI.modifyElement(topic, "a@b.c")
+        # simulate a crash before the update was written to file
+        pI.writer.clearProjectUpdates()
+
+        # a new revision of the same size
+        mtime = os.stat(bcfFile).st_mtime_ns + 10**9
+        os.utime(bcfFile, ns=(mtime, mtime))
+        pI.openProject(bcfFile)
+        self.assertTrue(pI.getTopics()[0][1].title == oldTitle)
+        self.assertFalse(os.path.exists(pI.journal.getJournalPath(bcfFile)))
+
+
+    def test_journalIsPrivate(self):
+
+        """ Tests whether the journal is kept in a directory only the user can
+        write to """
+
+        journalPath = pI.journal.getJournalPath(self.testFile)
+        self.assertTrue(journalPath.startswith(util.getUserStateDir()))
+        self.assertTrue(util.isPrivateDir(os.path.dirname(journalPath)))
+
+
+    def test_foreignClassIgnored(self):
+
+        """ Tests whether a record naming a class outside the data model is
+        not decoded """
+
+        topic = pI.getTopics()[0][1]
+        topic.title = "title of a valid record"
+        pI.modifyElement(topic, "a@b.c")
+        records = len(pI.journal.readUpdates(self.testFile))
+        self.assertTrue(records > 0)
+
+        payload = json.dumps({ "element": { "class": "os.system",
+            "members": {} }, "prevVal": None }).encode("utf-8")
+        with open(pI.journal.getJournalPath(self.testFile), "ab") as f:
+            f.write(pI.journal._packRecord(payload))
+
+        self.assertTrue(len(pI.journal.readUpdates(self.testFile)) == records)
+
+
+class FreezeModelTests(unittest.TestCase):
+
+    def setUp(self):
+        self.testFile = "./interface_tests/Issues-Example.bcf"
+        pI.openProject(self.testFile)
+
+
+    def tearDown(self):
+        pI.discardProject()
+
+
+    def test_modelFrozenAfterOpen(self):
+
+        """ Tests whether the data model read by openProject() is moved to the
+        permanent generation, and released again on reopening """
+
+        self.assertTrue(pI.modelFrozen)
+        frozen = gc.get_freeze_count()
+        self.assertTrue(frozen > 0)
+
+        pI.openProject(self.testFile)
+        self.assertTrue(pI.modelFrozen)
+        # the model read before is not kept frozen
+        self.assertTrue(gc.get_freeze_count() < 2 * frozen)
+
+        pI.discardProject()
+        self.assertFalse(pI.modelFrozen)
+        self.assertTrue(gc.get_freeze_count() == 0)
+
+
+    def test_frozenUntilLastSession(self):
+
+        """ Tests whether closing one session keeps the model of another one
+        frozen, and whether opening a further session does not freeze again
+        """
+
+        frozen = gc.get_freeze_count()
+        session = pI.ProjectSession()
+        session.openProject(self.testFile)
+        self.assertTrue(session.modelFrozen)
+        self.assertTrue(pI.frozenModels == 2)
+        # frozen objects released by reference counting leave the count
+        self.assertTrue(gc.get_freeze_count() <= frozen)
+
+        session.discardProject()
+        self.assertTrue(pI.frozenModels == 1)
+        self.assertTrue(gc.get_freeze_count() <= frozen)
+
+        pI.discardProject()
+        self.assertTrue(pI.frozenModels == 0)
+        self.assertTrue(gc.get_freeze_count() == 0)
+
+
+class UpdateWorkerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.testFile = "./interface_tests/Issues-Example.bcf"
+        pI.openProject(self.testFile)
+        pI.startUpdateWorker()
+
+
+    def tearDown(self):
+        pI.stopUpdateWorker()
+        pI.discardProject()
+
+
+    def test_backgroundWriting(self):
+
+        """ Tests whether updates are written to file by the worker """
+
+        newTitle = "title written in the background"
+        topic = pI.getTopics()[0][1]
+        topic.title = newTitle
+        pI.modifyElement(topic, "a@b.c")
+        self.assertTrue(pI.updateWorker.flush())
+
+        markupPath = os.path.join(util.getBcfDir(), str(topic.xmlId),
+                "markup.bcf")
+        with open(markupPath, "r") as f:
+            self.assertTrue(newTitle in f.read())
+
+
+    def test_failedUpdateRollback(self):
+
+        """ Tests whether the project is rolled back if the worker could not
+        write an update """
+
+        oldTitle = pI.getTopics()[0][1].title
+        handler = pI.writer.handleModifyElement
+        pI.writer.handleModifyElement = lambda element, prevVal: False
+        try:
+            topic = pI.getTopics()[0][1]
+            topic.title = "title that cannot be written"
+            pI.modifyElement(topic, "a@b.c")
+            pI.updateWorker.flush()
+        finally:
+            pI.writer.handleModifyElement = handler
+
+        self.assertTrue(pI.getTopics()[0][1].title == oldTitle)
+        self.assertTrue(len(pI.pendingBatches) == 0)
+
+
+    def test_failedAdditionRollback(self):
+
+        """ Tests whether an added label is removed again if the worker could
+        not write it """
+
+        oldLabels = [ label.value for label in pI.getTopics()[0][1].labels ]
+        handler = pI.writer.handleAddElement
+        pI.writer.handleAddElement = lambda element, prevVal: False
+        try:
+            pI.addLabel(pI.getTopics()[0][1], "label that cannot be written")
+            pI.updateWorker.flush()
+        finally:
+            pI.writer.handleAddElement = handler
+
+        labels = [ label.value for label in pI.getTopics()[0][1].labels ]
+        self.assertTrue(labels == oldLabels)
+        self.assertFalse(pI.isProjectDirty())
+
+
+    def test_saveWaitsForRollback(self):
+
+        """ Tests whether a save waits for a failing batch to be rolled back
+        before it takes the lock """
+
+        failedTitle = "title that cannot be written"
+        written = threading.Event()
+        handler = pI.writer.handleModifyElement
+        def failLater(element, prevVal):
+            # keep the batch pending until the save was started
+            written.wait()
+            return False
+
+        dstFile = os.path.join(os.path.dirname(pI.util.getSystemTmp()),
+                "rollback_test.bcf")
+        pI.writer.handleModifyElement = failLater
+        try:
+            topic = pI.getTopics()[0][1]
+            topic.title = failedTitle
+            pI.modifyElement(topic, "a@b.c")
+            self.assertFalse(pI.updateWorker.isIdle())
+
+            saver = threading.Thread(target=pI.saveProject, args=(dstFile,))
+            saver.start()
+            written.set()
+            saver.join(10)
+            self.assertFalse(saver.is_alive())
+        finally:
+            pI.writer.handleModifyElement = handler
+
+        try:
+            self.assertTrue(pI.getTopics()[0][1].title != failedTitle)
+            self.assertTrue(len(pI.pendingBatches) == 0)
+            with zipfile.ZipFile(dstFile) as dstZip:
+                markup = dstZip.read("{}/markup.bcf".format(
+                    topic.xmlId)).decode("utf-8")
+            self.assertTrue(failedTitle not in markup)
+        finally:
+            os.remove(dstFile)
+
+
+class BackgroundSaveTests(unittest.TestCase):
+
+    def setUp(self):
+        self.testFile = "./interface_tests/Issues-Example.bcf"
+        pI.openProject(self.testFile)
+        self.dstFile = os.path.join(os.path.dirname(pI.util.getSystemTmp()),
+                "background_test.bcf")
+
+
+    def tearDown(self):
+        pI.waitForSaves()
+        pI.discardProject()
+        if os.path.exists(self.dstFile):
+            os.remove(self.dstFile)
+
+
+    def test_snapshotIsolation(self):
+
+        """ Tests whether modifications made while a save is running are
+        neither contained in the saved file nor lost """
+
+        savedTitle = "title that is saved"
+        laterTitle = "title modified during the save"
+        topic = pI.getTopics()[0][1]
+        topic.title = savedTitle
+        pI.modifyElement(topic, "a@b.c")
+
+        progress = list()
+        results = list()
+        modified = threading.Event()
+        def onProgress(bytesWritten, membersWritten):
+            # keep the save from finishing until the project was modified
+            modified.wait()
+            progress.append((bytesWritten, membersWritten))
+
+        future = pI.saveProjectInBackground(self.dstFile,
+                onProgress=onProgress, onDone=results.append)
+        topic = pI.getTopics()[0][1]
+        topic.title = laterTitle
+        pI.modifyElement(topic, "a@b.c")
+        pI.writer.flushProjectUpdates()
+        modified.set()
+
+        self.assertTrue(future.result() == pI.OperationResults.SUCCESS)
+        self.assertTrue(results == [ pI.OperationResults.SUCCESS ])
+        self.assertTrue(len(progress) > 0)
+        self.assertTrue(progress[-1][1] == len(progress))
+
+        markupName = "{}/markup.bcf".format(topic.xmlId)
+        with zipfile.ZipFile(self.dstFile) as dstZip:
+            markup = dstZip.read(markupName).decode("utf-8")
+        self.assertTrue(savedTitle in markup)
+        self.assertTrue(laterTitle not in markup)
+
+        # the later modification still has to be saved
+        self.assertTrue(pI.isProjectDirty())
+        values = [ getattr(element, "value", None) for (element, prevVal) in
+                pI.journal.readUpdates(self.dstFile) ]
+        self.assertTrue(laterTitle in values)
+
+
+class ProjectSessionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.testFile = "./interface_tests/Issues-Example.bcf"
+        self.sessions = [ pI.ProjectSession(), pI.ProjectSession() ]
+        for session in self.sessions:
+            session.openProject(self.testFile)
+
+
+    def tearDown(self):
+        for session in self.sessions:
+            # otherwise closing asks whether to save the changes
+            session.project.setDirty(False)
+            session.closeProject()
+
+
+    def test_independentSessions(self):
+
+        """ Tests whether two sessions of the same file hold separate working
+        directories and data models """
+
+        (first, second) = self.sessions
+        self.assertTrue(first.context.getBcfDir() !=
+                second.context.getBcfDir())
+
+        topic = first.getTopics()[0][1]
+        originalTitle = topic.title
+        topic.title = "title of the first session"
+        self.assertTrue(first.modifyElement(topic, "a@b.c") ==
+                pI.OperationResults.SUCCESS)
+
+        self.assertTrue(first.isProjectDirty())
+        self.assertFalse(second.isProjectDirty())
+        self.assertTrue(second.getTopics()[0][1].title == originalTitle)
+        self.assertTrue(len(second.updates.updates) == 0)
+        self.assertTrue(first.project.stringPool is
+                second.project.stringPool)
+
+
+    def test_concurrentAccess(self):
+
+        """ Tests whether retrievals of several threads can run alongside
+        modifications, and whether the lock hold times get recorded """
+
+        session = self.sessions[0]
+        session.lock.resetMetrics()
+        errors = list()
+        titles = list()
+
+        def read():
+            try:
+                for i in range(20):
+                    titles.append(session.getTopics()[0][1].title)
+            except Exception as exc:
+                errors.append(exc)
+
+        readers = [ threading.Thread(target=read) for i in range(4) ]
+        for reader in readers:
+            reader.start()
+        for i in range(5):
+            topic = session.getTopics()[0][1]
+            topic.title = "title {}".format(i)
+            self.assertTrue(session.modifyElement(topic, "a@b.c") ==
+                    pI.OperationResults.SUCCESS)
+        for reader in readers:
+            reader.join()
+
+        self.assertTrue(len(errors) == 0)
+        self.assertTrue(len(titles) == 80)
+        self.assertTrue(session.getTopics()[0][1].title == "title 4")
+        metrics = session.getLockMetrics()
+        self.assertTrue(metrics["read"]["count"] >= 86)
+        self.assertTrue(metrics["write"]["count"] == 5)
+        self.assertTrue(metrics["write"]["longest"] > 0)
+
+
+    def test_failedAddProject(self):
+
+        """ Tests whether a project that could not be created leaves the
+        session without a project """
+
+        session = pI.ProjectSession()
+        self.addCleanup(session.discardProject)
+        handler = pI.writer.handleAddElement
+        pI.writer.handleAddElement = lambda element, prevVal, context: False
+        try:
+            result = session.addProject("project that cannot be written", "")
+        finally:
+            pI.writer.handleAddElement = handler
+
+        self.assertTrue(result == pI.OperationResults.FAILURE)
+        self.assertTrue(session.project is None)
+
+
+class SessionContextTests(unittest.TestCase):
+
+    def setUp(self):
+        self.stateHome = tempfile.mkdtemp()
+        self.oldStateHome = os.environ.get("XDG_STATE_HOME")
+        os.environ["XDG_STATE_HOME"] = self.stateHome
+        self.contexts = list()
+
+
+    def tearDown(self):
+        for context in self.contexts:
+            context.deleteTmp()
+        if self.oldStateHome is None:
+            del os.environ["XDG_STATE_HOME"]
+        else:
+            os.environ["XDG_STATE_HOME"] = self.oldStateHome
+        rmtree(self.stateHome, ignore_errors=True)
+
+
+    def newContext(self):
+
+        context = util.SessionContext(True)
+        self.contexts.append(context)
+        return context
+
+
+    def test_recoverTmpDir(self):
+
+        """ Tests whether a persistent context takes over the temporary
+        directory of the previous one, recorded in the state directory """
+
+        tmpDir = self.newContext().getSystemTmp()
+        stateDir = util.getUserStateDir()
+        self.assertTrue(stateDir.startswith(self.stateHome))
+        self.assertTrue(util.isPrivateDir(stateDir))
+        self.assertTrue(self.newContext().getSystemTmp() == tmpDir)
+
+
+    def test_foreignTmpDirNotAdopted(self):
+
+        """ Tests whether a recorded directory others can write to is not
+        taken over """
+
+        planted = tempfile.mkdtemp()
+        os.chmod(planted, 0o777)
+        self.addCleanup(rmtree, planted, True)
+        util.storeTmpPath(planted)
+
+        tmpDir = self.newContext().getSystemTmp()
+        self.assertTrue(tmpDir != planted)
+        self.assertTrue(util.isPrivateDir(tmpDir))
+
+
 if __name__ == "__main__":
     unittest.main()
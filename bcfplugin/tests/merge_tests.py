@@ -0,0 +1,156 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+import os
+import sys
+import zipfile
+import unittest
+import tempfile
+
+from shutil import rmtree
+
+sys.path.insert(0, "../")
+import rdwr.merge as merge
+import rdwr.reader as reader
+from diff_tests import copyArchive
+
+
+class MergeArchivesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.baseFile = "./interface_tests/Issues-Example.bcf"
+        self.topicDir = "2e92784b-80fc-4e0e-ac02-b424dfd8e664"
+        self.markupFile = "{}/markup.bcf".format(self.topicDir)
+        self.tmpDir = tempfile.mkdtemp()
+        self.oursFile = os.path.join(self.tmpDir, "ours.bcf")
+        self.theirsFile = os.path.join(self.tmpDir, "theirs.bcf")
+        self.mergedFile = os.path.join(self.tmpDir, "merged.bcf")
+
+
+    def tearDown(self):
+        rmtree(self.tmpDir)
+
+
+    def merge(self):
+
+        return merge.mergeArchives(self.baseFile, self.oursFile,
+                self.theirsFile, self.mergedFile)
+
+
+    def readMergedMarkup(self):
+
+        with zipfile.ZipFile(self.mergedFile) as mergedZip:
+            with mergedZip.open(self.markupFile) as markupFile:
+                return reader.decodeMarkup(markupFile)
+
+
+    def test_unchangedSideIsCopied(self):
+
+        copyArchive(self.baseFile, self.oursFile)
+        copyArchive(self.baseFile, self.theirsFile, { self.markupFile:
+            (b"<Title>Intersection", b"<Title>Overlap") })
+        result = self.merge()
+
+        self.assertTrue(result.copiedTopics == 1)
+        self.assertTrue(result.mergedTopics == 0)
+        self.assertTrue(len(result.conflicts) == 0)
+        with zipfile.ZipFile(self.theirsFile) as theirsZip, \
+                zipfile.ZipFile(self.mergedFile) as mergedZip:
+            self.assertTrue(sorted(theirsZip.namelist()) ==
+                    sorted(mergedZip.namelist()))
+            for name in theirsZip.namelist():
+                self.assertTrue(theirsZip.read(name) == mergedZip.read(name))
+
+
+    def test_mergeFieldsAndLabels(self):
+
+        copyArchive(self.baseFile, self.oursFile, { self.markupFile:
+            (b"<Title>Intersection", b"<Title>Overlap") })
+        copyArchive(self.baseFile, self.theirsFile, { self.markupFile:
+            (b"<Labels>structure</Labels>",
+                b"<Labels>electrical</Labels>") })
+        result = self.merge()
+
+        self.assertTrue(result.mergedTopics == 1)
+        self.assertTrue(len(result.conflicts) == 0)
+        topic = self.readMergedMarkup().topic
+        self.assertTrue(topic.title == "Overlap ventilation and wall")
+        self.assertTrue([ label.value for label in topic.labels ] ==
+                ["architecture", "mechanical", "electrical"])
+
+
+    def test_conflictLaterModificationWins(self):
+
+        copyArchive(self.baseFile, self.oursFile, { self.markupFile:
+            (b"<Title>Intersection", b"<Title>Overlap") })
+        with zipfile.ZipFile(self.baseFile) as baseZip:
+            markup = baseZip.read(self.markupFile)
+        markup = markup.replace(b"<Title>Intersection", b"<Title>Clash")
+        markup = markup.replace(b"<ModifiedDate>2014-10-16T14",
+                b"<ModifiedDate>2015-10-16T14")
+        copyArchive(self.baseFile, self.theirsFile,
+                removed = [ self.markupFile ],
+                added = { self.markupFile: markup })
+        result = self.merge()
+
+        self.assertTrue([ (conflict.name, conflict.winner) for conflict in
+            result.conflicts ] == [ ("title", merge.Side.THEIRS) ])
+        topic = self.readMergedMarkup().topic
+        self.assertTrue(topic.title == "Clash ventilation and wall")
+        self.assertTrue(topic.modDate.year == 2015)
+
+
+    def test_mergeComments(self):
+
+        newComment = (b"<Comment Guid=\"11b5802c-4ca0-4032-9128-b9c606955c4f\">"
+                b"<Date>2015-10-16T13:10:56+00:00</Date>"
+                b"<Author>irenfroe@bim.col</Author>"
+                b"<Comment>Hole was added.</Comment></Comment>"
+                b"<Viewpoints Guid=")
+        copyArchive(self.baseFile, self.oursFile, { self.markupFile:
+            (b"Ducts and walls are clashing.", b"Ducts are clashing.") })
+        copyArchive(self.baseFile, self.theirsFile, { self.markupFile:
+            (b"<Viewpoints Guid=", newComment) })
+        result = self.merge()
+
+        self.assertTrue(len(result.conflicts) == 0)
+        comments = self.readMergedMarkup().comments
+        self.assertTrue([ str(comment.xmlId) for comment in comments ] ==
+                [ "98b5802c-4ca0-4032-9128-b9c606955c4f",
+                    "11b5802c-4ca0-4032-9128-b9c606955c4f" ])
+        self.assertTrue(comments[0].comment.startswith("Ducts are clashing."))
+
+
+    def test_modificationWinsOverDeletion(self):
+
+        with zipfile.ZipFile(self.baseFile) as baseZip:
+            removed = [ name for name in baseZip.namelist()
+                    if name.startswith(self.topicDir) ]
+        copyArchive(self.baseFile, self.oursFile, removed = removed)
+        copyArchive(self.baseFile, self.theirsFile, { self.markupFile:
+            (b"<Title>Intersection", b"<Title>Overlap") })
+        result = self.merge()
+
+        self.assertTrue([ (conflict.name, conflict.winner) for conflict in
+            result.conflicts ] == [ ("topic", merge.Side.THEIRS) ])
+        topic = self.readMergedMarkup().topic
+        self.assertTrue(topic.title == "Overlap ventilation and wall")
+
+
+if __name__ == "__main__":
+    unittest.main()
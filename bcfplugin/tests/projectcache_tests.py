@@ -0,0 +1,141 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, "../../") # plugin root
+import bcfplugin.util as util
+import bcfplugin.rdwr.reader as reader
+import bcfplugin.rdwr.projectcache as projectcache
+from bcfplugin.rdwr.project import StringPool
+
+
+class ProjectCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cacheDir = tempfile.mkdtemp()
+        projectcache.cacheDir = self.cacheDir
+        reader.useProjectCache = True
+        self.testFile = "./interface_tests/Issues-Example.bcf"
+        self.sessions = list()
+
+
+    def tearDown(self):
+        reader.useProjectCache = False
+        projectcache.cacheDir = None
+        for session in self.sessions:
+            session.deleteTmp()
+        shutil.rmtree(self.cacheDir, ignore_errors=True)
+
+
+    def readFile(self, bcfFile, stringPool=None):
+
+        session = util.SessionContext()
+        self.sessions.append(session)
+        project = reader.readBcfFile(bcfFile, session=session,
+                stringPool=stringPool)
+        return (project, session)
+
+
+    def test_reopenFromCache(self):
+
+        """ Tests whether the second read takes the project from the cache,
+        with snapshots in the new working directory and the given pool """
+
+        (original, session) = self.readFile(self.testFile)
+        key = reader.getCacheKey(self.testFile)
+        self.assertTrue(os.path.exists(projectcache.getEntryPath(key)))
+
+        pool = StringPool()
+        (cached, cachedSession) = self.readFile(self.testFile, pool)
+        self.assertTrue(cached == original)
+        self.assertTrue(cached is not original)
+        self.assertTrue(cached.stringPool is pool)
+        self.assertTrue(cachedSession.getBcfDir() != session.getBcfDir())
+
+        snapshots = cached.topicList[0].snapshotFiles
+        self.assertTrue(len(snapshots) > 0)
+        for snapshot in snapshots:
+            self.assertTrue(snapshot.startswith(cachedSession.getBcfDir()))
+            self.assertTrue(os.path.exists(snapshot))
+
+
+    def test_corruptEntry(self):
+
+        """ Tests whether an unreadable entry is removed and the archive is
+        read again """
+
+        (original, session) = self.readFile(self.testFile)
+        entryPath = projectcache.getEntryPath(reader.getCacheKey(self.testFile))
+        with open(entryPath, "wb") as f:
+            f.write(b"no pickle")
+
+        (project, session) = self.readFile(self.testFile)
+        self.assertTrue(project == original)
+        # the entry was replaced by a valid one
+        self.assertTrue(projectcache.load(reader.getCacheKey(self.testFile),
+            session.getBcfDir()) == original)
+
+
+    def test_optionsInKey(self):
+
+        """ Tests whether a project read with other reader options is not
+        taken from the cache """
+
+        (original, session) = self.readFile(self.testFile)
+        key = reader.getCacheKey(self.testFile)
+        reader.strictMarkupDecoding = not reader.strictMarkupDecoding
+        try:
+            self.assertTrue(reader.getCacheKey(self.testFile) != key)
+            (project, session) = self.readFile(self.testFile)
+        finally:
+            reader.strictMarkupDecoding = not reader.strictMarkupDecoding
+
+        self.assertTrue(project == original)
+        self.assertTrue(len(os.listdir(self.cacheDir)) == 2)
+
+
+    def test_evictLeastRecentlyUsed(self):
+
+        """ Tests whether the least recently used entries are removed first
+        """
+
+        (project, session) = self.readFile(self.testFile)
+        for key in ("a", "b", "c"):
+            projectcache.store(key, session.getBcfDir(), project)
+            # make the modification times distinct
+            past = time.time() - 100 + ord(key)
+            os.utime(projectcache.getEntryPath(key), (past, past))
+        projectcache.load("a", session.getBcfDir())
+
+        # the entry of the read archive is the other recently used one
+        entrySize = os.path.getsize(projectcache.getEntryPath("a"))
+        projectcache.evict(2 * entrySize)
+        self.assertTrue(len(os.listdir(self.cacheDir)) == 2)
+        self.assertTrue(os.path.exists(projectcache.getEntryPath("a")))
+        self.assertFalse(os.path.exists(projectcache.getEntryPath("b")))
+        self.assertFalse(os.path.exists(projectcache.getEntryPath("c")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+import os
+import sys
+import zlib
+import zipfile
+import unittest
+import tempfile
+
+from shutil import rmtree
+
+sys.path.insert(0, "../")
+import rdwr.rawzip as rawzip
+
+
+class RawZipWriterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.srcFile = "./interface_tests/Issues-Example.bcf"
+        self.tmpDir = tempfile.mkdtemp()
+        self.dstFile = os.path.join(self.tmpDir, "raw.bcf")
+        self.dateTime = (2019, 8, 16, 12, 30, 10)
+
+
+    def tearDown(self):
+        rmtree(self.tmpDir)
+
+
+    def test_writeMembers(self):
+
+        """ Tests whether stored, deflated and directory members written by
+        RawZipWriter are read back by zipfile """
+
+        content = "<Markup>Äpfel</Markup>".encode("utf-8") * 100
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        deflated = compressor.compress(content) + compressor.flush()
+
+        with rawzip.RawZipWriter(self.dstFile) as dstZip:
+            dstZip.writeMember(zipfile.ZipInfo("topic/", self.dateTime))
+            for (name, compressType, data) in [
+                    ("topic/markup.bcf", zipfile.ZIP_DEFLATED, deflated),
+                    ("topic/snapshöt.png", zipfile.ZIP_STORED, content) ]:
+                info = zipfile.ZipInfo(name, self.dateTime)
+                info.compress_type = compressType
+                info.CRC = zlib.crc32(content)
+                info.file_size = len(content)
+                info.compress_size = len(data)
+                dstZip.writeMember(info, data)
+
+        with zipfile.ZipFile(self.dstFile) as dstZip:
+            self.assertTrue(dstZip.testzip() is None)
+            self.assertTrue(dstZip.namelist() == [ "topic/",
+                "topic/markup.bcf", "topic/snapshöt.png" ])
+            self.assertTrue(dstZip.getinfo("topic/").is_dir())
+            self.assertTrue(dstZip.read("topic/markup.bcf") == content)
+            self.assertTrue(dstZip.read("topic/snapshöt.png") == content)
+            self.assertTrue(dstZip.getinfo("topic/markup.bcf").date_time ==
+                    self.dateTime)
+
+
+    def test_copyRawMembers(self):
+
+        """ Tests whether members copied in their compressed form keep their
+        contents """
+
+        with zipfile.ZipFile(self.srcFile) as srcZip, \
+                open(self.srcFile, "rb") as srcFile, \
+                rawzip.RawZipWriter(self.dstFile) as dstZip:
+            for info in srcZip.infolist():
+                dstZip.writeMember(info, rawzip.readRawMember(srcFile, info))
+
+        with zipfile.ZipFile(self.srcFile) as srcZip, \
+                zipfile.ZipFile(self.dstFile) as dstZip:
+            self.assertTrue(dstZip.testzip() is None)
+            self.assertTrue(dstZip.namelist() == srcZip.namelist())
+            for name in srcZip.namelist():
+                self.assertTrue(dstZip.read(name) == srcZip.read(name))
+
+
+    def test_manyMembers(self):
+
+        """ Tests whether an archive with more members than the plain format
+        can count is read back by zipfile """
+
+        count = rawzip.MAX_MEMBERS + 10
+        with rawzip.RawZipWriter(self.dstFile) as dstZip:
+            for index in range(count):
+                info = zipfile.ZipInfo("topic/{}.bcfv".format(index),
+                        self.dateTime)
+                info.CRC = zlib.crc32(b"")
+                dstZip.writeMember(info)
+
+        with zipfile.ZipFile(self.dstFile) as dstZip:
+            names = dstZip.namelist()
+            self.assertTrue(len(names) == count)
+            self.assertTrue(names[-1] == "topic/{}.bcfv".format(count - 1))
+            self.assertTrue(dstZip.read(names[-1]) == b"")
+
+
+    def test_largeSizesAndOffsets(self):
+
+        """ Tests whether sizes and offsets beyond `MAX_SIZE` are written to
+        the ZIP64 extra fields """
+
+        content = b"<Markup/>" * 50
+        maxSize = rawzip.MAX_SIZE
+        # members of more than 4 GiB would take too long to write
+        rawzip.MAX_SIZE = 100
+        try:
+            with rawzip.RawZipWriter(self.dstFile) as dstZip:
+                for name in [ "small.bcf", "large.bcf", "behind.bcf" ]:
+                    data = content if name == "large.bcf" else b"<Markup/>"
+                    info = zipfile.ZipInfo(name, self.dateTime)
+                    info.CRC = zlib.crc32(data)
+                    info.file_size = len(data)
+                    info.compress_size = len(data)
+                    dstZip.writeMember(info, data)
+        finally:
+            rawzip.MAX_SIZE = maxSize
+
+        with zipfile.ZipFile(self.dstFile) as dstZip:
+            self.assertTrue(dstZip.testzip() is None)
+            self.assertTrue(dstZip.read("large.bcf") == content)
+            self.assertTrue(dstZip.read("behind.bcf") == b"<Markup/>")
+            self.assertTrue(dstZip.getinfo("behind.bcf").header_offset > 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,6 +18,7 @@ Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
 import os
 import sys
+import copy
 import unittest
 import dateutil.parser
 import xmlschema
@@ -424,6 +425,54 @@ class buildCommentTest(unittest.TestCase):
                     b))
 
 
+class decodeMarkupTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.fileDirectory = "./reader_tests/"
+        self.markupSchemaPath = self.fileDirectory + "markup.xsd"
+        self.markupFiles = ["topic_complete.bcf", "topic_minimal.bcf",
+                "topic_original.bcf", "comment_complete.bcf",
+                "comment_minimal.bcf", "topic_13_comments.bcf"]
+
+
+    def test_same_as_xmlschema(self):
+
+        """ `decodeMarkup()` shall yield the same objects as the decoding
+        through xmlschema in `buildMarkup()` """
+
+        for markupFile in self.markupFiles:
+            srcFilePath = os.path.join(self.fileDirectory, markupFile)
+            expectedMarkup = reader.buildMarkup(srcFilePath,
+                    self.markupSchemaPath)
+            actualMarkup = reader.decodeMarkup(srcFilePath)
+
+            self.assertEqual(expectedMarkup.topic, actualMarkup.topic,
+                    "\nExpected:\n{}\n\nActual:\n{}".format(
+                        expectedMarkup.topic, actualMarkup.topic))
+            self.assertEqual(expectedMarkup.comments, actualMarkup.comments)
+            self.assertEqual(expectedMarkup.viewpoints,
+                    actualMarkup.viewpoints)
+
+
+    def test_pooled_strings(self):
+
+        """ Repeating values, like the author of comments, shall be held only
+        once per project """
+
+        srcFilePath = os.path.join(self.fileDirectory, "topic_13_comments.bcf")
+        pool = project.StringPool()
+        firstMarkup = reader.decodeMarkup(srcFilePath, pool)
+        secondMarkup = reader.decodeMarkup(srcFilePath, pool)
+
+        authors = [ comment.author for comment in
+                firstMarkup.comments + secondMarkup.comments ]
+        self.assertTrue(len(authors) > 1)
+        for author in authors:
+            self.assertIs(pool.intern(author), author)
+        self.assertIs(firstMarkup.topic.author, secondMarkup.topic.author)
+
+
 class buildViewpointTest(unittest.TestCase):
 
     def setUp(self):
@@ -611,6 +660,23 @@ class buildViewpointTest(unittest.TestCase):
                 bitmaps=[])
 
 
+    def test_streamed_viewpoint(self):
+
+        """ The viewpoints built by `streamViewpoint()` shall be equal to the
+        ones decoded through xmlschema. """
+
+        for viewpointFile in self.viewpointFiles:
+            srcFilePath = os.path.join(self.fileDirectory, viewpointFile)
+            expectedViewpoint = reader.buildViewpoint(srcFilePath,
+                    self.viewpointSchemaPath)
+            actualViewpoint = reader.streamViewpoint(srcFilePath)
+
+            self.assertEqual(expectedViewpoint, actualViewpoint,
+                    "\n\nExpected:\n{}, \n\nActual:\n{}\n".format(
+                        str(expectedViewpoint),
+                        str(actualViewpoint)))
+
+
 class HierarchyTest(unittest.TestCase):
 
     def setUp(self):
@@ -629,6 +695,83 @@ class HierarchyTest(unittest.TestCase):
                     actualHierarchy))
 
 
+class FingerprintTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testFile = "../rdwr/test_data/Issues_BIMcollab_Example.bcf"
+        self.proj = reader.readBcfFile(self.testFile)
+
+    def test_copy_equals(self):
+        cpy = copy.deepcopy(self.proj)
+
+        self.assertTrue(cpy.fingerprint == self.proj.fingerprint)
+        self.assertTrue(cpy == self.proj)
+
+    def test_invalidation(self):
+        markup = self.proj.topicList[0]
+        fingerprint = self.proj.fingerprint
+        otherMarkup = self.proj.topicList[1]
+
+        markup.topic.title = "changed title"
+        self.assertTrue(markup.topic._fingerprint is None)
+        self.assertTrue(markup._fingerprint is None)
+        self.assertTrue(self.proj._fingerprint is None)
+        # siblings keep their cached fingerprint
+        self.assertTrue(otherMarkup._fingerprint is not None)
+        self.assertTrue(self.proj.fingerprint != fingerprint)
+
+
+class DirtySetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testFile = "../rdwr/test_data/Issues_BIMcollab_Example.bcf"
+        self.proj = reader.readBcfFile(self.testFile)
+
+    def test_register_state(self):
+        markup = self.proj.topicList[0]
+        title = markup.topic._title
+        States = title.States
+        self.assertTrue(self.proj.getStateList() == [])
+
+        title.state = States.MODIFIED
+        self.assertTrue(self.proj.getStateList() == [(States.MODIFIED, title)])
+        self.assertTrue(markup.getStateList() == [(States.MODIFIED, title)])
+        self.assertTrue(self.proj.topicList[1].getStateList() == [])
+        self.assertTrue(self.proj.getDirtyBit())
+
+        title.state = States.ORIGINAL
+        self.assertTrue(self.proj.getStateList() == [])
+        self.assertFalse(self.proj.getDirtyBit())
+
+    def test_register_on_adding(self):
+        markup = self.proj.topicList[0]
+        comment = copy.deepcopy(markup.comments[0])
+        States = comment.States
+        comment.state = States.ADDED
+        self.assertTrue(comment.getStateList() == [(States.ADDED, comment)])
+        self.assertTrue(self.proj.getStateList() == [])
+
+        markup.comments.append(comment)
+        comment.containingObject = markup
+        self.assertTrue(self.proj.getStateList() == [(States.ADDED, comment)])
+
+        cpy = copy.deepcopy(self.proj)
+        stateList = cpy.getStateList()
+        self.assertTrue(len(stateList) == 1)
+        self.assertTrue(stateList[0][1] is cpy.topicList[0].comments[-1])
+
+        # removed together with its markup
+        self.proj.topicList.remove(markup)
+        markup.containingObject = None
+        self.assertTrue(self.proj.getStateList() == [])
+
+    def test_dirty_bit(self):
+        self.assertFalse(self.proj.getDirtyBit())
+        self.proj.setDirty(True)
+        self.assertTrue(self.proj.getDirtyBit())
+        self.assertTrue(copy.deepcopy(self.proj).getDirtyBit())
+
+
 class readBcfFileTest(unittest.TestCase):
 
     def setUp(self):
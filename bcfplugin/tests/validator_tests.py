@@ -0,0 +1,116 @@
+"""
+Copyright (C) 2019 PODEST Patrick
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+import os
+import sys
+import shutil
+import zipfile
+import tempfile
+import unittest
+import subprocess
+
+sys.path.insert(0, "../../") # plugin root
+import bcfplugin.rdwr.validator as validator
+
+
+class ValidateArchivesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir = tempfile.mkdtemp()
+        self.validFile = os.path.join(self.tmpDir, "valid.bcf")
+        shutil.copyfile("./interface_tests/Issues-Example.bcf", self.validFile)
+
+        # same archive, but the title of the topic is missing
+        self.invalidFile = os.path.join(self.tmpDir, "sub", "invalid.bcf")
+        os.mkdir(os.path.dirname(self.invalidFile))
+        with zipfile.ZipFile(self.validFile) as src, \
+                zipfile.ZipFile(self.invalidFile, "w") as dst:
+            for member in src.namelist():
+                contents = src.read(member)
+                if member.endswith("markup.bcf"):
+                    start = contents.index(b"<Title>")
+                    end = contents.index(b"</Title>") + len(b"</Title>")
+                    contents = contents[:start] + contents[end:]
+                dst.writestr(member, contents)
+
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir, ignore_errors=True)
+
+
+    def test_validateArchives(self):
+
+        """ Tests whether the archives of a directory are found and validated
+        in separate processes """
+
+        results = list(validator.validateArchives([ self.tmpDir ], 2))
+        results = { result["file"]: result for result in results }
+        self.assertTrue(len(results) == 2)
+
+        valid = results[self.validFile]
+        self.assertTrue(valid["valid"])
+        self.assertTrue(valid["version"] == "2.1")
+        self.assertTrue(valid["members"] == 4)
+
+        invalid = results[self.invalidFile]
+        self.assertFalse(invalid["valid"])
+        self.assertTrue(len(invalid["errors"]) == 1)
+        self.assertTrue(invalid["errors"][0]["member"].endswith("markup.bcf"))
+
+
+    def test_commandLineKeepsTmpDirs(self):
+
+        """ Tests whether the command line interface, with worker processes
+        that import the plugin anew, neither deletes the temporary directories
+        of other instances of the plugin nor its own schemas """
+
+        otherTmpDir = tempfile.mkdtemp(prefix="bcfplugin_")
+        pluginRoot = os.path.abspath("../../")
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join([ pluginRoot ] +
+                env.get("PYTHONPATH", "").split(os.pathsep))
+        # spawned workers import the plugin, as on Windows and macOS
+        script = "import sys, runpy, multiprocessing;"\
+                " multiprocessing.set_start_method('spawn');"\
+                " sys.argv = ['-m', 'validate', '-j', '2', sys.argv[1]];"\
+                " runpy.run_module('bcfplugin', run_name='__main__')"
+        try:
+            process = subprocess.run([ sys.executable, "-c", script,
+                self.tmpDir ], env=env, cwd=pluginRoot,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=300)
+            self.assertTrue(os.path.isdir(otherTmpDir))
+        finally:
+            shutil.rmtree(otherTmpDir, ignore_errors=True)
+
+        self.assertTrue(process.returncode == 1, process.stderr)
+        lines = process.stdout.decode("utf-8").splitlines()
+        self.assertTrue(len(lines) == 2)
+
+
+    def test_notAnArchive(self):
+
+        """ Tests whether files that are no archive are reported as invalid """
+
+        results = list(validator.validateArchives([ __file__ ], 1))
+        self.assertTrue(len(results) == 1)
+        self.assertFalse(results[0]["valid"])
+        self.assertTrue(results[0]["errors"][0]["member"] is None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1008,5 +1008,113 @@ class ProjectTests(unittest.TestCase):
         self.assertTrue(project.name == "hello")
 
 
+class ZipToBcfFileTests(unittest.TestCase):
+
+    def setUp(self):
+
+        self.testFileDir = "./writer_tests"
+        self.testBCFName = "Issues-Example.bcf"
+        self.dstFile = os.path.join(os.path.dirname(util.getSystemTmp()),
+                "saved_test.bcf")
+
+
+    def tearDown(self):
+
+        if os.path.exists(self.dstFile):
+            os.remove(self.dstFile)
+
+
+    def test_compressionPolicy(self):
+
+        """ Tests whether XML files are deflated and images are stored """
+
+        import zipfile
+        srcFile = os.path.join(self.testFileDir, self.testBCFName)
+        p = reader.readBcfFile(srcFile)
+        writer.zipToBcfFile(util.getBcfDir(), self.dstFile)
+
+        with zipfile.ZipFile(self.dstFile) as dstZip:
+            self.assertTrue(dstZip.testzip() is None)
+            for info in dstZip.infolist():
+                if info.is_dir():
+                    continue
+                if info.filename.endswith(".png"):
+                    expected = zipfile.ZIP_STORED
+                else:
+                    expected = zipfile.ZIP_DEFLATED
+                self.assertTrue(info.compress_type == expected,
+                        "{} has compression type {}".format(info.filename,
+                            info.compress_type))
+
+
+    def test_unchangedMembersCopied(self):
+
+        """ Tests whether members not touched since the last save are taken
+        over without being written anew. """
+
+        import zipfile
+        srcFile = os.path.join(self.testFileDir, self.testBCFName)
+        p = reader.readBcfFile(srcFile)
+        # the level differs between both saves, so only copied members are
+        # equal
+        writer.zipToBcfFile(util.getBcfDir(), self.dstFile, 9)
+        with zipfile.ZipFile(self.dstFile) as dstZip:
+            firstInfos = dstZip.infolist()
+        writer.zipToBcfFile(util.getBcfDir(), self.dstFile, 1)
+
+        with zipfile.ZipFile(self.dstFile) as dstZip:
+            self.assertTrue(dstZip.testzip() is None)
+            for info in firstInfos:
+                dstInfo = dstZip.getinfo(info.filename)
+                self.assertTrue(dstInfo.compress_size == info.compress_size
+                        and dstInfo.CRC == info.CRC,
+                        "{} was written anew".format(info.filename))
+
+
+    def test_serializeRoundTrip(self):
+
+        """ Tests whether a project saved with only the source archive at hand
+        reads back the same, viewpoints, cameras and visibilities included """
+
+        import zipfile
+        srcFile = os.path.join(self.testFileDir, self.testBCFName)
+        p = reader.readBcfFile(srcFile)
+        p.topicList[0].topic.title = "serialized title"
+        vp = p.topicList[0].viewpoints[0].viewpoint
+        vp.lines = [ tdv.Line(tdv.Point(0.0, 0.0, 0.0),
+            tdv.Point(1.0, 2.0, 3.0)) ]
+        vp.clippingPlanes = [ tdv.ClippingPlane(tdv.Point(1.5, 1.5, 1.0),
+            tdv.Direction(0.0, 0.0, 1.0)) ]
+        writer.serializeToBcfFile(p, self.dstFile, srcFile)
+
+        with zipfile.ZipFile(srcFile) as srcZip:
+            with zipfile.ZipFile(self.dstFile) as dstZip:
+                self.assertTrue(dstZip.testzip() is None)
+                self.assertTrue(sorted(srcZip.namelist()) ==
+                        sorted(dstZip.namelist()))
+
+        newP = reader.readBcfFile(self.dstFile)
+        self.assertTrue(newP.topicList[0].topic.title == "serialized title")
+        self.assertTrue(len(newP.topicList) == len(p.topicList))
+        for (markup, newMarkup) in zip(p.topicList, newP.topicList):
+            self.assertTrue(len(markup.viewpoints) > 0)
+            self.assertTrue(len(newMarkup.viewpoints) ==
+                    len(markup.viewpoints))
+            for (vpRef, newVpRef) in zip(markup.viewpoints,
+                    newMarkup.viewpoints):
+                vp = vpRef.viewpoint
+                newVp = newVpRef.viewpoint
+                self.assertTrue(newVp is not None)
+                self.assertTrue(newVp.pCamera == vp.pCamera)
+                self.assertTrue(newVp.oCamera == vp.oCamera)
+                self.assertTrue(newVp.lines == vp.lines)
+                self.assertTrue(newVp.clippingPlanes == vp.clippingPlanes)
+                self.assertTrue(newVp.components.visibilityDefault ==
+                        vp.components.visibilityDefault)
+                self.assertTrue(newVp.components.visibilityExceptions ==
+                        vp.components.visibilityExceptions)
+                self.assertTrue(newVp == vp)
+
+
 if __name__ == "__main__":
     unittest.main()
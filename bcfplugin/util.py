@@ -23,14 +23,15 @@ Github: @podestplatz
 
 **** Description ****
 util provides the plugin with some miscellaneous functions that are needed in
-multiple places. Its main purpose, however is to store the paths of the
-temporary directory, the directory into which the current project was being
-extracted to, the file that serves as log file and the file in which the E-Mail
-of the author is stored.
+multiple places. Its main purpose, however is to keep the state of the session
+(see `SessionContext`): the paths of the temporary directory and of the
+directory into which the current project was being extracted to, and the E-Mail
+of the author.
 """
 
 import os
 import sys
+import stat
 import urllib.request
 import tempfile
 import shutil
@@ -38,8 +39,6 @@ import logging
 from enum import Enum
 from urllib.error import URLError
 
-from PySide2.QtWidgets import QMessageBox, QApplication
-
 PREFIX = "bcfplugin_"
 """ Prefix for every created folder and file. """
 
@@ -52,13 +51,6 @@ logInitialized = False
 MMPI = 25.4
 """ Millimeters per inch """
 
-AUTHOR_FILE = "author.txt"
-""" Name of the authors file, in which the email address will be stored once per
-session """
-
-DIRTY_FILE = "{}dirty.txt".format(PREFIX)
-""" Name of the file containing the dirty bit """
-
 """ Specifies the name of the directory in which the schema files are stored """
 schemaDir = "schemas"
 
@@ -67,7 +59,8 @@ schemaPaths = {} # during runtime this will be a map like __schemaUrls
 
 tmpFilePathsFileName = "{}tmp.txt".format(PREFIX)
 """ Holds the path to the file that contains just the path to the created
-temporary directory """
+temporary directory. The file is kept in the state directory of the user, see
+`getUserStateDir()`. """
 
 
 class Schema(Enum):
@@ -126,6 +119,60 @@ def getTmpFilePath(filename: str):
     return filepath
 
 
+def isPrivateDir(path: str):
+
+    """ Returns whether `path` is a directory, not a symbolic link to one,
+    owned by the current user that no one else can write to.
+
+    On platforms without the notion of file owners only the former is checked.
+    """
+
+    try:
+        dirStat = os.lstat(path)
+    except OSError:
+        return False
+
+    if not stat.S_ISDIR(dirStat.st_mode):
+        return False
+    if hasattr(os, "getuid"):
+        if dirStat.st_uid != os.getuid():
+            return False
+        if dirStat.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            return False
+
+    return True
+
+
+def getUserStateDir():
+
+    """ Returns the directory holding the state of the plugin that has to
+    outlast a session, e.g. the journals (see `rdwr.journal`).
+
+    The directory is "bcfplugin" inside the state directory of the user, which
+    depends on the platform. It is created, accessible by the user only, if it
+    does not exist. A PermissionError is raised if it is not private to the
+    user (see `isPrivateDir()`), since its contents are trusted.
+    """
+
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA",
+                os.path.join(os.path.expanduser("~"), "AppData", "Local"))
+    elif sys.platform == "darwin":
+        base = os.path.join(os.path.expanduser("~"), "Library",
+                "Application Support")
+    else:
+        base = (os.environ.get("XDG_STATE_HOME") or
+                os.path.join(os.path.expanduser("~"), ".local", "state"))
+
+    stateDir = os.path.join(base, "bcfplugin")
+    os.makedirs(stateDir, mode=0o700, exist_ok=True)
+    if not isPrivateDir(stateDir):
+        raise PermissionError("{} is not private to the current user. Its"\
+                " contents are not trusted.".format(stateDir))
+
+    return stateDir
+
+
 def appendLineBreak(line: str):
 
     """ Appends to `line` a linebreak character if none is present at the end.
@@ -169,11 +216,7 @@ def storeTmpPath(tmpPath):
     """ Wrapper for `storeLine()` which stores `tmpPath` in line 1 of the
     temporary paths file. """
 
-    global tmpFilePathsFileName
-
-    # get platform specific temporary directory
-    fpath = getTmpFilePath(tmpFilePathsFileName)
-
+    fpath = os.path.join(getUserStateDir(), tmpFilePathsFileName)
     storeLine(fpath, tmpPath, 1)
 
 
@@ -194,53 +237,244 @@ def readLine(file, lineno):
     return line
 
 
-def getSystemTmp(createNew: bool = False):
+class SessionContext(object):
 
-    """ Creates a temporary directory on first call or if `createNew` is set.
+    """ Holds the state of one session of the plugin in memory.
 
-    On subsequent calls the temp dir that was created latest is returned
+    This comprises the temporary directory, the working directory the current
+    project was extracted to, the BCF file it corresponds to along with the
+    stats of its files (see `getFileStats()`), and the E-Mail of the author.
+    If `persistent` is set, the path of the temporary directory is persisted
+    in the temporary paths file, inside the state directory of the user (see
+    `getUserStateDir()`). Thereby a session started after a crash takes over
+    the temporary directory of the previous one. Other contexts get a
+    temporary directory of their own, so that several projects can be open at
+    the same time.
+
+    The reader, the writer and the programmaticInterface take the context
+    they work in as argument, the module level functions below operate on
+    `session`.
     """
 
-    global tmpFilePathsFileName
-    global PREFIX
+    __slots__ = ("persistent", "tmpDir", "bcfDir", "sourceArchive",
+            "fileStats", "author")
 
-    tmpDir = ""
-    fpath = getTmpFilePath(tmpFilePathsFileName)
-    if not os.path.exists(fpath):
-        tmpDir = tempfile.mkdtemp(prefix=PREFIX)
-        storeLine(fpath, tmpDir, 1)
+    def __init__(self, persistent: bool = False):
 
-    else:
-        tmpDir = readLine(fpath, 1)
+        self.persistent = persistent
+        self.clear()
 
-    return tmpDir
 
+    def clear(self):
 
-def setBcfDir(dir):
+        """ Forget all state, e.g. after the temporary directory was deleted """
+
+        self.tmpDir = None
+        self.bcfDir = None
+        self.sourceArchive = None
+        self.fileStats = dict()
+        self.author = None
+
+
+    def getSystemTmp(self, createNew: bool = False):
+
+        """ Creates a temporary directory on first call or if `createNew` is
+        set.
+
+        On subsequent calls the temp dir that was created latest is returned.
+        On the first call a persistent context takes over the directory
+        recorded in the temporary paths file, if it still exists and is
+        private to the user (see `isPrivateDir()`). If the state directory of
+        the user cannot be used, the directory is not persisted.
+        """
+
+        if self.tmpDir is not None and not createNew:
+            return self.tmpDir
+
+        if not self.persistent:
+            self.tmpDir = tempfile.mkdtemp(prefix=PREFIX)
+            return self.tmpDir
+
+        try:
+            fpath = os.path.join(getUserStateDir(), tmpFilePathsFileName)
+        except OSError as exc:
+            logging.getLogger(__name__).warning("The temporary directory is"\
+                    " not persisted: {}".format(exc))
+            self.tmpDir = tempfile.mkdtemp(prefix=PREFIX)
+            return self.tmpDir
+
+        if not createNew and os.path.exists(fpath):
+            tmpDir = readLine(fpath, 1)
+            if tmpDir and isPrivateDir(tmpDir):
+                self.tmpDir = tmpDir
+                return self.tmpDir
+
+        self.tmpDir = tempfile.mkdtemp(prefix=PREFIX)
+        storeLine(fpath, self.tmpDir, 1)
+        return self.tmpDir
+
+
+    def deleteTmp(self):
+
+        """ Delete the temporary directory of this context with all its
+        contents and forget all state """
+
+        if self.tmpDir is not None:
+            shutil.rmtree(self.tmpDir, ignore_errors=True)
+        self.clear()
+
+
+    def setBcfDir(self, dir):
+
+        """ Set the directory the BCF file got extracted to """
+
+        self.bcfDir = dir
+
+
+    def getBcfDir(self):
+
+        """ Returns the directory in which the BCF file got extracted to """
+
+        return self.bcfDir
+
+
+    def setSourceArchive(self, archive):
+
+        """ Set the path of the BCF file the working directory was extracted
+        from (or saved to last).
+
+        An empty string indicates that there is no such file, like for newly
+        created projects.
+        """
+
+        self.sourceArchive = archive
+
+
+    def getSourceArchive(self):
+
+        """ Returns the path of the BCF file the working directory corresponds
+        to.
+
+        `None` is returned if no such file is set, or it does not exist
+        anymore.
+        """
+
+        archive = self.sourceArchive
+        if archive is None or archive == "" or not os.path.isfile(archive):
+            return None
+
+        return archive
+
+
+    def storeFileStats(self, stats):
+
+        """ Keep `stats`, as returned by `getFileStats()` """
+
+        self.fileStats = stats
+
+
+    def readFileStats(self):
 
-    """ Wrapper for `storeLine()` storing `dir` in the second line of the
-    temporary file paths file. """
+        """ Returns the stats kept by `storeFileStats()` """
 
-    global tmpFilePathsFileName
+        return self.fileStats
 
-    fpath = getTmpFilePath(tmpFilePathsFileName)
-    # fpath is assumed to already exist when this function is called the first
-    # time
 
-    storeLine(fpath, dir, 2)
+    def isAuthorSet(self):
+
+        """ Checks whether the E-Mail of the author was set in this session.
+
+        It is used as value for the "ModifiedAuthor" fields in the data model.
+        """
+
+        return self.author is not None
+
+
+    def setAuthor(self, author: str):
+
+        """ Set the E-Mail of the author for the rest of the session """
+
+        self.author = author
+
+
+    def getAuthor(self):
+
+        """ Returns the E-Mail of the author, or `None` if it is not set """
+
+        return self.author
+
+
+session = SessionContext(True)
+""" Context of the session the plugin runs in. """
+
+
+def getSystemTmp(createNew: bool = False):
+
+    """ Wrapper for `session.getSystemTmp()` """
+
+    return session.getSystemTmp(createNew)
+
+
+def setBcfDir(dir):
+
+    """ Wrapper for `session.setBcfDir()` """
+
+    session.setBcfDir(dir)
 
 
 def getBcfDir():
 
-    """ Wrapper for `readLine()`, returning the directory in which the BCF file
-    got extracted to. """
+    """ Wrapper for `session.getBcfDir()` """
+
+    return session.getBcfDir()
+
+
+def setSourceArchive(archive):
+
+    """ Wrapper for `session.setSourceArchive()` """
+
+    session.setSourceArchive(archive)
+
+
+def getSourceArchive():
+
+    """ Wrapper for `session.getSourceArchive()` """
+
+    return session.getSourceArchive()
+
+
+def getFileStats(rootDir: str):
+
+    """ Returns the modification time and size of every file beneath `rootDir`.
 
-    global tmpFilePathsFileName
+    The stats are returned as dictionary mapping the path relative to
+    `rootDir` (with "/" as separator) to a tuple of the modification time in
+    nanoseconds and the size.
+    """
+
+    stats = dict()
+    for (root, dirs, files) in os.walk(rootDir):
+        for file in files:
+            absPath = os.path.join(root, file)
+            relPath = os.path.relpath(absPath, rootDir).replace(os.sep, "/")
+            stat = os.stat(absPath)
+            stats[relPath] = (stat.st_mtime_ns, stat.st_size)
+
+    return stats
+
+
+def storeFileStats(stats):
+
+    """ Wrapper for `session.storeFileStats()` """
+
+    session.storeFileStats(stats)
+
+
+def readFileStats():
 
-    fpath = getTmpFilePath(tmpFilePathsFileName)
-    bcfDir = readLine(fpath, 2)
+    """ Wrapper for `session.readFileStats()` """
 
-    return bcfDir
+    return session.readFileStats()
 
 
 def deleteTmp():
@@ -249,6 +483,7 @@ def deleteTmp():
 
     global PREFIX
 
+    session.clear()
     sysTmp = tempfile.gettempdir()
     for fname in os.listdir(sysTmp):
         if fname.startswith(PREFIX):
@@ -277,50 +512,23 @@ def getCurrentQScreen():
 
 def isAuthorSet():
 
-    """ Checks for author.txt file in temp directory.
+    """ Wrapper for `session.isAuthorSet()` """
 
-    author.txt will be filled once per session with the email address of the
-    author. It is then used as value for the "ModifiedAuthor" fields in the data
-    model.
-    """
-
-    authorsPath = os.path.join(getSystemTmp(), AUTHOR_FILE)
-    if os.path.exists(authorsPath):
-        return True
-    return False
+    return session.isAuthorSet()
 
 
 def setAuthor(author: str):
 
-    """ Creates the authors file in the temporary directory with `author` as
-    content.
+    """ Wrapper for `session.setAuthor()` """
 
-    If the file already exists, then the file is just overwritten.
-    """
-
-    authorsPath = os.path.join(getSystemTmp(), AUTHOR_FILE)
-    with open(authorsPath, "w") as f:
-        f.write(author)
+    session.setAuthor(author)
 
 
 def getAuthor():
 
-    """ Reads the contents of AUTHORS_FILE and returns its contents.
-
-    If the file does not exist `None` is returned. This function assumes that
-    the file only contains one line, without a line break, containing the
-    author's email.
-    """
-
-    authorsPath = os.path.join(getSystemTmp(), AUTHOR_FILE)
-    if not os.path.exists(authorsPath):
-        return None
-
-    author = ""
-    with open(authorsPath, "r") as f:
-        author = f.read()
+    """ Wrapper for `session.getAuthor()` """
 
-    return author
+    return session.getAuthor()
 
 
 def retrieveWebFile(schema: Schema, storePath: str):
@@ -472,45 +680,6 @@ def doesFileExistInProject(file: str):
     return os.path.exists(fileAbsPath)
 
 
-def setDirty(bit: bool):
-
-    """ Sets the dirty bit in the `DIRTY_FILE` """
-
-    global DIRTY_FILE
-
-    filepath = getTmpFilePath(DIRTY_FILE)
-
-    with open(filepath, "w") as f:
-        if bit:
-            f.write("True")
-        else:
-            f.write("False")
-
-
-def getDirtyBit():
-
-    """ Returns the dirty bit as stored in the `DIRTY_FILE`.
-
-    Per default `False` is returned indicating that the current state is not
-    dirty.
-    """
-
-    global DIRTY_FILE
-
-    filepath = getTmpFilePath(DIRTY_FILE)
-    if not os.path.exists(filepath):
-        return False
-
-    bit = False
-    with open(filepath, "r") as f:
-        content = f.read()
-        if content == "True":
-            bit = True
-        else:
-            bit = False
-    return bit
-
-
 def loggingReady():
 
     """ Returns `True` or `False` whether the log file is created or not. """